@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import argparse
+from dataclasses import asdict
+
+from src.engine.allowlists import SuppressionEngine
+from src.engine.evidence import EvidenceIndex
+from src.engine.incremental import DETECTION_SPECS
+from src.engine.maintenance import MaintenanceCalendar
+from src.engine.replay import replay_archive
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay an NDJSON event archive through the predictive detections.")
+    parser.add_argument("--archive", required=True, help="Path to time-ordered NDJSON archive (.ndjson or .ndjson.gz)")
+    parser.add_argument(
+        "--detection",
+        action="append",
+        default=None,
+        help=f"Detection id to replay (repeatable). Default: all of {', '.join(DETECTION_SPECS)}",
+    )
+    parser.add_argument("--baseline-days", type=int, default=30, help="Rolling baseline window in days (default: 30)")
+    parser.add_argument("--no-true-novelty", action="store_true", help="Use the 0401 novelty proxy instead of set-diff")
+    parser.add_argument("--suppression", default=None, help="Suppression/allowlist rules YAML (optional)")
+    parser.add_argument("--maintenance", default=None, help="Maintenance window calendar YAML (optional)")
+    parser.add_argument("--show-signals", action="store_true", help="Print every replayed signal")
+    parser.add_argument("--top-k", type=int, default=0, help="Attach top-K evidence items to each signal (default: off)")
+    parser.add_argument("--evidence-index", default=None, help="Write a raw-event evidence index (JSON) for signal drilldown")
+    args = parser.parse_args()
+
+    evidence = EvidenceIndex(args.archive) if args.evidence_index else None
+    report = replay_archive(
+        args.archive,
+        args.detection,
+        baseline_days=args.baseline_days,
+        true_novelty=not args.no_true_novelty,
+        suppression=SuppressionEngine(args.suppression) if args.suppression else None,
+        maintenance=MaintenanceCalendar(args.maintenance) if args.maintenance else None,
+        top_k=args.top_k,
+        evidence=evidence,
+    )
+
+    print("\n=== Replay ===\n")
+    print(f"Events replayed: {report.events_replayed} | Late (dropped): {report.late_events}")
+    print(f"Suppressed (per detection): {report.suppressed_events}")
+    for rule_id, n in report.suppression_hits.items():
+        print(f"  - {rule_id}: {n}")
+    print(f"Entity buckets inside maintenance windows: {report.maintenance_buckets}")
+    print(f"Wall time: {report.wall_seconds:.2f}s")
+
+    print("\n=== Evaluation points / signals ===\n")
+    counts = report.signal_counts()
+    for d in report.detections:
+        print(f"  {d}: buckets={report.buckets_evaluated.get(d, 0)} signals={counts.get(d, 0)}")
+
+    print("\n=== Stage timings ===\n")
+    for stage, t in report.timings.items():
+        print(f"  {stage:<10} {t['seconds']:>10.3f}s  calls={int(t['calls'])}")
+
+    if evidence is not None:
+        evidence.save(args.evidence_index)
+        print(f"\nEvidence index: {len(evidence)} signal buckets -> {args.evidence_index}")
+
+    if args.show_signals:
+        print("\n=== Signals ===\n")
+        for h in report.hits:
+            print(h.bucket_start, h.detection_id, asdict(h.signal))
+
+
+if __name__ == "__main__":
+    main()
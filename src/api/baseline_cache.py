@@ -0,0 +1,400 @@
+"""
+Server-side cache of computed baseline stats.
+
+Clients upload a detection's 30-day baseline once and get back a content
+hash. Evaluate calls then pass `baseline_id` instead of resending the
+baseline rows, and the server reuses the stats it already computed.
+
+Entries are evicted least-recently-used once either the entry count or the
+estimated memory footprint exceeds its cap, except those an alias points
+at. Evicted ids simply miss; the client re-uploads.
+
+An alias names the current baseline for a detection (e.g. "corp-0402").
+Uploading with ?alias= moves the alias to the new baseline_id and bumps
+its generation; evaluate calls may pass the alias as baseline_id and
+always get whichever generation is current when they are dispatched.
+
+By default the cache lives in the API process, so under
+`uvicorn --workers N` every worker holds its own copy. With
+PDE_BASELINE_SHARED_DIR set (point it at tmpfs, e.g.
+/dev/shm/pde-baselines), SharedBaselineStore is used instead: baselines
+are written once as memory-mapped tables (src/baselines/shared.py) that all
+API and evaluation workers read without copying, and aliases are files
+swapped atomically with os.replace.
+
+Configuration (environment):
+  PDE_BASELINE_CACHE_MAX_BYTES    memory cap, estimated (default: 256 MiB);
+                                  with a shared dir, the cap on table files
+  PDE_BASELINE_CACHE_MAX_ENTRIES  entry cap (default: 1024)
+  PDE_BASELINE_SHARED_DIR         directory for shared tables (default: unset)
+"""
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, fields, is_dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, Mapping, Optional, Union
+
+from src.baselines.shared import forget_table, open_table, write_table
+
+
+@dataclass(frozen=True)
+class CachedBaseline:
+    baseline_id: str
+    detection: str
+    stats: Mapping[str, Any]
+    nbytes: int
+
+
+@dataclass(frozen=True)
+class BaselineAlias:
+    alias: str
+    baseline_id: str
+    detection: str
+    generation: int
+
+
+def baseline_id_for(detection: str, body: bytes) -> str:
+    """
+    Content hash of an uploaded baseline body, namespaced by detection.
+    """
+    h = hashlib.sha256()
+    h.update(detection.encode("utf-8"))
+    h.update(b"\0")
+    h.update(body)
+    return h.hexdigest()
+
+
+_BASELINE_ID = re.compile(r"^[0-9a-f]{64}$")
+_ALIAS = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]{0,127}$")
+
+
+def check_alias(alias: str) -> str:
+    if _BASELINE_ID.match(alias) or not _ALIAS.match(alias):
+        raise ValueError(f"Invalid alias {alias!r}: use 1-128 of [A-Za-z0-9_.-], not a baseline id")
+    return alias
+
+
+def estimate_nbytes(stats: Dict[str, Any]) -> int:
+    """
+    Rough in-memory size of a {entity: stats dataclass} mapping.
+    """
+    total = sys.getsizeof(stats)
+    for k, v in stats.items():
+        total += sys.getsizeof(k) + sys.getsizeof(v)
+        if is_dataclass(v):
+            total += sum(sys.getsizeof(getattr(v, f.name)) for f in fields(v))
+    return total
+
+
+class BaselineCache:
+    """
+    Thread-safe LRU of CachedBaseline by id, bounded by entries and bytes.
+    Ids an alias points at are never evicted (they may hold the cache over
+    its caps until the alias moves on).
+    """
+
+    def __init__(self, *, max_bytes: int = 256 * 1024 * 1024, max_entries: int = 1024) -> None:
+        self.max_bytes = int(max_bytes)
+        self.max_entries = int(max_entries)
+        self._entries: "OrderedDict[str, CachedBaseline]" = OrderedDict()
+        self._aliases: Dict[str, BaselineAlias] = {}
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls) -> "BaselineCache":
+        return cls(
+            max_bytes=int(os.environ.get("PDE_BASELINE_CACHE_MAX_BYTES") or 256 * 1024 * 1024),
+            max_entries=int(os.environ.get("PDE_BASELINE_CACHE_MAX_ENTRIES") or 1024),
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, baseline_id: str) -> bool:
+        return baseline_id in self._entries
+
+    def get(self, baseline_id: str) -> Optional[CachedBaseline]:
+        with self._lock:
+            entry = self._entries.get(baseline_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(baseline_id)
+            self.hits += 1
+            return entry
+
+    def put(self, baseline_id: str, detection: str, stats: Dict[str, Any]) -> CachedBaseline:
+        entry = CachedBaseline(baseline_id=baseline_id, detection=detection, stats=stats, nbytes=estimate_nbytes(stats))
+        if entry.nbytes > self.max_bytes:
+            raise ValueError(f"Baseline of ~{entry.nbytes} bytes exceeds the cache cap of {self.max_bytes} bytes")
+        with self._lock:
+            old = self._entries.pop(baseline_id, None)
+            if old is not None:
+                self.nbytes -= old.nbytes
+            self._entries[baseline_id] = entry
+            self.nbytes += entry.nbytes
+            pinned = {a.baseline_id for a in self._aliases.values()}
+            while self.nbytes > self.max_bytes or len(self._entries) > self.max_entries:
+                victim = next((k for k in self._entries if k not in pinned and k != baseline_id), None)
+                if victim is None:
+                    break
+                evicted = self._entries.pop(victim)
+                self.nbytes -= evicted.nbytes
+                self.evictions += 1
+        return entry
+
+    def delete(self, baseline_id: str) -> bool:
+        with self._lock:
+            entry = self._entries.pop(baseline_id, None)
+            if entry is None:
+                return False
+            self.nbytes -= entry.nbytes
+            return True
+
+    def set_alias(self, alias: str, entry: CachedBaseline) -> BaselineAlias:
+        check_alias(alias)
+        with self._lock:
+            old = self._aliases.get(alias)
+            new = BaselineAlias(alias, entry.baseline_id, entry.detection, (old.generation if old else 0) + 1)
+            self._aliases[alias] = new
+        return new
+
+    def alias(self, alias: str) -> Optional[BaselineAlias]:
+        return self._aliases.get(alias)
+
+    def lookup(self, ref: str) -> Optional[CachedBaseline]:
+        """
+        Entry for a baseline_id or an alias.
+        """
+        alias = self._aliases.get(ref)
+        return self.get(alias.baseline_id if alias is not None else ref)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.nbytes,
+            "max_bytes": self.max_bytes,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits / lookups) if lookups else None,
+            "evictions": self.evictions,
+            "aliases": len(self._aliases),
+        }
+
+
+class SharedBaselineStore:
+    """
+    BaselineCache counterpart whose entries are table files in a directory
+    shared by every worker process.
+
+    <dir>/<baseline_id>.pdeb   one table per baseline (immutable)
+    <dir>/<alias>.alias        {"baseline_id", "detection", "generation"}
+
+    Tables are content-addressed, so two workers uploading the same
+    baseline write the same bytes and the later os.replace is harmless.
+    Alias updates hold an flock so generations stay monotonic across
+    processes. Eviction removes the least recently used tables (by mtime,
+    touched on every hit), never one an alias points at. Processes that
+    still map an evicted table keep reading it until they drop it; new
+    lookups miss.
+
+    Hit/miss counters are per process; entry and byte counts are read from
+    the directory.
+    """
+
+    SUFFIX = ".pdeb"
+    ALIAS_SUFFIX = ".alias"
+
+    def __init__(self, directory: Union[str, Path], *, max_bytes: int = 256 * 1024 * 1024, max_entries: int = 1024) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int(max_bytes)
+        self.max_entries = int(max_entries)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls) -> "SharedBaselineStore":
+        return cls(
+            os.environ["PDE_BASELINE_SHARED_DIR"],
+            max_bytes=int(os.environ.get("PDE_BASELINE_CACHE_MAX_BYTES") or 256 * 1024 * 1024),
+            max_entries=int(os.environ.get("PDE_BASELINE_CACHE_MAX_ENTRIES") or 1024),
+        )
+
+    def _path(self, baseline_id: str) -> Path:
+        if not _BASELINE_ID.match(baseline_id):
+            # Never let a client-supplied id escape the directory
+            return self.directory / "invalid"
+        return self.directory / (baseline_id + self.SUFFIX)
+
+    def _tables(self) -> Iterator[os.DirEntry]:
+        with os.scandir(self.directory) as it:
+            for e in it:
+                if e.name.endswith(self.SUFFIX) and not e.name.startswith("."):
+                    yield e
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self._tables())
+
+    def __contains__(self, baseline_id: str) -> bool:
+        return self._path(baseline_id).exists()
+
+    def get(self, baseline_id: str) -> Optional[CachedBaseline]:
+        path = self._path(baseline_id)
+        try:
+            # Marks the table recently used, and fails if it was evicted
+            os.utime(path)
+            # Another worker may evict it before we map it
+            table = open_table(path)
+        except FileNotFoundError:
+            forget_table(path)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return CachedBaseline(baseline_id=baseline_id, detection=table.detection, stats=table, nbytes=table.nbytes)
+
+    def put(self, baseline_id: str, detection: str, stats: Dict[str, Any]) -> CachedBaseline:
+        path = self._path(baseline_id)
+        nbytes = write_table(path, detection, stats)
+        if nbytes > self.max_bytes:
+            path.unlink(missing_ok=True)
+            raise ValueError(f"Baseline table of {nbytes} bytes exceeds the cache cap of {self.max_bytes} bytes")
+        self._evict(keep=path.name)
+        try:
+            table = open_table(path)
+        except FileNotFoundError:
+            # Evicted by another worker already; this request can still use the stats it built
+            return CachedBaseline(baseline_id=baseline_id, detection=detection, stats=stats, nbytes=nbytes)
+        return CachedBaseline(baseline_id=baseline_id, detection=detection, stats=table, nbytes=nbytes)
+
+    def _evict(self, *, keep: str) -> None:
+        pinned = {a.baseline_id + self.SUFFIX for a in self._read_aliases()}
+        tables = []
+        for e in self._tables():
+            try:
+                st = e.stat()
+            except FileNotFoundError:
+                continue
+            tables.append((st.st_mtime, e.name, st.st_size))
+        total = sum(size for _, _, size in tables)
+        count = len(tables)
+        for _, name, size in sorted(tables):
+            if total <= self.max_bytes and count <= self.max_entries:
+                break
+            if name == keep or name in pinned:
+                continue
+            try:
+                (self.directory / name).unlink()
+            except FileNotFoundError:
+                pass
+            forget_table(self.directory / name)
+            total -= size
+            count -= 1
+            self.evictions += 1
+
+    def delete(self, baseline_id: str) -> bool:
+        path = self._path(baseline_id)
+        forget_table(path)
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            return False
+        return True
+
+    # ------------------------
+    # Aliases
+    # ------------------------
+
+    @contextmanager
+    def _alias_lock(self) -> Iterator[None]:
+        with open(self.directory / ".alias.lock", "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _read_alias(self, path: Path) -> Optional[BaselineAlias]:
+        try:
+            doc = json.loads(path.read_bytes())
+        except FileNotFoundError:
+            return None
+        return BaselineAlias(path.name[: -len(self.ALIAS_SUFFIX)], doc["baseline_id"], doc["detection"], int(doc["generation"]))
+
+    def _read_aliases(self) -> Iterator[BaselineAlias]:
+        for path in self.directory.glob("*" + self.ALIAS_SUFFIX):
+            alias = self._read_alias(path)
+            if alias is not None:
+                yield alias
+
+    def set_alias(self, alias: str, entry: CachedBaseline) -> BaselineAlias:
+        path = self.directory / (check_alias(alias) + self.ALIAS_SUFFIX)
+        with self._alias_lock():
+            old = self._read_alias(path)
+            new = BaselineAlias(alias, entry.baseline_id, entry.detection, (old.generation if old else 0) + 1)
+            fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".tmp-", suffix=self.ALIAS_SUFFIX)
+            with os.fdopen(fd, "w") as f:
+                json.dump({"baseline_id": new.baseline_id, "detection": new.detection, "generation": new.generation}, f)
+            os.replace(tmp, path)
+        return new
+
+    def alias(self, alias: str) -> Optional[BaselineAlias]:
+        if not _ALIAS.match(alias):
+            return None
+        return self._read_alias(self.directory / (alias + self.ALIAS_SUFFIX))
+
+    def lookup(self, ref: str) -> Optional[CachedBaseline]:
+        """
+        Entry for a baseline_id or an alias.
+        """
+        alias = None if _BASELINE_ID.match(ref) else self.alias(ref)
+        return self.get(alias.baseline_id if alias is not None else ref)
+
+    def stats(self) -> dict:
+        entries = 0
+        nbytes = 0
+        for e in self._tables():
+            try:
+                nbytes += e.stat().st_size
+            except FileNotFoundError:
+                continue
+            entries += 1
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "bytes": nbytes,
+            "max_bytes": self.max_bytes,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits / lookups) if lookups else None,
+            "evictions": self.evictions,
+            "aliases": sum(1 for _ in self._read_aliases()),
+            "shared_dir": str(self.directory),
+        }
+
+
+def baseline_cache_from_env() -> Union[BaselineCache, SharedBaselineStore]:
+    if os.environ.get("PDE_BASELINE_SHARED_DIR"):
+        return SharedBaselineStore.from_env()
+    return BaselineCache.from_env()
+
+
+baseline_cache = baseline_cache_from_env()
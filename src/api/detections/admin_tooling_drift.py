@@ -0,0 +1,57 @@
+"""
+Admin tooling drift (PDE-SPL-0405).
+
+Runner and baseline builder, imported on first use through
+src/api/registry.py.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, Mapping, Optional
+
+from src.api.columnar import group_column
+from src.api.detections.common import count_payload, observation_rows
+from src.api.metrics import gate_counts, stage
+from src.api.responses import signal_dict
+from src.engine.evaluator_admin_tooling import (
+    AdminToolingBaselineStats,
+    admin_tooling_baseline_stats_from_values,
+    compute_admin_tooling_baseline_stats,
+    evaluate_pde_spl_0405,
+)
+from src.features.admin_tooling_drift import (
+    AdminToolingBucketFeatures,
+    compute_growth_hits as admin_tooling_growth_hits,
+)
+
+if TYPE_CHECKING:
+    from src.api.routes import Eval0405Request
+
+
+def baseline_0405(req: Eval0405Request) -> Dict[str, AdminToolingBaselineStats]:
+    if req.baseline_columns is not None:
+        return admin_tooling_baseline_stats_from_values(group_column(req.baseline_columns, AdminToolingBucketFeatures, "host", "admin_tool_events_per_host"))
+    return compute_admin_tooling_baseline_stats(req.baseline)
+
+
+def run_0405(req: Eval0405Request, baselines: Optional[Mapping[str, AdminToolingBaselineStats]] = None) -> dict:
+    count_payload(req)
+    with stage("baseline"):
+        if baselines is None:
+            baselines = baseline_0405(req)
+    with stage("validation"):
+        observation = observation_rows(req, AdminToolingBucketFeatures)
+    with stage("growth"):
+        growth = admin_tooling_growth_hits(observation, sustained_buckets=req.sustained_buckets)
+    with stage("evaluate"):
+        signals = evaluate_pde_spl_0405(
+            observation,
+            baselines,
+            drift_ratio_threshold=req.drift_ratio_threshold,
+            sustained_buckets=req.sustained_buckets,
+            min_unique_tools=req.min_unique_tools,
+            expected_baseline_buckets=req.expected_baseline_buckets,
+            min_baseline_buckets=req.min_baseline_buckets,
+            growth_hits_map=growth,
+            gate_counts=gate_counts(),
+        )
+        return {"count": len(signals), "signals": [signal_dict(s) for s in signals]}
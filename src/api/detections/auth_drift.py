@@ -0,0 +1,54 @@
+"""
+Password spray drift (PDE-SPL-0402).
+
+Runner and baseline builder, imported on first use through
+src/api/registry.py.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, Mapping, Optional
+
+from src.api.columnar import group_column
+from src.api.detections.common import count_payload, observation_rows
+from src.api.metrics import gate_counts, stage
+from src.api.responses import signal_dict
+from src.engine.evaluator_auth import (
+    AuthBaselineStats,
+    auth_baseline_stats_from_values,
+    compute_auth_baseline_stats,
+    evaluate_pde_spl_0402,
+)
+from src.features.auth_drift import AuthBucketFeatures, compute_growth_hits as auth_growth_hits
+
+if TYPE_CHECKING:
+    from src.api.routes import Eval0402Request
+
+
+def baseline_0402(req: Eval0402Request) -> Dict[str, AuthBaselineStats]:
+    if req.baseline_columns is not None:
+        return auth_baseline_stats_from_values(group_column(req.baseline_columns, AuthBucketFeatures, "src_ip", "auth_failures_per_src"))
+    return compute_auth_baseline_stats(req.baseline)
+
+
+def run_0402(req: Eval0402Request, baselines: Optional[Mapping[str, AuthBaselineStats]] = None) -> dict:
+    count_payload(req)
+    with stage("baseline"):
+        if baselines is None:
+            baselines = baseline_0402(req)
+    with stage("validation"):
+        observation = observation_rows(req, AuthBucketFeatures)
+    with stage("growth"):
+        growth = auth_growth_hits(observation, sustained_buckets=req.sustained_buckets)
+    with stage("evaluate"):
+        signals = evaluate_pde_spl_0402(
+            observation,
+            baselines,
+            drift_ratio_threshold=req.drift_ratio_threshold,
+            sustained_buckets=req.sustained_buckets,
+            min_users=req.min_users,
+            expected_baseline_buckets=req.expected_baseline_buckets,
+            min_baseline_buckets=req.min_baseline_buckets,
+            growth_hits_map=growth,
+            gate_counts=gate_counts(),
+        )
+        return {"count": len(signals), "signals": [signal_dict(s) for s in signals]}
@@ -0,0 +1,31 @@
+"""
+Helpers shared by the detection runners in this package.
+"""
+from __future__ import annotations
+
+from typing import Any, List
+
+from src.api.columnar import rows_from_columns
+from src.api.metrics import count_rows
+
+
+def observation_rows(req: Any, row_type: type) -> List[Any]:
+    """
+    The request's observation rows, built from observation_columns if given.
+    """
+    if req.observation_columns is not None:
+        return rows_from_columns(req.observation_columns, row_type)
+    return req.observation
+
+
+def count_payload(req: Any) -> None:
+    """
+    Record baseline/observation row counts for /metrics (inside a runner).
+    """
+    for kind in ("baseline", "observation"):
+        columns = getattr(req, f"{kind}_columns")
+        if columns is not None:
+            n = len(next(iter(columns.values()), ()))
+        else:
+            n = len(getattr(req, kind))
+        count_rows(kind, n)
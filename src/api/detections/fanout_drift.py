@@ -0,0 +1,56 @@
+"""
+Lateral fan-out drift (PDE-SPL-0401).
+
+Runner and baseline builder, imported on first use through
+src/api/registry.py.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, Mapping, Optional
+
+from src.api.columnar import group_column
+from src.api.detections.common import count_payload, observation_rows
+from src.api.metrics import gate_counts, stage
+from src.api.responses import signal_dict
+from src.baselines.rolling import (
+    BaselineStats,
+    apply_baseline_to_observation,
+    compute_host_baseline_stats,
+    host_baseline_stats_from_values,
+)
+from src.engine.evaluator import evaluate_ns_p2_001
+from src.features.network_fanout import FanoutBucketFeatures, compute_growth_hits as fanout_growth_hits
+
+if TYPE_CHECKING:
+    from src.api.routes import Eval0401Request
+
+
+def baseline_0401(req: Eval0401Request) -> Dict[str, BaselineStats]:
+    if req.baseline_columns is not None:
+        return host_baseline_stats_from_values(group_column(req.baseline_columns, FanoutBucketFeatures, "host", "internal_dest_count"))
+    return compute_host_baseline_stats(req.baseline)
+
+
+def run_0401(req: Eval0401Request, baselines: Optional[Mapping[str, BaselineStats]] = None) -> dict:
+    count_payload(req)
+    with stage("baseline"):
+        if baselines is None:
+            baselines = baseline_0401(req)
+    with stage("validation"):
+        observation = observation_rows(req, FanoutBucketFeatures)
+    with stage("baseline"):
+        obs_with_ratio = apply_baseline_to_observation(observation, baselines, min_baseline_buckets=1)
+    with stage("growth"):
+        growth = fanout_growth_hits(obs_with_ratio, sustained_buckets=req.sustained_buckets)
+    with stage("evaluate"):
+        signals = evaluate_ns_p2_001(
+            obs_with_ratio,
+            baselines,
+            deviation_ratio_threshold=req.deviation_ratio_threshold,
+            sustained_buckets=req.sustained_buckets,
+            min_new_targets=req.min_new_targets,
+            expected_baseline_buckets=req.expected_baseline_buckets,
+            growth_hits_map=growth,
+            gate_counts=gate_counts(),
+        )
+        return {"count": len(signals), "signals": [signal_dict(s) for s in signals]}
@@ -0,0 +1,54 @@
+"""
+Persistence mechanism drift (PDE-SPL-0403).
+
+Runner and baseline builder, imported on first use through
+src/api/registry.py.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, Mapping, Optional
+
+from src.api.columnar import group_column
+from src.api.detections.common import count_payload, observation_rows
+from src.api.metrics import gate_counts, stage
+from src.api.responses import signal_dict
+from src.engine.evaluator_persistence import (
+    PersistenceBaselineStats,
+    compute_persistence_baseline_stats,
+    evaluate_pde_spl_0403,
+    persistence_baseline_stats_from_values,
+)
+from src.features.persistence_drift import PersistenceBucketFeatures, compute_growth_hits as persistence_growth_hits
+
+if TYPE_CHECKING:
+    from src.api.routes import Eval0403Request
+
+
+def baseline_0403(req: Eval0403Request) -> Dict[str, PersistenceBaselineStats]:
+    if req.baseline_columns is not None:
+        return persistence_baseline_stats_from_values(group_column(req.baseline_columns, PersistenceBucketFeatures, "host", "persistence_events_per_host"))
+    return compute_persistence_baseline_stats(req.baseline)
+
+
+def run_0403(req: Eval0403Request, baselines: Optional[Mapping[str, PersistenceBaselineStats]] = None) -> dict:
+    count_payload(req)
+    with stage("baseline"):
+        if baselines is None:
+            baselines = baseline_0403(req)
+    with stage("validation"):
+        observation = observation_rows(req, PersistenceBucketFeatures)
+    with stage("growth"):
+        growth = persistence_growth_hits(observation, sustained_buckets=req.sustained_buckets)
+    with stage("evaluate"):
+        signals = evaluate_pde_spl_0403(
+            observation,
+            baselines,
+            drift_ratio_threshold=req.drift_ratio_threshold,
+            sustained_buckets=req.sustained_buckets,
+            min_unique_artifacts=req.min_unique_artifacts,
+            expected_baseline_buckets=req.expected_baseline_buckets,
+            min_baseline_buckets=req.min_baseline_buckets,
+            growth_hits_map=growth,
+            gate_counts=gate_counts(),
+        )
+        return {"count": len(signals), "signals": [signal_dict(s) for s in signals]}
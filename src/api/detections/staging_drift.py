@@ -0,0 +1,54 @@
+"""
+Data staging drift (PDE-SPL-0404).
+
+Runner and baseline builder, imported on first use through
+src/api/registry.py.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, Mapping, Optional
+
+from src.api.columnar import group_column
+from src.api.detections.common import count_payload, observation_rows
+from src.api.metrics import gate_counts, stage
+from src.api.responses import signal_dict
+from src.engine.evaluator_staging import (
+    StagingBaselineStats,
+    compute_staging_baseline_stats,
+    evaluate_pde_spl_0404,
+    staging_baseline_stats_from_values,
+)
+from src.features.data_staging_drift import StagingBucketFeatures, compute_growth_hits as staging_growth_hits
+
+if TYPE_CHECKING:
+    from src.api.routes import Eval0404Request
+
+
+def baseline_0404(req: Eval0404Request) -> Dict[str, StagingBaselineStats]:
+    if req.baseline_columns is not None:
+        return staging_baseline_stats_from_values(group_column(req.baseline_columns, StagingBucketFeatures, "host", "staging_events_per_host"))
+    return compute_staging_baseline_stats(req.baseline)
+
+
+def run_0404(req: Eval0404Request, baselines: Optional[Mapping[str, StagingBaselineStats]] = None) -> dict:
+    count_payload(req)
+    with stage("baseline"):
+        if baselines is None:
+            baselines = baseline_0404(req)
+    with stage("validation"):
+        observation = observation_rows(req, StagingBucketFeatures)
+    with stage("growth"):
+        growth = staging_growth_hits(observation, sustained_buckets=req.sustained_buckets)
+    with stage("evaluate"):
+        signals = evaluate_pde_spl_0404(
+            observation,
+            baselines,
+            drift_ratio_threshold=req.drift_ratio_threshold,
+            sustained_buckets=req.sustained_buckets,
+            min_unique_artifacts=req.min_unique_artifacts,
+            expected_baseline_buckets=req.expected_baseline_buckets,
+            min_baseline_buckets=req.min_baseline_buckets,
+            growth_hits_map=growth,
+            gate_counts=gate_counts(),
+        )
+        return {"count": len(signals), "signals": [signal_dict(s) for s in signals]}
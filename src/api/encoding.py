@@ -0,0 +1,164 @@
+"""
+Compressed request bodies.
+
+Collectors may send evaluate and ingest payloads with
+Content-Encoding: gzip (or x-gzip, deflate) or zstd. RequestDecompression
+is an ASGI middleware that inflates the body as it arrives, chunk by
+chunk, so routes see a plain body and a compressed upload never sits in
+memory in both forms. Concatenated gzip members are accepted.
+
+  415  unknown encoding, or zstd without the optional zstandard package
+  400  corrupt or truncated compressed body
+  413  body inflates past the limit (guards against compression bombs)
+
+Configuration (environment):
+  PDE_MAX_DECOMPRESSED_BYTES  inflated size limit per request (default: 512 MiB)
+"""
+from __future__ import annotations
+
+import os
+import zlib
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional
+    zstandard = None
+
+
+Message = Dict[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
+
+# Maximum decompressed output produced per inflate step, so a small,
+# highly compressed chunk cannot expand into one huge buffer
+DECODE_STEP_BYTES = 256 * 1024
+
+
+class _ZlibDecoder:
+    def __init__(self, wbits: int) -> None:
+        self.wbits = wbits
+        self.name = "gzip" if wbits > zlib.MAX_WBITS else "deflate"
+        self._d = zlib.decompressobj(wbits)
+
+    def feed(self, data: bytes) -> Tuple[bytes, bytes]:
+        """
+        (inflated output, input left over for the next call)
+        """
+        out = self._d.decompress(data, DECODE_STEP_BYTES)
+        tail = self._d.unconsumed_tail
+        if self._d.eof and self._d.unused_data:
+            # Another gzip member follows
+            tail = self._d.unused_data + tail
+            self._d = zlib.decompressobj(self.wbits)
+        return out, tail
+
+    def finish(self) -> bytes:
+        out = self._d.flush()
+        if not self._d.eof:
+            raise zlib.error("truncated stream")
+        return out
+
+
+class _ZstdDecoder:
+    name = "zstd"
+
+    def __init__(self) -> None:
+        self._d = zstandard.ZstdDecompressor().decompressobj()
+
+    def feed(self, data: bytes) -> Tuple[bytes, bytes]:
+        return self._d.decompress(data), b""
+
+    def finish(self) -> bytes:
+        return self._d.flush()
+
+
+def _decoder(encoding: str) -> Optional[Any]:
+    if encoding in ("gzip", "x-gzip"):
+        return _ZlibDecoder(16 + zlib.MAX_WBITS)
+    if encoding == "deflate":
+        return _ZlibDecoder(zlib.MAX_WBITS)
+    if encoding == "zstd" and zstandard is not None:
+        return _ZstdDecoder()
+    return None
+
+
+class _InflatingReceive:
+    """
+    Wraps an ASGI receive callable, inflating http.request bodies.
+    """
+
+    def __init__(self, receive: Receive, decoder: Any, max_bytes: int) -> None:
+        self._receive = receive
+        self._decoder = decoder
+        self._max_bytes = max_bytes
+        self._pending = b""
+        self._more = True
+        self._done = False
+        self.inflated = 0
+
+    def _count(self, out: bytes) -> bytes:
+        self.inflated += len(out)
+        if self.inflated > self._max_bytes:
+            raise HTTPException(status_code=413, detail=f"Decompressed body exceeds {self._max_bytes} bytes")
+        return out
+
+    async def __call__(self) -> Message:
+        if self._done:
+            return await self._receive()
+        errors = (zlib.error,) if zstandard is None else (zlib.error, zstandard.ZstdError)
+        while True:
+            if not self._pending and self._more:
+                message = await self._receive()
+                if message["type"] != "http.request":
+                    return message
+                self._pending = message.get("body", b"")
+                self._more = message.get("more_body", False)
+            try:
+                out, self._pending = self._decoder.feed(self._pending)
+                if not self._more and not self._pending:
+                    out += self._decoder.finish()
+                    self._done = True
+            except errors as exc:
+                raise HTTPException(status_code=400, detail=f"Invalid {self._decoder.name} request body: {exc}") from None
+            if out or self._done:
+                return {"type": "http.request", "body": self._count(out), "more_body": not self._done}
+
+
+class RequestDecompression:
+    """
+    ASGI middleware: inflate gzip/deflate/zstd request bodies in a stream.
+    """
+
+    def __init__(self, app: Callable[..., Awaitable[None]], *, max_bytes: Optional[int] = None) -> None:
+        self.app = app
+        self.max_bytes = int(max_bytes or os.environ.get("PDE_MAX_DECOMPRESSED_BYTES") or 512 * 1024 * 1024)
+
+    async def __call__(self, scope: Dict[str, Any], receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = b""
+        for name, value in scope["headers"]:
+            if name == b"content-encoding":
+                encoding = value.strip().lower()
+        if encoding in (b"", b"identity"):
+            await self.app(scope, receive, send)
+            return
+
+        decoder = _decoder(encoding.decode("latin-1"))
+        if decoder is None:
+            supported = "gzip, deflate" + (", zstd" if zstandard is not None else "")
+            response = JSONResponse(
+                status_code=415,
+                content={"detail": f"Unsupported Content-Encoding {encoding.decode('latin-1')!r}; use {supported}"},
+            )
+            await response(scope, receive, send)
+            return
+        # The route sees an unencoded body of unknown length
+        headers = [(n, v) for n, v in scope["headers"] if n not in (b"content-encoding", b"content-length")]
+        scope = dict(scope, headers=headers)
+        await self.app(scope, _InflatingReceive(receive, decoder, self.max_bytes), send)
@@ -0,0 +1,360 @@
+"""
+Raw event ingestion for the control plane.
+
+  POST   /ingest?stream=name   NDJSON events through the incremental pipeline
+  GET    /ingest/{stream}      stream state
+  DELETE /ingest/{stream}      drop a stream and its bucket state
+
+Each named stream keeps its own IncrementalPipeline (baselines, and per
+open bucket only per-entity counts and distinct-value sets, never the raw
+events). Streams are created on first use, capped in number (429 past
+the cap) and dropped after sitting idle.
+
+allowed_lateness keeps buckets open that long past the watermark for
+out-of-order sources. Events more than max_skew ahead of the watermark
+are dropped and counted in future_events, so a bad timestamp cannot close
+every bucket; raise max_skew for a request that resumes after a longer gap.
+Both apply from the request that sets them on. Every stream applies the
+allowlist/suppression rules and the maintenance calendar, if configured;
+both files are re-read when they change.
+
+Configuration (environment):
+  PDE_INGEST_MAX_STREAMS           concurrent streams (default: 64)
+  PDE_INGEST_STREAM_IDLE_SECONDS   drop a stream unused for this long (default: 3600)
+  PDE_INGEST_ALLOWED_LATENESS      default allowed_lateness, seconds (default: 0)
+  PDE_INGEST_MAX_SKEW_SECONDS      default max_skew, seconds (default: 86400)
+  PDE_SUPPRESSION_RULES            allowlist/suppression rule file (src/engine/allowlists.py)
+  PDE_MAINTENANCE_CALENDAR         maintenance calendar file (src/engine/maintenance.py)
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from starlette.concurrency import run_in_threadpool
+
+from src.api.responses import signal_dict
+from src.api.subscriptions import signal_hub
+
+if TYPE_CHECKING:
+    from src.engine.allowlists import SuppressionEngine
+    from src.engine.incremental import BucketResult, IncrementalPipeline
+    from src.engine.maintenance import MaintenanceCalendar
+
+
+router = APIRouter(prefix="/ingest", tags=["ingest"])
+
+# A single NDJSON line longer than this is rejected rather than buffered
+MAX_LINE_BYTES = 1 << 20
+# Lines are handed to the pipeline in batches of roughly this many bytes
+FEED_BATCH_BYTES = 256 * 1024
+
+
+# ------------------------
+# Streaming line splitting
+# ------------------------
+
+class _LineSplitter:
+    """
+    Splits a byte stream into complete lines, carrying the partial tail over.
+    """
+
+    def __init__(self, max_line_bytes: int = MAX_LINE_BYTES) -> None:
+        self.tail = b""
+        self.max_line_bytes = max_line_bytes
+
+    def feed(self, data: bytes) -> List[bytes]:
+        buf = self.tail + data if self.tail else data
+        lines = buf.split(b"\n")
+        self.tail = lines.pop()
+        if len(self.tail) > self.max_line_bytes:
+            raise HTTPException(status_code=413, detail="NDJSON line exceeds maximum length")
+        return lines
+
+    def finish(self) -> List[bytes]:
+        tail, self.tail = self.tail, b""
+        return [tail] if tail.strip() else []
+
+
+# ------------------------
+# Server-side stream state
+# ------------------------
+
+@dataclass
+class IngestStream:
+    """
+    Per-stream bucket state. One pipeline per named stream so independent
+    sources (e.g. per tenant or per forwarder) keep separate baselines.
+    """
+    name: str
+    pipeline: IncrementalPipeline
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    bad_lines: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+
+
+class StreamRegistry:
+    """
+    Named ingest streams, capped in number and expired when idle. The
+    suppression rules and maintenance calendar are loaded with the first
+    stream and shared by all of them.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_streams: int = 64,
+        idle_seconds: float = 3600,
+        allowed_lateness: int = 0,
+        max_skew: int = 86400,
+        suppression_path: Optional[str] = None,
+        maintenance_path: Optional[str] = None,
+    ) -> None:
+        self.max_streams = int(max_streams)
+        self.idle_seconds = float(idle_seconds)
+        self.allowed_lateness = int(allowed_lateness)
+        self.max_skew = int(max_skew)
+        self.suppression_path = suppression_path
+        self.maintenance_path = maintenance_path
+        self.streams: Dict[str, IngestStream] = {}
+        self.expired = 0
+        self._filters: Optional[Tuple[Optional[SuppressionEngine], Optional[MaintenanceCalendar]]] = None
+
+    @classmethod
+    def from_env(cls) -> "StreamRegistry":
+        return cls(
+            max_streams=int(os.environ.get("PDE_INGEST_MAX_STREAMS") or 64),
+            idle_seconds=float(os.environ.get("PDE_INGEST_STREAM_IDLE_SECONDS") or 3600),
+            allowed_lateness=int(os.environ.get("PDE_INGEST_ALLOWED_LATENESS") or 0),
+            max_skew=int(os.environ.get("PDE_INGEST_MAX_SKEW_SECONDS") or 86400),
+            suppression_path=os.environ.get("PDE_SUPPRESSION_RULES") or None,
+            maintenance_path=os.environ.get("PDE_MAINTENANCE_CALENDAR") or None,
+        )
+
+    def filters(self) -> Tuple[Optional[SuppressionEngine], Optional[MaintenanceCalendar]]:
+        if self._filters is None:
+            from src.engine.allowlists import SuppressionEngine
+            from src.engine.maintenance import MaintenanceCalendar
+
+            self._filters = (
+                SuppressionEngine(self.suppression_path) if self.suppression_path else None,
+                MaintenanceCalendar(self.maintenance_path) if self.maintenance_path else None,
+            )
+        return self._filters
+
+    def expire(self, now: Optional[float] = None) -> List[str]:
+        """
+        Drop streams unused for idle_seconds, skipping any with a request in flight.
+        """
+        now = time.monotonic() if now is None else now
+        stale = [
+            name for name, s in list(self.streams.items())
+            if now - s.last_used > self.idle_seconds and not s.lock.locked()
+        ]
+        for name in stale:
+            self.streams.pop(name, None)
+        self.expired += len(stale)
+        return stale
+
+    def get(
+        self,
+        name: str,
+        detections: Optional[List[str]],
+        baseline_days: int,
+        allowed_lateness: Optional[int] = None,
+        max_skew: Optional[int] = None,
+    ) -> IngestStream:
+        """
+        The named stream, created on first use. allowed_lateness and
+        max_skew, when given, replace the stream's current settings.
+        """
+        self.expire()
+        stream = self.streams.get(name)
+        if stream is not None:
+            stream.last_used = time.monotonic()
+            if allowed_lateness is not None:
+                stream.pipeline.allowed_lateness = int(allowed_lateness)
+            if max_skew is not None:
+                stream.pipeline.max_skew = int(max_skew)
+            return stream
+        if len(self.streams) >= self.max_streams:
+            raise HTTPException(status_code=429, detail="Too many ingest streams", headers={"Retry-After": "60"})
+        # Imported with the first stream: it loads every detection's extractor
+        # and evaluator, which API start-up should not pay for
+        from src.engine.incremental import DETECTION_SPECS, IncrementalPipeline
+
+        if detections:
+            unknown = [d for d in detections if d not in DETECTION_SPECS]
+            if unknown:
+                raise HTTPException(status_code=400, detail=f"Unknown detection ids: {unknown}")
+        suppression, maintenance = self.filters()
+        stream = self.streams[name] = IngestStream(
+            name=name,
+            pipeline=IncrementalPipeline(
+                detections or None,
+                baseline_seconds=int(baseline_days) * 86400,
+                allowed_lateness=self.allowed_lateness if allowed_lateness is None else allowed_lateness,
+                max_skew=self.max_skew if max_skew is None else max_skew,
+                suppression=suppression,
+                maintenance=maintenance,
+            ),
+        )
+        return stream
+
+    def lookup(self, name: str) -> Optional[IngestStream]:
+        self.expire()
+        return self.streams.get(name)
+
+    def pop(self, name: str) -> Optional[IngestStream]:
+        return self.streams.pop(name, None)
+
+    def stats(self) -> dict:
+        return {"streams": len(self.streams), "max_streams": self.max_streams, "expired": self.expired}
+
+
+ingest_streams = StreamRegistry.from_env()
+
+
+def _get_stream(
+    name: str,
+    detections: Optional[List[str]],
+    baseline_days: int,
+    allowed_lateness: Optional[int] = None,
+    max_skew: Optional[int] = None,
+) -> IngestStream:
+    return ingest_streams.get(name, detections, baseline_days, allowed_lateness, max_skew)
+
+
+def _feed_lines(stream: IngestStream, lines: List[bytes]) -> List[BucketResult]:
+    """
+    Parse and feed one batch of lines. Runs in a worker thread.
+    """
+    pipeline = stream.pipeline
+    pipeline.poll()
+    out: List[BucketResult] = []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            e = json.loads(line)
+        except ValueError:
+            stream.bad_lines += 1
+            continue
+        if not isinstance(e, dict):
+            stream.bad_lines += 1
+            continue
+        closed = pipeline.feed(e)
+        if closed:
+            out.extend(closed)
+    return out
+
+
+def _publish(stream: str, results: List[BucketResult]) -> List[BucketResult]:
+    """
+    Push newly closed buckets' signals to live subscribers (/signals).
+    """
+    signal_hub.publish(
+        {"stream": stream, "bucket_start": res.bucket_start, **signal_dict(s)}
+        for res in results
+        for s in res.signals
+    )
+    return results
+
+
+def _result_dict(res: BucketResult) -> Dict[str, Any]:
+    return {
+        "detection_id": res.detection_id,
+        "bucket_start": res.bucket_start,
+        "entities": res.entities,
+        "signals": [signal_dict(s) for s in res.signals],
+    }
+
+
+@router.post("")
+async def ingest(
+    request: Request,
+    stream: str = Query("default", description="Named ingest stream; state is kept per stream"),
+    detection: Optional[List[str]] = Query(None, description="Detections to run (first request of a stream only)"),
+    baseline_days: int = Query(30, ge=1),
+    allowed_lateness: Optional[int] = Query(None, ge=0, description="Seconds to keep buckets open past the watermark"),
+    max_skew: Optional[int] = Query(None, ge=0, description="Drop events more than this many seconds ahead of the watermark"),
+    flush: bool = Query(False, description="Close every open bucket after this request"),
+) -> dict:
+    """
+    Stream raw NDJSON events (optionally compressed, see
+    src/api/encoding.py) through the incremental extractors. The body is
+    inflated and split chunk by chunk and
+    never held in memory whole; buckets are evaluated as the event-time
+    watermark closes them, and their results are returned (and pushed to
+    /signals subscribers as each batch closes them).
+    """
+    s = _get_stream(stream, detection, baseline_days, allowed_lateness, max_skew)
+    splitter = _LineSplitter()
+    results: List[BucketResult] = []
+
+    async with s.lock:
+        bad_before = s.bad_lines
+        events_before = s.pipeline.events_seen
+        late_before = s.pipeline.late_events
+        future_before = s.pipeline.future_events
+        pending: List[bytes] = []
+        pending_bytes = 0
+        async for chunk in request.stream():
+            for line in splitter.feed(chunk):
+                pending.append(line)
+                pending_bytes += len(line)
+            if pending_bytes >= FEED_BATCH_BYTES:
+                results.extend(_publish(stream, await run_in_threadpool(_feed_lines, s, pending)))
+                pending, pending_bytes = [], 0
+        pending.extend(splitter.finish())
+        if pending:
+            results.extend(_publish(stream, await run_in_threadpool(_feed_lines, s, pending)))
+        if flush:
+            results.extend(_publish(stream, await run_in_threadpool(s.pipeline.flush)))
+        s.last_used = time.monotonic()
+
+        return {
+            "stream": stream,
+            "events": s.pipeline.events_seen - events_before,
+            "bad_lines": s.bad_lines - bad_before,
+            "late_events": s.pipeline.late_events - late_before,
+            "future_events": s.pipeline.future_events - future_before,
+            "watermark": s.pipeline.watermark,
+            "buckets_closed": len(results),
+            "signal_count": sum(len(r.signals) for r in results),
+            "results": [_result_dict(r) for r in results if r.signals],
+        }
+
+
+@router.get("/{stream}")
+def ingest_stream_status(stream: str) -> dict:
+    s = ingest_streams.lookup(stream)
+    if s is None:
+        raise HTTPException(status_code=404, detail=f"Unknown ingest stream: {stream}")
+    p = s.pipeline
+    return {
+        "stream": stream,
+        "detections": list(p.states.keys()),
+        "events": p.events_seen,
+        "bad_lines": s.bad_lines,
+        "late_events": p.late_events,
+        "future_events": p.future_events,
+        "allowed_lateness": p.allowed_lateness,
+        "max_skew": p.max_skew,
+        "watermark": p.watermark,
+        "open_buckets": {d: len(st.open_buckets) for d, st in p.states.items()},
+        "entities": {d: len(st.baselines) for d, st in p.states.items()},
+    }
+
+
+@router.delete("/{stream}")
+def ingest_stream_delete(stream: str) -> dict:
+    if ingest_streams.pop(stream) is None:
+        raise HTTPException(status_code=404, detail=f"Unknown ingest stream: {stream}")
+    return {"stream": stream, "deleted": True}
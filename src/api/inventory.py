@@ -0,0 +1,89 @@
+"""
+Detection inventory browsing for the control plane.
+
+  GET /inventory                        sources, document count, index build time
+  GET /inventory/search                 filtered, full-text and faceted search
+  GET /inventory/detections/{id}        records with that detection_id
+
+Search parameters: q (words of name and description, "word*" for a
+prefix), and repeatable technique, tactic, tag, readiness,
+detection_type, source, platform, product, severity, status; plus
+min_score, limit, offset, facets and facet_limit. See
+src/inventory/query.py for the index and matching rules.
+
+The index is built on first use and rebuilt when an inventory file
+changes. Routes are sync, so that build runs in the threadpool and not
+on the event loop. 503 if there is no inventory to load.
+"""
+from __future__ import annotations
+
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+from src.api.responses import ORJSONResponse
+from src.inventory.query import FACET_LIMIT, MAX_LIMIT, InventoryIndex, inventory_query
+from src.inventory.store import InventoryError
+
+
+router = APIRouter(prefix="/inventory", tags=["inventory"], default_response_class=ORJSONResponse)
+
+
+def _index() -> InventoryIndex:
+    try:
+        return inventory_query.current()
+    except InventoryError as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from None
+
+
+@router.get("")
+def inventory_summary() -> dict:
+    _index()
+    return inventory_query.describe()
+
+
+@router.get("/search")
+def inventory_search(
+    q: Optional[str] = Query(None, max_length=512),
+    technique: List[str] = Query([]),
+    tactic: List[str] = Query([]),
+    tag: List[str] = Query([]),
+    readiness: List[str] = Query([]),
+    detection_type: List[str] = Query([]),
+    source: List[str] = Query([]),
+    platform: List[str] = Query([]),
+    product: List[str] = Query([]),
+    severity: List[str] = Query([]),
+    status: List[str] = Query([]),
+    min_score: Optional[int] = Query(None, ge=0),
+    limit: int = Query(50, ge=0, le=MAX_LIMIT),
+    offset: int = Query(0, ge=0),
+    facets: bool = True,
+    facet_limit: int = Query(FACET_LIMIT, ge=1, le=1000),
+) -> dict:
+    return _index().search(
+        text=q,
+        min_score=min_score,
+        offset=offset,
+        limit=limit,
+        facets=facets,
+        facet_limit=facet_limit,
+        techniques=technique,
+        tactics=tactic,
+        tags=tag,
+        predictive_readiness=readiness,
+        detection_type=detection_type,
+        source_id=source,
+        platform=platform,
+        product=product,
+        severity=severity,
+        status=status,
+    )
+
+
+@router.get("/detections/{detection_id}")
+def inventory_detection(detection_id: str) -> dict:
+    records = _index().get(detection_id)
+    if not records:
+        raise HTTPException(status_code=404, detail=f"Detection {detection_id!r} is not in the inventory")
+    return {"detection_id": detection_id, "records": records}
@@ -1,13 +1,105 @@
 from __future__ import annotations
 
-from fastapi import FastAPI
+# Installed before any other import, so the start-up report covers them all
+from src.api.startup import import_timer
 
+import_timer.install()
+
+import logging
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from src.api.columnar import ColumnarError
+from src.api.baseline_cache import baseline_cache
+from src.api.encoding import RequestDecompression
+from src.api.ingest import ingest_streams, router as ingest_router
+from src.api.inventory import router as inventory_router
+from src.api.metrics import metrics
+from src.api.responses import ORJSONResponse
+from src.api.registry import detection_registry
+from src.api.result_cache import result_cache
 from src.api.routes import router as api_router
+from src.api.subscriptions import router as signals_router, signal_hub
+from src.api.workers import evaluation_pool
+from src.baselines.shared import TableEvicted
+
 
-app = FastAPI(title="Predictive Detection Engineering API", version="0.1.0")
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    import_timer.mark_ready()
+    logging.getLogger("uvicorn.error").info("Start-up: %s", import_timer.summary())
+    yield
+    evaluation_pool.shutdown()
+
+
+app = FastAPI(
+    title="Predictive Detection Engineering API",
+    version="0.1.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
+app.add_middleware(RequestDecompression)
 app.include_router(api_router)
+app.include_router(ingest_router)
+app.include_router(signals_router)
+app.include_router(inventory_router)
+
+
+@app.exception_handler(ColumnarError)
+async def columnar_error(_: Request, exc: ColumnarError) -> JSONResponse:
+    # Raised inside evaluation workers and re-raised here by the pool
+    return JSONResponse(status_code=422, content={"detail": str(exc)})
+
+
+@app.exception_handler(TableEvicted)
+async def table_evicted(_: Request, exc: TableEvicted) -> JSONResponse:
+    # A shared baseline was evicted between lookup and the worker mapping it
+    baseline_id = exc.path.rsplit("/", 1)[-1].split(".", 1)[0]
+    return JSONResponse(status_code=404, content={"detail": f"Unknown or evicted baseline_id {baseline_id}; upload it again"})
 
 
 @app.get("/health")
 def health() -> dict:
-    return {"status": "ok"}
+    return {"status": "ok", "evaluation_pool": evaluation_pool.stats()}
+
+
+@app.get("/startup")
+def startup_report() -> dict:
+    """
+    Import times from process start to ready, imports deferred to first
+    use since, and which detection plugins have been loaded.
+    """
+    return {**import_timer.report(), "detections": detection_registry.describe()}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint() -> PlainTextResponse:
+    """
+    Prometheus text exposition: per-detection counters and stage latency
+    histograms, plus pool, cache, subscriber and ingest stream figures.
+    """
+    pool = evaluation_pool.stats()
+    cache = baseline_cache.stats()
+    results = result_cache.stats()
+    hub = signal_hub.stats()
+    streams = ingest_streams.stats()
+    sampled = {
+        "pde_eval_pool_pending": ("gauge", "Evaluations queued or running", pool["pending"]),
+        "pde_eval_pool_rejected_total": ("counter", "Evaluations rejected with 429", pool["rejected"]),
+        "pde_eval_pool_timed_out_total": ("counter", "Evaluations that hit the timeout", pool["timed_out"]),
+        "pde_eval_pool_failed_total": ("counter", "Evaluations that raised in the worker", pool["failed"]),
+        "pde_baseline_cache_entries": ("gauge", "Cached baselines", cache["entries"]),
+        "pde_baseline_cache_bytes": ("gauge", "Estimated bytes held by cached baselines", cache["bytes"]),
+        "pde_baseline_cache_hits_total": ("counter", "Baseline cache hits", cache["hits"]),
+        "pde_baseline_cache_misses_total": ("counter", "Baseline cache misses", cache["misses"]),
+        "pde_result_cache_entries": ("gauge", "Cached evaluate results", results["entries"]),
+        "pde_result_cache_hits_total": ("counter", "Evaluate requests answered from the result cache", results["hits"]),
+        "pde_result_cache_misses_total": ("counter", "Evaluate requests that ran an evaluation", results["misses"]),
+        "pde_signal_subscribers": ("gauge", "Live /signals subscribers", hub["subscribers"]),
+        "pde_signal_published_total": ("counter", "Signals published to /signals subscribers", hub["published"]),
+        "pde_ingest_streams": ("gauge", "Open /ingest streams", streams["streams"]),
+        "pde_ingest_streams_expired_total": ("counter", "Ingest streams dropped after sitting idle", streams["expired"]),
+    }
+    return PlainTextResponse(metrics.render(sampled), media_type="text/plain; version=0.0.4")
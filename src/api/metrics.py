@@ -0,0 +1,281 @@
+"""
+Prometheus-style metrics for the API.
+
+Writes never take a lock. Each thread increments its own shard (a pair of
+plain dicts reached through threading.local). A scrape sums the shards, so
+the only contention is a lock on registering a new thread's shard, which
+happens once per thread. The event loop thread does most of the recording;
+FastAPI's thread pool gets its own shards.
+
+Evaluation stages run in worker processes, so they cannot write here
+directly. Runners time their stages into a RunRecord (see `stage` and
+`count_rows`). `instrumented` ships that record back with the result, and
+the route observes it under the detection's labels.
+
+Exposed at GET /metrics in the text exposition format (version 0.0.4).
+"""
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from src.engine.gates import GateCounts
+from src.engine.timing import StageTimer
+
+
+Labels = Tuple[Tuple[str, str], ...]
+SeriesKey = Tuple[str, Labels]
+
+# Seconds; upper bounds of the histogram buckets (+Inf is implicit)
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+EVALUATIONS = "pde_evaluations_total"
+EVALUATION_ERRORS = "pde_evaluation_errors_total"
+PAYLOAD_ROWS = "pde_payload_rows_total"
+STAGE_SECONDS = "pde_stage_seconds"
+
+METRIC_HELP: Dict[str, Tuple[str, str]] = {
+    EVALUATIONS: ("counter", "Evaluations completed, per detection"),
+    EVALUATION_ERRORS: ("counter", "Evaluations that failed or were rejected, per detection"),
+    PAYLOAD_ROWS: ("counter", "Feature rows received, per detection and kind (baseline/observation)"),
+    STAGE_SECONDS: ("histogram", "Wall-clock seconds per evaluation stage, per detection"),
+}
+
+
+def _labels(labels: Dict[str, str]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class _Shard:
+    __slots__ = ("counters", "histograms")
+
+    def __init__(self) -> None:
+        self.counters: Dict[SeriesKey, float] = {}
+        # key -> [bucket counts..., +Inf count, sum]
+        self.histograms: Dict[SeriesKey, List[float]] = {}
+
+
+class Metrics:
+    """
+    Counters and fixed-bucket histograms with per-thread shards.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self._local = threading.local()
+        self._shards: List[_Shard] = []
+        self._register_lock = threading.Lock()
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            with self._register_lock:
+                self._shards.append(shard)
+        return shard
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        counters = self._shard().counters
+        key = (name, _labels(labels))
+        counters[key] = counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        histograms = self._shard().histograms
+        key = (name, _labels(labels))
+        h = histograms.get(key)
+        if h is None:
+            h = histograms[key] = [0.0] * (len(self.buckets) + 2)
+        h[bisect_left(self.buckets, value)] += 1
+        h[-1] += value
+
+    # ------------------------
+    # Scrape
+    # ------------------------
+
+    def snapshot(self) -> Tuple[Dict[SeriesKey, float], Dict[SeriesKey, List[float]]]:
+        """
+        Sum of all shards. Copying a shard's dict is atomic under the GIL,
+        so a concurrent write lands in this scrape or the next.
+        """
+        with self._register_lock:
+            shards = list(self._shards)
+        counters: Dict[SeriesKey, float] = {}
+        histograms: Dict[SeriesKey, List[float]] = {}
+        for shard in shards:
+            for key, v in list(shard.counters.items()):
+                counters[key] = counters.get(key, 0) + v
+            for key, h in list(shard.histograms.items()):
+                acc = histograms.get(key)
+                if acc is None:
+                    histograms[key] = list(h)
+                else:
+                    for i, v in enumerate(h):
+                        acc[i] += v
+        return counters, histograms
+
+    def render(self, extra: Optional[Dict[str, Tuple[str, str, float]]] = None) -> str:
+        """
+        Text exposition of every series, plus `extra` values sampled by the
+        caller at scrape time ({name: (type, help, value)}).
+        """
+        counters, histograms = self.snapshot()
+        by_name: Dict[str, List[str]] = {}
+
+        for (name, labels), v in sorted(counters.items()):
+            by_name.setdefault(name, []).append(f"{name}{_fmt_labels(labels)} {_fmt_value(v)}")
+
+        for (name, labels), h in sorted(histograms.items()):
+            lines = by_name.setdefault(name, [])
+            cumulative = 0.0
+            for bound, n in zip(self.buckets + (float("inf"),), h):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{name}_bucket{_fmt_labels(labels + (('le', le),))} {_fmt_value(cumulative)}")
+            lines.append(f"{name}_sum{_fmt_labels(labels)} {h[-1]!r}")
+            lines.append(f"{name}_count{_fmt_labels(labels)} {_fmt_value(cumulative)}")
+
+        out: List[str] = []
+        for name in sorted(by_name):
+            kind, help_text = METRIC_HELP.get(name, ("untyped", name))
+            out.append(f"# HELP {name} {help_text}")
+            out.append(f"# TYPE {name} {kind}")
+            out.extend(by_name[name])
+        for name, (kind, help_text, value) in sorted((extra or {}).items()):
+            out.append(f"# HELP {name} {help_text}")
+            out.append(f"# TYPE {name} {kind}")
+            out.append(f"{name} {_fmt_value(value)}")
+        return "\n".join(out) + "\n"
+
+
+def _fmt_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    body = ",".join(
+        '{}="{}"'.format(k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for k, v in labels
+    )
+    return "{" + body + "}"
+
+
+def _fmt_value(v: float) -> str:
+    return str(int(v)) if float(v).is_integer() else repr(float(v))
+
+
+metrics = Metrics()
+
+
+# ------------------------
+# Worker-side stage recording
+# ------------------------
+
+class RunRecord(StageTimer):
+    """
+    Stage seconds plus payload row counts for one runner call. With
+    profile=True it also keeps per-stage CPU seconds and gate funnel counts
+    (see src/api/profiling.py).
+    """
+
+    def __init__(self, *, profile: bool = False) -> None:
+        super().__init__()
+        self.rows: Dict[str, int] = {}
+        self.profile = profile
+        self.cpu_seconds: Dict[str, float] = {}
+        self.gates: GateCounts = {}
+        self.cprofile: Optional[str] = None
+
+
+_current: ContextVar[Optional[RunRecord]] = ContextVar("pde_run_record", default=None)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Time a block into the current RunRecord; a no-op outside `instrumented`.
+    """
+    record = _current.get()
+    if record is None:
+        yield
+        return
+    t0 = time.perf_counter()
+    c0 = time.thread_time() if record.profile else 0.0
+    try:
+        yield
+    finally:
+        record.add(name, time.perf_counter() - t0)
+        if record.profile:
+            record.cpu_seconds[name] = record.cpu_seconds.get(name, 0.0) + time.thread_time() - c0
+
+
+def count_rows(kind: str, n: int) -> None:
+    record = _current.get()
+    if record is not None:
+        record.rows[kind] = record.rows.get(kind, 0) + int(n)
+
+
+def gate_counts() -> Optional[GateCounts]:
+    """
+    The dict evaluators should record gate counts into, or None unless the
+    current call is being profiled.
+    """
+    record = _current.get()
+    return record.gates if record is not None and record.profile else None
+
+
+def run_recorded(record: RunRecord, fn: Callable[..., Any], args: Tuple[Any, ...]) -> Any:
+    token = _current.set(record)
+    try:
+        return fn(*args)
+    finally:
+        _current.reset(token)
+
+
+def instrumented(fn: Callable[..., Any], *args: Any) -> Tuple[Any, RunRecord]:
+    """
+    Run fn(*args) with a fresh RunRecord; module-level so the pool can
+    pickle it. Returns (result, record).
+    """
+    record = RunRecord()
+    return run_recorded(record, fn, args), record
+
+
+def observe_run(detection: str, record: RunRecord) -> None:
+    metrics.inc(EVALUATIONS, detection=detection)
+    for kind, n in record.rows.items():
+        metrics.inc(PAYLOAD_ROWS, n, detection=detection, kind=kind)
+    for name, seconds in record.seconds.items():
+        metrics.observe(STAGE_SECONDS, seconds, detection=detection, stage=name)
+
+
+Clock = Tuple[float, float]  # (perf_counter, thread_time)
+
+
+def since(started: Clock) -> Clock:
+    """
+    (wall, cpu) seconds elapsed since a request_clock reading.
+    """
+    return time.perf_counter() - started[0], time.thread_time() - started[1]
+
+
+def add_validation(record: RunRecord, elapsed: Clock) -> None:
+    """
+    Fold API-side validation time into the record's "validation" stage,
+    next to any columnar checks the worker did.
+    """
+    record.add("validation", elapsed[0])
+    if record.profile:
+        record.cpu_seconds["validation"] = record.cpu_seconds.get("validation", 0.0) + elapsed[1]
+
+
+async def request_clock() -> Clock:
+    """
+    Dependency: FastAPI resolves it just before validating the request
+    body, so handler entry minus this value is the validation time. Async
+    so it runs on the event loop thread, like validation and the handler
+    (thread_time is per thread).
+    """
+    return time.perf_counter(), time.thread_time()
@@ -0,0 +1,95 @@
+"""
+Opt-in per-request profiling for the evaluate routes.
+
+  POST /evaluate/0402?profile=true            stage wall/CPU time, rows,
+                                               gate funnel
+  POST /evaluate/0402?profile=true&cprofile=true   ... plus a cProfile
+                                               summary of the worker call
+
+Profiling is an admin feature: the request must carry
+X-PDE-Admin-Token matching PDE_ADMIN_TOKEN, otherwise 403. With no
+PDE_ADMIN_TOKEN configured, profiling is disabled.
+
+The report is added to the response as "profile" (per detection for
+/evaluate/batch). It covers work done in the API process before dispatch
+(validation) and in the worker (baseline, growth, evaluate); response
+encoding happens after the report is built and is not included.
+"""
+from __future__ import annotations
+
+import cProfile
+import hmac
+import io
+import os
+import pstats
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import Header, HTTPException, Query
+
+from src.api.metrics import RunRecord, run_recorded
+from src.engine.gates import gate_funnel
+
+
+# Functions listed in the cProfile summary
+CPROFILE_TOP = 25
+
+
+@dataclass(frozen=True)
+class ProfileOptions:
+    cprofile: bool = False
+
+
+async def profile_request(
+    profile: bool = Query(False, description="Return a stage timing breakdown (admin only)"),
+    cprofile: bool = Query(False, description="With profile: attach a cProfile summary"),
+    x_pde_admin_token: Optional[str] = Header(None),
+) -> Optional[ProfileOptions]:
+    """
+    Dependency: ProfileOptions when profiling was asked for and allowed.
+    """
+    if not profile:
+        return None
+    expected = os.environ.get("PDE_ADMIN_TOKEN") or ""
+    if not expected or not x_pde_admin_token or not hmac.compare_digest(x_pde_admin_token, expected):
+        raise HTTPException(status_code=403, detail="Profiling requires a valid X-PDE-Admin-Token")
+    return ProfileOptions(cprofile=cprofile)
+
+
+def profiled(options: ProfileOptions, fn: Callable[..., Any], *args: Any) -> Tuple[Any, RunRecord]:
+    """
+    Profiling counterpart of metrics.instrumented; runs in the worker.
+    """
+    record = RunRecord(profile=True)
+    if not options.cprofile:
+        return run_recorded(record, fn, args), record
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        result = run_recorded(record, fn, args)
+    finally:
+        profiler.disable()
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).strip_dirs().sort_stats("cumulative").print_stats(CPROFILE_TOP)
+    record.cprofile = out.getvalue()
+    return result, record
+
+
+def profile_report(record: RunRecord) -> Dict[str, Any]:
+    stages = {
+        name: {
+            "wall_seconds": round(seconds, 6),
+            "cpu_seconds": round(record.cpu_seconds.get(name, 0.0), 6),
+        }
+        for name, seconds in record.seconds.items()
+    }
+    report: Dict[str, Any] = {
+        "stages": stages,
+        "wall_seconds": round(sum(record.seconds.values()), 6),
+        "cpu_seconds": round(sum(record.cpu_seconds.values()), 6),
+        "rows": dict(record.rows),
+        "gates": gate_funnel(record.gates),
+    }
+    if record.cprofile is not None:
+        report["cprofile"] = record.cprofile
+    return report
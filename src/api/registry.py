@@ -0,0 +1,125 @@
+"""
+Detection plugin registry.
+
+Detections are listed in src/api/detections/manifest.json (or the file
+named by PDE_DETECTION_MANIFEST), keyed by route number:
+
+  "0402": {
+    "detection_id": "pde-spl-0402",
+    "name": "Password spray drift",
+    "runner": "src.api.detections.auth_drift:run_0402",
+    "baseline": "src.api.detections.auth_drift:baseline_0402"
+  }
+
+Reading the manifest imports nothing. A detection's module, and the
+evaluator and feature code behind it, is imported the first time one of
+its callables is needed, so API start-up cost does not grow with the
+number of detections. Worker processes import plugin modules the same
+way, when they unpickle a runner. First-use load times show up in the
+startup report (GET /startup, see src/api/startup.py).
+
+The request models and routes for each detection are still declared in
+src/api/routes.py, since FastAPI needs them when the app is built. Routes
+for a detection the manifest leaves out answer 404.
+"""
+from __future__ import annotations
+
+import importlib
+import json
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Union
+
+
+DEFAULT_MANIFEST = Path(__file__).parent / "detections" / "manifest.json"
+
+
+class RegistryError(ValueError):
+    pass
+
+
+def load_ref(ref: str) -> Any:
+    """
+    Import "package.module:attr" and return attr.
+    """
+    module_name, sep, attr = ref.partition(":")
+    if not sep or not module_name or not attr:
+        raise RegistryError(f"Invalid reference {ref!r}; expected 'module:attr'")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+@dataclass(frozen=True)
+class DetectionPlugin:
+    key: str
+    detection_id: str
+    name: str
+    runner_ref: str
+    baseline_ref: str
+
+
+class DetectionRegistry:
+    """
+    Manifest entries by key, with their callables resolved on first use.
+    """
+
+    def __init__(self, plugins: Dict[str, DetectionPlugin]) -> None:
+        self.plugins = plugins
+        self._loaded: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_manifest(cls, path: Union[str, Path]) -> "DetectionRegistry":
+        doc = json.loads(Path(path).read_text(encoding="utf-8"))
+        plugins: Dict[str, DetectionPlugin] = {}
+        for key, entry in doc.items():
+            missing = [f for f in ("detection_id", "runner", "baseline") if not entry.get(f)]
+            if missing:
+                raise RegistryError(f"{path}: detection {key} is missing {missing}")
+            plugins[key] = DetectionPlugin(
+                key=key,
+                detection_id=entry["detection_id"],
+                name=entry.get("name", entry["detection_id"]),
+                runner_ref=entry["runner"],
+                baseline_ref=entry["baseline"],
+            )
+        return cls(plugins)
+
+    @classmethod
+    def from_env(cls) -> "DetectionRegistry":
+        return cls.from_manifest(os.environ.get("PDE_DETECTION_MANIFEST") or DEFAULT_MANIFEST)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.plugins
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.plugins)
+
+    def _resolve(self, ref: str) -> Any:
+        obj = self._loaded.get(ref)
+        if obj is None:
+            with self._lock:
+                obj = self._loaded.get(ref)
+                if obj is None:
+                    obj = self._loaded[ref] = load_ref(ref)
+        return obj
+
+    def runner(self, key: str) -> Callable[..., dict]:
+        return self._resolve(self.plugins[key].runner_ref)
+
+    def baseline_builder(self, key: str) -> Callable[[Any], Dict[str, Any]]:
+        return self._resolve(self.plugins[key].baseline_ref)
+
+    def loaded(self, key: str) -> bool:
+        plugin = self.plugins[key]
+        return plugin.runner_ref in self._loaded or plugin.baseline_ref in self._loaded
+
+    def describe(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            key: {"detection_id": p.detection_id, "name": p.name, "loaded": self.loaded(key)}
+            for key, p in self.plugins.items()
+        }
+
+
+detection_registry = DetectionRegistry.from_env()
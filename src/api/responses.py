@@ -0,0 +1,221 @@
+"""
+Response encoding for evaluation results.
+
+Routes return a Response built here instead of a dict, so FastAPI skips its
+jsonable_encoder pass (a recursive copy of every signal) and the body is
+encoded in one call by orjson when it is installed.
+
+The format follows the Accept header:
+  application/json (default)      {"count": n, "signals": [...]}
+  application/x-ndjson            one signal per line, streamed in chunks
+                                  so the full body is never one buffer
+  application/msgpack             same document as JSON, MessagePack-encoded
+                                  (needs the msgpack package)
+
+Routes negotiate in a dependency (accepted_media), so a request that
+cannot be served gets its 406 before any evaluation runs. q-values are
+honoured; an Accept header naming none of these types gets JSON.
+"""
+from __future__ import annotations
+
+import json
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from fastapi import HTTPException, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - stdlib fallback
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional
+    msgpack = None
+
+
+JSON = "application/json"
+NDJSON = "application/x-ndjson"
+MSGPACK = "application/msgpack"
+NDJSON_TYPES = (NDJSON, "application/ndjson")
+MSGPACK_TYPES = (MSGPACK, "application/x-msgpack", "application/vnd.msgpack")
+
+# Offered media types, in server preference order for ties
+_OFFERS: Tuple[Tuple[str, Tuple[str, ...]], ...] = ((JSON, (JSON,)), (NDJSON, NDJSON_TYPES), (MSGPACK, MSGPACK_TYPES))
+
+# NDJSON lines are flushed to the client in chunks of roughly this size
+NDJSON_CHUNK_BYTES = 64 * 1024
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, separators=(",", ":"), allow_nan=False).encode("utf-8")
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with orjson (stdlib json if orjson is missing).
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class MsgPackResponse(Response):
+    media_type = MSGPACK
+
+    def render(self, content: Any) -> bytes:
+        return msgpack.packb(content, use_bin_type=True)
+
+
+def _accept_ranges(accept: str) -> List[Tuple[str, float]]:
+    """
+    (media range, q) per Accept header element, in header order.
+    """
+    ranges = []
+    for part in accept.split(","):
+        media, *params = part.split(";")
+        media = media.strip().lower()
+        if not media:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = min(max(float(value), 0.0), 1.0)
+                except ValueError:
+                    q = 0.0
+        ranges.append((media, q))
+    return ranges
+
+
+def _quality(types: Tuple[str, ...], ranges: List[Tuple[str, float]]) -> Optional[Tuple[float, int]]:
+    """
+    (q, position) of the most specific range matching any of types, or None.
+    """
+    best: Optional[Tuple[int, float, int]] = None
+    for pos, (media, q) in enumerate(ranges):
+        if media in types:
+            specificity = 2
+        elif media == "application/*":
+            specificity = 1
+        elif media == "*/*":
+            specificity = 0
+        else:
+            continue
+        if best is None or specificity > best[0]:
+            best = (specificity, q, pos)
+    return (best[1], best[2]) if best is not None else None
+
+
+def negotiate(accept: str) -> str:
+    """
+    Pick the response media type for an Accept header value: highest q,
+    then earliest in the header, then JSON before NDJSON before
+    MessagePack. 406 if every type we could send is refused (q=0), or if
+    only MessagePack is acceptable and msgpack is not installed.
+    """
+    ranges = _accept_ranges(accept)
+    if not ranges:
+        return JSON
+    best: Optional[Tuple[float, int, int]] = None
+    choice = None
+    matched = False
+    for rank, (media, types) in enumerate(_OFFERS):
+        quality = _quality(types, ranges)
+        if quality is None:
+            continue
+        matched = True
+        q, pos = quality
+        if q <= 0 or (media == MSGPACK and msgpack is None):
+            continue
+        key = (q, -pos, -rank)
+        if best is None or key > best:
+            best, choice = key, media
+    if choice is not None:
+        return choice
+    if not matched:
+        return JSON
+    if msgpack is None and (_quality(MSGPACK_TYPES, ranges) or (0.0, 0))[0] > 0:
+        raise HTTPException(status_code=406, detail="MessagePack responses need the msgpack package")
+    raise HTTPException(status_code=406, detail=f"Acceptable types: {JSON}, {NDJSON}, {MSGPACK}")
+
+
+def accepted_media(request: Request) -> str:
+    """
+    Route dependency: the negotiated response media type (406 up front).
+    """
+    return negotiate(request.headers.get("accept", ""))
+
+
+def _ndjson_chunks(
+    signals: Iterable[Dict[str, Any]],
+    on_encoded: Optional[Callable[[float], None]] = None,
+) -> Iterator[bytes]:
+    buf: List[bytes] = []
+    size = 0
+    spent = 0.0
+    for s in signals:
+        t0 = time.perf_counter()
+        line = dumps(s) + b"\n"
+        spent += time.perf_counter() - t0
+        buf.append(line)
+        size += len(line)
+        if size >= NDJSON_CHUNK_BYTES:
+            yield b"".join(buf)
+            buf, size = [], 0
+    if buf:
+        yield b"".join(buf)
+    if on_encoded is not None:
+        on_encoded(spent)
+
+
+def signal_dict(signal: Any) -> Dict[str, Any]:
+    """
+    A signal dataclass as a response dict. top_evidence is only filled when
+    top-K sketches are on, so it is left out rather than sent as null.
+    """
+    d = signal.__dict__
+    if d.get("top_evidence") is None:
+        return {k: v for k, v in d.items() if k != "top_evidence"}
+    return d
+
+
+def result_signals(result: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """
+    Signals of one runner result, or of every detection in a batch result.
+    A profiling report, if present, follows its signals as its own line.
+    """
+    if "signals" in result:
+        yield from result["signals"]
+        if "profile" in result:
+            yield {"profile": result["profile"]}
+        return
+    for key, sub in (result.get("results") or {}).items():
+        yield from sub["signals"]
+        if "profile" in sub:
+            yield {"detection": key, "profile": sub["profile"]}
+
+
+def render_result(
+    media: str,
+    result: Dict[str, Any],
+    *,
+    on_encoded: Optional[Callable[[float], None]] = None,
+) -> Response:
+    """
+    Encode a runner result as media (from accepted_media). on_encoded
+    receives the seconds spent encoding (for NDJSON, once the stream has
+    been sent).
+    """
+    if media == NDJSON:
+        return StreamingResponse(_ndjson_chunks(result_signals(result), on_encoded), media_type=NDJSON)
+    t0 = time.perf_counter()
+    response = MsgPackResponse(result) if media == MSGPACK else ORJSONResponse(result)
+    if on_encoded is not None:
+        on_encoded(time.perf_counter() - t0)
+    return response
@@ -0,0 +1,152 @@
+"""
+Idempotent evaluate results.
+
+Evaluation is a pure function of the detection, the request body (which
+carries the thresholds) and the baseline it references. So a scheduler
+retry or a duplicate submission can be answered from the result of the
+first call. Results are keyed by
+
+  sha256(detection, resolved baseline_id, body)
+
+The baseline_id is resolved first, so an alias that moved to a new
+generation is a different key. Entries expire after a TTL and are evicted
+least-recently-used past the entry or byte cap. Concurrent identical
+requests share a single evaluation: later arrivals wait for the first
+instead of queueing another run. Failed evaluations are not cached.
+
+Profiled requests bypass the cache, since they exist to measure a run.
+Responses carry X-PDE-Result-Cache: hit | miss.
+
+Configuration (environment):
+  PDE_RESULT_CACHE_TTL_SECONDS  seconds a result is reused (default: 300; 0 disables)
+  PDE_RESULT_CACHE_MAX_BYTES    cap on encoded result size (default: 64 MiB)
+  PDE_RESULT_CACHE_MAX_ENTRIES  entry cap (default: 1024)
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from src.api.responses import dumps
+
+
+HEADER = "X-PDE-Result-Cache"
+
+
+def result_key(detection: str, baseline_ids: Iterable[Optional[str]], body: bytes) -> str:
+    h = hashlib.sha256()
+    h.update(detection.encode("utf-8"))
+    for baseline_id in baseline_ids:
+        h.update(b"\0")
+        h.update((baseline_id or "").encode("utf-8"))
+    h.update(b"\0\0")
+    h.update(body)
+    return h.hexdigest()
+
+
+class ResultCache:
+    """
+    TTL + LRU cache of evaluate result dicts, with single-flight runs.
+    Used from the event loop thread only.
+    """
+
+    def __init__(self, *, ttl_seconds: float = 300.0, max_bytes: int = 64 * 1024 * 1024, max_entries: int = 1024) -> None:
+        self.ttl_seconds = float(ttl_seconds)
+        self.max_bytes = int(max_bytes)
+        self.max_entries = int(max_entries)
+        # key -> (expires_at, result, nbytes)
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any], int]]" = OrderedDict()
+        self._inflight: Dict[str, "asyncio.Future[Dict[str, Any]]"] = {}
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls) -> "ResultCache":
+        return cls(
+            ttl_seconds=float(os.environ.get("PDE_RESULT_CACHE_TTL_SECONDS") or 300),
+            max_bytes=int(os.environ.get("PDE_RESULT_CACHE_MAX_BYTES") or 64 * 1024 * 1024),
+            max_entries=int(os.environ.get("PDE_RESULT_CACHE_MAX_ENTRIES") or 1024),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        expires_at, result, nbytes = item
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.nbytes -= nbytes
+            return None
+        self._entries.move_to_end(key)
+        return result
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        nbytes = len(dumps(result))
+        if nbytes > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.nbytes -= old[2]
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, result, nbytes)
+        self.nbytes += nbytes
+        while self._entries and (self.nbytes > self.max_bytes or len(self._entries) > self.max_entries):
+            _, (_, _, evicted) = self._entries.popitem(last=False)
+            self.nbytes -= evicted
+            self.evictions += 1
+
+    async def get_or_run(self, key: str, run: Callable[[], Awaitable[Dict[str, Any]]]) -> Tuple[Dict[str, Any], bool]:
+        """
+        (result, hit). A request that joins an identical in-flight
+        evaluation counts as a hit. The evaluation runs as its own task, so
+        the first client disconnecting does not cancel it for the others.
+        """
+        result = self.get(key)
+        if result is not None:
+            self.hits += 1
+            return result, True
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            self.hits += 1
+            return await asyncio.shield(task), True
+
+        self.misses += 1
+        task = self._inflight[key] = asyncio.ensure_future(run())
+        task.add_done_callback(lambda t: self._settle(key, t))
+        return await asyncio.shield(task), False
+
+    def _settle(self, key: str, task: "asyncio.Future[Dict[str, Any]]") -> None:
+        del self._inflight[key]
+        # exception() also marks a failure as retrieved when nobody awaits it
+        if not task.cancelled() and task.exception() is None:
+            self.put(key, task.result())
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.nbytes,
+            "max_bytes": self.max_bytes,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_ratio": (self.hits / lookups) if lookups else None,
+            "evictions": self.evictions,
+            "inflight": len(self._inflight),
+        }
+
+
+result_cache = ResultCache.from_env()
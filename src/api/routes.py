@@ -1,16 +1,29 @@
 from __future__ import annotations
 
-from fastapi import APIRouter
-from pydantic import BaseModel, Field
-from typing import Dict, List, Optional
-
-from src.baselines.rolling import compute_host_baseline_stats, apply_baseline_to_observation
-from src.engine.evaluator import evaluate_ns_p2_001
-from src.engine.evaluator_auth import compute_auth_baseline_stats, evaluate_pde_spl_0402
-from src.engine.evaluator_persistence import compute_persistence_baseline_stats, evaluate_pde_spl_0403
-from src.engine.evaluator_staging import compute_staging_baseline_stats, evaluate_pde_spl_0404
-from src.engine.evaluator_admin_tooling import compute_admin_tooling_baseline_stats, evaluate_pde_spl_0405
-
+from functools import partial
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional, Tuple
+
+from src.api.baseline_cache import CachedBaseline, baseline_cache, baseline_id_for, check_alias
+from src.api.columnar import Columns
+from src.api.metrics import (
+    EVALUATION_ERRORS,
+    STAGE_SECONDS,
+    Clock,
+    add_validation,
+    instrumented,
+    metrics,
+    observe_run,
+    request_clock,
+    since,
+)
+from src.api.registry import detection_registry
+from src.api.profiling import ProfileOptions, profile_report, profile_request, profiled
+from src.api.responses import ORJSONResponse, accepted_media, render_result
+from src.api.result_cache import HEADER as RESULT_CACHE_HEADER, result_cache, result_key
+from src.api.workers import evaluation_pool
 from src.features.network_fanout import FanoutBucketFeatures
 from src.features.auth_drift import AuthBucketFeatures
 from src.features.persistence_drift import PersistenceBucketFeatures
@@ -18,7 +31,7 @@ from src.features.data_staging_drift import StagingBucketFeatures
 from src.features.admin_tooling_drift import AdminToolingBucketFeatures
 
 
-router = APIRouter(prefix="/evaluate", tags=["evaluate"])
+router = APIRouter(prefix="/evaluate", tags=["evaluate"], default_response_class=ORJSONResponse)
 
 
 # ------------------------
@@ -33,6 +46,97 @@ class EvalParams(BaseModel):
     expected_baseline_buckets: int = 30 * 24  # default for 1h buckets
 
 
+def cached_baseline(detection: str, req: Any) -> Optional[CachedBaseline]:
+    """
+    Resolve req.baseline_id (an id or an alias) to a cache entry, in this
+    process before the request is handed to a worker. None means compute
+    from req.baseline.
+    """
+    baseline_id = getattr(req, "baseline_id", None)
+    if baseline_id is None:
+        return None
+    entry = baseline_cache.lookup(baseline_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail=f"Unknown or evicted baseline_id {baseline_id}; upload it again")
+    if entry.detection != detection:
+        raise HTTPException(status_code=400, detail=f"baseline_id {baseline_id} belongs to {entry.detection}, not {detection}")
+    return entry
+
+
+def detection_runner(key: str) -> Callable[..., dict]:
+    """
+    The registry's runner for key; 404 if the manifest does not list it
+    (PDE_DETECTION_MANIFEST may enable a subset of the detections).
+    """
+    if key not in detection_registry:
+        raise HTTPException(status_code=404, detail=f"Unknown detection: {key}")
+    return detection_registry.runner(key)
+
+
+def stats_of(entry: Optional[CachedBaseline]) -> Optional[Mapping[str, Any]]:
+    return entry.stats if entry is not None else None
+
+
+async def idempotent(
+    request: Request,
+    detection: str,
+    baselines: List[Optional[CachedBaseline]],
+    profile: Optional[ProfileOptions],
+    run: Callable[[], Awaitable[dict]],
+) -> Tuple[dict, Optional[bool]]:
+    """
+    run() through the result cache: (result, hit), or (result, None) when
+    the cache does not apply.
+    """
+    if profile is not None or not result_cache.enabled:
+        return await run(), None
+    key = result_key(detection, [b.baseline_id if b is not None else None for b in baselines], await request.body())
+    return await result_cache.get_or_run(key, run)
+
+
+def mark_cache(response: Response, hit: Optional[bool]) -> Response:
+    if hit is not None:
+        response.headers[RESULT_CACHE_HEADER] = "hit" if hit else "miss"
+    return response
+
+
+def serialize_observer(detection: str) -> Callable[[float], None]:
+    return lambda seconds: metrics.observe(STAGE_SECONDS, seconds, detection=detection, stage="serialize")
+
+
+async def evaluate(
+    detection: str,
+    runner: Callable[..., dict],
+    req: Any,
+    request: Request,
+    started: Clock,
+    profile: Optional[ProfileOptions],
+    media: str,
+) -> Response:
+    """
+    Shared body of the single-detection routes: run in the pool, record
+    stage metrics, encode as the negotiated media type.
+    """
+    validation = since(started)
+    call = instrumented if profile is None else partial(profiled, profile)
+    baseline = cached_baseline(detection, req)
+
+    async def run() -> dict:
+        try:
+            result, record = await evaluation_pool.run(call, runner, req, stats_of(baseline))
+        except Exception:
+            metrics.inc(EVALUATION_ERRORS, detection=detection)
+            raise
+        add_validation(record, validation)
+        observe_run(detection, record)
+        if profile is not None:
+            result["profile"] = profile_report(record)
+        return result
+
+    result, hit = await idempotent(request, detection, [baseline], profile, run)
+    return mark_cache(render_result(media, result, on_encoded=serialize_observer(detection)), hit)
+
+
 # ------------------------
 # 0401 Fan-out drift
 # ------------------------
@@ -40,6 +144,11 @@ class EvalParams(BaseModel):
 class Eval0401Request(BaseModel):
     baseline: List[FanoutBucketFeatures] = Field(default_factory=list)
     observation: List[FanoutBucketFeatures] = Field(default_factory=list)
+    # Reference to a baseline uploaded via POST /evaluate/baselines/{detection}; replaces `baseline`
+    baseline_id: Optional[str] = None
+    # Columnar alternatives to `baseline` / `observation`: {field: [values, ...]}
+    baseline_columns: Optional[Columns] = None
+    observation_columns: Optional[Columns] = None
     deviation_ratio_threshold: float = 2.5
     sustained_buckets: int = 3
     min_new_targets: int = 3
@@ -47,19 +156,14 @@ class Eval0401Request(BaseModel):
 
 
 @router.post("/0401")
-def eval_0401(req: Eval0401Request) -> dict:
-    baselines = compute_host_baseline_stats(req.baseline)
-    obs_with_ratio = apply_baseline_to_observation(req.observation, baselines, min_baseline_buckets=1)
-
-    signals = evaluate_ns_p2_001(
-        obs_with_ratio,
-        baselines,
-        deviation_ratio_threshold=req.deviation_ratio_threshold,
-        sustained_buckets=req.sustained_buckets,
-        min_new_targets=req.min_new_targets,
-        expected_baseline_buckets=req.expected_baseline_buckets,
-    )
-    return {"count": len(signals), "signals": [s.__dict__ for s in signals]}
+async def eval_0401(
+    req: Eval0401Request,
+    request: Request,
+    started: Clock = Depends(request_clock),
+    profile: Optional[ProfileOptions] = Depends(profile_request),
+    media: str = Depends(accepted_media),
+) -> Response:
+    return await evaluate("0401", detection_runner("0401"), req, request, started, profile, media)
 
 
 # ------------------------
@@ -69,6 +173,11 @@ def eval_0401(req: Eval0401Request) -> dict:
 class Eval0402Request(BaseModel):
     baseline: List[AuthBucketFeatures] = Field(default_factory=list)
     observation: List[AuthBucketFeatures] = Field(default_factory=list)
+    # Reference to a baseline uploaded via POST /evaluate/baselines/{detection}; replaces `baseline`
+    baseline_id: Optional[str] = None
+    # Columnar alternatives to `baseline` / `observation`: {field: [values, ...]}
+    baseline_columns: Optional[Columns] = None
+    observation_columns: Optional[Columns] = None
     drift_ratio_threshold: float = 2.5
     sustained_buckets: int = 3
     min_users: int = 10
@@ -77,18 +186,14 @@ class Eval0402Request(BaseModel):
 
 
 @router.post("/0402")
-def eval_0402(req: Eval0402Request) -> dict:
-    baselines = compute_auth_baseline_stats(req.baseline)
-    signals = evaluate_pde_spl_0402(
-        req.observation,
-        baselines,
-        drift_ratio_threshold=req.drift_ratio_threshold,
-        sustained_buckets=req.sustained_buckets,
-        min_users=req.min_users,
-        expected_baseline_buckets=req.expected_baseline_buckets,
-        min_baseline_buckets=req.min_baseline_buckets,
-    )
-    return {"count": len(signals), "signals": [s.__dict__ for s in signals]}
+async def eval_0402(
+    req: Eval0402Request,
+    request: Request,
+    started: Clock = Depends(request_clock),
+    profile: Optional[ProfileOptions] = Depends(profile_request),
+    media: str = Depends(accepted_media),
+) -> Response:
+    return await evaluate("0402", detection_runner("0402"), req, request, started, profile, media)
 
 
 # ------------------------
@@ -98,6 +203,11 @@ def eval_0402(req: Eval0402Request) -> dict:
 class Eval0403Request(BaseModel):
     baseline: List[PersistenceBucketFeatures] = Field(default_factory=list)
     observation: List[PersistenceBucketFeatures] = Field(default_factory=list)
+    # Reference to a baseline uploaded via POST /evaluate/baselines/{detection}; replaces `baseline`
+    baseline_id: Optional[str] = None
+    # Columnar alternatives to `baseline` / `observation`: {field: [values, ...]}
+    baseline_columns: Optional[Columns] = None
+    observation_columns: Optional[Columns] = None
     drift_ratio_threshold: float = 2.5
     sustained_buckets: int = 3
     min_unique_artifacts: int = 2
@@ -106,18 +216,14 @@ class Eval0403Request(BaseModel):
 
 
 @router.post("/0403")
-def eval_0403(req: Eval0403Request) -> dict:
-    baselines = compute_persistence_baseline_stats(req.baseline)
-    signals = evaluate_pde_spl_0403(
-        req.observation,
-        baselines,
-        drift_ratio_threshold=req.drift_ratio_threshold,
-        sustained_buckets=req.sustained_buckets,
-        min_unique_artifacts=req.min_unique_artifacts,
-        expected_baseline_buckets=req.expected_baseline_buckets,
-        min_baseline_buckets=req.min_baseline_buckets,
-    )
-    return {"count": len(signals), "signals": [s.__dict__ for s in signals]}
+async def eval_0403(
+    req: Eval0403Request,
+    request: Request,
+    started: Clock = Depends(request_clock),
+    profile: Optional[ProfileOptions] = Depends(profile_request),
+    media: str = Depends(accepted_media),
+) -> Response:
+    return await evaluate("0403", detection_runner("0403"), req, request, started, profile, media)
 
 
 # ------------------------
@@ -127,6 +233,11 @@ def eval_0403(req: Eval0403Request) -> dict:
 class Eval0404Request(BaseModel):
     baseline: List[StagingBucketFeatures] = Field(default_factory=list)
     observation: List[StagingBucketFeatures] = Field(default_factory=list)
+    # Reference to a baseline uploaded via POST /evaluate/baselines/{detection}; replaces `baseline`
+    baseline_id: Optional[str] = None
+    # Columnar alternatives to `baseline` / `observation`: {field: [values, ...]}
+    baseline_columns: Optional[Columns] = None
+    observation_columns: Optional[Columns] = None
     drift_ratio_threshold: float = 2.5
     sustained_buckets: int = 3
     min_unique_artifacts: int = 2
@@ -135,18 +246,14 @@ class Eval0404Request(BaseModel):
 
 
 @router.post("/0404")
-def eval_0404(req: Eval0404Request) -> dict:
-    baselines = compute_staging_baseline_stats(req.baseline)
-    signals = evaluate_pde_spl_0404(
-        req.observation,
-        baselines,
-        drift_ratio_threshold=req.drift_ratio_threshold,
-        sustained_buckets=req.sustained_buckets,
-        min_unique_artifacts=req.min_unique_artifacts,
-        expected_baseline_buckets=req.expected_baseline_buckets,
-        min_baseline_buckets=req.min_baseline_buckets,
-    )
-    return {"count": len(signals), "signals": [s.__dict__ for s in signals]}
+async def eval_0404(
+    req: Eval0404Request,
+    request: Request,
+    started: Clock = Depends(request_clock),
+    profile: Optional[ProfileOptions] = Depends(profile_request),
+    media: str = Depends(accepted_media),
+) -> Response:
+    return await evaluate("0404", detection_runner("0404"), req, request, started, profile, media)
 
 
 # ------------------------
@@ -156,6 +263,11 @@ def eval_0404(req: Eval0404Request) -> dict:
 class Eval0405Request(BaseModel):
     baseline: List[AdminToolingBucketFeatures] = Field(default_factory=list)
     observation: List[AdminToolingBucketFeatures] = Field(default_factory=list)
+    # Reference to a baseline uploaded via POST /evaluate/baselines/{detection}; replaces `baseline`
+    baseline_id: Optional[str] = None
+    # Columnar alternatives to `baseline` / `observation`: {field: [values, ...]}
+    baseline_columns: Optional[Columns] = None
+    observation_columns: Optional[Columns] = None
     drift_ratio_threshold: float = 2.5
     sustained_buckets: int = 3
     min_unique_tools: int = 2
@@ -164,15 +276,155 @@ class Eval0405Request(BaseModel):
 
 
 @router.post("/0405")
-def eval_0405(req: Eval0405Request) -> dict:
-    baselines = compute_admin_tooling_baseline_stats(req.baseline)
-    signals = evaluate_pde_spl_0405(
-        req.observation,
-        baselines,
-        drift_ratio_threshold=req.drift_ratio_threshold,
-        sustained_buckets=req.sustained_buckets,
-        min_unique_tools=req.min_unique_tools,
-        expected_baseline_buckets=req.expected_baseline_buckets,
-        min_baseline_buckets=req.min_baseline_buckets,
-    )
-    return {"count": len(signals), "signals": [s.__dict__ for s in signals]}
+async def eval_0405(
+    req: Eval0405Request,
+    request: Request,
+    started: Clock = Depends(request_clock),
+    profile: Optional[ProfileOptions] = Depends(profile_request),
+    media: str = Depends(accepted_media),
+) -> Response:
+    return await evaluate("0405", detection_runner("0405"), req, request, started, profile, media)
+
+
+# ------------------------
+# Batch: several detections in one request
+# ------------------------
+
+class EvalBatchRequest(BaseModel):
+    """
+    Feature payloads keyed by detection number; omit detections you don't need.
+    """
+    model_config = ConfigDict(populate_by_name=True)
+
+    d0401: Optional[Eval0401Request] = Field(default=None, alias="0401")
+    d0402: Optional[Eval0402Request] = Field(default=None, alias="0402")
+    d0403: Optional[Eval0403Request] = Field(default=None, alias="0403")
+    d0404: Optional[Eval0404Request] = Field(default=None, alias="0404")
+    d0405: Optional[Eval0405Request] = Field(default=None, alias="0405")
+
+
+@router.post("/batch")
+async def eval_batch(
+    req: EvalBatchRequest,
+    request: Request,
+    started: Clock = Depends(request_clock),
+    profile: Optional[ProfileOptions] = Depends(profile_request),
+    media: str = Depends(accepted_media),
+) -> Response:
+    """
+    Evaluate every detection present in the request concurrently (one
+    worker-pool slot each) and return one combined response:
+    {"count": total, "results": {"0401": {...}, ...}}. With
+    Accept: application/x-ndjson the signals of all detections are streamed
+    one per line instead.
+    """
+    validation = since(started)
+    metrics.observe(STAGE_SECONDS, validation[0], detection="batch", stage="validation")
+    jobs = {key: getattr(req, f"d{key}") for key in BASELINE_MODELS if getattr(req, f"d{key}") is not None}
+    runners = {key: detection_runner(key) for key in jobs}
+    call = instrumented if profile is None else partial(profiled, profile)
+    baselines = {key: cached_baseline(key, payload) for key, payload in jobs.items()}
+
+    async def run() -> dict:
+        calls = [(call, (runners[key], payload, stats_of(baselines[key]))) for key, payload in jobs.items()]
+        try:
+            outputs = await evaluation_pool.run_many(calls)
+        except Exception:
+            for key in jobs:
+                metrics.inc(EVALUATION_ERRORS, detection=key)
+            raise
+        results = {}
+        for key, (result, record) in zip(jobs.keys(), outputs):
+            observe_run(key, record)
+            if profile is not None:
+                # Validation of the whole batch body is reported on each detection
+                add_validation(record, validation)
+                result["profile"] = profile_report(record)
+            results[key] = result
+        return {"count": sum(r["count"] for r in results.values()), "results": results}
+
+    result, hit = await idempotent(request, "batch", list(baselines.values()), profile, run)
+    return mark_cache(render_result(media, result, on_encoded=serialize_observer("batch")), hit)
+
+
+# ------------------------
+# Baseline upload / cache
+# ------------------------
+
+BASELINE_MODELS: Dict[str, Any] = {
+    "0401": Eval0401Request,
+    "0402": Eval0402Request,
+    "0403": Eval0403Request,
+    "0404": Eval0404Request,
+    "0405": Eval0405Request,
+}
+
+
+def _uploaded(entry: CachedBaseline, cached: bool, alias: Optional[str]) -> dict:
+    out = {"baseline_id": entry.baseline_id, "entities": len(entry.stats), "cached": cached}
+    if alias is not None:
+        current = baseline_cache.set_alias(alias, entry)
+        out.update(alias=current.alias, generation=current.generation)
+    return out
+
+
+@router.post("/baselines/{detection}")
+async def upload_baseline(
+    detection: str,
+    request: Request,
+    alias: Optional[str] = Query(None, description="Point this alias at the uploaded baseline (new generation)"),
+) -> dict:
+    """
+    Upload {"baseline": [...]} (or {"baseline_columns": {...}}) once; returns a baseline_id (content hash) to
+    pass on later evaluate calls. Re-uploading identical bytes is a cache
+    hit and skips parsing entirely. With ?alias=, evaluate calls can pass
+    the alias as baseline_id and pick up each refreshed upload.
+    """
+    model = BASELINE_MODELS.get(detection)
+    if model is None or detection not in detection_registry:
+        raise HTTPException(status_code=404, detail=f"Unknown detection: {detection}")
+    if alias is not None:
+        try:
+            check_alias(alias)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from None
+        current = baseline_cache.alias(alias)
+        if current is not None and current.detection != detection:
+            raise HTTPException(status_code=400, detail=f"Alias {alias} belongs to {current.detection}, not {detection}")
+
+    body = await request.body()
+    baseline_id = baseline_id_for(detection, body)
+    entry = baseline_cache.get(baseline_id)
+    if entry is not None:
+        return _uploaded(entry, True, alias)
+
+    try:
+        req = model.model_validate_json(body)
+    except ValidationError as exc:
+        raise HTTPException(status_code=422, detail=exc.errors(include_url=False)) from None
+    stats = await evaluation_pool.run(detection_registry.baseline_builder(detection), req)
+    try:
+        entry = baseline_cache.put(baseline_id, detection, stats)
+    except ValueError as exc:
+        raise HTTPException(status_code=413, detail=str(exc)) from None
+    return _uploaded(entry, False, alias)
+
+
+@router.get("/baselines")
+def baseline_cache_stats() -> dict:
+    return baseline_cache.stats()
+
+
+@router.get("/baselines/aliases/{alias}")
+def baseline_alias(alias: str) -> dict:
+    current = baseline_cache.alias(alias)
+    if current is None:
+        raise HTTPException(status_code=404, detail=f"Unknown alias: {alias}")
+    return current.__dict__
+
+
+@router.delete("/baselines/{baseline_id}")
+def delete_baseline(baseline_id: str) -> dict:
+    if not baseline_cache.delete(baseline_id):
+        raise HTTPException(status_code=404, detail=f"Unknown baseline_id: {baseline_id}")
+    return {"baseline_id": baseline_id, "deleted": True}
@@ -0,0 +1,172 @@
+"""
+Start-up import report.
+
+src/api/main.py installs ImportTimer before anything else, so every
+module imported while the app is built is timed, like `python -X
+importtime` but available in a running server:
+
+  GET /startup   total import seconds before the app was ready, the
+                 slowest modules (self and cumulative), and modules
+                 imported later on first use (detection plugins, the
+                 ingest engine)
+
+The same summary is logged once when the server starts. The timer wraps
+module loaders (create_module/exec_module) and does nothing else, so it
+stays installed for the life of the process.
+"""
+from __future__ import annotations
+
+import importlib.abc
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+
+# Modules listed in the report, slowest first
+REPORT_TOP = 25
+
+
+class _TimedLoader(importlib.abc.Loader):
+    def __init__(self, loader: Any, timer: "ImportTimer") -> None:
+        self._loader = loader
+        self._timer = timer
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._loader, name)
+
+    def create_module(self, spec: Any) -> Any:
+        # Extension modules do their work here rather than in exec_module
+        with self._timer.timing(spec.name):
+            return self._loader.create_module(spec)
+
+    def exec_module(self, module: Any) -> None:
+        with self._timer.timing(module.__name__):
+            self._loader.exec_module(module)
+
+
+class _Timing:
+    __slots__ = ("timer", "name", "started", "children")
+
+    def __init__(self, timer: "ImportTimer", name: str) -> None:
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.children = 0.0
+        self.timer._stack().append(self)
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc: Any) -> None:
+        elapsed = time.perf_counter() - self.started
+        stack = self.timer._stack()
+        stack.pop()
+        if stack:
+            stack[-1].children += elapsed
+        self.timer._record(self.name, elapsed, elapsed - self.children)
+
+
+class ImportTimer(importlib.abc.MetaPathFinder):
+    """
+    Meta path finder that times the loaders of every module it sees found.
+    """
+
+    def __init__(self) -> None:
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # name -> [cumulative seconds, self seconds, after_ready]
+        self.modules: Dict[str, List[Any]] = {}
+        self.installed_at: Optional[float] = None
+        self.ready_at: Optional[float] = None
+
+    def install(self) -> None:
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+            self.installed_at = time.perf_counter()
+
+    def mark_ready(self) -> None:
+        if self.ready_at is None:
+            self.ready_at = time.perf_counter()
+
+    def _stack(self) -> List[_Timing]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def timing(self, name: str) -> _Timing:
+        return _Timing(self, name)
+
+    def _record(self, name: str, cumulative: float, own: float) -> None:
+        with self._lock:
+            entry = self.modules.get(name)
+            if entry is None:
+                self.modules[name] = [cumulative, own, self.ready_at is not None]
+            else:
+                entry[0] += cumulative
+                entry[1] += own
+
+    def find_spec(self, fullname: str, path: Any = None, target: Any = None) -> Any:
+        if getattr(self._local, "finding", False):
+            return None
+        self._local.finding = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self._local.finding = False
+        if spec.loader is not None and hasattr(spec.loader, "exec_module") and not isinstance(spec.loader, _TimedLoader):
+            spec.loader = _TimedLoader(spec.loader, self)
+        return spec
+
+    # ------------------------
+    # Report
+    # ------------------------
+
+    def report(self, top: int = REPORT_TOP) -> Dict[str, Any]:
+        with self._lock:
+            items = [(name, c, s, late) for name, (c, s, late) in self.modules.items()]
+        startup = [i for i in items if not i[3]]
+        deferred = [i for i in items if i[3]]
+
+        def rows(selected: List[Any]) -> List[Dict[str, Any]]:
+            return [
+                {"module": name, "self_ms": round(s * 1000, 3), "cumulative_ms": round(c * 1000, 3)}
+                for name, c, s, _ in sorted(selected, key=lambda i: i[2], reverse=True)[:top]
+            ]
+
+        return {
+            "ready_seconds": (
+                round(self.ready_at - self.installed_at, 6)
+                if self.ready_at is not None and self.installed_at is not None
+                else None
+            ),
+            "startup_imports": {
+                "modules": len(startup),
+                "seconds": round(sum(s for _, _, s, _ in startup), 6),
+                "slowest": rows(startup),
+            },
+            "deferred_imports": {
+                "modules": len(deferred),
+                "seconds": round(sum(s for _, _, s, _ in deferred), 6),
+                "slowest": rows(deferred),
+            },
+        }
+
+    def summary(self, top: int = 5) -> str:
+        report = self.report(top)
+        imports = report["startup_imports"]
+        slowest = ", ".join(f"{r['module']} {r['self_ms']:.1f}ms" for r in imports["slowest"])
+        return (
+            f"imported {imports['modules']} modules in {imports['seconds'] * 1000:.1f} ms "
+            f"(ready after {(report['ready_seconds'] or 0) * 1000:.1f} ms); slowest: {slowest}"
+        )
+
+
+import_timer = ImportTimer()
@@ -0,0 +1,283 @@
+"""
+Live signal subscriptions.
+
+Clients subscribe once and get signals pushed as /ingest closes buckets,
+instead of polling the evaluate routes:
+
+  GET  /signals/stream   Server-Sent Events
+  WS   /signals/ws       WebSocket, one JSON message per event
+
+Both take the same filters: detection (repeatable; "0402" or
+"pde-spl-0402"), entity (repeatable), min_risk. They also take a
+per-subscriber buffer size and a policy for when the consumer falls
+behind and its buffer is full:
+
+  drop_oldest  (default) discard the oldest buffered signal
+  drop_newest  discard the incoming signal
+  disconnect   close the subscription as a slow consumer
+
+Dropped signals are reported to the client as a "dropped" event with a
+count, so a consumer knows it missed something.
+
+The hub is in-process: publish() runs on the event loop thread, and
+subscribers only see signals ingested by the same API worker process (the
+same holds for /ingest stream state).
+
+Configuration (environment):
+  PDE_SIGNAL_MAX_SUBSCRIBERS  concurrent subscriptions (default: 256)
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Deque, Dict, FrozenSet, Iterable, List, Optional, Set
+
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+
+from src.api.responses import dumps
+
+
+router = APIRouter(prefix="/signals", tags=["signals"])
+
+POLICIES = ("drop_oldest", "drop_newest", "disconnect")
+DEFAULT_BUFFER = 1024
+MAX_BUFFER = 65536
+# Idle connections get a heartbeat this often, which also detects dead peers
+HEARTBEAT_SECONDS = 15.0
+
+
+def _detection_key(detection: str) -> str:
+    d = detection.strip().lower()
+    return d if d.startswith("pde-") else f"pde-spl-{d}"
+
+
+@dataclass(frozen=True)
+class SignalFilter:
+    detections: FrozenSet[str] = frozenset()
+    entities: FrozenSet[str] = frozenset()
+    min_risk: int = 0
+
+    def matches(self, signal: Dict[str, Any]) -> bool:
+        if self.detections and str(signal.get("detection_id", "")).lower() not in self.detections:
+            return False
+        if self.entities and signal.get("entity_id") not in self.entities:
+            return False
+        return int(signal.get("risk_score") or 0) >= self.min_risk
+
+
+class Subscriber:
+    """
+    One client's filter and bounded buffer.
+    """
+
+    def __init__(self, signal_filter: SignalFilter, *, buffer: int = DEFAULT_BUFFER, policy: str = "drop_oldest") -> None:
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy {policy!r}; expected one of {POLICIES}")
+        self.filter = signal_filter
+        self.maxlen = int(buffer)
+        self.policy = policy
+        self.buffer: Deque[Dict[str, Any]] = deque()
+        self.delivered = 0
+        self.dropped = 0
+        self._unreported_drops = 0
+        self.closed_reason: Optional[str] = None
+        self._wake = asyncio.Event()
+
+    @property
+    def closed(self) -> bool:
+        return self.closed_reason is not None
+
+    def offer(self, signal: Dict[str, Any]) -> None:
+        if self.closed or not self.filter.matches(signal):
+            return
+        if len(self.buffer) >= self.maxlen:
+            if self.policy == "disconnect":
+                self.close("slow consumer: buffer full")
+                return
+            self.dropped += 1
+            self._unreported_drops += 1
+            if self.policy == "drop_newest":
+                return
+            self.buffer.popleft()
+        self.buffer.append(signal)
+        self._wake.set()
+
+    def close(self, reason: str) -> None:
+        if self.closed_reason is None:
+            self.closed_reason = reason
+        self._wake.set()
+
+    async def events(self) -> AsyncIterator[Dict[str, Any]]:
+        """
+        {"type": "signal" | "dropped" | "heartbeat" | "closed", ...} until
+        the subscription is closed.
+        """
+        while True:
+            if self._unreported_drops:
+                n, self._unreported_drops = self._unreported_drops, 0
+                yield {"type": "dropped", "count": n}
+            if self.buffer:
+                signal = self.buffer.popleft()
+                self.delivered += 1
+                yield {"type": "signal", "signal": signal}
+                continue
+            if self.closed:
+                yield {"type": "closed", "reason": self.closed_reason}
+                return
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield {"type": "heartbeat"}
+
+
+class SignalHub:
+    """
+    Fan-out of published signals to subscribers. Not thread-safe: publish
+    and subscribe from the event loop thread.
+    """
+
+    def __init__(self, *, max_subscribers: int = 256) -> None:
+        self.max_subscribers = int(max_subscribers)
+        self.subscribers: Set[Subscriber] = set()
+        self.published = 0
+
+    @classmethod
+    def from_env(cls) -> "SignalHub":
+        return cls(max_subscribers=int(os.environ.get("PDE_SIGNAL_MAX_SUBSCRIBERS") or 256))
+
+    def subscribe(self, signal_filter: SignalFilter, *, buffer: int, policy: str) -> Subscriber:
+        if len(self.subscribers) >= self.max_subscribers:
+            raise HTTPException(status_code=503, detail="Too many signal subscribers")
+        sub = Subscriber(signal_filter, buffer=buffer, policy=policy)
+        self.subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        self.subscribers.discard(sub)
+        sub.close("unsubscribed")
+
+    def publish(self, signals: Iterable[Dict[str, Any]]) -> None:
+        if not self.subscribers:
+            return
+        subs = list(self.subscribers)
+        for signal in signals:
+            self.published += 1
+            for sub in subs:
+                sub.offer(signal)
+        for sub in subs:
+            if sub.closed:
+                self.subscribers.discard(sub)
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self.subscribers),
+            "max_subscribers": self.max_subscribers,
+            "published": self.published,
+            "buffered": sum(len(s.buffer) for s in self.subscribers),
+            "dropped": sum(s.dropped for s in self.subscribers),
+        }
+
+
+signal_hub = SignalHub.from_env()
+
+
+# ------------------------
+# Routes
+# ------------------------
+
+@dataclass(frozen=True)
+class SubscriptionParams:
+    signal_filter: SignalFilter
+    buffer: int
+    policy: str
+
+
+def subscription_params(
+    detection: Optional[List[str]] = Query(None, description="Detection ids to receive, e.g. 0402"),
+    entity: Optional[List[str]] = Query(None, description="Entity ids (host, src_ip) to receive"),
+    min_risk: int = Query(0, ge=0, le=100),
+    buffer: int = Query(DEFAULT_BUFFER, ge=1, le=MAX_BUFFER, description="Signals buffered for this subscriber"),
+    policy: str = Query("drop_oldest", description="When the buffer is full: " + ", ".join(POLICIES)),
+) -> SubscriptionParams:
+    if policy not in POLICIES:
+        raise HTTPException(status_code=400, detail=f"Unknown policy {policy!r}; expected one of {list(POLICIES)}")
+    return SubscriptionParams(
+        signal_filter=SignalFilter(
+            detections=frozenset(_detection_key(d) for d in detection or ()),
+            entities=frozenset(entity or ()),
+            min_risk=min_risk,
+        ),
+        buffer=buffer,
+        policy=policy,
+    )
+
+
+def _sse(event: Dict[str, Any]) -> bytes:
+    kind = event["type"]
+    if kind == "heartbeat":
+        return b": heartbeat\n\n"
+    data = event["signal"] if kind == "signal" else {k: v for k, v in event.items() if k != "type"}
+    return b"event: " + kind.encode() + b"\ndata: " + dumps(data) + b"\n\n"
+
+
+@router.get("/stream")
+async def signal_stream(params: SubscriptionParams = Depends(subscription_params)) -> StreamingResponse:
+    """
+    Server-Sent Events: `event: signal` per matching signal, `event:
+    dropped` after buffer overflow, `event: closed` before the server ends
+    the stream.
+    """
+    sub = signal_hub.subscribe(params.signal_filter, buffer=params.buffer, policy=params.policy)
+
+    async def body() -> AsyncIterator[bytes]:
+        try:
+            async for event in sub.events():
+                yield _sse(event)
+        finally:
+            signal_hub.unsubscribe(sub)
+
+    return StreamingResponse(body(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+async def _until_disconnect(websocket: WebSocket) -> None:
+    # Client messages are ignored; this only notices the client going away
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
+
+
+@router.websocket("/ws")
+async def signal_socket(websocket: WebSocket, params: SubscriptionParams = Depends(subscription_params)) -> None:
+    """
+    WebSocket: one JSON text message per event, {"type": ..., ...}.
+    """
+    await websocket.accept()
+    try:
+        sub = signal_hub.subscribe(params.signal_filter, buffer=params.buffer, policy=params.policy)
+    except HTTPException as exc:
+        await websocket.close(code=1013, reason=str(exc.detail))
+        return
+    watcher = asyncio.create_task(_until_disconnect(websocket))
+    watcher.add_done_callback(lambda _: signal_hub.unsubscribe(sub))
+    try:
+        async for event in sub.events():
+            if event["type"] == "closed":
+                if not watcher.done():
+                    # Closed server-side (slow consumer), not by the client
+                    await websocket.send_text(dumps(event).decode("utf-8"))
+                    await websocket.close(code=1008, reason=event["reason"])
+                break
+            await websocket.send_text(dumps(event).decode("utf-8"))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        watcher.cancel()
+        signal_hub.unsubscribe(sub)
+
+
+@router.get("")
+def signal_hub_stats() -> dict:
+    return signal_hub.stats()
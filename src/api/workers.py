@@ -0,0 +1,236 @@
+"""
+Process pool for CPU-bound evaluation.
+
+Evaluation routes hand their runner (a module-level, picklable function) to
+EvaluationPool instead of running it on the event loop or FastAPI's thread
+pool, so the GIL no longer serializes evaluations and /health stays
+responsive under load.
+
+Configuration (environment):
+  PDE_EVAL_WORKERS          worker processes (default: CPU count; 0 = run in
+                            the thread pool, no subprocesses)
+  PDE_EVAL_MAX_PENDING      max evaluations queued or running before new
+                            ones get 429 (default: 4 x workers)
+  PDE_EVAL_TIMEOUT_SECONDS  per-evaluation timeout, 504 on expiry (default: 30)
+  PDE_EVAL_START_METHOD     multiprocessing start method (default: spawn)
+"""
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+
+Call = Tuple[Callable[..., Any], Tuple[Any, ...]]
+
+
+def _env_int(name: str, default: int) -> int:
+    raw = os.environ.get(name)
+    return int(raw) if raw not in (None, "") else default
+
+
+class EvaluationPool:
+    """
+    Bounded, timed dispatch of evaluation calls to worker processes.
+    """
+
+    def __init__(
+        self,
+        *,
+        workers: int,
+        max_pending: int,
+        timeout_seconds: float,
+        start_method: str = "spawn",
+    ) -> None:
+        if max_pending <= 0:
+            raise ValueError("max_pending must be > 0")
+        self.workers = max(0, int(workers))
+        self.max_pending = int(max_pending)
+        self.timeout_seconds = float(timeout_seconds)
+        self.start_method = start_method
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    @classmethod
+    def from_env(cls) -> "EvaluationPool":
+        workers = _env_int("PDE_EVAL_WORKERS", os.cpu_count() or 1)
+        return cls(
+            workers=workers,
+            max_pending=_env_int("PDE_EVAL_MAX_PENDING", 4 * max(1, workers)),
+            timeout_seconds=float(os.environ.get("PDE_EVAL_TIMEOUT_SECONDS") or 30),
+            start_method=os.environ.get("PDE_EVAL_START_METHOD") or "spawn",
+        )
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context(self.start_method),
+                    )
+        return self._executor
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    # ------------------------
+    # Admission
+    # ------------------------
+
+    def _reserve(self, n: int) -> None:
+        with self._lock:
+            if self._pending + n > self.max_pending:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=429,
+                    detail="Evaluation queue is full; retry shortly",
+                    headers={"Retry-After": "1"},
+                )
+            self._pending += n
+
+    def _release(self, outcome: Optional[str] = None) -> None:
+        """
+        Free one slot; outcome ("completed", "failed", "cancelled") is
+        counted if given. Calls that never reached a worker pass None.
+        """
+        with self._lock:
+            self._pending -= 1
+            if outcome == "completed":
+                self.completed += 1
+            elif outcome == "failed":
+                self.failed += 1
+            elif outcome == "cancelled":
+                self.cancelled += 1
+
+    def _release_future(self, cf: Future) -> None:
+        if cf.cancelled():
+            self._release("cancelled")
+        else:
+            self._release("failed" if cf.exception() is not None else "completed")
+
+    # ------------------------
+    # Dispatch
+    # ------------------------
+
+    def _claim(self, ticket: List[bool]) -> bool:
+        with self._lock:
+            if ticket:
+                ticket.pop()
+                return True
+            return False
+
+    def _submit_thread(self, fn: Callable[..., Any], args: Tuple[Any, ...]) -> "asyncio.Future[Any]":
+        # A thread cannot be interrupted, so the slot is freed by the thread
+        # when fn returns; freeing it when the caller gives up (504) would let
+        # timed-out work pile up behind the queue bound. Whichever of the
+        # thread and a cancellation before it started claims the ticket first
+        # releases the slot; a call cancelled before starting never runs.
+        ticket = [True]
+
+        def call() -> Any:
+            if not self._claim(ticket):
+                return None
+            try:
+                result = fn(*args)
+            except BaseException:
+                self._release("failed")
+                raise
+            self._release("completed")
+            return result
+
+        def cancelled_before_start(task: "asyncio.Future[Any]") -> None:
+            if task.cancelled() and self._claim(ticket):
+                self._release("cancelled")
+
+        task = asyncio.ensure_future(run_in_threadpool(call))
+        task.add_done_callback(cancelled_before_start)
+        return task
+
+    def _submit(self, fn: Callable[..., Any], args: Tuple[Any, ...]) -> "asyncio.Future[Any]":
+        if self.workers == 0:
+            return self._submit_thread(fn, args)
+        # The slot is released when the worker actually finishes (or the call
+        # is cancelled before starting), not when the caller stops waiting.
+        try:
+            cf: Future = self._get_executor().submit(fn, *args)
+        except (BrokenProcessPool, RuntimeError):
+            self._release()
+            self.shutdown()
+            raise HTTPException(status_code=503, detail="Evaluation pool unavailable; retry") from None
+        cf.add_done_callback(self._release_future)
+        return asyncio.wrap_future(cf)
+
+    async def _await(self, fut: "asyncio.Future[Any]") -> Any:
+        try:
+            return await asyncio.wait_for(fut, self.timeout_seconds)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise HTTPException(status_code=504, detail="Evaluation timed out") from None
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed); start a fresh pool for later calls
+            self.shutdown()
+            raise HTTPException(status_code=503, detail="Evaluation worker failed; retry") from None
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run fn(*args) in a worker. 429 if the queue is full, 504 on timeout.
+        """
+        self._reserve(1)
+        return await self._await(self._submit(fn, args))
+
+    async def run_many(self, calls: Sequence[Call]) -> List[Any]:
+        """
+        Run several calls concurrently; slots for all of them are reserved
+        up front so a batch is either admitted whole or rejected whole.
+        """
+        if not calls:
+            return []
+        self._reserve(len(calls))
+        futures: List["asyncio.Future[Any]"] = []
+        try:
+            for fn, args in calls:
+                futures.append(self._submit(fn, args))
+        except HTTPException:
+            # The failed call released its own slot; release the ones never submitted
+            for _ in range(len(calls) - len(futures) - 1):
+                self._release()
+            raise
+        return list(await asyncio.gather(*(self._await(f) for f in futures)))
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
+
+
+evaluation_pool = EvaluationPool.from_env()
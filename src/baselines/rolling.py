@@ -1,7 +1,8 @@
 from __future__ import annotations
 
+from collections import deque
 from dataclasses import dataclass
-from typing import Dict, Iterable, List, Optional
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
 import math
 
 from src.features.network_fanout import FanoutBucketFeatures
@@ -37,13 +38,19 @@ def compute_host_baseline_stats(
     """
     Compute baseline statistics per host.
     """
-    by_host: Dict[str, List[FanoutBucketFeatures]] = {}
+    by_host: Dict[str, List[float]] = {}
     for r in baseline_buckets:
-        by_host.setdefault(r.host, []).append(r)
+        by_host.setdefault(r.host, []).append(float(r.internal_dest_count))
+    return host_baseline_stats_from_values(by_host)
 
+
+def host_baseline_stats_from_values(by_host: Dict[str, List[float]]) -> Dict[str, BaselineStats]:
+    """
+    Baseline statistics from already-grouped internal_dest_count values
+    (e.g. straight from a columnar payload).
+    """
     stats: Dict[str, BaselineStats] = {}
-    for host, rows in by_host.items():
-        values = [float(r.internal_dest_count) for r in rows]
+    for host, values in by_host.items():
         avg = _mean(values)
         std = _std(values, avg)
 
@@ -94,6 +101,66 @@ def apply_baseline_to_observation(
     return output
 
 
+class RollingWindowStats:
+    """
+    Incrementally maintained mean/std over a trailing time window of buckets.
+
+    Matches compute_host_baseline_stats semantics: only buckets that were
+    pushed (i.e. had activity) count towards bucket_count, mean and std.
+    push() and expire() are amortized O(1), so replay/streaming callers can
+    keep a 30d baseline per entity without recomputing it every bucket.
+    """
+
+    __slots__ = ("window_seconds", "_rows", "_sum", "_sumsq")
+
+    def __init__(self, window_seconds: int) -> None:
+        if window_seconds <= 0:
+            raise ValueError("window_seconds must be > 0")
+        self.window_seconds = int(window_seconds)
+        self._rows: Deque[Tuple[int, float]] = deque()
+        self._sum = 0.0
+        self._sumsq = 0.0
+
+    def push(self, bucket_start: int, value: float) -> None:
+        v = float(value)
+        self._rows.append((int(bucket_start), v))
+        self._sum += v
+        self._sumsq += v * v
+
+    def expire(self, now: int) -> None:
+        """
+        Drop buckets older than the window ending (exclusively) at `now`.
+        """
+        cutoff = int(now) - self.window_seconds
+        rows = self._rows
+        while rows and rows[0][0] < cutoff:
+            _, v = rows.popleft()
+            self._sum -= v
+            self._sumsq -= v * v
+        if not rows:
+            # Reset accumulated float error whenever the window empties
+            self._sum = 0.0
+            self._sumsq = 0.0
+
+    @property
+    def bucket_count(self) -> int:
+        return len(self._rows)
+
+    @property
+    def mean(self) -> float:
+        n = len(self._rows)
+        return self._sum / float(n) if n else 0.0
+
+    @property
+    def std(self) -> float:
+        n = len(self._rows)
+        if not n:
+            return 0.0
+        mean = self._sum / float(n)
+        var = max(0.0, self._sumsq / float(n) - mean * mean)
+        return float(math.sqrt(var))
+
+
 def baseline_completeness_score(
     baseline: Optional[BaselineStats],
     expected_buckets: int,
@@ -0,0 +1,273 @@
+"""
+Read-optimized, memory-mapped baseline stats tables.
+
+A table is one immutable file holding {entity: stats dataclass} for one
+detection. Put the files on tmpfs (e.g. /dev/shm), and every process that
+maps them (API workers and evaluation workers) shares one copy of the
+pages. Lookups read straight out of the mapping:
+
+  magic "PDEB" | u32 header length | JSON header
+  u32 key offsets[n + 1] | UTF-8 key blob (entities, sorted bytewise)
+  fixed-size records[n] (struct format from the header)
+
+A lookup is a binary search over the sorted keys, then one
+struct.unpack_from. Tables are written to a temp file and os.replace()d
+into place, so readers never see a partial table.
+
+SharedStatsTable is a read-only Mapping, so evaluators use it exactly like
+the dict that compute_*_baseline_stats returns. It pickles as its path,
+so handing one to a worker process costs a path string plus one mmap on
+the other side. If the file was removed in between (evicted by another
+process), the worker gets a placeholder that raises TableEvicted when
+read, rather than failing to unpickle (which would take down the pool).
+"""
+from __future__ import annotations
+
+import importlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+from collections import OrderedDict
+from dataclasses import fields, is_dataclass
+from pathlib import Path
+from typing import Any, Iterator, Mapping, Optional, Tuple, Type, Union, get_type_hints
+
+from src.baselines.rolling import BaselineStats
+
+
+MAGIC = b"PDEB"
+VERSION = 1
+
+# Per-process cache of open tables by path, so repeated evaluations in a
+# worker reuse the mapping instead of reopening the file
+MAX_OPEN_TABLES = 64
+_OPEN: "OrderedDict[str, SharedStatsTable]" = OrderedDict()
+
+
+def _type_ref(stats_type: type) -> str:
+    return f"{stats_type.__module__}:{stats_type.__qualname__}"
+
+
+def _load_type(ref: str) -> type:
+    """
+    Stats dataclass named by a table header, imported on demand so opening
+    a table only loads the evaluator it belongs to.
+    """
+    module_name, _, qualname = ref.partition(":")
+    if not module_name.startswith("src.") or not qualname.isidentifier():
+        raise ValueError(f"Unsupported stats type {ref!r}")
+    stats_type = getattr(importlib.import_module(module_name), qualname)
+    if not is_dataclass(stats_type):
+        raise ValueError(f"Unsupported stats type {ref!r}")
+    return stats_type
+
+
+def _layout(stats_type: type) -> Tuple[str, Tuple[str, ...], str]:
+    """
+    (key field, value fields, struct format) of a stats dataclass: the first
+    field is the entity key, the rest are ints ("q") or floats ("d").
+    """
+    hints = get_type_hints(stats_type)
+    names = tuple(f.name for f in fields(stats_type))
+    fmt = "<" + "".join("q" if hints[n] is int else "d" for n in names[1:])
+    return names[0], names[1:], fmt
+
+
+def write_table(path: Union[str, Path], detection: str, stats: Mapping[str, Any]) -> int:
+    """
+    Atomically write stats to path; returns the file size.
+    """
+    path = Path(path)
+    items = sorted(stats.items(), key=lambda kv: kv[0].encode("utf-8"))
+    if items:
+        stats_type = type(items[0][1])
+    else:
+        stats_type = BaselineStats
+    if not is_dataclass(stats_type) or not stats_type.__module__.startswith("src."):
+        raise ValueError(f"Unsupported stats type {stats_type.__name__}")
+    key_field, value_fields, fmt = _layout(stats_type)
+
+    keys = [k.encode("utf-8") for k, _ in items]
+    offsets = [0]
+    for k in keys:
+        offsets.append(offsets[-1] + len(k))
+    key_blob = b"".join(keys)
+    record = struct.Struct(fmt)
+    values = bytearray(record.size * len(items))
+    for i, (_, s) in enumerate(items):
+        record.pack_into(values, i * record.size, *(getattr(s, n) for n in value_fields))
+
+    header = {
+        "version": VERSION,
+        "detection": detection,
+        "stats_type": _type_ref(stats_type),
+        "key_field": key_field,
+        "value_fields": list(value_fields),
+        "format": fmt,
+        "count": len(items),
+    }
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    body = [
+        MAGIC,
+        struct.pack("<I", len(header_bytes)),
+        header_bytes,
+        struct.pack(f"<{len(offsets)}I", *offsets),
+        key_blob,
+    ]
+    # Align records to 8 bytes
+    used = sum(len(b) for b in body)
+    body.append(b"\0" * (-used % 8))
+    body.append(bytes(values))
+
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-", suffix=path.suffix)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for b in body:
+                f.write(b)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+    return path.stat().st_size
+
+
+class TableEvicted(LookupError):
+    """
+    A table file was removed before this process could map it.
+    """
+
+    def __init__(self, path: str) -> None:
+        super().__init__(path)
+        self.path = path
+
+    def __str__(self) -> str:
+        return f"Baseline table {self.path} was evicted"
+
+
+class SharedStatsTable(Mapping):
+    """
+    Read-only {entity: stats} view over a mapped table file.
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = str(path)
+        with open(self.path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            self._mm = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+        mm = self._mm
+        if mm[:4] != MAGIC:
+            raise ValueError(f"{self.path} is not a baseline table")
+        (hlen,) = struct.unpack_from("<I", mm, 4)
+        header = json.loads(mm[8 : 8 + hlen])
+        if header.get("version") != VERSION:
+            raise ValueError(f"{self.path}: unsupported table version {header.get('version')}")
+        self.detection: str = header["detection"]
+        self.stats_type: Type[Any] = _load_type(header["stats_type"])
+        self._n = int(header["count"])
+        self._record = struct.Struct(header["format"])
+
+        pos = 8 + hlen
+        self._offsets = memoryview(mm)[pos : pos + 4 * (self._n + 1)].cast("I")
+        pos += 4 * (self._n + 1)
+        self._keys_at = pos
+        pos += self._offsets[self._n] if self._n else 0
+        self._values_at = pos + (-pos % 8)
+        self.nbytes = size
+
+    def __reduce__(self):
+        return (_unpickle_table, (self.path,))
+
+    def _key(self, i: int) -> bytes:
+        start = self._keys_at + self._offsets[i]
+        return self._mm[start : self._keys_at + self._offsets[i + 1]]
+
+    def _find(self, key: str) -> int:
+        target = key.encode("utf-8")
+        lo, hi = 0, self._n
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._n and self._key(lo) == target:
+            return lo
+        return -1
+
+    def _stats(self, i: int, key: str) -> Any:
+        values = self._record.unpack_from(self._mm, self._values_at + i * self._record.size)
+        return self.stats_type(key, *values)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if not isinstance(key, str):
+            return default
+        i = self._find(key)
+        return default if i < 0 else self._stats(i, key)
+
+    def __getitem__(self, key: str) -> Any:
+        i = self._find(key) if isinstance(key, str) else -1
+        if i < 0:
+            raise KeyError(key)
+        return self._stats(i, key)
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self._find(key) >= 0
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(self._n):
+            yield self._key(i).decode("utf-8")
+
+    def __len__(self) -> int:
+        return self._n
+
+
+def open_table(path: Union[str, Path]) -> SharedStatsTable:
+    """
+    Open (or reuse this process's mapping of) a table file.
+    """
+    key = str(path)
+    table = _OPEN.get(key)
+    if table is not None:
+        _OPEN.move_to_end(key)
+        return table
+    table = _OPEN[key] = SharedStatsTable(key)
+    while len(_OPEN) > MAX_OPEN_TABLES:
+        _OPEN.popitem(last=False)
+    return table
+
+
+class _EvictedTable(Mapping):
+    """
+    Stands in for a table whose file is gone; raises TableEvicted when read.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def __getitem__(self, key: str) -> Any:
+        raise TableEvicted(self.path)
+
+    def __iter__(self) -> Iterator[str]:
+        raise TableEvicted(self.path)
+
+    def __len__(self) -> int:
+        raise TableEvicted(self.path)
+
+
+def _unpickle_table(path: str) -> Mapping:
+    try:
+        return open_table(path)
+    except FileNotFoundError:
+        return _EvictedTable(path)
+
+
+def forget_table(path: Union[str, Path]) -> Optional[SharedStatsTable]:
+    """
+    Drop this process's cached mapping (the file itself is untouched).
+    """
+    return _OPEN.pop(str(path), None)
@@ -1,8 +1,323 @@
 """
-Phase 2.2 placeholder: allowlists and suppression.
+Phase 2.2: allowlists and suppression.
 
-Planned responsibilities:
-- host allowlists (jump hosts, management servers)
-- tool allowlists (backup/orchestration/EDR)
-- maintenance window suppression hooks
+Suppression is applied to raw events *before* feature extraction, so that
+allowlisted scanners, jump hosts and backup servers never create bucket state
+(and therefore never skew baselines either).
+
+Rule file format (YAML):
+
+    host_allowlist:
+      - id: jump-hosts
+        hosts: [jump01, jump02]
+        patterns: ['^backup-\\d+\\.corp$']
+        detections: [pde-spl-0401, pde-spl-0405]   # optional, default: all
+    cidr_allowlist:
+      - id: vuln-scanners
+        cidrs: [10.20.0.0/24, 192.168.50.10/32]
+        fields: [host, src_ip]                      # optional, default: host, src_ip
+    tool_allowlist:
+      - id: backup-agent
+        tools: [veeam.backup.agent.exe]             # process basename, case-insensitive
+        patterns: ['\\bsccm\\b']                   # matched against process + command line
+        detections: [pde-spl-0404]
+    exceptions:
+      - id: build-server-archives
+        detection: pde-spl-0404
+        match:                                      # all fields must match (regex, case-insensitive)
+          host: '^build\\d+$'
+          file_path: '\\\\artifacts\\\\'
+
+Rules compile into hashed sets (hosts/tools), an integer interval index per
+field (CIDRs) and compiled regexes, grouped by detection scope. The compiled
+rule set is swapped atomically on reload, so readers never see a partial one.
 """
+from __future__ import annotations
+
+import ipaddress
+import re
+import socket
+import struct
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Pattern, Tuple, Union
+
+from src.engine.intervals import IntervalIndex
+from src.engine.reloadable import CHECK_INTERVAL, ReloadableFile
+
+
+GLOBAL_SCOPE = "*"
+DEFAULT_CIDR_FIELDS: Tuple[str, ...] = ("host", "src_ip")
+
+_V4 = struct.Struct("!I")
+
+
+def ip_to_int(value: str) -> Optional[Tuple[int, int]]:
+    """
+    Parse an IP string into (version, integer). Returns None if not an IP.
+    """
+    if not value:
+        return None
+    if ":" in value:
+        try:
+            return 6, int(ipaddress.IPv6Address(value))
+        except ValueError:
+            return None
+    # Fast path: dotted-quad IPv4 without constructing ipaddress objects
+    if value.count(".") != 3:
+        return None
+    try:
+        return 4, _V4.unpack(socket.inet_aton(value))[0]
+    except OSError:
+        return None
+
+
+class CidrIndex:
+    """
+    Integer interval index over CIDR ranges (one IntervalIndex per IP version).
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, str]] = ()) -> None:
+        by_version: Dict[int, List[Tuple[int, int, str]]] = {}
+        for cidr, owner in entries:
+            net = ipaddress.ip_network(str(cidr).strip(), strict=False)
+            start = int(net.network_address)
+            end = int(net.broadcast_address) + 1
+            by_version.setdefault(net.version, []).append((start, end, owner))
+        self._tables: Dict[int, IntervalIndex[str]] = {v: IntervalIndex(r) for v, r in by_version.items()}
+
+    def __bool__(self) -> bool:
+        return bool(self._tables)
+
+    def lookup(self, value: str) -> Optional[str]:
+        parsed = ip_to_int(value)
+        if parsed is None:
+            return None
+        table = self._tables.get(parsed[0])
+        if table is None:
+            return None
+        return table.stab(parsed[1])
+
+
+def _compile_patterns(patterns: Iterable[str]) -> Optional[Pattern[str]]:
+    pats = [p for p in (patterns or []) if p]
+    if not pats:
+        return None
+    return re.compile("|".join(f"(?:{p})" for p in pats), re.IGNORECASE)
+
+
+def _basename(process: str) -> str:
+    p = process.replace("\\", "/")
+    return p.rsplit("/", 1)[-1].lower()
+
+
+class _ScopeRules:
+    """
+    Compiled rules for one detection scope (or the global scope).
+    """
+
+    def __init__(self) -> None:
+        self.hosts: Dict[str, str] = {}
+        self.host_patterns: List[Tuple[str, Pattern[str]]] = []
+        self.cidr_entries: Dict[str, List[Tuple[str, str]]] = {}
+        self.cidrs: Dict[str, CidrIndex] = {}
+        self.tools: Dict[str, str] = {}
+        self.tool_patterns: List[Tuple[str, Pattern[str]]] = []
+        self.exceptions: List[Tuple[str, List[Tuple[str, Pattern[str]]]]] = []
+
+    def finalize(self) -> None:
+        self.cidrs = {f: CidrIndex(entries) for f, entries in self.cidr_entries.items()}
+        self.cidr_entries = {}
+
+    def match(self, event: Dict, host_field: str, process_field: str, cmd_field: str) -> Optional[str]:
+        if self.hosts or self.host_patterns:
+            host = str(event.get(host_field) or "").strip().lower()
+            if host:
+                rid = self.hosts.get(host)
+                if rid is not None:
+                    return rid
+                for rid, pat in self.host_patterns:
+                    if pat.search(host):
+                        return rid
+
+        for fld, index in self.cidrs.items():
+            v = event.get(fld)
+            if v:
+                rid = index.lookup(str(v).strip())
+                if rid is not None:
+                    return rid
+
+        if self.tools or self.tool_patterns:
+            proc = str(event.get(process_field) or "").strip()
+            if proc and self.tools:
+                rid = self.tools.get(_basename(proc))
+                if rid is not None:
+                    return rid
+            if self.tool_patterns:
+                text = f"{proc} {event.get(cmd_field) or ''}"
+                for rid, pat in self.tool_patterns:
+                    if pat.search(text):
+                        return rid
+
+        for rid, conds in self.exceptions:
+            for fld, pat in conds:
+                v = event.get(fld)
+                if v is None or not pat.search(str(v)):
+                    break
+            else:
+                return rid
+
+        return None
+
+
+def _scopes_for(rule: Dict[str, Any]) -> List[str]:
+    dets = rule.get("detections")
+    if rule.get("detection"):
+        dets = [rule["detection"]]
+    if not dets:
+        return [GLOBAL_SCOPE]
+    return [str(d).strip().lower() for d in dets]
+
+
+def compile_rules(doc: Optional[Dict[str, Any]]) -> Dict[str, _ScopeRules]:
+    """
+    Compile a suppression rule document into per-scope rule sets.
+    """
+    doc = doc or {}
+    scopes: Dict[str, _ScopeRules] = {}
+
+    def scope(name: str) -> _ScopeRules:
+        if name not in scopes:
+            scopes[name] = _ScopeRules()
+        return scopes[name]
+
+    for i, rule in enumerate(doc.get("host_allowlist") or []):
+        rid = str(rule.get("id") or f"host_allowlist[{i}]")
+        pat = _compile_patterns(rule.get("patterns") or [])
+        for s in _scopes_for(rule):
+            sr = scope(s)
+            for h in rule.get("hosts") or []:
+                sr.hosts.setdefault(str(h).strip().lower(), rid)
+            if pat is not None:
+                sr.host_patterns.append((rid, pat))
+
+    for i, rule in enumerate(doc.get("cidr_allowlist") or []):
+        rid = str(rule.get("id") or f"cidr_allowlist[{i}]")
+        fields = rule.get("fields") or list(DEFAULT_CIDR_FIELDS)
+        for s in _scopes_for(rule):
+            sr = scope(s)
+            for fld in fields:
+                entries = sr.cidr_entries.setdefault(str(fld), [])
+                entries.extend((str(c), rid) for c in rule.get("cidrs") or [])
+
+    for i, rule in enumerate(doc.get("tool_allowlist") or []):
+        rid = str(rule.get("id") or f"tool_allowlist[{i}]")
+        pat = _compile_patterns(rule.get("patterns") or [])
+        for s in _scopes_for(rule):
+            sr = scope(s)
+            for t in rule.get("tools") or []:
+                sr.tools.setdefault(_basename(str(t).strip()), rid)
+            if pat is not None:
+                sr.tool_patterns.append((rid, pat))
+
+    for i, rule in enumerate(doc.get("exceptions") or []):
+        rid = str(rule.get("id") or f"exceptions[{i}]")
+        match = rule.get("match") or {}
+        if not match:
+            raise ValueError(f"Suppression exception {rid} has no match conditions")
+        conds = [(str(f), re.compile(str(p), re.IGNORECASE)) for f, p in match.items()]
+        for s in _scopes_for(rule):
+            scope(s).exceptions.append((rid, conds))
+
+    for sr in scopes.values():
+        sr.finalize()
+    return scopes
+
+
+class SuppressionEngine(ReloadableFile):
+    """
+    Compiled, hot-reloadable allowlist/suppression rules with per-rule hit
+    counters. poll() picks up edits to the rule file (see ReloadableFile).
+    """
+
+    file_kind = "suppression rules"
+
+    def __init__(
+        self,
+        path: Optional[Union[str, Path]] = None,
+        *,
+        rules: Optional[Dict[str, Any]] = None,
+        host_field: str = "host",
+        process_field: str = "process_name",
+        cmd_field: str = "command_line",
+        check_interval: float = CHECK_INTERVAL,
+    ) -> None:
+        self._init_reload(path, check_interval)
+        self.host_field = host_field
+        self.process_field = process_field
+        self.cmd_field = cmd_field
+        self.hits: Dict[str, int] = {}
+        self._scopes: Dict[str, _ScopeRules] = {}
+
+        if rules is not None:
+            self.load(rules)
+        elif self.path is not None:
+            self.reload()
+
+    def load(self, doc: Optional[Dict[str, Any]]) -> None:
+        compiled = compile_rules(doc)
+        # Single attribute swap: concurrent readers see either the old or the new rule set
+        self._scopes = compiled
+
+    def match(self, event: Dict, detection_id: Optional[str] = None) -> Optional[str]:
+        """
+        Return the id of the first rule suppressing this event for the
+        detection, or None. Hit counters are updated on match.
+        """
+        scopes = self._scopes
+        if not scopes:
+            return None
+        rid = None
+        sr = scopes.get(GLOBAL_SCOPE)
+        if sr is not None:
+            rid = sr.match(event, self.host_field, self.process_field, self.cmd_field)
+        if rid is None and detection_id is not None:
+            sr = scopes.get(detection_id.lower())
+            if sr is not None:
+                rid = sr.match(event, self.host_field, self.process_field, self.cmd_field)
+        if rid is not None:
+            self.hits[rid] = self.hits.get(rid, 0) + 1
+        return rid
+
+    def filter_events(self, events: Iterable[Dict], detection_id: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Yield only events not suppressed for the detection. Wrap extractor
+        inputs with this, e.g. extract_fanout_bucket_features(engine.filter_events(evts, "pde-spl-0401")).
+        """
+        for e in events:
+            if self.match(e, detection_id) is None:
+                yield e
+
+    def hit_counts(self) -> Dict[str, int]:
+        return dict(sorted(self.hits.items()))
+
+    def reset_counters(self) -> None:
+        self.hits = {}
+
+
+if __name__ == "__main__":
+    engine = SuppressionEngine(
+        rules={
+            "host_allowlist": [{"id": "jump-hosts", "hosts": ["jump01"]}],
+            "cidr_allowlist": [{"id": "scanners", "cidrs": ["10.20.0.0/24"]}],
+            "tool_allowlist": [{"id": "backup", "tools": ["veeam.exe"], "detections": ["pde-spl-0405"]}],
+        }
+    )
+    sample = [
+        {"host": "jump01", "dest_ip": "10.0.0.5"},
+        {"host": "10.20.0.7", "dest_ip": "10.0.0.5"},
+        {"host": "h1", "process_name": "C:\\Program Files\\Veeam\\veeam.exe"},
+        {"host": "h1", "dest_ip": "10.0.0.5"},
+    ]
+    for e in sample:
+        print(e, "->", engine.match(e, "pde-spl-0405"))
+    print(engine.hit_counts())
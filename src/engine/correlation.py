@@ -0,0 +1,319 @@
+"""
+Time-windowed correlation of signals across detections.
+
+Replaces the Splunk `join` in docs/correlation/pde-correlation-0001-splunk-search.txt
+and implements the story-level `recommended_correlation` blocks in stories/*.yml:
+a primary detection plus a supporting detection on the same correlation key
+(e.g. host) within N minutes escalates severity.
+
+Signals are indexed by (key value, detection id) -> sorted timestamps and rules
+are evaluated incrementally as each signal arrives. Entries older than the
+largest rule window behind the newest signal seen are evicted, so memory is
+bounded by the signal rate times that window.
+"""
+from __future__ import annotations
+
+import re
+from bisect import bisect_left, bisect_right, insort
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Deque, Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple, Union
+
+import yaml
+
+
+SEVERITY_ORDER = {"informational": 0, "low": 1, "medium": 2, "high": 3, "critical": 4}
+
+DEFAULT_KEY_ALIASES: Dict[str, Tuple[str, ...]] = {
+    "host": ("host", "dest_host", "dest_hosts"),
+    "user": ("user", "triggered_user"),
+    "src_ip": ("src_ip",),
+}
+
+_WINDOW_RE = re.compile(r"^\s*(\d+)\s*([smhd]?)\s*$", re.IGNORECASE)
+_ESCALATION_RE = re.compile(
+    r"^\s*if\s*\((?P<primary>[^)]+)\)\s*and\s*\((?P<supporting>[^)]+)\)\s*then\s+escalate\s+severity\s+to\s+(?P<severity>\w+)",
+    re.IGNORECASE,
+)
+
+
+@dataclass(frozen=True)
+class CorrelationRule:
+    rule_id: str
+    story_id: str
+    primary: FrozenSet[str]
+    supporting: FrozenSet[str]
+    window_seconds: int
+    severity: str
+    correlation_key: str = "host"
+
+
+@dataclass(frozen=True)
+class CorrelationMatch:
+    story_id: str
+    rule_id: str
+    severity: str
+    correlation_key: str
+    key_value: str
+    primary_detections: Tuple[str, ...]
+    supporting_detections: Tuple[str, ...]
+    first_seen: int
+    last_seen: int
+
+
+def parse_window(value: Union[str, int]) -> int:
+    """
+    "60m" -> 3600. Bare integers are seconds.
+    """
+    if isinstance(value, int):
+        return value
+    m = _WINDOW_RE.match(str(value))
+    if not m:
+        raise ValueError(f"Unsupported correlation window: {value}")
+    n = int(m.group(1))
+    unit = (m.group(2) or "s").lower()
+    return n * {"s": 1, "m": 60, "h": 3600, "d": 86400}[unit]
+
+
+def _norm_id(detection_id: str) -> str:
+    return str(detection_id).strip().upper()
+
+
+def _split_ids(expr: str) -> FrozenSet[str]:
+    return frozenset(_norm_id(p) for p in re.split(r"\s+or\s+", expr.strip(), flags=re.IGNORECASE) if p.strip())
+
+
+def rules_from_story(doc: Dict[str, Any]) -> List[CorrelationRule]:
+    """
+    Build correlation rules from a story document.
+
+    Each parseable `escalation_logic` line of the form
+      "If (A OR B) AND (C OR D) then escalate severity to critical."
+    becomes one rule. If none parse, any primary + any supporting detection
+    escalates to high.
+    """
+    story_id = str(doc.get("story_id") or "unknown_story")
+    dets = doc.get("detections") or {}
+    primary = frozenset(_norm_id(d["detection_id"]) for d in dets.get("primary") or [] if d.get("detection_id"))
+    supporting = frozenset(_norm_id(d["detection_id"]) for d in dets.get("supporting") or [] if d.get("detection_id"))
+
+    corr = doc.get("recommended_correlation") or {}
+    if not corr:
+        return []
+    window = parse_window(corr.get("window", "60m"))
+    keys = corr.get("correlation_keys") or ["host"]
+    key = str(keys[0])
+
+    rules: List[CorrelationRule] = []
+    for i, line in enumerate(corr.get("escalation_logic") or []):
+        m = _ESCALATION_RE.match(str(line))
+        if not m:
+            continue
+        rules.append(
+            CorrelationRule(
+                rule_id=f"{story_id}#{i}",
+                story_id=story_id,
+                primary=_split_ids(m.group("primary")),
+                supporting=_split_ids(m.group("supporting")),
+                window_seconds=window,
+                severity=m.group("severity").lower(),
+                correlation_key=key,
+            )
+        )
+
+    if not rules and primary and supporting:
+        rules.append(
+            CorrelationRule(
+                rule_id=f"{story_id}#default",
+                story_id=story_id,
+                primary=primary,
+                supporting=supporting,
+                window_seconds=window,
+                severity="high",
+                correlation_key=key,
+            )
+        )
+    return rules
+
+
+def load_story_rules(paths: Iterable[Union[str, Path]]) -> List[CorrelationRule]:
+    rules: List[CorrelationRule] = []
+    for p in paths:
+        with Path(p).open("r", encoding="utf-8") as f:
+            doc = yaml.safe_load(f) or {}
+        rules.extend(rules_from_story(doc))
+    return rules
+
+
+def _field(signal: Any, name: str) -> Any:
+    if isinstance(signal, dict):
+        return signal.get(name)
+    return getattr(signal, name, None)
+
+
+class CorrelationEngine:
+    """
+    Incremental multi-detection correlation over a sliding time window.
+    """
+
+    def __init__(
+        self,
+        rules: Sequence[CorrelationRule],
+        *,
+        key_aliases: Optional[Dict[str, Tuple[str, ...]]] = None,
+    ) -> None:
+        self.rules = list(rules)
+        self.key_aliases = dict(DEFAULT_KEY_ALIASES)
+        if key_aliases:
+            self.key_aliases.update(key_aliases)
+        self.max_window = max((r.window_seconds for r in self.rules), default=0)
+
+        # detection id -> rules it participates in
+        self._rules_by_detection: Dict[str, List[CorrelationRule]] = {}
+        for r in self.rules:
+            for d in r.primary | r.supporting:
+                self._rules_by_detection.setdefault(d, []).append(r)
+
+        # (correlation key, key value, detection id) -> sorted timestamps
+        self._index: Dict[Tuple[str, str, str], List[int]] = {}
+        # arrival log for eviction: (ts, index key)
+        self._log: Deque[Tuple[int, Tuple[str, str, str]]] = deque()
+        # (rule id, key value) -> ts of last emitted match (throttle to one per window)
+        self._fired: Dict[Tuple[str, str], int] = {}
+        self.watermark: Optional[int] = None
+
+    def __len__(self) -> int:
+        return len(self._log)
+
+    def _key_values(self, signal: Any, key: str) -> List[str]:
+        if str(_field(signal, "entity_type") or "") == key and _field(signal, "entity_id"):
+            return [str(_field(signal, "entity_id"))]
+        for name in self.key_aliases.get(key, (key,)):
+            v = _field(signal, name)
+            if v is None or v == "":
+                continue
+            if isinstance(v, (list, tuple, set)):
+                return [str(x) for x in v if x]
+            return [str(v)]
+        return []
+
+    def ingest(self, signal: Any, ts: int) -> List[CorrelationMatch]:
+        """
+        Index a signal observed at epoch `ts` and return any correlation
+        matches it completes. Accepts evaluator signal dataclasses or dicts
+        with at least detection_id plus the correlation key field(s).
+        """
+        det = _norm_id(_field(signal, "detection_id") or "")
+        rules = self._rules_by_detection.get(det)
+        if not rules:
+            return []
+
+        ts = int(ts)
+        if self.watermark is None or ts > self.watermark:
+            self.watermark = ts
+            self._evict()
+        elif ts < self.watermark - self.max_window:
+            # Too late to correlate with anything still held
+            return []
+
+        matches: List[CorrelationMatch] = []
+        keys = {r.correlation_key for r in rules}
+        for key in keys:
+            for value in self._key_values(signal, key):
+                idx_key = (key, value, det)
+                times = self._index.get(idx_key)
+                if times is None:
+                    times = self._index[idx_key] = []
+                if not times or ts >= times[-1]:
+                    times.append(ts)
+                else:
+                    insort(times, ts)
+                self._log.append((ts, idx_key))
+
+                for rule in rules:
+                    if rule.correlation_key == key:
+                        m = self._evaluate(rule, value, det, ts)
+                        if m is not None:
+                            matches.append(m)
+
+        matches.sort(key=lambda m: -SEVERITY_ORDER.get(m.severity, 0))
+        return matches
+
+    def _hits(self, key: str, value: str, detections: FrozenSet[str], lo: int, hi: int) -> Dict[str, Tuple[int, int]]:
+        out: Dict[str, Tuple[int, int]] = {}
+        for d in detections:
+            times = self._index.get((key, value, d))
+            if not times:
+                continue
+            i = bisect_left(times, lo)
+            j = bisect_right(times, hi)
+            if i < j:
+                out[d] = (times[i], times[j - 1])
+        return out
+
+    def _evaluate(self, rule: CorrelationRule, value: str, det: str, ts: int) -> Optional[CorrelationMatch]:
+        fired_key = (rule.rule_id, value)
+        last = self._fired.get(fired_key)
+        if last is not None and abs(ts - last) < rule.window_seconds:
+            return None
+
+        lo, hi = ts - rule.window_seconds, ts + rule.window_seconds
+        # The arriving signal is one side; the other side must fall within the window of it
+        other = rule.supporting if det in rule.primary else rule.primary
+        other_hits = self._hits(rule.correlation_key, value, other, lo, hi)
+        if not other_hits:
+            return None
+
+        own_side = rule.primary if det in rule.primary else rule.supporting
+        own_hits = self._hits(rule.correlation_key, value, own_side, lo, hi)
+        primary_hits, supporting_hits = (own_hits, other_hits) if det in rule.primary else (other_hits, own_hits)
+
+        all_times = [t for pair in list(primary_hits.values()) + list(supporting_hits.values()) for t in pair]
+        self._fired[fired_key] = ts
+        return CorrelationMatch(
+            story_id=rule.story_id,
+            rule_id=rule.rule_id,
+            severity=rule.severity,
+            correlation_key=rule.correlation_key,
+            key_value=value,
+            primary_detections=tuple(sorted(primary_hits)),
+            supporting_detections=tuple(sorted(supporting_hits)),
+            first_seen=min(all_times),
+            last_seen=max(all_times),
+        )
+
+    def _evict(self) -> None:
+        if self.watermark is None:
+            return
+        cutoff = self.watermark - self.max_window
+        log = self._log
+        index = self._index
+        while log and log[0][0] < cutoff:
+            _, idx_key = log.popleft()
+            times = index.get(idx_key)
+            if times is None:
+                continue
+            i = bisect_left(times, cutoff)
+            if i:
+                del times[:i]
+            if not times:
+                del index[idx_key]
+
+        if len(self._fired) > 2 * len(index) + 1024:
+            self._fired = {k: t for k, t in self._fired.items() if t >= cutoff}
+
+
+if __name__ == "__main__":
+    story = Path(__file__).resolve().parents[2] / "stories" / "pde-story-0001-binary-location-and-sideloading.yml"
+    engine = CorrelationEngine(load_story_rules([story]))
+    base = 1700000000
+    feed = [
+        ({"detection_id": "PDE-SPL-0302", "host": "ws01"}, base),
+        ({"detection_id": "PDE-SPL-0002", "host": "ws01"}, base + 600),
+        ({"detection_id": "PDE-SPL-0005", "host": "ws01"}, base + 1200),
+        ({"detection_id": "PDE-SPL-0005", "host": "ws02"}, base + 1300),
+    ]
+    for sig, t in feed:
+        for m in engine.ingest(sig, t):
+            print(m)
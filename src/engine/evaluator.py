@@ -6,7 +6,9 @@ from typing import Dict, List, Optional, Set, Tuple
 from src.baselines.rolling import BaselineStats
 from src.engine.scoring import ScoreResult, score_ns_p2_001
 from src.engine.novelty import compute_true_novelty_count
+from src.engine.gates import GateCounts, record_gates
 from src.features.network_fanout import FanoutBucketFeatures, compute_growth_hits
+from src.features.sketches import TopEvidence, top_items
 
 
 @dataclass(frozen=True)
@@ -27,6 +29,9 @@ class Signal:
     growth_hits: int
     new_internal_targets: int
 
+    # Phase 2.2: top (item, count) evidence for the bucket, if the extractor kept it
+    top_evidence: Optional[List[Tuple[str, int]]] = None
+
 
 def evaluate_ns_p2_001(
     observation_buckets: List[FanoutBucketFeatures],
@@ -39,6 +44,11 @@ def evaluate_ns_p2_001(
     # Phase 2.2: optional true novelty inputs
     baseline_dest_union_by_host: Optional[Dict[str, Set[str]]] = None,
     current_dest_sets_by_bucket: Optional[Dict[Tuple[str, int], Set[str]]] = None,
+    # Incremental callers (replay/streaming) supply growth state they already track
+    growth_hits_map: Optional[Dict[Tuple[str, int], int]] = None,
+    top_evidence: Optional[TopEvidence] = None,
+    top_n: int = 5,
+    gate_counts: Optional[GateCounts] = None,
 ) -> List[Signal]:
     """
     NS-P2-001: Emerging Lateral Movement Preparation via Internal Fan-out Drift
@@ -49,10 +59,17 @@ def evaluate_ns_p2_001(
           |current_set - baseline_union_set|
       - Otherwise, falls back to proxy:
           new_internal_targets := internal_dest_count
+
+    If growth_hits_map is provided it is used as-is instead of recomputing
+    growth hits from observation_buckets.
+
+    If top_evidence sketches are provided (see extract_fanout_bucket_features),
+    each signal carries the top_n most contacted internal destinations.
     """
     signals: List[Signal] = []
 
-    growth_hits_map = compute_growth_hits(observation_buckets, sustained_buckets=sustained_buckets)
+    if growth_hits_map is None:
+        growth_hits_map = compute_growth_hits(observation_buckets, sustained_buckets=sustained_buckets)
 
     for r in observation_buckets:
         baseline = baselines.get(r.host)
@@ -79,6 +96,7 @@ def evaluate_ns_p2_001(
         cond_a = (ratio is not None) and (ratio >= deviation_ratio_threshold)
         cond_b = sustained_growth
         cond_c = new_targets >= min_new_targets
+        record_gates(gate_counts, cond_a, cond_b, cond_c)
 
         if not (cond_a and cond_b and cond_c):
             continue
@@ -107,6 +125,7 @@ def evaluate_ns_p2_001(
                 baseline_deviation_ratio=ratio,
                 growth_hits=growth_hits,
                 new_internal_targets=new_targets,
+                top_evidence=top_items(top_evidence, (r.host, r.bucket_start), top_n),
             )
         )
 
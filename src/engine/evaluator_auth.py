@@ -3,7 +3,9 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Dict, List, Optional, Tuple
 
+from src.engine.gates import GateCounts, record_gates
 from src.features.auth_drift import AuthBucketFeatures, compute_growth_hits
+from src.features.sketches import TopEvidence, top_items
 
 
 @dataclass(frozen=True)
@@ -30,6 +32,9 @@ class AuthSignal:
     failure_drift_ratio: Optional[float]
     growth_hits: int
 
+    # Phase 2.2: top (item, count) evidence for the bucket, if the extractor kept it
+    top_evidence: Optional[List[Tuple[str, int]]] = None
+
 
 def compute_auth_baseline_stats(
     baseline_buckets: List[AuthBucketFeatures],
@@ -37,7 +42,13 @@ def compute_auth_baseline_stats(
     by_src: Dict[str, List[int]] = {}
     for r in baseline_buckets:
         by_src.setdefault(r.src_ip, []).append(int(r.auth_failures_per_src))
+    return auth_baseline_stats_from_values(by_src)
+
 
+def auth_baseline_stats_from_values(by_src: Dict[str, List[int]]) -> Dict[str, AuthBaselineStats]:
+    """
+    Same as compute_auth_baseline_stats, for counts already grouped by src_ip.
+    """
     out: Dict[str, AuthBaselineStats] = {}
     for src, vals in by_src.items():
         avg = float(sum(vals)) / float(len(vals)) if vals else 0.0
@@ -96,9 +107,14 @@ def evaluate_pde_spl_0402(
     min_users: int = 10,
     expected_baseline_buckets: int = 30 * 24 * 4,
     min_baseline_buckets: int = 24,
+    growth_hits_map: Optional[Dict[Tuple[str, int], int]] = None,
+    top_evidence: Optional[TopEvidence] = None,
+    top_n: int = 5,
+    gate_counts: Optional[GateCounts] = None,
 ) -> List[AuthSignal]:
     signals: List[AuthSignal] = []
-    growth_hits_map = compute_growth_hits(observation_buckets, sustained_buckets=sustained_buckets)
+    if growth_hits_map is None:
+        growth_hits_map = compute_growth_hits(observation_buckets, sustained_buckets=sustained_buckets)
 
     for r in observation_buckets:
         baseline = baselines.get(r.src_ip)
@@ -115,6 +131,7 @@ def evaluate_pde_spl_0402(
         cond_a = (failure_ratio is not None) and (failure_ratio >= drift_ratio_threshold)
         cond_b = sustained_growth
         cond_c = r.unique_users_targeted >= min_users
+        record_gates(gate_counts, cond_a, cond_b, cond_c)
 
         if not (cond_a and cond_b and cond_c):
             continue
@@ -141,6 +158,7 @@ def evaluate_pde_spl_0402(
                 baseline_fail_avg=baseline_avg,
                 failure_drift_ratio=failure_ratio,
                 growth_hits=growth_hits,
+                top_evidence=top_items(top_evidence, (r.src_ip, r.bucket_start), top_n),
             )
         )
 
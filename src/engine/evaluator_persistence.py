@@ -3,7 +3,9 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Dict, List, Optional, Tuple
 
+from src.engine.gates import GateCounts, record_gates
 from src.features.persistence_drift import PersistenceBucketFeatures, compute_growth_hits
+from src.features.sketches import TopEvidence, top_items
 
 
 @dataclass(frozen=True)
@@ -30,6 +32,9 @@ class PersistenceSignal:
     persistence_drift_ratio: Optional[float]
     growth_hits: int
 
+    # Phase 2.2: top (item, count) evidence for the bucket, if the extractor kept it
+    top_evidence: Optional[List[Tuple[str, int]]] = None
+
 
 def compute_persistence_baseline_stats(
     baseline_buckets: List[PersistenceBucketFeatures],
@@ -37,7 +42,13 @@ def compute_persistence_baseline_stats(
     by_host: Dict[str, List[int]] = {}
     for r in baseline_buckets:
         by_host.setdefault(r.host, []).append(int(r.persistence_events_per_host))
+    return persistence_baseline_stats_from_values(by_host)
+
 
+def persistence_baseline_stats_from_values(by_host: Dict[str, List[int]]) -> Dict[str, PersistenceBaselineStats]:
+    """
+    Same as compute_persistence_baseline_stats, for counts already grouped by host.
+    """
     out: Dict[str, PersistenceBaselineStats] = {}
     for host, vals in by_host.items():
         avg = float(sum(vals)) / float(len(vals)) if vals else 0.0
@@ -92,9 +103,14 @@ def evaluate_pde_spl_0403(
     min_unique_artifacts: int = 2,
     expected_baseline_buckets: int = 30 * 24,
     min_baseline_buckets: int = 24,
+    growth_hits_map: Optional[Dict[Tuple[str, int], int]] = None,
+    top_evidence: Optional[TopEvidence] = None,
+    top_n: int = 5,
+    gate_counts: Optional[GateCounts] = None,
 ) -> List[PersistenceSignal]:
     signals: List[PersistenceSignal] = []
-    growth_hits_map = compute_growth_hits(observation_buckets, sustained_buckets=sustained_buckets)
+    if growth_hits_map is None:
+        growth_hits_map = compute_growth_hits(observation_buckets, sustained_buckets=sustained_buckets)
 
     for r in observation_buckets:
         baseline = baselines.get(r.host)
@@ -111,6 +127,7 @@ def evaluate_pde_spl_0403(
         cond_a = (drift_ratio is not None) and (drift_ratio >= drift_ratio_threshold)
         cond_b = sustained_growth
         cond_c = r.unique_persistence_artifacts >= min_unique_artifacts
+        record_gates(gate_counts, cond_a, cond_b, cond_c)
 
         if not (cond_a and cond_b and cond_c):
             continue
@@ -137,6 +154,7 @@ def evaluate_pde_spl_0403(
                 baseline_evt_avg=baseline_avg,
                 persistence_drift_ratio=drift_ratio,
                 growth_hits=growth_hits,
+                top_evidence=top_items(top_evidence, (r.host, r.bucket_start), top_n),
             )
         )
 
@@ -0,0 +1,159 @@
+"""
+Raw-event evidence index for signal drilldown.
+
+While buckets are extracted, the engine records the archive byte offsets of
+the events behind each (detection, entity, bucket). Fetching the raw events
+behind a signal is then one seek + readline per event into the NDJSON
+archive instead of a rescan (or a round trip to Splunk after the events
+have aged out).
+
+Offsets are positions in the uncompressed NDJSON stream. Plain .ndjson
+archives seek directly; gzip archives can only seek by decompressing forward,
+so a drilldown there costs a partial scan up to the last offset.
+
+By default only buckets that produced a signal are kept, so memory scales
+with signal volume rather than event volume; max_per_bucket caps any single
+noisy bucket.
+"""
+from __future__ import annotations
+
+import gzip
+import json
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from src.features.offsets import OFFSET_FIELD
+
+
+IndexKey = Tuple[str, str, int]  # (detection_id, entity, bucket_start)
+
+
+def open_archive(path: Path):
+    if path.suffix == ".gz":
+        return gzip.open(path, "rb")
+    return path.open("rb")
+
+
+class EvidenceIndex:
+    """
+    (detection_id, entity, bucket_start) -> archive offsets.
+    """
+
+    def __init__(
+        self,
+        archive: Optional[Union[str, Path]] = None,
+        *,
+        record_all: bool = False,
+        max_per_bucket: int = 10_000,
+    ) -> None:
+        self.archive = Path(archive) if archive is not None else None
+        self.record_all = record_all
+        self.max_per_bucket = int(max_per_bucket)
+        self._offsets: Dict[IndexKey, array] = {}
+        self.truncated: Dict[IndexKey, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __contains__(self, key: IndexKey) -> bool:
+        return key in self._offsets
+
+    def add(self, detection_id: str, entity: str, bucket_start: int, offsets: Iterable[int]) -> None:
+        key = (str(detection_id).lower(), str(entity), int(bucket_start))
+        arr = self._offsets.get(key)
+        if arr is None:
+            arr = self._offsets[key] = array("q")
+        room = self.max_per_bucket - len(arr)
+        dropped = 0
+        for off in offsets:
+            if room > 0:
+                arr.append(off)
+                room -= 1
+            else:
+                dropped += 1
+        if dropped:
+            self.truncated[key] = self.truncated.get(key, 0) + dropped
+
+    def offsets(self, detection_id: str, entity: str, bucket_start: int) -> List[int]:
+        arr = self._offsets.get((str(detection_id).lower(), str(entity), int(bucket_start)))
+        return list(arr) if arr is not None else []
+
+    def keys(self) -> List[IndexKey]:
+        return sorted(self._offsets)
+
+    # ------------------------
+    # Drilldown
+    # ------------------------
+
+    def fetch(
+        self,
+        detection_id: str,
+        entity: str,
+        bucket_start: int,
+        *,
+        archive: Optional[Union[str, Path]] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Raw events behind one (detection, entity, bucket), in archive order.
+        """
+        offs = self.offsets(detection_id, entity, bucket_start)
+        if limit is not None:
+            offs = offs[: max(0, limit)]
+        return list(read_events_at(archive or self._require_archive(), offs))
+
+    def fetch_for_signal(self, signal: Any, bucket_start: int, **kwargs: Any) -> List[Dict[str, Any]]:
+        return self.fetch(signal.detection_id, signal.entity_id, bucket_start, **kwargs)
+
+    def _require_archive(self) -> Path:
+        if self.archive is None:
+            raise ValueError("EvidenceIndex has no archive path; pass archive=")
+        return self.archive
+
+    # ------------------------
+    # Persistence
+    # ------------------------
+
+    def save(self, path: Union[str, Path]) -> None:
+        doc = {
+            "archive": str(self.archive) if self.archive is not None else None,
+            "record_all": self.record_all,
+            "max_per_bucket": self.max_per_bucket,
+            "entries": [[d, e, b, list(arr)] for (d, e, b), arr in sorted(self._offsets.items())],
+            "truncated": [[d, e, b, n] for (d, e, b), n in sorted(self.truncated.items())],
+        }
+        with Path(path).open("w", encoding="utf-8") as f:
+            json.dump(doc, f, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "EvidenceIndex":
+        with Path(path).open("r", encoding="utf-8") as f:
+            doc = json.load(f)
+        idx = cls(
+            doc.get("archive"),
+            record_all=bool(doc.get("record_all", False)),
+            max_per_bucket=int(doc.get("max_per_bucket", 10_000)),
+        )
+        for d, e, b, offs in doc.get("entries") or []:
+            idx._offsets[(d, e, int(b))] = array("q", offs)
+        for d, e, b, n in doc.get("truncated") or []:
+            idx.truncated[(d, e, int(b))] = int(n)
+        return idx
+
+
+def read_events_at(archive: Union[str, Path], offsets: Iterable[int]) -> Iterator[Dict[str, Any]]:
+    """
+    Seek to each offset and parse one NDJSON line. Offsets are read in
+    ascending order so the file is traversed forward once.
+    """
+    p = Path(archive)
+    with open_archive(p) as f:
+        for off in sorted(offsets):
+            f.seek(off)
+            line = f.readline()
+            if not line.strip():
+                continue
+            e = json.loads(line)
+            e[OFFSET_FIELD] = off
+            yield e
@@ -1,9 +1,104 @@
 from __future__ import annotations
 
-from dataclasses import asdict
-from typing import Dict, List
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
 
 from src.engine.evaluator import Signal
+from src.engine.explainability_templates import CompiledTemplate, get_template
+
+
+EXPLANATION_FIELDS = ("headline", "narrative", "evidence", "next_steps", "raw")
+
+
+class Explanation(Mapping):
+    """
+    Lazily rendered explanation for one signal.
+
+    Behaves like the dict returned by explain_ns_p2_001 (headline, narrative,
+    evidence, next_steps, raw) but formats each part only on first access.
+    """
+
+    __slots__ = ("signal", "_template", "_cache")
+
+    def __init__(self, signal: Any, template: Optional[CompiledTemplate] = None) -> None:
+        self.signal = signal
+        self._template = template
+        self._cache: Dict[str, Any] = {}
+
+    @property
+    def template(self) -> CompiledTemplate:
+        if self._template is None:
+            self._template = get_template(self.signal.detection_id)
+        return self._template
+
+    def _render(self, key: str) -> Any:
+        # Signals are flat dataclasses; their __dict__ is the format context
+        ctx = vars(self.signal)
+        t = self.template
+        if key == "headline":
+            return t.render_headline(ctx)
+        if key == "narrative":
+            return t.render_narrative(ctx)
+        if key == "evidence":
+            return t.render_evidence(ctx)
+        if key == "next_steps":
+            return list(t.next_steps)
+        if key == "raw":
+            return dict(ctx)
+        raise KeyError(key)
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
+        value = self._cache[key] = self._render(key)
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(EXPLANATION_FIELDS)
+
+    def __len__(self) -> int:
+        return len(EXPLANATION_FIELDS)
+
+    def to_dict(self, fields: Sequence[str] = EXPLANATION_FIELDS) -> Dict[str, Any]:
+        return {k: self[k] for k in fields}
+
+
+def explain(signal: Any) -> Explanation:
+    """
+    Explanation for any registered detection's signal. Nothing is formatted
+    until a field is read.
+    """
+    return Explanation(signal)
+
+
+def explain_many(
+    signals: Iterable[Any],
+    *,
+    fields: Sequence[str] = EXPLANATION_FIELDS,
+    offset: int = 0,
+    limit: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Render a page of explanations in bulk: signals[offset:offset + limit],
+    only the requested fields. Templates are looked up once per detection.
+    """
+    for f in fields:
+        if f not in EXPLANATION_FIELDS:
+            raise ValueError(f"Unknown explanation field: {f}")
+
+    items = list(signals)
+    end = len(items) if limit is None else offset + max(0, limit)
+    templates: Dict[str, CompiledTemplate] = {}
+    out: List[Dict[str, Any]] = []
+    for s in items[offset:end]:
+        det = s.detection_id
+        t = templates.get(det)
+        if t is None:
+            t = templates[det] = get_template(det)
+        out.append(Explanation(s, t).to_dict(fields))
+    return out
 
 
 def explain_ns_p2_001(signal: Signal) -> Dict[str, object]:
@@ -17,46 +112,4 @@ def explain_ns_p2_001(signal: Signal) -> Dict[str, object]:
       - recommended next steps
       - raw fields (for UI/debug)
     """
-    headline = f"{signal.signal_name} on host {signal.entity_id}"
-
-    # Keep narrative concise and consistent
-    narrative = (
-        f"Host behavior is drifting from historical norms. In the most recent observation bucket, "
-        f"the host contacted {signal.internal_dest_count} unique internal destinations "
-        f"with a baseline deviation ratio of {signal.baseline_deviation_ratio:.2f} "
-        f"(relative to the host’s baseline average). This increase was sustained across "
-        f"{signal.growth_hits} growth-hit buckets, which is consistent with early-stage lateral movement preparation."
-        if signal.baseline_deviation_ratio is not None
-        else
-        f"Host behavior is drifting from historical norms. The host contacted {signal.internal_dest_count} "
-        f"unique internal destinations and sustained growth across {signal.growth_hits} buckets, which can indicate "
-        f"early-stage lateral movement preparation."
-    )
-
-    evidence: List[str] = [
-        f"Unique internal destinations (current): {signal.internal_dest_count}",
-        f"Internal connections (current): {signal.internal_conn_count}",
-        f"Baseline avg unique destinations: {signal.baseline_avg_internal_dest_count if signal.baseline_avg_internal_dest_count is not None else 'unknown'}",
-        f"Baseline deviation ratio: {signal.baseline_deviation_ratio if signal.baseline_deviation_ratio is not None else 'unknown'}",
-        f"Sustained growth hits (rolling): {signal.growth_hits}",
-        f"New internal targets (MVP proxy): {signal.new_internal_targets}",
-        f"Risk score: {signal.risk_score}",
-        f"Confidence: {signal.confidence:.2f}",
-        f"Time horizon: {signal.time_horizon}",
-    ]
-
-    next_steps: List[str] = [
-        "Validate expected activity: patching, deployment, scanning, monitoring, or backup tasks.",
-        "Review the top internal destinations contacted and identify whether they are new or unusual for this host.",
-        "Pivot to authentication telemetry for the same host and time window (failed logons, new logon types, remote logons).",
-        "If endpoint telemetry is available, identify the process/user responsible for outbound connections.",
-        "If this host is non-admin or non-management, treat as higher priority and broaden scope to adjacent hosts.",
-    ]
-
-    return {
-        "headline": headline,
-        "narrative": narrative,
-        "evidence": evidence,
-        "next_steps": next_steps,
-        "raw": asdict(signal),
-    }
+    return explain(signal).to_dict()
@@ -1,7 +1,324 @@
 """
-Phase 2.2 placeholder: standardized explainability templates.
+Phase 2.2: standardized explainability templates.
 
-Planned responsibilities:
-- consistent narrative/evidence/next-steps format across detections
-- per-detection template registry
+One ExplanationTemplate per detection gives every signal type the same
+headline / narrative / evidence / next-steps shape. Templates are plain
+str.format strings; they are validated against the signal dataclass and
+compiled into bound format_map callables once, at registration, so
+rendering a signal is only the string formatting itself.
+
+Evidence lines render missing (None) fields as "unknown"; format specs
+such as {confidence:.2f} should only be used on fields that are always set.
+When a signal carries top_evidence (Space-Saving counts, which may slightly
+over-estimate), one extra line lists the items under top_evidence_label.
 """
+from __future__ import annotations
+
+from dataclasses import dataclass, fields, is_dataclass
+from string import Formatter
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple, Type
+
+from src.engine.evaluator import Signal
+from src.engine.evaluator_admin_tooling import AdminToolingSignal
+from src.engine.evaluator_auth import AuthSignal
+from src.engine.evaluator_persistence import PersistenceSignal
+from src.engine.evaluator_staging import StagingSignal
+
+
+Render = Callable[[Mapping[str, Any]], str]
+
+
+class _UnknownIfNone(dict):
+    """
+    Evidence context: None values render as 'unknown'.
+    """
+
+    def __getitem__(self, key: str) -> Any:
+        v = dict.__getitem__(self, key)
+        return "unknown" if v is None else v
+
+
+@dataclass(frozen=True)
+class ExplanationTemplate:
+    detection_id: str
+    signal_type: Type[Any]
+    headline: str
+    narrative: str
+    evidence: Tuple[str, ...]
+    next_steps: Tuple[str, ...]
+    # Used instead of `narrative` when `narrative_requires` is None on the signal
+    narrative_fallback: Optional[str] = None
+    narrative_requires: Optional[str] = None
+    # Label for the signal's top_evidence line, rendered only when present
+    top_evidence_label: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class CompiledTemplate:
+    template: ExplanationTemplate
+    headline: Render
+    narrative: Render
+    narrative_fallback: Optional[Render]
+    evidence: Tuple[Render, ...]
+
+    @property
+    def next_steps(self) -> Tuple[str, ...]:
+        return self.template.next_steps
+
+    def render_headline(self, ctx: Mapping[str, Any]) -> str:
+        return self.headline(ctx)
+
+    def render_narrative(self, ctx: Mapping[str, Any]) -> str:
+        t = self.template
+        if self.narrative_fallback is not None and t.narrative_requires and ctx.get(t.narrative_requires) is None:
+            return self.narrative_fallback(ctx)
+        return self.narrative(ctx)
+
+    def render_evidence(self, ctx: Mapping[str, Any]) -> List[str]:
+        safe = _UnknownIfNone(ctx)
+        out = [line(safe) for line in self.evidence]
+        top = ctx.get("top_evidence")
+        if top and self.template.top_evidence_label:
+            items = ", ".join(f"{item} ({count})" for item, count in top)
+            out.append(f"{self.template.top_evidence_label}: {items}")
+        return out
+
+
+_FORMATTER = Formatter()
+
+
+def _compile(text: str, allowed: frozenset, where: str) -> Render:
+    for _, name, _, _ in _FORMATTER.parse(text):
+        if name is None:
+            continue
+        root = name.split(".", 1)[0].split("[", 1)[0]
+        if root not in allowed:
+            raise ValueError(f"{where} references unknown signal field: {root}")
+    return text.format_map
+
+
+def compile_template(template: ExplanationTemplate) -> CompiledTemplate:
+    """
+    Validate every placeholder against the signal dataclass and bind the
+    format callables. Raises ValueError on a field the signal doesn't have.
+    """
+    if not is_dataclass(template.signal_type):
+        raise TypeError(f"{template.detection_id}: signal_type must be a dataclass")
+    allowed = frozenset(f.name for f in fields(template.signal_type))
+    did = template.detection_id
+    if template.narrative_requires is not None and template.narrative_requires not in allowed:
+        raise ValueError(f"{did} narrative_requires unknown signal field: {template.narrative_requires}")
+
+    return CompiledTemplate(
+        template=template,
+        headline=_compile(template.headline, allowed, f"{did} headline"),
+        narrative=_compile(template.narrative, allowed, f"{did} narrative"),
+        narrative_fallback=(
+            _compile(template.narrative_fallback, allowed, f"{did} narrative_fallback")
+            if template.narrative_fallback is not None
+            else None
+        ),
+        evidence=tuple(_compile(e, allowed, f"{did} evidence") for e in template.evidence),
+    )
+
+
+_REGISTRY: Dict[str, CompiledTemplate] = {}
+
+
+def register_template(template: ExplanationTemplate) -> CompiledTemplate:
+    compiled = compile_template(template)
+    _REGISTRY[template.detection_id.strip().lower()] = compiled
+    return compiled
+
+
+def get_template(detection_id: str) -> CompiledTemplate:
+    try:
+        return _REGISTRY[str(detection_id).strip().lower()]
+    except KeyError:
+        raise KeyError(f"No explanation template registered for {detection_id}") from None
+
+
+def registered_detections() -> List[str]:
+    return sorted(_REGISTRY)
+
+
+def _common_evidence() -> Tuple[str, ...]:
+    return (
+        "Risk score: {risk_score}",
+        "Confidence: {confidence:.2f}",
+        "Time horizon: {time_horizon}",
+    )
+
+
+# ------------------------
+# Built-in templates
+# ------------------------
+
+DEFAULT_TEMPLATES: Sequence[ExplanationTemplate] = (
+    ExplanationTemplate(
+        detection_id="pde-spl-0401",
+        signal_type=Signal,
+        headline="{signal_name} on host {entity_id}",
+        narrative=(
+            "Host behavior is drifting from historical norms. In the most recent observation bucket, "
+            "the host contacted {internal_dest_count} unique internal destinations "
+            "with a baseline deviation ratio of {baseline_deviation_ratio:.2f} "
+            "(relative to the host’s baseline average). This increase was sustained across "
+            "{growth_hits} growth-hit buckets, which is consistent with early-stage lateral movement preparation."
+        ),
+        narrative_fallback=(
+            "Host behavior is drifting from historical norms. The host contacted {internal_dest_count} "
+            "unique internal destinations and sustained growth across {growth_hits} buckets, which can indicate "
+            "early-stage lateral movement preparation."
+        ),
+        narrative_requires="baseline_deviation_ratio",
+        evidence=(
+            "Unique internal destinations (current): {internal_dest_count}",
+            "Internal connections (current): {internal_conn_count}",
+            "Baseline avg unique destinations: {baseline_avg_internal_dest_count}",
+            "Baseline deviation ratio: {baseline_deviation_ratio}",
+            "Sustained growth hits (rolling): {growth_hits}",
+            "New internal targets (MVP proxy): {new_internal_targets}",
+        ) + _common_evidence(),
+        top_evidence_label="Top internal destinations",
+        next_steps=(
+            "Validate expected activity: patching, deployment, scanning, monitoring, or backup tasks.",
+            "Review the top internal destinations contacted and identify whether they are new or unusual for this host.",
+            "Pivot to authentication telemetry for the same host and time window (failed logons, new logon types, remote logons).",
+            "If endpoint telemetry is available, identify the process/user responsible for outbound connections.",
+            "If this host is non-admin or non-management, treat as higher priority and broaden scope to adjacent hosts.",
+        ),
+    ),
+    ExplanationTemplate(
+        detection_id="pde-spl-0402",
+        signal_type=AuthSignal,
+        headline="{signal_name} from source {entity_id}",
+        narrative=(
+            "Authentication failures from this source are drifting from historical norms. In the most recent "
+            "observation bucket, the source produced {failures} failed logons across {unique_users_targeted} "
+            "distinct accounts, a drift ratio of {failure_drift_ratio:.2f} against its baseline average. "
+            "Growth was sustained across {growth_hits} buckets, which is consistent with a low-and-slow password spray."
+        ),
+        narrative_fallback=(
+            "Authentication failures from this source are drifting from historical norms. The source produced "
+            "{failures} failed logons across {unique_users_targeted} distinct accounts and sustained growth across "
+            "{growth_hits} buckets, which can indicate a low-and-slow password spray."
+        ),
+        narrative_requires="failure_drift_ratio",
+        evidence=(
+            "Failed logons (current): {failures}",
+            "Distinct accounts targeted (current): {unique_users_targeted}",
+            "Baseline avg failures: {baseline_fail_avg}",
+            "Failure drift ratio: {failure_drift_ratio}",
+            "Sustained growth hits (rolling): {growth_hits}",
+        ) + _common_evidence(),
+        top_evidence_label="Most targeted accounts",
+        next_steps=(
+            "Confirm whether the source is a known authentication broker, VPN concentrator, or service with stale credentials.",
+            "Review the targeted accounts for privileged, service, or recently created accounts.",
+            "Check for any successful logon from this source to a targeted account after the failures.",
+            "If the source is external or unmanaged, consider blocking it and forcing resets for accounts that later succeeded.",
+        ),
+    ),
+    ExplanationTemplate(
+        detection_id="pde-spl-0403",
+        signal_type=PersistenceSignal,
+        headline="{signal_name} on host {entity_id}",
+        narrative=(
+            "Persistence activity on this host is drifting from historical norms. In the most recent observation "
+            "bucket, the host recorded {persistence_events_per_host} scheduled task or service changes touching "
+            "{unique_persistence_artifacts} distinct artifacts, a drift ratio of {persistence_drift_ratio:.2f} "
+            "against its baseline average. Growth was sustained across {growth_hits} buckets, which is consistent "
+            "with an attacker establishing persistence."
+        ),
+        narrative_fallback=(
+            "Persistence activity on this host is drifting from historical norms. The host recorded "
+            "{persistence_events_per_host} scheduled task or service changes touching {unique_persistence_artifacts} "
+            "distinct artifacts and sustained growth across {growth_hits} buckets, which can indicate an attacker "
+            "establishing persistence."
+        ),
+        narrative_requires="persistence_drift_ratio",
+        evidence=(
+            "Persistence events (current): {persistence_events_per_host}",
+            "Distinct persistence artifacts (current): {unique_persistence_artifacts}",
+            "Baseline avg persistence events: {baseline_evt_avg}",
+            "Persistence drift ratio: {persistence_drift_ratio}",
+            "Sustained growth hits (rolling): {growth_hits}",
+        ) + _common_evidence(),
+        top_evidence_label="Most frequent persistence artifacts",
+        next_steps=(
+            "Validate expected activity: software installs, agent upgrades, or configuration management runs.",
+            "Review the created or modified tasks and services, including their command lines and run-as accounts.",
+            "Check whether the referenced binaries are signed and live in expected install locations.",
+            "Look for the same task or service names on other hosts to gauge spread.",
+        ),
+    ),
+    ExplanationTemplate(
+        detection_id="pde-spl-0404",
+        signal_type=StagingSignal,
+        headline="{signal_name} on host {entity_id}",
+        narrative=(
+            "File staging activity on this host is drifting from historical norms. In the most recent observation "
+            "bucket, the host recorded {staging_events_per_host} compression or large-file events across "
+            "{unique_staging_artifacts} distinct artifacts, a drift ratio of {staging_drift_ratio:.2f} against its "
+            "baseline average. Growth was sustained across {growth_hits} buckets, which is consistent with data "
+            "being staged ahead of exfiltration."
+        ),
+        narrative_fallback=(
+            "File staging activity on this host is drifting from historical norms. The host recorded "
+            "{staging_events_per_host} compression or large-file events across {unique_staging_artifacts} distinct "
+            "artifacts and sustained growth across {growth_hits} buckets, which can indicate data being staged "
+            "ahead of exfiltration."
+        ),
+        narrative_requires="staging_drift_ratio",
+        evidence=(
+            "Staging events (current): {staging_events_per_host}",
+            "Distinct staging artifacts (current): {unique_staging_artifacts}",
+            "Baseline avg staging events: {baseline_evt_avg}",
+            "Staging drift ratio: {staging_drift_ratio}",
+            "Sustained growth hits (rolling): {growth_hits}",
+        ) + _common_evidence(),
+        top_evidence_label="Most frequent staging artifacts",
+        next_steps=(
+            "Validate expected activity: backups, log rotation, build pipelines, or scheduled exports.",
+            "Review the archives and large files created, their locations, and the process/user that wrote them.",
+            "Pivot to network telemetry for outbound transfers from this host shortly after the staging activity.",
+            "If the host holds sensitive data, treat as higher priority and preserve the staged files.",
+        ),
+    ),
+    ExplanationTemplate(
+        detection_id="pde-spl-0405",
+        signal_type=AdminToolingSignal,
+        headline="{signal_name} on host {entity_id}",
+        narrative=(
+            "Admin tool usage on this host is drifting from historical norms. In the most recent observation bucket, "
+            "the host ran {admin_tool_events_per_host} admin tool executions using {unique_admin_tools} distinct "
+            "tools, a drift ratio of {admin_tool_drift_ratio:.2f} against its baseline average. Growth was sustained "
+            "across {growth_hits} buckets, which is consistent with hands-on-keyboard discovery or lateral movement."
+        ),
+        narrative_fallback=(
+            "Admin tool usage on this host is drifting from historical norms. The host ran {admin_tool_events_per_host} "
+            "admin tool executions using {unique_admin_tools} distinct tools and sustained growth across "
+            "{growth_hits} buckets, which can indicate hands-on-keyboard discovery or lateral movement."
+        ),
+        narrative_requires="admin_tool_drift_ratio",
+        evidence=(
+            "Admin tool executions (current): {admin_tool_events_per_host}",
+            "Distinct admin tools (current): {unique_admin_tools}",
+            "Baseline avg admin tool executions: {baseline_evt_avg}",
+            "Admin tool drift ratio: {admin_tool_drift_ratio}",
+            "Sustained growth hits (rolling): {growth_hits}",
+        ) + _common_evidence(),
+        top_evidence_label="Most used admin tools",
+        next_steps=(
+            "Validate expected activity: IT administration, helpdesk sessions, or scheduled maintenance.",
+            "Identify the user and parent process behind the admin tool executions.",
+            "Review the command lines for remote execution, credential access, or discovery patterns.",
+            "Pivot to authentication and network telemetry for the hosts this one reached with those tools.",
+        ),
+    ),
+)
+
+
+for _t in DEFAULT_TEMPLATES:
+    register_template(_t)
@@ -0,0 +1,41 @@
+"""
+Gate funnel counts for profiling.
+
+Every evaluator applies the same three gates to each observation row: drift
+ratio, sustained growth, and a minimum unique count (targets, users,
+artifacts or tools). Given a GateCounts dict, an evaluator records how many
+rows reach and pass each gate in that order, so a profile can show where a
+payload's rows drop out.
+"""
+from __future__ import annotations
+
+from typing import Dict, Optional
+
+
+GATES = ("ratio", "growth", "min_unique")
+
+# "rows" plus, per gate, rows that passed it and every gate before it
+GateCounts = Dict[str, int]
+
+
+def record_gates(gate_counts: Optional[GateCounts], ratio_ok: bool, growth_ok: bool, unique_ok: bool) -> None:
+    if gate_counts is None:
+        return
+    gate_counts["rows"] = gate_counts.get("rows", 0) + 1
+    for gate, ok in zip(GATES, (ratio_ok, growth_ok, unique_ok)):
+        if not ok:
+            return
+        gate_counts[gate] = gate_counts.get(gate, 0) + 1
+
+
+def gate_funnel(gate_counts: GateCounts) -> Dict[str, Dict[str, int]]:
+    """
+    {gate: {"in": rows entering, "out": rows leaving}} in gate order.
+    """
+    out: Dict[str, Dict[str, int]] = {}
+    entering = gate_counts.get("rows", 0)
+    for gate in GATES:
+        passed = gate_counts.get(gate, 0)
+        out[gate] = {"in": entering, "out": passed}
+        entering = passed
+    return out
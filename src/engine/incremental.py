@@ -0,0 +1,465 @@
+"""
+Incremental (bucket-at-a-time) evaluation of the predictive detections.
+
+The batch evaluators take a baseline list and an observation list and derive
+everything from scratch. That is fine for a single scheduled run, but replaying
+an archive (or consuming a live stream) one bucket at a time would recompute a
+30d baseline, growth hits and novelty sets at every step.
+
+IncrementalPipeline keeps that state per detection and per entity instead:
+  - rolling baseline mean/std (RollingWindowStats)
+  - growth flags for the last N buckets
+  - reference-counted baseline destination sets for 0401 true novelty
+
+Events are fed in time order and reduced on arrival into per-(entity,
+bucket) counts and distinct-value sets (BucketCounts), using the same
+per-event logic as the batch extractors; raw events are not kept. Each
+time a bucket closes its rows go through the detection's normal
+evaluator, with baselines and growth hits supplied from the incremental
+state.
+"""
+from __future__ import annotations
+
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from src.baselines.rolling import BaselineStats, RollingWindowStats
+from src.engine.allowlists import SuppressionEngine
+from src.engine.evidence import EvidenceIndex
+from src.engine.evaluator import evaluate_ns_p2_001
+from src.engine.evaluator_admin_tooling import AdminToolingBaselineStats, evaluate_pde_spl_0405
+from src.engine.evaluator_auth import AuthBaselineStats, evaluate_pde_spl_0402
+from src.engine.evaluator_persistence import PersistenceBaselineStats, evaluate_pde_spl_0403
+from src.engine.evaluator_staging import StagingBaselineStats, evaluate_pde_spl_0404
+from src.engine.maintenance import MaintenanceCalendar
+from src.engine.novelty import RollingDestinationSet
+from src.engine.timing import StageTimer
+from src.features.admin_tooling_drift import admin_tool_item, admin_tooling_rows
+from src.features.auth_drift import auth_failure_item, auth_failure_rows
+from src.features.bucket_counts import BucketCounts, ItemFn
+from src.features.data_staging_drift import staging_item, staging_rows
+from src.features.network_fanout import bucket_epoch, fanout_rows, internal_dest_item
+from src.features.persistence_drift import persistence_item, persistence_rows
+from src.features.sketches import DEFAULT_CAPACITY
+
+
+@dataclass(frozen=True)
+class DetectionSpec:
+    """
+    How to run one predictive detection incrementally.
+
+    value_attr is the per-bucket count used for both the baseline average and
+    the growth flag (the same field the batch evaluator compares). item and
+    rows are the two halves of the batch extractor (see
+    src/features/bucket_counts.py).
+    """
+    detection_id: str
+    entity_attr: str
+    value_attr: str
+    bucket_seconds: int
+    item: ItemFn
+    rows: Callable[[BucketCounts], List[Any]]
+    make_baseline: Callable[[str, RollingWindowStats], Any]
+    evaluate: Callable[..., List[Any]]
+
+
+DETECTION_SPECS: Dict[str, DetectionSpec] = {
+    "pde-spl-0401": DetectionSpec(
+        detection_id="pde-spl-0401",
+        entity_attr="host",
+        value_attr="internal_dest_count",
+        bucket_seconds=3600,
+        item=internal_dest_item,
+        rows=fanout_rows,
+        make_baseline=lambda e, w: BaselineStats(
+            host=e,
+            avg_internal_dest_count=w.mean,
+            std_internal_dest_count=w.std,
+            bucket_count=w.bucket_count,
+        ),
+        evaluate=evaluate_ns_p2_001,
+    ),
+    "pde-spl-0402": DetectionSpec(
+        detection_id="pde-spl-0402",
+        entity_attr="src_ip",
+        value_attr="auth_failures_per_src",
+        bucket_seconds=900,
+        item=auth_failure_item,
+        rows=auth_failure_rows,
+        make_baseline=lambda e, w: AuthBaselineStats(src_ip=e, avg_failures=w.mean, bucket_count=w.bucket_count),
+        evaluate=evaluate_pde_spl_0402,
+    ),
+    "pde-spl-0403": DetectionSpec(
+        detection_id="pde-spl-0403",
+        entity_attr="host",
+        value_attr="persistence_events_per_host",
+        bucket_seconds=3600,
+        item=persistence_item,
+        rows=persistence_rows,
+        make_baseline=lambda e, w: PersistenceBaselineStats(host=e, avg_events=w.mean, bucket_count=w.bucket_count),
+        evaluate=evaluate_pde_spl_0403,
+    ),
+    "pde-spl-0404": DetectionSpec(
+        detection_id="pde-spl-0404",
+        entity_attr="host",
+        value_attr="staging_events_per_host",
+        bucket_seconds=3600,
+        item=staging_item,
+        rows=staging_rows,
+        make_baseline=lambda e, w: StagingBaselineStats(host=e, avg_events=w.mean, bucket_count=w.bucket_count),
+        evaluate=evaluate_pde_spl_0404,
+    ),
+    "pde-spl-0405": DetectionSpec(
+        detection_id="pde-spl-0405",
+        entity_attr="host",
+        value_attr="admin_tool_events_per_host",
+        bucket_seconds=3600,
+        item=admin_tool_item,
+        rows=admin_tooling_rows,
+        make_baseline=lambda e, w: AdminToolingBaselineStats(host=e, avg_events=w.mean, bucket_count=w.bucket_count),
+        evaluate=evaluate_pde_spl_0405,
+    ),
+}
+
+
+@dataclass
+class BucketResult:
+    """
+    Outcome of closing one bucket for one detection (one evaluation point).
+    """
+    detection_id: str
+    bucket_start: int
+    entities: int
+    signals: List[Any] = field(default_factory=list)
+
+
+class _GrowthState:
+    """
+    Incremental equivalent of compute_growth_hits for a single entity.
+    """
+
+    __slots__ = ("prev", "flags")
+
+    def __init__(self, sustained_buckets: int) -> None:
+        self.prev: Optional[int] = None
+        self.flags: Deque[int] = deque(maxlen=sustained_buckets)
+
+    def update(self, value: int) -> int:
+        self.flags.append(0 if self.prev is None else (1 if value > self.prev else 0))
+        self.prev = value
+        return int(sum(self.flags))
+
+
+class _DetectionState:
+    def __init__(
+        self,
+        spec: DetectionSpec,
+        *,
+        baseline_seconds: int,
+        params: Dict[str, Any],
+        true_novelty: bool,
+    ) -> None:
+        self.spec = spec
+        self.baseline_seconds = baseline_seconds
+        self.params = params
+        self.sustained_buckets = int(params.get("sustained_buckets", 3))
+        self.true_novelty = true_novelty and spec.detection_id == "pde-spl-0401"
+
+        self.open_buckets: Dict[int, BucketCounts] = {}
+        self.closed_through: Optional[int] = None  # bucket_start of last closed bucket
+        self.closes = 0
+
+        self.baselines: Dict[str, RollingWindowStats] = {}
+        self.growth: Dict[str, _GrowthState] = {}
+        self.dest_sets: Dict[str, RollingDestinationSet] = {}
+
+
+class IncrementalPipeline:
+    """
+    Streams time-ordered raw events through the predictive detections.
+
+    feed() returns results for any buckets that closed because of the event;
+    flush() closes whatever is still open (end of archive / shutdown).
+
+    allowed_lateness (seconds) keeps a bucket open after the watermark passes
+    its end, for mildly out-of-order live sources. Events older than an
+    already-closed bucket are counted in late_events and dropped. With
+    max_skew (seconds), an event more than that far ahead of the watermark
+    is counted in future_events and dropped, so one bad timestamp cannot
+    close every open bucket and make the rest of the stream late.
+
+    If a SuppressionEngine is given, events it matches for a detection are
+    dropped before they reach that detection's bucket state. If a
+    MaintenanceCalendar is given, entity buckets overlapping a maintenance
+    window are neither evaluated nor added to baseline/growth/novelty state.
+    Both are polled for rule-file changes once per feed_many() batch (see
+    poll()), so edits take effect without a restart.
+
+    top_k > 0 keeps a bounded Space-Saving sketch per (entity, bucket) while
+    extracting and attaches the top_k items to each signal's top_evidence.
+    An EvidenceIndex records the `_offset` of the events behind each signal
+    (or behind every entity bucket, if the index has record_all set).
+    """
+
+    def __init__(
+        self,
+        detection_ids: Optional[Sequence[str]] = None,
+        *,
+        baseline_seconds: int = 30 * 86400,
+        allowed_lateness: int = 0,
+        max_skew: Optional[int] = None,
+        params: Optional[Dict[str, Dict[str, Any]]] = None,
+        true_novelty: bool = True,
+        time_field: str = "_time",
+        sweep_every: int = 24,
+        timer: Optional[StageTimer] = None,
+        suppression: Optional[SuppressionEngine] = None,
+        maintenance: Optional[MaintenanceCalendar] = None,
+        top_k: int = 0,
+        evidence: Optional[EvidenceIndex] = None,
+    ) -> None:
+        ids = list(detection_ids) if detection_ids else list(DETECTION_SPECS.keys())
+        unknown = [d for d in ids if d not in DETECTION_SPECS]
+        if unknown:
+            raise ValueError(f"Unknown detection ids: {unknown}")
+
+        params = params or {}
+        self.states: Dict[str, _DetectionState] = {
+            d: _DetectionState(
+                DETECTION_SPECS[d],
+                baseline_seconds=baseline_seconds,
+                params=dict(params.get(d, {})),
+                true_novelty=true_novelty,
+            )
+            for d in ids
+        }
+        self.allowed_lateness = int(allowed_lateness)
+        self.max_skew = None if max_skew is None else int(max_skew)
+        self.time_field = time_field
+        self.sweep_every = max(1, int(sweep_every))
+        self.timer = timer or StageTimer()
+        self.suppression = suppression
+        self.maintenance = maintenance
+        self.top_k = max(0, int(top_k))
+        self.top_k_capacity = max(DEFAULT_CAPACITY, 4 * self.top_k)
+        self.evidence = evidence
+
+        self.watermark: Optional[int] = None
+        self.events_seen = 0
+        self.late_events = 0
+        self.future_events = 0
+        self.suppressed_events = 0
+        self.maintenance_buckets = 0
+
+    # ------------------------
+    # Input
+    # ------------------------
+
+    def feed(self, event: Dict) -> List[BucketResult]:
+        ts_raw = event.get(self.time_field)
+        if ts_raw is None:
+            return []
+        try:
+            ts = int(ts_raw)
+        except Exception:
+            return []
+
+        self.events_seen += 1
+        if self.max_skew is not None and self.watermark is not None and ts > self.watermark + self.max_skew:
+            self.future_events += 1
+            return []
+        suppression = self.suppression
+        for state in self.states.values():
+            b = bucket_epoch(ts, state.spec.bucket_seconds)
+            if state.closed_through is not None and b <= state.closed_through:
+                self.late_events += 1
+                continue
+            if suppression is not None and suppression.match(event, state.spec.detection_id) is not None:
+                self.suppressed_events += 1
+                continue
+            counts = state.open_buckets.get(b)
+            if counts is None:
+                counts = state.open_buckets[b] = self._bucket_counts()
+            item = state.spec.item(event)
+            if item is not None:
+                counts.add((item[0], b), item[1], event)
+
+        if self.watermark is None or ts > self.watermark:
+            self.watermark = ts
+            return self._close_ready()
+        return []
+
+    def feed_many(self, events: Iterable[Dict]) -> List[BucketResult]:
+        self.poll()
+        out: List[BucketResult] = []
+        for e in events:
+            out.extend(self.feed(e))
+        return out
+
+    def poll(self) -> None:
+        """
+        Pick up edits to the suppression rules and maintenance calendar
+        (throttled, see ReloadableFile.poll). feed_many() polls once per
+        batch; callers feeding events one at a time poll per batch too.
+        """
+        if self.suppression is not None:
+            self.suppression.poll()
+        if self.maintenance is not None:
+            self.maintenance.poll()
+
+    def flush(self) -> List[BucketResult]:
+        out: List[BucketResult] = []
+        for state in self.states.values():
+            for b in sorted(state.open_buckets):
+                out.append(self._close_bucket(state, b))
+        out.sort(key=lambda r: (r.bucket_start, r.detection_id))
+        return out
+
+    # ------------------------
+    # Bucket lifecycle
+    # ------------------------
+
+    def _bucket_counts(self) -> BucketCounts:
+        return BucketCounts(
+            top_evidence={} if self.top_k else None,
+            top_k_capacity=self.top_k_capacity,
+            evidence={} if self.evidence is not None else None,
+        )
+
+    def _close_ready(self) -> List[BucketResult]:
+        out: List[BucketResult] = []
+        horizon = int(self.watermark) - self.allowed_lateness
+        for state in self.states.values():
+            if not state.open_buckets:
+                continue
+            bs = state.spec.bucket_seconds
+            ready = sorted(b for b in state.open_buckets if b + bs <= horizon)
+            for b in ready:
+                out.append(self._close_bucket(state, b))
+        if len(out) > 1:
+            out.sort(key=lambda r: (r.bucket_start, r.detection_id))
+        return out
+
+    def _close_bucket(self, state: _DetectionState, b: int) -> BucketResult:
+        spec = state.spec
+        timer = self.timer
+        counts = state.open_buckets.pop(b)
+        entity_attr = spec.entity_attr
+        value_attr = spec.value_attr
+
+        extra: Dict[str, Any] = {}
+
+        t0 = time.perf_counter()
+        if counts.top_evidence is not None:
+            extra["top_evidence"] = counts.top_evidence
+            extra["top_n"] = self.top_k
+        offsets = counts.evidence
+        rows = spec.rows(counts)
+        # 0401 counts internal destinations, so its distinct values are the dest sets
+        dest_sets: Dict[Tuple[str, int], Set[str]] = counts.values if state.true_novelty else {}
+        t1 = time.perf_counter()
+        timer.add("extract", t1 - t0)
+
+        if self.maintenance is not None and rows:
+            kept = [r for r in rows if not self.maintenance.in_window(getattr(r, entity_attr), b, spec.bucket_seconds)]
+            self.maintenance_buckets += len(rows) - len(kept)
+            rows = kept
+            t_m = time.perf_counter()
+            timer.add("maintenance", t_m - t1)
+            t1 = t_m
+
+        baselines: Dict[str, Any] = {}
+        for r in rows:
+            entity = getattr(r, entity_attr)
+            window = state.baselines.get(entity)
+            if window is None:
+                continue
+            window.expire(b)
+            if window.bucket_count:
+                baselines[entity] = spec.make_baseline(entity, window)
+        t2 = time.perf_counter()
+        timer.add("baseline", t2 - t1)
+
+        growth_hits_map: Dict[Tuple[str, int], int] = {}
+        for r in rows:
+            entity = getattr(r, entity_attr)
+            g = state.growth.get(entity)
+            if g is None:
+                g = state.growth[entity] = _GrowthState(state.sustained_buckets)
+            growth_hits_map[(entity, b)] = g.update(int(getattr(r, value_attr)))
+        t3 = time.perf_counter()
+        timer.add("growth", t3 - t2)
+
+        if state.true_novelty:
+            union_by_host: Dict[str, Set[str]] = {}
+            for r in rows:
+                ds = state.dest_sets.get(r.host)
+                if ds is not None:
+                    ds.expire(b)
+                    union_by_host[r.host] = ds.members
+            extra["baseline_dest_union_by_host"] = union_by_host
+            extra["current_dest_sets_by_bucket"] = dest_sets
+        t4 = time.perf_counter()
+        timer.add("novelty", t4 - t3)
+
+        signals = spec.evaluate(rows, baselines, growth_hits_map=growth_hits_map, **state.params, **extra) if rows else []
+        t5 = time.perf_counter()
+        timer.add("evaluate", t5 - t4)
+
+        if offsets is not None and self.evidence is not None:
+            if self.evidence.record_all:
+                entities = [getattr(r, entity_attr) for r in rows]
+            else:
+                entities = [s.entity_id for s in signals]
+            for entity in entities:
+                self.evidence.add(spec.detection_id, entity, b, offsets.get((entity, b), ()))
+
+        # The closed bucket becomes part of the baseline for later buckets only
+        for r in rows:
+            entity = getattr(r, entity_attr)
+            window = state.baselines.get(entity)
+            if window is None:
+                window = state.baselines[entity] = RollingWindowStats(state.baseline_seconds)
+            window.push(b, getattr(r, value_attr))
+            if state.true_novelty:
+                ds = state.dest_sets.get(entity)
+                if ds is None:
+                    ds = state.dest_sets[entity] = RollingDestinationSet(state.baseline_seconds)
+                ds.push(b, dest_sets.get((entity, b), ()))
+
+        state.closed_through = b if state.closed_through is None else max(state.closed_through, b)
+        state.closes += 1
+        if state.closes % self.sweep_every == 0:
+            self._sweep(state, b)
+        timer.add("update", time.perf_counter() - t5)
+
+        return BucketResult(detection_id=spec.detection_id, bucket_start=b, entities=len(rows), signals=signals)
+
+    def _sweep(self, state: _DetectionState, now: int) -> None:
+        """
+        Drop per-entity state for entities that have not been seen for a full
+        baseline window, keeping memory proportional to active entities.
+        """
+        stale: List[str] = []
+        for entity, window in state.baselines.items():
+            window.expire(now)
+            if not window.bucket_count:
+                stale.append(entity)
+        for entity in stale:
+            del state.baselines[entity]
+            state.growth.pop(entity, None)
+            state.dest_sets.pop(entity, None)
+
+
+if __name__ == "__main__":
+    base = 1700000000
+    pipeline = IncrementalPipeline(["pde-spl-0401"], params={"pde-spl-0401": {"sustained_buckets": 2, "min_new_targets": 1}})
+    sample = []
+    for i, n in enumerate([2, 2, 2, 4, 6, 8]):
+        for k in range(n):
+            sample.append({"_time": base + i * 3600 + k, "host": "h1", "dest_ip": f"10.0.{i}.{k}"})
+    for res in pipeline.feed_many(sample) + pipeline.flush():
+        print(res.detection_id, res.bucket_start, res.entities, len(res.signals))
+    print(pipeline.timer.as_dict())
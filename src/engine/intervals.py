@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from typing import Generic, Iterable, List, Optional, Tuple, TypeVar
+
+
+T = TypeVar("T")
+
+
+class IntervalIndex(Generic[T]):
+    """
+    Static index over half-open integer intervals [start, end).
+
+    Intervals are sorted by start with a running maximum of ends (and the
+    owner achieving it). Any interval that starts before a query point and
+    reaches past it implies the running max does too, so point and range
+    overlap queries are a single bisect: O(log n).
+
+    Returns one matching owner (the one reaching furthest), not all matches.
+    """
+
+    __slots__ = ("_starts", "_max_end", "_owners")
+
+    def __init__(self, intervals: Iterable[Tuple[int, int, T]] = ()) -> None:
+        rows = sorted(((int(s), int(e), o) for s, e, o in intervals if int(e) > int(s)), key=lambda r: (r[0], -r[1]))
+        self._starts: List[int] = []
+        self._max_end: List[int] = []
+        self._owners: List[T] = []
+        best_end: Optional[int] = None
+        best_owner: Optional[T] = None
+        for start, end, owner in rows:
+            if best_end is None or end > best_end:
+                best_end, best_owner = end, owner
+            self._starts.append(start)
+            self._max_end.append(best_end)
+            self._owners.append(best_owner)  # type: ignore[arg-type]
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def __bool__(self) -> bool:
+        return bool(self._starts)
+
+    def stab(self, point: int) -> Optional[T]:
+        """
+        Owner of an interval containing `point`, or None.
+        """
+        i = bisect_right(self._starts, point) - 1
+        if i >= 0 and self._max_end[i] > point:
+            return self._owners[i]
+        return None
+
+    def overlap(self, start: int, end: int) -> Optional[T]:
+        """
+        Owner of an interval overlapping [start, end), or None.
+        """
+        if end <= start:
+            return self.stab(start)
+        i = bisect_left(self._starts, end) - 1
+        if i >= 0 and self._max_end[i] > start:
+            return self._owners[i]
+        return None
@@ -0,0 +1,325 @@
+"""
+Phase 2.2: maintenance-window suppression.
+
+Patch and deployment windows are the largest source of false-positive bursts
+for fan-out and admin tooling drift. Buckets that fall inside a maintenance
+window are excluded from both baseline computation and alerting.
+
+Calendar file format (YAML, all times UTC):
+
+    groups:
+      patch-ring-1: [app01, app02, app03]
+    windows:
+      - id: weekly-patching
+        recurrence: weekly            # weekly | daily | (omit for one-off)
+        days: [sat, sun]              # weekly only
+        start: "02:00"
+        duration_minutes: 240
+        scope:
+          groups: [patch-ring-1]
+          cidrs: [10.50.0.0/16]
+      - id: dc-migration
+        start: "2026-03-01T00:00:00Z"
+        end: "2026-03-01T06:00:00Z"
+        scope:
+          hosts: [dc01, dc02]
+      - id: global-freeze-exercise
+        start: "2026-04-10T18:00:00Z"
+        end: "2026-04-10T20:00:00Z"   # no scope => applies to every entity
+
+Each scope (global, host, group, CIDR) gets two IntervalIndex instances: one
+over absolute one-off windows and one over recurring windows folded into
+"seconds since Monday 00:00 UTC". A (host, bucket) check resolves the host's
+scopes once (memoized in an LRU of max_resolved entities) and then does
+O(log n) lookups per scope.
+"""
+from __future__ import annotations
+
+import ipaddress
+from collections import OrderedDict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, TypeVar, Union
+
+from src.engine.allowlists import ip_to_int
+from src.engine.intervals import IntervalIndex
+from src.engine.reloadable import CHECK_INTERVAL, ReloadableFile
+
+
+DAY = 86400
+# Entities whose scope resolution is memoized; high-cardinality entities
+# (src_ip on a long-lived stream) must not grow the memo without bound
+MAX_RESOLVED = 4096
+WEEK = 7 * DAY
+# 1970-01-01 was a Thursday; the first Monday 00:00 UTC is 4 days later.
+_MONDAY_EPOCH = 4 * DAY
+
+_DAY_NAMES = {
+    "mon": 0, "monday": 0,
+    "tue": 1, "tuesday": 1,
+    "wed": 2, "wednesday": 2,
+    "thu": 3, "thursday": 3,
+    "fri": 4, "friday": 4,
+    "sat": 5, "saturday": 5,
+    "sun": 6, "sunday": 6,
+}
+
+R = TypeVar("R")
+
+
+def _parse_ts(value: Any) -> int:
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, datetime):
+        dt = value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+        return int(dt.timestamp())
+    s = str(value).strip()
+    if s.endswith("Z"):
+        s = s[:-1] + "+00:00"
+    dt = datetime.fromisoformat(s)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+
+def _parse_time_of_day(value: Any) -> int:
+    if isinstance(value, int):
+        # YAML 1.1 reads unquoted 02:00 as sexagesimal minutes
+        return int(value) * 60
+    parts = str(value).strip().split(":")
+    h = int(parts[0])
+    m = int(parts[1]) if len(parts) > 1 else 0
+    if not (0 <= h < 24 and 0 <= m < 60):
+        raise ValueError(f"Invalid time of day: {value}")
+    return h * 3600 + m * 60
+
+
+def _week_intervals(starts: Iterable[int], duration: int, owner: str) -> List[Tuple[int, int, str]]:
+    """
+    Fold recurring windows into week-offset space, splitting any that wrap
+    past the end of the week.
+    """
+    out: List[Tuple[int, int, str]] = []
+    for s in starts:
+        e = s + duration
+        if e <= WEEK:
+            out.append((s, e, owner))
+        else:
+            out.append((s, WEEK, owner))
+            out.append((0, e - WEEK, owner))
+    return out
+
+
+class _ScopeIndex:
+    __slots__ = ("one_off", "weekly", "any_weekly")
+
+    def __init__(self, one_off: List[Tuple[int, int, str]], weekly: List[Tuple[int, int, str]]) -> None:
+        self.one_off: IntervalIndex[str] = IntervalIndex(one_off)
+        self.weekly: IntervalIndex[str] = IntervalIndex(weekly)
+        self.any_weekly: Optional[str] = weekly[0][2] if weekly else None
+
+    def lookup(self, start: int, end: int) -> Optional[str]:
+        hit = self.one_off.overlap(start, end)
+        if hit is not None or self.any_weekly is None:
+            return hit
+        if end - start >= WEEK:
+            # A range spanning a full week overlaps every recurring window
+            return self.any_weekly
+        ws = (start - _MONDAY_EPOCH) % WEEK
+        if end <= start:
+            return self.weekly.stab(ws)
+        we = ws + (end - start)
+        if we <= WEEK:
+            return self.weekly.overlap(ws, we)
+        return self.weekly.overlap(ws, WEEK) or self.weekly.overlap(0, we - WEEK)
+
+
+def _compile_window(w: Dict[str, Any], idx: int) -> Tuple[str, List[Tuple[int, int, str]], List[Tuple[int, int, str]]]:
+    wid = str(w.get("id") or f"windows[{idx}]")
+    recurrence = str(w.get("recurrence") or "").strip().lower()
+
+    if not recurrence:
+        start = _parse_ts(w["start"])
+        if "end" in w:
+            end = _parse_ts(w["end"])
+        else:
+            end = start + int(w["duration_minutes"]) * 60
+        if end <= start:
+            raise ValueError(f"Maintenance window {wid} ends before it starts")
+        return wid, [(start, end, wid)], []
+
+    tod = _parse_time_of_day(w["start"])
+    duration = int(w["duration_minutes"]) * 60
+    if duration <= 0:
+        raise ValueError(f"Maintenance window {wid} needs a positive duration_minutes")
+
+    if recurrence == "daily":
+        days = list(range(7))
+    elif recurrence == "weekly":
+        names = w.get("days") or []
+        if not names:
+            raise ValueError(f"Weekly maintenance window {wid} needs days")
+        days = sorted({_DAY_NAMES[str(d).strip().lower()] for d in names})
+    else:
+        raise ValueError(f"Unsupported recurrence for {wid}: {recurrence}")
+
+    return wid, [], _week_intervals((d * DAY + tod for d in days), min(duration, WEEK), wid)
+
+
+class MaintenanceCalendar(ReloadableFile):
+    """
+    Recurring and one-off maintenance windows scoped to hosts, groups or
+    CIDRs. poll() picks up edits to the calendar file (see ReloadableFile).
+    """
+
+    file_kind = "maintenance calendar"
+
+    def __init__(
+        self,
+        path: Optional[Union[str, Path]] = None,
+        *,
+        doc: Optional[Dict[str, Any]] = None,
+        check_interval: float = CHECK_INTERVAL,
+        max_resolved: int = MAX_RESOLVED,
+    ) -> None:
+        self._init_reload(path, check_interval)
+        self.max_resolved = int(max_resolved)
+        self.hits: Dict[str, int] = {}
+        self._compiled: Tuple[Any, ...] = ({}, {}, {}, {}, None)
+        self._resolved: "OrderedDict[str, List[_ScopeIndex]]" = OrderedDict()
+
+        if doc is not None:
+            self.load(doc)
+        elif self.path is not None:
+            self.reload()
+
+    # ------------------------
+    # Loading
+    # ------------------------
+
+    def load(self, doc: Optional[Dict[str, Any]]) -> None:
+        doc = doc or {}
+        host_groups: Dict[str, List[str]] = {}
+        for group, members in (doc.get("groups") or {}).items():
+            for h in members or []:
+                host_groups.setdefault(str(h).strip().lower(), []).append(str(group))
+
+        # scope key -> (one_off, weekly)
+        raw: Dict[Tuple[str, str], Tuple[List, List]] = {}
+
+        def add(key: Tuple[str, str], one_off: List, weekly: List) -> None:
+            a, b = raw.setdefault(key, ([], []))
+            a.extend(one_off)
+            b.extend(weekly)
+
+        for i, w in enumerate(doc.get("windows") or []):
+            wid, one_off, weekly = _compile_window(w, i)
+            scope = w.get("scope") or {}
+            keys: List[Tuple[str, str]] = []
+            keys += [("host", str(h).strip().lower()) for h in scope.get("hosts") or []]
+            keys += [("group", str(g)) for g in scope.get("groups") or []]
+            keys += [("cidr", str(ipaddress.ip_network(str(c).strip(), strict=False))) for c in scope.get("cidrs") or []]
+            if not keys:
+                keys = [("global", "*")]
+            for key in keys:
+                add(key, one_off, weekly)
+
+        by_host = {k[1]: _ScopeIndex(*v) for k, v in raw.items() if k[0] == "host"}
+        by_group = {k[1]: _ScopeIndex(*v) for k, v in raw.items() if k[0] == "group"}
+        global_scope = _ScopeIndex(*raw[("global", "*")]) if ("global", "*") in raw else None
+
+        # CIDR scopes may nest, so index them by (version, prefix length) -> network int;
+        # resolving an address is one masked dict lookup per distinct prefix length.
+        by_prefix: Dict[Tuple[int, int], Dict[int, _ScopeIndex]] = {}
+        for k, v in raw.items():
+            if k[0] != "cidr":
+                continue
+            net = ipaddress.ip_network(k[1], strict=False)
+            by_prefix.setdefault((net.version, net.prefixlen), {})[int(net.network_address)] = _ScopeIndex(*v)
+
+        # Swap in one assignment; drop per-host resolution from the previous calendar
+        self._compiled = (by_host, by_group, host_groups, by_prefix, global_scope)
+        self._resolved = OrderedDict()
+
+    # ------------------------
+    # Queries
+    # ------------------------
+
+    def _scopes_for(self, entity: str) -> List[_ScopeIndex]:
+        key = entity.strip().lower()
+        scopes = self._resolved.get(key)
+        if scopes is not None:
+            self._resolved.move_to_end(key)
+            return scopes
+
+        by_host, by_group, host_groups, by_prefix, global_scope = self._compiled
+        scopes = []
+        if global_scope is not None:
+            scopes.append(global_scope)
+        if key in by_host:
+            scopes.append(by_host[key])
+        for g in host_groups.get(key, []):
+            if g in by_group:
+                scopes.append(by_group[g])
+        if by_prefix:
+            parsed = ip_to_int(key)
+            if parsed is not None:
+                version, value = parsed
+                bits = 32 if version == 4 else 128
+                for (v, plen), nets in by_prefix.items():
+                    if v != version:
+                        continue
+                    mask = ((1 << plen) - 1) << (bits - plen)
+                    sc = nets.get(value & mask)
+                    if sc is not None:
+                        scopes.append(sc)
+
+        self._resolved[key] = scopes
+        while len(self._resolved) > self.max_resolved:
+            self._resolved.popitem(last=False)
+        return scopes
+
+    def window_for(self, entity: str, start: int, end: Optional[int] = None) -> Optional[str]:
+        """
+        Id of a maintenance window covering the entity during [start, end)
+        (or at `start` if end is omitted), else None.
+        """
+        if not entity:
+            return None
+        s = int(start)
+        e = int(end) if end is not None else s
+        for scope in self._scopes_for(entity):
+            wid = scope.lookup(s, e)
+            if wid is not None:
+                self.hits[wid] = self.hits.get(wid, 0) + 1
+                return wid
+        return None
+
+    def in_window(self, entity: str, bucket_start: int, bucket_seconds: int = 0) -> bool:
+        """
+        True if any part of the bucket overlaps a maintenance window for the entity.
+        """
+        end = int(bucket_start) + int(bucket_seconds) if bucket_seconds > 0 else None
+        return self.window_for(entity, bucket_start, end) is not None
+
+    def hit_counts(self) -> Dict[str, int]:
+        return dict(sorted(self.hits.items()))
+
+
+def exclude_maintenance_buckets(
+    rows: Iterable[R],
+    calendar: Optional[MaintenanceCalendar],
+    *,
+    entity_attr: str = "host",
+    bucket_seconds: int = 3600,
+) -> List[R]:
+    """
+    Drop bucket feature rows that fall inside a maintenance window. Apply to
+    both the baseline and the observation lists before evaluating.
+    """
+    if calendar is None:
+        return list(rows)
+    return [
+        r for r in rows
+        if not calendar.in_window(getattr(r, entity_attr), getattr(r, "bucket_start"), bucket_seconds)
+    ]
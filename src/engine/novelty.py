@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from typing import Dict, Set, Tuple
+from collections import deque
+from typing import Deque, Dict, Iterable, Set, Tuple
 
 
 def compute_true_novelty_count(
@@ -32,3 +33,51 @@ def build_baseline_set_by_host(
             out[host] = set()
         out[host].update(dests)
     return out
+
+
+class RollingDestinationSet:
+    """
+    Baseline destination set for one host over a trailing time window.
+
+    Each destination is reference-counted by the number of baseline buckets it
+    appears in, so expiring a bucket only touches that bucket's destinations
+    instead of re-unioning the whole window. `members` is a plain set that can
+    be passed straight to compute_true_novelty_count.
+    """
+
+    __slots__ = ("window_seconds", "members", "_refs", "_buckets")
+
+    def __init__(self, window_seconds: int) -> None:
+        if window_seconds <= 0:
+            raise ValueError("window_seconds must be > 0")
+        self.window_seconds = int(window_seconds)
+        self.members: Set[str] = set()
+        self._refs: Dict[str, int] = {}
+        self._buckets: Deque[Tuple[int, Set[str]]] = deque()
+
+    def push(self, bucket_start: int, dests: Iterable[str]) -> None:
+        bucket_set = set(dests)
+        self._buckets.append((int(bucket_start), bucket_set))
+        refs = self._refs
+        for d in bucket_set:
+            n = refs.get(d, 0)
+            if n == 0:
+                self.members.add(d)
+            refs[d] = n + 1
+
+    def expire(self, now: int) -> None:
+        cutoff = int(now) - self.window_seconds
+        buckets = self._buckets
+        refs = self._refs
+        while buckets and buckets[0][0] < cutoff:
+            _, bucket_set = buckets.popleft()
+            for d in bucket_set:
+                n = refs[d] - 1
+                if n:
+                    refs[d] = n
+                else:
+                    del refs[d]
+                    self.members.discard(d)
+
+    def __len__(self) -> int:
+        return len(self.members)
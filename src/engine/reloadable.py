@@ -0,0 +1,86 @@
+"""
+Hot reloading for rule sets compiled from a YAML file.
+
+SuppressionEngine and MaintenanceCalendar compile a YAML document into
+lookup structures and swap them in with load(doc). ReloadableFile gives
+both the same reload(), reload_if_changed() and throttled poll(), driven
+by the file's mtime.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import yaml
+
+
+# Minimum seconds between file stat checks in ReloadableFile.poll()
+CHECK_INTERVAL = 5.0
+
+
+class ReloadableFile:
+    """
+    Mixin: reload the rule set from self.path when the file changes.
+    Subclasses implement load(doc), call _init_reload() in __init__, and
+    name the file in file_kind (used in messages).
+    """
+
+    file_kind = "file"
+    path: Optional[Path]
+
+    def _init_reload(self, path: Any, check_interval: float) -> None:
+        self.path = Path(path) if path is not None else None
+        self.check_interval = float(check_interval)
+        self._mtime: Optional[float] = None
+        self._checked_at = time.monotonic()
+
+    def load(self, doc: Optional[Dict[str, Any]]) -> None:
+        raise NotImplementedError
+
+    def reload(self) -> None:
+        if self.path is None:
+            raise ValueError(f"{type(self).__name__} has no {self.file_kind} to reload")
+        mtime = os.stat(self.path).st_mtime
+        with self.path.open("r", encoding="utf-8") as f:
+            doc = yaml.safe_load(f) or {}
+        self.load(doc)
+        self._mtime = mtime
+
+    def reload_if_changed(self) -> bool:
+        """
+        Recompile if the file changed on disk. Returns True if reloaded.
+        A file that fails to compile raises, leaving the current rules in place.
+        """
+        if self.path is None:
+            return False
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            return False
+        if self._mtime is not None and mtime == self._mtime:
+            return False
+        self.reload()
+        return True
+
+    def poll(self) -> bool:
+        """
+        reload_if_changed(), but stat the file at most once per
+        check_interval seconds. A file that fails to compile is logged and
+        skipped (the current rules stay in place) until it changes again.
+        """
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return False
+        self._checked_at = now
+        try:
+            return self.reload_if_changed()
+        except Exception as exc:
+            logging.getLogger(type(self).__module__).warning("Keeping current %s; %s: %s", self.file_kind, self.path, exc)
+            try:
+                self._mtime = os.stat(self.path).st_mtime
+            except OSError:
+                pass
+            return False
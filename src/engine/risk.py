@@ -0,0 +1,210 @@
+"""
+Per-entity risk accumulation with exponential decay across detections.
+
+Every evaluator emits an independent risk_score per signal. RiskLedger folds
+them into one decayed score per (entity_type, entity_id):
+
+    score(t) = sum_i weight(det_i) * risk_i * 2 ** (-(t - t_i) / half_life)
+
+Because every entity decays at the same rate, scores are stored relative to a
+fixed reference epoch in log2 space:
+
+    key = log2(score(t)) + (t - epoch) / half_life
+
+`key` does not change as time passes, so updates are O(1) (a log-sum-exp),
+decay is applied lazily on read, and a max-heap over `key` stays correctly
+ordered forever -- top-K never needs a rescan or re-sort.
+"""
+from __future__ import annotations
+
+import heapq
+import math
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+
+EntityKey = Tuple[str, str]
+
+
+@dataclass(frozen=True)
+class EntityRisk:
+    entity_type: str
+    entity_id: str
+    score: float
+    last_seen: int
+    signal_count: int
+    detections: Dict[str, int]
+
+
+class _Entry:
+    __slots__ = ("key", "version", "last_seen", "signal_count", "detections")
+
+    def __init__(self) -> None:
+        self.key = -math.inf
+        self.version = 0
+        self.last_seen = 0
+        self.signal_count = 0
+        self.detections: Dict[str, int] = {}
+
+
+def _log2_add(a: float, b: float) -> float:
+    if a == -math.inf:
+        return b
+    if b == -math.inf:
+        return a
+    hi, lo = (a, b) if a >= b else (b, a)
+    return hi + math.log2(1.0 + 2.0 ** (lo - hi))
+
+
+def _field(signal: Any, name: str) -> Any:
+    if isinstance(signal, dict):
+        return signal.get(name)
+    return getattr(signal, name, None)
+
+
+class RiskLedger:
+    """
+    Decayed risk per entity with O(1) updates and heap-backed top-K.
+    """
+
+    def __init__(
+        self,
+        *,
+        half_life_seconds: int = 24 * 3600,
+        detection_weights: Optional[Dict[str, float]] = None,
+        epoch: Optional[int] = None,
+    ) -> None:
+        if half_life_seconds <= 0:
+            raise ValueError("half_life_seconds must be > 0")
+        self.half_life = float(half_life_seconds)
+        self.detection_weights = {k.lower(): float(v) for k, v in (detection_weights or {}).items()}
+        # Reference time for stored keys; defaults to the first signal seen (keeps keys small)
+        self.epoch: Optional[int] = int(epoch) if epoch is not None else None
+        self._entries: Dict[EntityKey, _Entry] = {}
+        # (-key, version, entity) ; stale versions are skipped lazily
+        self._heap: List[Tuple[float, int, EntityKey]] = []
+        self._seq = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _offset(self, ts: int) -> float:
+        return (int(ts) - (self.epoch or 0)) / self.half_life
+
+    def add(
+        self,
+        signal: Any,
+        ts: int,
+        *,
+        entity_type: Optional[str] = None,
+        entity_id: Optional[str] = None,
+        risk: Optional[float] = None,
+    ) -> float:
+        """
+        Fold one signal into its entity's score. Returns the entity's score at ts.
+        """
+        etype = str(entity_type or _field(signal, "entity_type") or "")
+        eid = str(entity_id or _field(signal, "entity_id") or "")
+        if not etype or not eid:
+            raise ValueError("Signal has no entity_type/entity_id")
+
+        det = str(_field(signal, "detection_id") or "unknown").lower()
+        value = float(risk if risk is not None else (_field(signal, "risk_score") or 0.0))
+        value *= self.detection_weights.get(det, 1.0)
+
+        if self.epoch is None:
+            self.epoch = int(ts)
+
+        ekey = (etype, eid)
+        entry = self._entries.get(ekey)
+        if entry is None:
+            entry = self._entries[ekey] = _Entry()
+
+        if value > 0:
+            entry.key = _log2_add(entry.key, math.log2(value) + self._offset(ts))
+        entry.last_seen = max(entry.last_seen, int(ts))
+        entry.signal_count += 1
+        entry.detections[det] = entry.detections.get(det, 0) + 1
+
+        self._seq += 1
+        entry.version = self._seq
+        if entry.key != -math.inf:
+            heapq.heappush(self._heap, (-entry.key, entry.version, ekey))
+            if len(self._heap) > 2 * len(self._entries) + 64:
+                self._compact()
+
+        return self._decayed(entry, ts)
+
+    def _decayed(self, entry: _Entry, at: int) -> float:
+        if entry.key == -math.inf:
+            return 0.0
+        return float(2.0 ** (entry.key - self._offset(at)))
+
+    def score(self, entity_type: str, entity_id: str, at: int) -> float:
+        entry = self._entries.get((str(entity_type), str(entity_id)))
+        return self._decayed(entry, at) if entry is not None else 0.0
+
+    def _snapshot(self, ekey: EntityKey, entry: _Entry, at: int) -> EntityRisk:
+        return EntityRisk(
+            entity_type=ekey[0],
+            entity_id=ekey[1],
+            score=self._decayed(entry, at),
+            last_seen=entry.last_seen,
+            signal_count=entry.signal_count,
+            detections=dict(entry.detections),
+        )
+
+    def get(self, entity_type: str, entity_id: str, at: int) -> Optional[EntityRisk]:
+        ekey = (str(entity_type), str(entity_id))
+        entry = self._entries.get(ekey)
+        return self._snapshot(ekey, entry, at) if entry is not None else None
+
+    def top(self, k: int, at: int, entity_type: Optional[str] = None) -> List[EntityRisk]:
+        """
+        The k riskiest entities at time `at`, optionally restricted to one
+        entity type. O(k log n) plus skipped stale heap entries.
+        """
+        out: List[EntityRisk] = []
+        if k <= 0:
+            return out
+        heap = self._heap
+        popped: List[Tuple[float, int, EntityKey]] = []
+        while heap and len(out) < k:
+            item = heapq.heappop(heap)
+            _, version, ekey = item
+            entry = self._entries.get(ekey)
+            if entry is None or entry.version != version:
+                continue  # stale: entity updated or pruned since this push
+            popped.append(item)
+            if entity_type is None or ekey[0] == entity_type:
+                out.append(self._snapshot(ekey, entry, at))
+        for item in popped:
+            heapq.heappush(heap, item)
+        return out
+
+    def prune(self, at: int, min_score: float = 0.5) -> int:
+        """
+        Forget entities whose decayed score fell below min_score. Returns the
+        number removed. O(n); run periodically, not per signal.
+        """
+        threshold = math.log2(min_score) + self._offset(at) if min_score > 0 else -math.inf
+        stale = [k for k, e in self._entries.items() if e.key < threshold]
+        for k in stale:
+            del self._entries[k]
+        if stale:
+            self._compact()
+        return len(stale)
+
+    def _compact(self) -> None:
+        self._heap = [(-e.key, e.version, k) for k, e in self._entries.items() if e.key != -math.inf]
+        heapq.heapify(self._heap)
+
+
+if __name__ == "__main__":
+    ledger = RiskLedger(half_life_seconds=3600)
+    base = 1700000000
+    ledger.add({"detection_id": "pde-spl-0401", "entity_type": "host", "entity_id": "h1", "risk_score": 80}, base)
+    ledger.add({"detection_id": "pde-spl-0405", "entity_type": "host", "entity_id": "h1", "risk_score": 60}, base + 1800)
+    ledger.add({"detection_id": "pde-spl-0402", "entity_type": "src_ip", "entity_id": "1.2.3.4", "risk_score": 90}, base + 3600)
+    for r in ledger.top(5, at=base + 3600):
+        print(r)
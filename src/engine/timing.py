@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+from typing import Dict
+
+
+class StageTimer:
+    """
+    Accumulates wall-clock seconds per named pipeline stage.
+    """
+
+    def __init__(self) -> None:
+        self.seconds: Dict[str, float] = {}
+        self.calls: Dict[str, int] = {}
+
+    def add(self, stage: str, elapsed: float) -> None:
+        self.seconds[stage] = self.seconds.get(stage, 0.0) + elapsed
+        self.calls[stage] = self.calls.get(stage, 0) + 1
+
+    def as_dict(self) -> Dict[str, Dict[str, float]]:
+        return {
+            stage: {"seconds": round(secs, 6), "calls": self.calls.get(stage, 0)}
+            for stage, secs in sorted(self.seconds.items())
+        }
@@ -1,7 +1,12 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Dict, Iterable, List, Optional, Set, Tuple
+from functools import partial
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.features.bucket_counts import BucketCounts
+from src.features.offsets import EventOffsets
+from src.features.sketches import DEFAULT_CAPACITY, TopEvidence
 
 
 @dataclass(frozen=True)
@@ -68,6 +73,9 @@ def extract_admin_tooling_bucket_features(
     host_field: str = "host",
     process_field: str = "process_name",
     cmd_field: str = "command_line",
+    top_evidence: Optional[TopEvidence] = None,
+    top_k_capacity: int = DEFAULT_CAPACITY,
+    evidence: Optional[EventOffsets] = None,
 ) -> List[AdminToolingBucketFeatures]:
     """
     MVP feature extraction for suspicious admin tooling drift (PDE-SPL-0405).
@@ -81,47 +89,49 @@ def extract_admin_tooling_bucket_features(
     Computes per host per bucket:
       - admin_tool_events_per_host: count of classified tool executions
       - unique_admin_tools: distinct tools observed
-    """
-    counts: Dict[Tuple[str, int], int] = {}
-    tools: Dict[Tuple[str, int], Set[str]] = {}
-
-    for e in events:
-        ts_raw = e.get(time_field)
-        host = str(e.get(host_field, "")).strip()
 
-        if ts_raw is None or not host:
-            continue
+    If top_evidence is given, it is filled with a bounded sketch of the most
+    used tools per (host, bucket).
 
-        try:
-            ts = int(ts_raw)
-        except Exception:
-            continue
+    If evidence is given, it collects the archive offsets (event `_offset`)
+    of the events behind each row.
+    """
+    item = partial(admin_tool_item, host_field=host_field, process_field=process_field, cmd_field=cmd_field)
+    counts = BucketCounts(top_evidence, top_k_capacity, evidence)
+    return admin_tooling_rows(counts.extend(events, item, bucket_seconds, time_field))
 
-        proc = str(e.get(process_field, "") or "").strip()
-        cmd = str(e.get(cmd_field, "") or "").strip()
 
-        tool = _classify_tool(proc, cmd)
-        if tool is None:
-            continue
+def admin_tool_item(
+    e: Dict,
+    host_field: str = "host",
+    process_field: str = "process_name",
+    cmd_field: str = "command_line",
+) -> Optional[Tuple[str, str]]:
+    """
+    (host, tool) for an admin tool execution, else None.
+    """
+    host = str(e.get(host_field, "")).strip()
+    if not host:
+        return None
 
-        b = bucket_epoch(ts, bucket_seconds)
-        key = (host, b)
+    proc = str(e.get(process_field, "") or "").strip()
+    cmd = str(e.get(cmd_field, "") or "").strip()
+    tool = _classify_tool(proc, cmd)
+    if tool is None:
+        return None
 
-        if key not in counts:
-            counts[key] = 0
-            tools[key] = set()
+    return host, tool
 
-        counts[key] += 1
-        tools[key].add(tool)
 
+def admin_tooling_rows(counts: BucketCounts) -> List[AdminToolingBucketFeatures]:
     out: List[AdminToolingBucketFeatures] = []
-    for (host, b), c in counts.items():
+    for (host, b), c in counts.counts.items():
         out.append(
             AdminToolingBucketFeatures(
                 host=host,
                 bucket_start=b,
                 admin_tool_events_per_host=int(c),
-                unique_admin_tools=len(tools[(host, b)]),
+                unique_admin_tools=len(counts.values[(host, b)]),
             )
         )
 
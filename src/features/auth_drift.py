@@ -1,7 +1,12 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Dict, Iterable, List, Optional, Set, Tuple
+from functools import partial
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.features.bucket_counts import BucketCounts
+from src.features.offsets import EventOffsets
+from src.features.sketches import DEFAULT_CAPACITY, TopEvidence
 
 
 @dataclass(frozen=True)
@@ -33,6 +38,9 @@ def extract_auth_failure_bucket_features(
     user_field: str = "user",
     outcome_field: str = "outcome",
     failure_values: Tuple[str, ...] = ("failure", "failed", "fail"),
+    top_evidence: Optional[TopEvidence] = None,
+    top_k_capacity: int = DEFAULT_CAPACITY,
+    evidence: Optional[EventOffsets] = None,
 ) -> List[AuthBucketFeatures]:
     """
     MVP feature extraction for password spray drift (PDE-SPL-0402).
@@ -46,46 +54,56 @@ def extract_auth_failure_bucket_features(
     Output per src_ip per bucket:
       - auth_failures_per_src: count of failures
       - unique_users_targeted: distinct users receiving failures
-    """
-    # (src_ip, bucket) -> (fail_count, user_set)
-    fail_counts: Dict[Tuple[str, int], int] = {}
-    user_sets: Dict[Tuple[str, int], Set[str]] = {}
-
-    for e in events:
-        ts_raw = e.get(time_field)
-        src_ip = str(e.get(src_ip_field, "")).strip()
-        user = str(e.get(user_field, "")).strip()
-        outcome = str(e.get(outcome_field, "")).strip().lower()
 
-        if ts_raw is None or not src_ip or not user or not outcome:
-            continue
+    If top_evidence is given, it is filled with a bounded sketch of the most
+    targeted users per (src_ip, bucket).
 
-        if outcome not in failure_values:
-            continue
+    If evidence is given, it collects the archive offsets (event `_offset`)
+    of the events behind each row.
+    """
+    item = partial(
+        auth_failure_item,
+        src_ip_field=src_ip_field,
+        user_field=user_field,
+        outcome_field=outcome_field,
+        failure_values=failure_values,
+    )
+    counts = BucketCounts(top_evidence, top_k_capacity, evidence)
+    return auth_failure_rows(counts.extend(events, item, bucket_seconds, time_field))
+
+
+def auth_failure_item(
+    e: Dict,
+    src_ip_field: str = "src_ip",
+    user_field: str = "user",
+    outcome_field: str = "outcome",
+    failure_values: Tuple[str, ...] = ("failure", "failed", "fail"),
+) -> Optional[Tuple[str, str]]:
+    """
+    (src_ip, user) for an auth failure event, else None.
+    """
+    src_ip = str(e.get(src_ip_field, "")).strip()
+    user = str(e.get(user_field, "")).strip()
+    outcome = str(e.get(outcome_field, "")).strip().lower()
 
-        try:
-            ts = int(ts_raw)
-        except Exception:
-            continue
+    if not src_ip or not user or not outcome:
+        return None
 
-        b = bucket_epoch(ts, bucket_seconds)
-        key = (src_ip, b)
+    if outcome not in failure_values:
+        return None
 
-        if key not in fail_counts:
-            fail_counts[key] = 0
-            user_sets[key] = set()
+    return src_ip, user
 
-        fail_counts[key] += 1
-        user_sets[key].add(user)
 
+def auth_failure_rows(counts: BucketCounts) -> List[AuthBucketFeatures]:
     out: List[AuthBucketFeatures] = []
-    for (src_ip, b), c in fail_counts.items():
+    for (src_ip, b), c in counts.counts.items():
         out.append(
             AuthBucketFeatures(
                 src_ip=src_ip,
                 bucket_start=b,
                 auth_failures_per_src=int(c),
-                unique_users_targeted=len(user_sets[(src_ip, b)]),
+                unique_users_targeted=len(counts.values[(src_ip, b)]),
             )
         )
 
@@ -0,0 +1,84 @@
+"""
+Per-(entity, bucket) event counts and distinct values, built one event at a
+time.
+
+Every bucket extractor reduces its events to the same two things per
+(entity, bucket): how many matching events there were and the set of
+distinct values they carried (destinations, users, artifacts, tools). The
+extractors fill a BucketCounts from a whole event list; the incremental
+pipeline keeps one per open bucket and adds events as they arrive, so it
+never has to hold the raw events until the bucket closes.
+
+Each feature module provides the two halves for its detection:
+  *_item(event)   (entity, value) for a matching event, else None
+  *_rows(counts)  the feature rows, sorted by (entity, bucket_start)
+"""
+from __future__ import annotations
+
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+
+from src.features.offsets import EventOffsets, record_offset
+from src.features.sketches import DEFAULT_CAPACITY, TopEvidence, record_evidence
+
+
+# event -> (entity, value), or None if the event does not count
+ItemFn = Callable[[Dict], Optional[Tuple[str, str]]]
+
+
+def bucket_epoch(ts: int, bucket_seconds: int) -> int:
+    if bucket_seconds <= 0:
+        raise ValueError("bucket_seconds must be > 0")
+    return (ts // bucket_seconds) * bucket_seconds
+
+
+class BucketCounts:
+    """
+    (entity, bucket_start) -> event count and distinct values, plus the
+    optional top-K sketches and event offsets the extractors collect.
+    """
+
+    __slots__ = ("counts", "values", "top_evidence", "top_k_capacity", "evidence")
+
+    def __init__(
+        self,
+        top_evidence: Optional[TopEvidence] = None,
+        top_k_capacity: int = DEFAULT_CAPACITY,
+        evidence: Optional[EventOffsets] = None,
+    ) -> None:
+        self.counts: Dict[Tuple[str, int], int] = {}
+        self.values: Dict[Tuple[str, int], Set[str]] = {}
+        self.top_evidence = top_evidence
+        self.top_k_capacity = top_k_capacity
+        self.evidence = evidence
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def add(self, key: Tuple[str, int], value: str, event: Dict) -> None:
+        c = self.counts.get(key)
+        if c is None:
+            self.counts[key] = 1
+            self.values[key] = {value}
+        else:
+            self.counts[key] = c + 1
+            self.values[key].add(value)
+        record_evidence(self.top_evidence, key, value, self.top_k_capacity)
+        record_offset(self.evidence, key, event)
+
+    def extend(self, events: Iterable[Dict], item: ItemFn, bucket_seconds: int, time_field: str = "_time") -> "BucketCounts":
+        """
+        Add every event item() accepts and that has an integer time_field.
+        """
+        for e in events:
+            ts_raw = e.get(time_field)
+            if ts_raw is None:
+                continue
+            it = item(e)
+            if it is None:
+                continue
+            try:
+                ts = int(ts_raw)
+            except Exception:
+                continue
+            self.add((it[0], bucket_epoch(ts, bucket_seconds)), it[1], e)
+        return self
@@ -1,7 +1,12 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Dict, Iterable, List, Optional, Set, Tuple
+from functools import partial
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.features.bucket_counts import BucketCounts
+from src.features.offsets import EventOffsets
+from src.features.sketches import DEFAULT_CAPACITY, TopEvidence
 
 
 @dataclass(frozen=True)
@@ -72,58 +77,72 @@ def extract_data_staging_bucket_features(
     large_file_bytes: int = 100_000_000,
     tool_keywords: Tuple[str, ...] = ("7z", "7za", "rar", "winzip", "zip", "tar", "gzip"),
     archive_exts: Tuple[str, ...] = (".zip", ".7z", ".rar", ".tar", ".gz"),
+    top_evidence: Optional[TopEvidence] = None,
+    top_k_capacity: int = DEFAULT_CAPACITY,
+    evidence: Optional[EventOffsets] = None,
 ) -> List[StagingBucketFeatures]:
-    counts: Dict[Tuple[str, int], int] = {}
-    artifacts: Dict[Tuple[str, int], Set[str]] = {}
-
-    for e in events:
-        ts_raw = e.get(time_field)
-        host = str(e.get(host_field, "")).strip()
-
-        if ts_raw is None or not host:
-            continue
-
-        try:
-            ts = int(ts_raw)
-        except Exception:
-            continue
-
-        if not _is_staging_event(
-            e,
-            process_field=process_field,
-            file_name_field=file_name_field,
-            file_size_field=file_size_field,
-            large_file_bytes=large_file_bytes,
-            tool_keywords=tool_keywords,
-            archive_exts=archive_exts,
-        ):
-            continue
-
-        b = bucket_epoch(ts, bucket_seconds)
-        key = (host, b)
-
-        if key not in counts:
-            counts[key] = 0
-            artifacts[key] = set()
-
-        counts[key] += 1
-
-        artifact = (
-            str(e.get(file_path_field) or "").strip()
-            or str(e.get(file_name_field) or "").strip()
-            or str(e.get(process_field) or "").strip()
-            or "unknown_artifact"
-        )
-        artifacts[key].add(artifact)
-
+    item = partial(
+        staging_item,
+        host_field=host_field,
+        process_field=process_field,
+        file_name_field=file_name_field,
+        file_path_field=file_path_field,
+        file_size_field=file_size_field,
+        large_file_bytes=large_file_bytes,
+        tool_keywords=tool_keywords,
+        archive_exts=archive_exts,
+    )
+    counts = BucketCounts(top_evidence, top_k_capacity, evidence)
+    return staging_rows(counts.extend(events, item, bucket_seconds, time_field))
+
+
+def staging_item(
+    e: Dict,
+    host_field: str = "host",
+    process_field: str = "process_name",
+    file_name_field: str = "file_name",
+    file_path_field: str = "file_path",
+    file_size_field: str = "file_size",
+    large_file_bytes: int = 100_000_000,
+    tool_keywords: Tuple[str, ...] = ("7z", "7za", "rar", "winzip", "zip", "tar", "gzip"),
+    archive_exts: Tuple[str, ...] = (".zip", ".7z", ".rar", ".tar", ".gz"),
+) -> Optional[Tuple[str, str]]:
+    """
+    (host, artifact) for a staging event, else None.
+    """
+    host = str(e.get(host_field, "")).strip()
+    if not host:
+        return None
+
+    if not _is_staging_event(
+        e,
+        process_field=process_field,
+        file_name_field=file_name_field,
+        file_size_field=file_size_field,
+        large_file_bytes=large_file_bytes,
+        tool_keywords=tool_keywords,
+        archive_exts=archive_exts,
+    ):
+        return None
+
+    artifact = (
+        str(e.get(file_path_field) or "").strip()
+        or str(e.get(file_name_field) or "").strip()
+        or str(e.get(process_field) or "").strip()
+        or "unknown_artifact"
+    )
+    return host, artifact
+
+
+def staging_rows(counts: BucketCounts) -> List[StagingBucketFeatures]:
     out: List[StagingBucketFeatures] = []
-    for (host, b), c in counts.items():
+    for (host, b), c in counts.counts.items():
         out.append(
             StagingBucketFeatures(
                 host=host,
                 bucket_start=b,
                 staging_events_per_host=int(c),
-                unique_staging_artifacts=len(artifacts[(host, b)]),
+                unique_staging_artifacts=len(counts.values[(host, b)]),
             )
         )
 
@@ -1,8 +1,13 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from functools import partial
 from typing import Dict, Iterable, List, Optional, Set, Tuple
 
+from src.features.bucket_counts import BucketCounts
+from src.features.offsets import EventOffsets
+from src.features.sketches import DEFAULT_CAPACITY, TopEvidence
+
 
 @dataclass(frozen=True)
 class FanoutBucketFeatures:
@@ -50,49 +55,48 @@ def extract_fanout_bucket_features(
     host_field: str = "host",
     dest_ip_field: str = "dest_ip",
     time_field: str = "_time",
+    top_evidence: Optional[TopEvidence] = None,
+    top_k_capacity: int = DEFAULT_CAPACITY,
+    evidence: Optional[EventOffsets] = None,
 ) -> List[FanoutBucketFeatures]:
     """
     Computes per-host per-bucket:
       - internal_dest_count
       - internal_conn_count
-    """
-    dest_sets: Dict[Tuple[str, int], Set[str]] = {}
-    conn_counts: Dict[Tuple[str, int], int] = {}
 
-    for e in events:
-        host = str(e.get(host_field, "")).strip()
-        dest_ip = str(e.get(dest_ip_field, "")).strip()
-        ts_raw = e.get(time_field)
+    If top_evidence is given, it is filled with a bounded sketch of the most
+    contacted internal destinations per (host, bucket).
 
-        if not host or not dest_ip or ts_raw is None:
-            continue
+    If evidence is given, it collects the archive offsets (event `_offset`)
+    of the events behind each row.
+    """
+    item = partial(internal_dest_item, host_field=host_field, dest_ip_field=dest_ip_field)
+    counts = BucketCounts(top_evidence, top_k_capacity, evidence)
+    return fanout_rows(counts.extend(events, item, bucket_seconds, time_field))
 
-        try:
-            ts = int(ts_raw)
-        except Exception:
-            continue
 
-        if not is_internal_ip(dest_ip):
-            continue
+def internal_dest_item(e: Dict, host_field: str = "host", dest_ip_field: str = "dest_ip") -> Optional[Tuple[str, str]]:
+    """
+    (host, dest_ip) for a connection to an internal destination, else None.
+    """
+    host = str(e.get(host_field, "")).strip()
+    dest_ip = str(e.get(dest_ip_field, "")).strip()
 
-        b = bucket_epoch(ts, bucket_seconds)
-        key = (host, b)
+    if not host or not dest_ip or not is_internal_ip(dest_ip):
+        return None
 
-        if key not in dest_sets:
-            dest_sets[key] = set()
-            conn_counts[key] = 0
+    return host, dest_ip
 
-        dest_sets[key].add(dest_ip)
-        conn_counts[key] += 1
 
+def fanout_rows(counts: BucketCounts) -> List[FanoutBucketFeatures]:
     out: List[FanoutBucketFeatures] = []
-    for (host, b), dests in dest_sets.items():
+    for (host, b), dests in counts.values.items():
         out.append(
             FanoutBucketFeatures(
                 host=host,
                 bucket_start=b,
                 internal_dest_count=len(dests),
-                internal_conn_count=int(conn_counts[(host, b)]),
+                internal_conn_count=int(counts.counts[(host, b)]),
             )
         )
 
@@ -111,33 +115,8 @@ def extract_internal_dest_sets_by_bucket(
     Phase 2.2 helper: returns (host, bucket_start) -> set(dest_ip) for internal traffic.
     Used to compute true novelty via set-diff.
     """
-    dest_sets: Dict[Tuple[str, int], Set[str]] = {}
-
-    for e in events:
-        host = str(e.get(host_field, "")).strip()
-        dest_ip = str(e.get(dest_ip_field, "")).strip()
-        ts_raw = e.get(time_field)
-
-        if not host or not dest_ip or ts_raw is None:
-            continue
-
-        try:
-            ts = int(ts_raw)
-        except Exception:
-            continue
-
-        if not is_internal_ip(dest_ip):
-            continue
-
-        b = bucket_epoch(ts, bucket_seconds)
-        key = (host, b)
-
-        if key not in dest_sets:
-            dest_sets[key] = set()
-
-        dest_sets[key].add(dest_ip)
-
-    return dest_sets
+    item = partial(internal_dest_item, host_field=host_field, dest_ip_field=dest_ip_field)
+    return BucketCounts().extend(events, item, bucket_seconds, time_field).values
 
 
 def compute_growth_hits(
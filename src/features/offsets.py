@@ -0,0 +1,34 @@
+"""
+Phase 2.2: raw-event references captured during extraction.
+
+Archive readers can tag each event with its byte offset in the archive
+(`_offset`). Extractors given an EventOffsets dict append the offset of every
+event that contributed to an (entity, bucket) row, so the engine can later
+seek straight to the raw events behind a signal.
+"""
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Tuple
+
+
+OFFSET_FIELD = "_offset"
+
+# (entity, bucket_start) -> archive offsets of contributing events
+EventOffsets = Dict[Tuple[str, int], List[int]]
+
+
+def record_offset(
+    evidence: Optional[EventOffsets],
+    key: Tuple[str, int],
+    event: Dict,
+    offset_field: str = OFFSET_FIELD,
+) -> None:
+    if evidence is None:
+        return
+    off = event.get(offset_field)
+    if off is None:
+        return
+    lst = evidence.get(key)
+    if lst is None:
+        lst = evidence[key] = []
+    lst.append(int(off))
@@ -1,7 +1,12 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Dict, Iterable, List, Optional, Set, Tuple
+from functools import partial
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.features.bucket_counts import BucketCounts
+from src.features.offsets import EventOffsets
+from src.features.sketches import DEFAULT_CAPACITY, TopEvidence
 
 
 @dataclass(frozen=True)
@@ -34,6 +39,9 @@ def extract_persistence_bucket_features(
     task_name_fields: Tuple[str, ...] = ("TaskName", "task_name"),
     service_name_fields: Tuple[str, ...] = ("ServiceName", "service_name"),
     persistence_eventcodes: Tuple[int, ...] = (4698, 7045),
+    top_evidence: Optional[TopEvidence] = None,
+    top_k_capacity: int = DEFAULT_CAPACITY,
+    evidence: Optional[EventOffsets] = None,
 ) -> List[PersistenceBucketFeatures]:
     """
     MVP feature extraction for persistence drift (PDE-SPL-0403).
@@ -47,69 +55,81 @@ def extract_persistence_bucket_features(
     Computes per host per bucket:
       - persistence_events_per_host: count of matching persistence events
       - unique_persistence_artifacts: distinct task/service names (artifact ids)
-    """
-    counts: Dict[Tuple[str, int], int] = {}
-    artifacts: Dict[Tuple[str, int], Set[str]] = {}
-
-    for e in events:
-        ts_raw = e.get(time_field)
-        host = str(e.get(host_field, "")).strip()
-        ec_raw = e.get(eventcode_field)
-
-        if ts_raw is None or not host or ec_raw is None:
-            continue
-
-        try:
-            ts = int(ts_raw)
-        except Exception:
-            continue
-
-        try:
-            ec = int(ec_raw)
-        except Exception:
-            continue
-
-        if ec not in persistence_eventcodes:
-            continue
-
-        b = bucket_epoch(ts, bucket_seconds)
-        key = (host, b)
-
-        if key not in counts:
-            counts[key] = 0
-            artifacts[key] = set()
-
-        counts[key] += 1
-
-        # Determine artifact name
-        artifact_val = None
-        if ec == 4698:
-            for f in task_name_fields:
-                if e.get(f):
-                    artifact_val = str(e.get(f)).strip()
-                    break
-            if not artifact_val:
-                artifact_val = "unknown_task"
-        elif ec == 7045:
-            for f in service_name_fields:
-                if e.get(f):
-                    artifact_val = str(e.get(f)).strip()
-                    break
-            if not artifact_val:
-                artifact_val = "unknown_service"
-        else:
-            artifact_val = "unknown_artifact"
-
-        artifacts[key].add(artifact_val)
 
+    If top_evidence is given, it is filled with a bounded sketch of the most
+    frequent artifacts per (host, bucket).
+
+    If evidence is given, it collects the archive offsets (event `_offset`)
+    of the events behind each row.
+    """
+    item = partial(
+        persistence_item,
+        host_field=host_field,
+        eventcode_field=eventcode_field,
+        task_name_fields=task_name_fields,
+        service_name_fields=service_name_fields,
+        persistence_eventcodes=persistence_eventcodes,
+    )
+    counts = BucketCounts(top_evidence, top_k_capacity, evidence)
+    return persistence_rows(counts.extend(events, item, bucket_seconds, time_field))
+
+
+def persistence_item(
+    e: Dict,
+    host_field: str = "host",
+    eventcode_field: str = "EventCode",
+    task_name_fields: Tuple[str, ...] = ("TaskName", "task_name"),
+    service_name_fields: Tuple[str, ...] = ("ServiceName", "service_name"),
+    persistence_eventcodes: Tuple[int, ...] = (4698, 7045),
+) -> Optional[Tuple[str, str]]:
+    """
+    (host, artifact name) for a persistence event, else None.
+    """
+    host = str(e.get(host_field, "")).strip()
+    ec_raw = e.get(eventcode_field)
+
+    if not host or ec_raw is None:
+        return None
+
+    try:
+        ec = int(ec_raw)
+    except Exception:
+        return None
+
+    if ec not in persistence_eventcodes:
+        return None
+
+    # Determine artifact name
+    artifact_val = None
+    if ec == 4698:
+        for f in task_name_fields:
+            if e.get(f):
+                artifact_val = str(e.get(f)).strip()
+                break
+        if not artifact_val:
+            artifact_val = "unknown_task"
+    elif ec == 7045:
+        for f in service_name_fields:
+            if e.get(f):
+                artifact_val = str(e.get(f)).strip()
+                break
+        if not artifact_val:
+            artifact_val = "unknown_service"
+    else:
+        artifact_val = "unknown_artifact"
+
+    return host, artifact_val
+
+
+def persistence_rows(counts: BucketCounts) -> List[PersistenceBucketFeatures]:
     out: List[PersistenceBucketFeatures] = []
-    for (host, b), c in counts.items():
+    for (host, b), c in counts.counts.items():
         out.append(
             PersistenceBucketFeatures(
                 host=host,
                 bucket_start=b,
                 persistence_events_per_host=int(c),
-                unique_persistence_artifacts=len(artifacts[(host, b)]),
+                unique_persistence_artifacts=len(counts.values[(host, b)]),
             )
         )
 
@@ -0,0 +1,131 @@
+"""
+Phase 2.2: bounded top-K evidence per (entity, bucket).
+
+SpaceSaving is the Metwally et al. heavy-hitters sketch: it keeps at most
+`capacity` counters. When a new item arrives and the sketch is full, it takes
+over the counter of the current minimum and inherits its count as error.
+Any item whose true frequency exceeds total / capacity is guaranteed to be
+tracked, and reported counts over-estimate by at most the recorded error.
+
+Extractors use these (when asked) to keep the top destinations, targeted
+users, artifacts or tools behind a bucket without keeping the full sets.
+"""
+from __future__ import annotations
+
+import heapq
+from typing import Dict, Hashable, List, Optional, Tuple
+
+
+DEFAULT_CAPACITY = 16
+
+# (entity, bucket_start) -> sketch, filled in by extractors
+TopEvidence = Dict[Tuple[str, int], "SpaceSaving"]
+
+
+class SpaceSaving:
+    """
+    Fixed-memory frequency sketch for the top items in a stream.
+    """
+
+    __slots__ = ("capacity", "total", "_counts", "_errors", "_heap")
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY) -> None:
+        if capacity <= 0:
+            raise ValueError("capacity must be > 0")
+        self.capacity = int(capacity)
+        self.total = 0
+        self._counts: Dict[Hashable, int] = {}
+        self._errors: Dict[Hashable, int] = {}
+        # (count, item) ; entries whose count no longer matches are stale
+        self._heap: List[Tuple[int, Hashable]] = []
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def __contains__(self, item: Hashable) -> bool:
+        return item in self._counts
+
+    def add(self, item: Hashable, weight: int = 1) -> None:
+        self.total += weight
+        counts = self._counts
+        c = counts.get(item)
+        if c is not None:
+            counts[item] = c + weight
+            return
+
+        if len(counts) < self.capacity:
+            counts[item] = weight
+            self._errors[item] = 0
+            heapq.heappush(self._heap, (weight, item))
+            return
+
+        victim, floor = self._pop_min()
+        del counts[victim]
+        del self._errors[victim]
+        counts[item] = floor + weight
+        self._errors[item] = floor
+        heapq.heappush(self._heap, (floor + weight, item))
+
+    def _pop_min(self) -> Tuple[Hashable, int]:
+        heap = self._heap
+        counts = self._counts
+        if len(heap) > 4 * self.capacity:
+            heap[:] = [(c, i) for i, c in counts.items()]
+            heapq.heapify(heap)
+        while True:
+            c, item = heapq.heappop(heap)
+            current = counts.get(item)
+            if current == c:
+                return item, c
+            if current is not None:
+                # Count grew since this entry was pushed; requeue at its real value
+                heapq.heappush(heap, (current, item))
+
+    def count(self, item: Hashable) -> int:
+        return self._counts.get(item, 0)
+
+    def error(self, item: Hashable) -> int:
+        return self._errors.get(item, 0)
+
+    def top(self, n: Optional[int] = None) -> List[Tuple[Hashable, int]]:
+        """
+        Items by descending estimated count (ties by item), at most n.
+        """
+        items = sorted(self._counts.items(), key=lambda kv: (-kv[1], str(kv[0])))
+        return items if n is None else items[: max(0, n)]
+
+
+def record_evidence(
+    top_evidence: Optional[TopEvidence],
+    key: Tuple[str, int],
+    item: str,
+    capacity: int,
+) -> None:
+    """
+    Extractor helper: add item to the sketch for key, if top evidence is wanted.
+    """
+    if top_evidence is None:
+        return
+    sketch = top_evidence.get(key)
+    if sketch is None:
+        sketch = top_evidence[key] = SpaceSaving(capacity)
+    sketch.add(item)
+
+
+def top_items(top_evidence: Optional[TopEvidence], key: Tuple[str, int], n: int) -> Optional[List[Tuple[str, int]]]:
+    """
+    Evaluator helper: the top-n (item, count) pairs for key, or None.
+    """
+    if top_evidence is None:
+        return None
+    sketch = top_evidence.get(key)
+    if sketch is None:
+        return None
+    return [(str(i), int(c)) for i, c in sketch.top(n)]
+
+
+if __name__ == "__main__":
+    s = SpaceSaving(capacity=3)
+    for x in ["a"] * 10 + ["b"] * 5 + list("cdefg") + ["a"] * 2:
+        s.add(x)
+    print(s.top(), {i: s.error(i) for i, _ in s.top()})
@@ -0,0 +1,388 @@
+"""
+Inventory query service.
+
+All corpus inventories in one in-memory index for the control plane's
+browse and search views: the Sigma database (src/inventory/store.py)
+plus every other inventory/detections.*.yml, such as the Splunk starter
+pack. A query combines
+
+  filters  technique (T1059 also matches its sub-techniques), tactic,
+           tag, readiness label, detection type, source, platform,
+           product, severity, min_score. Repeated values of one filter
+           are OR-ed; different filters are AND-ed
+  text     words of name and description, all required; a trailing *
+           matches a prefix ("power*")
+  facets   per-value counts of each FACET_FIELDS field over the matches
+
+Indexed values map to bitmaps (Python ints, bit i set for document i), so
+a filter is an OR/AND of bitmaps and a facet count is a popcount.
+Postings for text words are kept as id arrays and turned into bitmaps
+per query, since there are many more words than facet values and most
+are rare. Documents are numbered in result order (score descending, then
+name), so a page is the lowest set bits of the result and nothing is
+sorted at query time.
+
+InventoryQuery.current() rebuilds the index when an inventory file is
+added, removed or replaced, checked with a few stat calls per query.
+
+Configuration (environment):
+  PDE_INVENTORY_PATH  Sigma inventory database (default: inventory/detections.sigma.index.sqlite)
+                      (any other path is opened as is, not rebuilt from the YAML index)
+  PDE_INVENTORY_DIR   directory scanned for detections.*.yml inventories (default: inventory/)
+"""
+from __future__ import annotations
+
+import os
+import re
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from src.inventory.store import DEFAULT_PATH, DEFAULT_YAML_PATH, InventoryStore, open_inventory, source_yaml
+
+
+INVENTORY_DIR = DEFAULT_PATH.parent
+INVENTORY_GLOB = "detections.*.yml"
+
+# Multi-valued fields are counted per value
+FACET_FIELDS = (
+    "source_id",
+    "predictive_readiness",
+    "detection_type",
+    "severity",
+    "status",
+    "platform",
+    "product",
+    "tactics",
+    "techniques",
+    "tags",
+)
+FACET_LIMIT = 20
+MAX_LIMIT = 500
+
+WORD_RE = re.compile(r"[a-z0-9]+")
+TECHNIQUE_PARENT_RE = re.compile(r"^(t\d{4})\.\d{3}$")
+
+
+def _values(record: Dict[str, Any], field: str) -> List[str]:
+    value = record.get(field)
+    if value is None or value == "":
+        return []
+    if isinstance(value, list):
+        return [str(v) for v in value if v is not None and v != ""]
+    return [str(value)]
+
+
+def _bitmap(ids: Iterable[int]) -> int:
+    ids = list(ids)
+    if not ids:
+        return 0
+    buf = bytearray(max(ids) // 8 + 1)
+    for i in ids:
+        buf[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(buf, "little")
+
+
+def _lowest(bits: int, offset: int, limit: int) -> List[int]:
+    """
+    Positions of the set bits offset..offset+limit-1, counting from bit 0.
+    """
+    out: List[int] = []
+    skipped = 0
+    while bits and len(out) < limit:
+        low = bits & -bits
+        bits ^= low
+        if skipped < offset:
+            skipped += 1
+            continue
+        out.append(low.bit_length() - 1)
+    return out
+
+
+def _ids(bits: int) -> List[int]:
+    s = bin(bits)[:1:-1]
+    return [i for i, c in enumerate(s) if c == "1"]
+
+
+class InventoryIndex:
+    """
+    Immutable index over a list of inventory records.
+    """
+
+    def __init__(self, records: Sequence[Dict[str, Any]]) -> None:
+        self.docs = sorted(
+            records,
+            key=lambda r: (
+                -(r.get("predictive_readiness_score") if isinstance(r.get("predictive_readiness_score"), int) else -1),
+                str(r.get("name") or "").lower(),
+                str(r.get("source_id") or ""),
+                str(r.get("detection_id") or ""),
+            ),
+        )
+        self.all = (1 << len(self.docs)) - 1
+
+        # field -> lowercased value -> ids, then bitmaps
+        postings: Dict[str, Dict[str, List[int]]] = {f: {} for f in FACET_FIELDS}
+        self.display: Dict[str, Dict[str, str]] = {f: {} for f in FACET_FIELDS}
+        parents: Dict[str, List[int]] = {}
+        scores: Dict[int, List[int]] = {}
+        words: Dict[str, array] = {}
+        self.by_id: Dict[str, List[int]] = {}
+        # doc -> (field, key) pairs, for counting facets over small results
+        self.doc_keys: List[Tuple[Tuple[str, str], ...]] = []
+
+        for i, r in enumerate(self.docs):
+            keys = []
+            for field in FACET_FIELDS:
+                for value in dict.fromkeys(_values(r, field)):
+                    key = value.lower()
+                    postings[field].setdefault(key, []).append(i)
+                    self.display[field].setdefault(key, value)
+                    keys.append((field, key))
+            self.doc_keys.append(tuple(keys))
+            for technique in _values(r, "techniques"):
+                m = TECHNIQUE_PARENT_RE.match(technique.lower())
+                if m:
+                    ids = parents.setdefault(m.group(1), [])
+                    if not ids or ids[-1] != i:
+                        ids.append(i)
+            score = r.get("predictive_readiness_score")
+            if isinstance(score, int):
+                scores.setdefault(score, []).append(i)
+            text = f"{r.get('name') or ''} {r.get('description') or ''}".lower()
+            for word in set(WORD_RE.findall(text)):
+                words.setdefault(word, array("I")).append(i)
+            self.by_id.setdefault(str(r.get("detection_id") or "").lower(), []).append(i)
+
+        self.fields: Dict[str, Dict[str, int]] = {
+            field: {key: _bitmap(ids) for key, ids in values.items()} for field, values in postings.items()
+        }
+        self.technique_parents = {key: _bitmap(ids) for key, ids in parents.items()}
+        self.scores = sorted((score, _bitmap(ids)) for score, ids in scores.items())
+        self.words = words
+        self.word_list = sorted(words)
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    # ------------------------
+    # Matching
+    # ------------------------
+
+    def _field(self, field: str, values: Iterable[str]) -> int:
+        bits = 0
+        index = self.fields[field]
+        for value in values:
+            key = value.strip().lower()
+            bits |= index.get(key, 0)
+            if field == "techniques":
+                bits |= self.technique_parents.get(key, 0)
+        return bits
+
+    def _word(self, term: str) -> int:
+        if term.endswith("*"):
+            prefix = term[:-1]
+            ids: set = set()
+            i = bisect_left(self.word_list, prefix)
+            while i < len(self.word_list) and self.word_list[i].startswith(prefix):
+                ids.update(self.words[self.word_list[i]])
+                i += 1
+            return _bitmap(ids)
+        return _bitmap(self.words.get(term, ()))
+
+    def match(
+        self, *, text: Optional[str] = None, min_score: Optional[int] = None, **filters: Sequence[str]
+    ) -> int:
+        """
+        Bitmap of matching documents. filters maps FACET_FIELDS names to
+        accepted values.
+        """
+        bits = self.all
+        for field, values in filters.items():
+            if field not in self.fields:
+                raise ValueError(f"Unknown filter {field!r}; expected one of {FACET_FIELDS}")
+            if values:
+                bits &= self._field(field, values)
+        if min_score is not None:
+            scored = 0
+            for score, score_bits in self.scores:
+                if score >= min_score:
+                    scored |= score_bits
+            bits &= scored
+        if text:
+            terms = re.findall(r"[a-z0-9]+\*?", text.lower())
+            for term in terms:
+                if not bits:
+                    break
+                bits &= self._word(term)
+        return bits
+
+    def facets(self, bits: int, limit: int = FACET_LIMIT) -> Dict[str, Dict[str, int]]:
+        """
+        {field: {value: count}} over the documents in bits, each field's
+        values by count descending, at most limit per field.
+        """
+        total = bits.bit_count()
+        counts: Dict[str, Dict[str, int]] = {f: {} for f in FACET_FIELDS}
+        if total * 16 < len(self.doc_keys):
+            for i in _ids(bits):
+                for field, key in self.doc_keys[i]:
+                    counts[field][key] = counts[field].get(key, 0) + 1
+        else:
+            for field, index in self.fields.items():
+                field_counts = counts[field]
+                for key, value_bits in index.items():
+                    n = (value_bits & bits).bit_count()
+                    if n:
+                        field_counts[key] = n
+        out: Dict[str, Dict[str, int]] = {}
+        for field, field_counts in counts.items():
+            top = sorted(field_counts.items(), key=lambda kv: (-kv[1], kv[0]))[:limit]
+            out[field] = {self.display[field][key]: n for key, n in top}
+        return out
+
+    def search(
+        self,
+        *,
+        text: Optional[str] = None,
+        min_score: Optional[int] = None,
+        offset: int = 0,
+        limit: int = 50,
+        facets: bool = True,
+        facet_limit: int = FACET_LIMIT,
+        **filters: Sequence[str],
+    ) -> Dict[str, Any]:
+        started = time.perf_counter()
+        bits = self.match(text=text, min_score=min_score, **filters)
+        limit = max(0, min(int(limit), MAX_LIMIT))
+        out: Dict[str, Any] = {
+            "total": bits.bit_count(),
+            "offset": offset,
+            "limit": limit,
+            "results": [self.docs[i] for i in _lowest(bits, max(0, int(offset)), limit)],
+        }
+        if facets:
+            out["facets"] = self.facets(bits, facet_limit)
+        out["took_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        return out
+
+    def get(self, detection_id: str) -> List[Dict[str, Any]]:
+        return [self.docs[i] for i in self.by_id.get(detection_id.strip().lower(), [])]
+
+
+# ------------------------
+# Sources
+# ------------------------
+
+def yaml_inventories(directory: Union[str, Path] = INVENTORY_DIR) -> List[Path]:
+    """
+    YAML inventories other than the Sigma index, which is read from its
+    database instead.
+    """
+    return [p for p in sorted(Path(directory).glob(INVENTORY_GLOB)) if p.name != DEFAULT_YAML_PATH.name]
+
+
+def load_yaml_inventory(path: Path) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    import yaml
+
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    with path.open("r", encoding="utf-8") as f:
+        doc = yaml.load(f, Loader=loader) or {}
+    source_id = doc.get("source_id") or path.stem
+    records = [dict(r, source_id=r.get("source_id") or source_id) for r in doc.get("records") or [] if isinstance(r, dict)]
+    return {"source_id": source_id, "path": str(path), "generated_at": doc.get("generated_at") or None}, records
+
+
+class InventoryQuery:
+    """
+    Holds the current InventoryIndex and rebuilds it when a source changes.
+    """
+
+    def __init__(
+        self,
+        db_path: Union[str, Path, None] = None,
+        directory: Union[str, Path] = INVENTORY_DIR,
+        yaml_path: Union[str, Path, None] = None,
+    ) -> None:
+        self.db_path = Path(db_path or DEFAULT_PATH)
+        self.directory = Path(directory)
+        # Only the default database is rebuilt from the committed YAML
+        self.yaml_path = source_yaml(self.db_path, yaml_path)
+        self.index: Optional[InventoryIndex] = None
+        self.sources: List[Dict[str, Any]] = []
+        self.built_at: Optional[float] = None
+        self.build_seconds: Optional[float] = None
+        self._stamp: Optional[Tuple[Any, ...]] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "InventoryQuery":
+        return cls(
+            db_path=os.environ.get("PDE_INVENTORY_PATH") or DEFAULT_PATH,
+            directory=os.environ.get("PDE_INVENTORY_DIR") or INVENTORY_DIR,
+        )
+
+    def _paths(self) -> List[Path]:
+        paths = yaml_inventories(self.directory) + [self.db_path]
+        if self.yaml_path is not None:
+            paths.append(Path(self.yaml_path))
+        return paths
+
+    def _current_stamp(self) -> Tuple[Any, ...]:
+        stamp = []
+        for p in self._paths():
+            try:
+                st = p.stat()
+                stamp.append((str(p), st.st_mtime_ns, st.st_size))
+            except OSError:
+                stamp.append((str(p), None, None))
+        return tuple(stamp)
+
+    def current(self) -> InventoryIndex:
+        stamp = self._current_stamp()
+        if self.index is not None and stamp == self._stamp:
+            return self.index
+        with self._lock:
+            stamp = self._current_stamp()
+            if self.index is None or stamp != self._stamp:
+                self._build()
+                # open_inventory may have just (re)built the database
+                self._stamp = self._current_stamp()
+        return self.index
+
+    def _build(self) -> None:
+        started = time.perf_counter()
+        store: InventoryStore = open_inventory(self.db_path, self.yaml_path)
+        try:
+            records = list(store.records())
+            sources = [{
+                "source_id": store.meta.get("source_id"),
+                "path": str(store.path),
+                "generated_at": store.meta.get("generated_at") or None,
+                "records": len(records),
+            }]
+        finally:
+            store.close()
+        for path in yaml_inventories(self.directory):
+            info, extra = load_yaml_inventory(path)
+            sources.append(dict(info, records=len(extra)))
+            records.extend(extra)
+        self.index = InventoryIndex(records)
+        self.sources = sources
+        self.built_at = time.time()
+        self.build_seconds = round(time.perf_counter() - started, 6)
+
+    def describe(self) -> Dict[str, Any]:
+        index = self.current()
+        return {
+            "documents": len(index),
+            "sources": self.sources,
+            "built_at": self.built_at,
+            "build_seconds": self.build_seconds,
+        }
+
+
+inventory_query = InventoryQuery.from_env()
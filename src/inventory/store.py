@@ -0,0 +1,257 @@
+"""
+Indexed detection inventory (SQLite).
+
+tools/ingest_sigma.py writes the Sigma inventory to
+inventory/detections.sigma.index.sqlite, and exports the same records to
+the committed YAML index. One row per record, list fields stored as JSON, and the fields
+the control plane filters on indexed:
+
+  detections            one row per record, in inventory order
+  detection_techniques  (detection, technique), indexed on technique
+  detection_tactics     (detection, tactic), indexed on tactic
+  meta                  source_id, generated_at, counts
+
+plus indexes on readiness label, score, platform and product. Opening
+the file and reading the meta table takes milliseconds; loading all
+records is one table scan with no YAML parsing.
+
+The database is a build artifact and is not committed. open_inventory()
+(re)builds the default database from the committed YAML index when it is
+missing or older than the YAML, so a fresh checkout pays the YAML parse
+once. A database at any other path (PDE_INVENTORY_PATH) is only opened,
+never rebuilt, unless the caller names the YAML to build it from.
+"""
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Union
+
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_PATH = REPO_ROOT / "inventory" / "detections.sigma.index.sqlite"
+DEFAULT_YAML_PATH = REPO_ROOT / "inventory" / "detections.sigma.index.yml"
+
+SCHEMA_VERSION = 1
+
+# Inventory record fields, in record order (see build_inventory_record in
+# tools/ingest_sigma.py); list fields are stored as JSON text
+RECORD_FIELDS = (
+    "detection_id",
+    "source_id",
+    "source_rule_path",
+    "name",
+    "description",
+    "query_language",
+    "detection_type",
+    "predictive_readiness",
+    "predictive_readiness_score",
+    "predictive_readiness_factors",
+    "severity",
+    "status",
+    "platform",
+    "product",
+    "category",
+    "data_sources",
+    "tactics",
+    "techniques",
+    "tags",
+    "time_window",
+    "references",
+    "false_positives",
+    "notes",
+)
+JSON_FIELDS = frozenset(
+    ("predictive_readiness_factors", "data_sources", "tactics", "techniques", "tags", "references", "false_positives")
+)
+
+SCHEMA = f"""
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE detections (
+    id INTEGER PRIMARY KEY,
+    {", ".join(f'"{f}" {"INTEGER" if f == "predictive_readiness_score" else "TEXT"}' for f in RECORD_FIELDS)}
+);
+CREATE TABLE detection_techniques (detection INTEGER NOT NULL, technique TEXT NOT NULL);
+CREATE TABLE detection_tactics (detection INTEGER NOT NULL, tactic TEXT NOT NULL);
+"""
+
+INDEXES = """
+CREATE INDEX ix_detections_detection_id ON detections (detection_id);
+CREATE INDEX ix_detections_readiness ON detections (predictive_readiness);
+CREATE INDEX ix_detections_score ON detections (predictive_readiness_score);
+CREATE INDEX ix_detections_platform ON detections (platform);
+CREATE INDEX ix_detections_product ON detections (product);
+CREATE INDEX ix_techniques ON detection_techniques (technique, detection);
+CREATE INDEX ix_tactics ON detection_tactics (tactic, detection);
+"""
+
+
+class InventoryError(RuntimeError):
+    pass
+
+
+def _column(field: str, value: Any) -> Any:
+    if field in JSON_FIELDS:
+        return json.dumps(value if value is not None else [], ensure_ascii=False, default=str)
+    return value
+
+
+def write_inventory(path: Union[str, Path], records: Sequence[Dict[str, Any]], meta: Dict[str, Any]) -> int:
+    """
+    Write records (inventory record dicts) and meta to a new database at
+    path, replacing any existing file atomically. Returns the file size.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-", suffix=path.suffix)
+    os.close(fd)
+    # mkstemp creates the file 0600; the inventory is read by other users
+    os.chmod(tmp, 0o644)
+    try:
+        conn = sqlite3.connect(tmp)
+        try:
+            conn.execute("PRAGMA journal_mode = OFF")
+            conn.execute("PRAGMA synchronous = OFF")
+            conn.executescript(SCHEMA)
+            placeholders = ", ".join("?" for _ in range(len(RECORD_FIELDS) + 1))
+            columns = ", ".join(f'"{f}"' for f in RECORD_FIELDS)
+            conn.executemany(
+                f"INSERT INTO detections (id, {columns}) VALUES ({placeholders})",
+                ([i] + [_column(f, r.get(f)) for f in RECORD_FIELDS] for i, r in enumerate(records)),
+            )
+            conn.executemany(
+                "INSERT INTO detection_techniques VALUES (?, ?)",
+                ((i, t) for i, r in enumerate(records) for t in dict.fromkeys(r.get("techniques") or [])),
+            )
+            conn.executemany(
+                "INSERT INTO detection_tactics VALUES (?, ?)",
+                ((i, t) for i, r in enumerate(records) for t in dict.fromkeys(r.get("tactics") or [])),
+            )
+            conn.executemany(
+                "INSERT INTO meta VALUES (?, ?)",
+                [(k, json.dumps(v)) for k, v in dict(meta, schema_version=SCHEMA_VERSION).items()],
+            )
+            conn.executescript(INDEXES)
+            conn.commit()
+            conn.execute("VACUUM")
+        finally:
+            conn.close()
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    return path.stat().st_size
+
+
+class InventoryStore:
+    """
+    Read-only connection to an inventory database.
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = Path(path)
+        if not self.path.exists():
+            raise InventoryError(f"Inventory database not found: {self.path}")
+        self.conn = sqlite3.connect(f"{self.path.resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False)
+        self.conn.execute("PRAGMA query_only = ON")
+        self.meta = {k: json.loads(v) for k, v in self.conn.execute("SELECT key, value FROM meta")}
+        if self.meta.get("schema_version") != SCHEMA_VERSION:
+            self.conn.close()
+            raise InventoryError(
+                f"{self.path}: schema version {self.meta.get('schema_version')}, expected {SCHEMA_VERSION}; re-run the ingester"
+            )
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT count(*) FROM detections").fetchone()[0]
+
+    def _records(self, where: str = "", params: Sequence[Any] = ()) -> Iterator[Dict[str, Any]]:
+        columns = ", ".join(f'"{f}"' for f in RECORD_FIELDS)
+        cursor = self.conn.execute(f"SELECT {columns} FROM detections {where} ORDER BY id", params)
+        loads = json.loads
+        for row in cursor:
+            yield {f: (loads(v) if f in JSON_FIELDS else v) for f, v in zip(RECORD_FIELDS, row)}
+
+    def records(self) -> Iterator[Dict[str, Any]]:
+        """
+        All records as inventory record dicts, in inventory order.
+        """
+        return self._records()
+
+    def find(
+        self,
+        *,
+        technique: Optional[str] = None,
+        tactic: Optional[str] = None,
+        readiness: Optional[str] = None,
+        min_score: Optional[int] = None,
+        platform: Optional[str] = None,
+        product: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Records matching every given filter, using the indexes.
+        """
+        clauses: List[str] = []
+        params: List[Any] = []
+        if technique is not None:
+            clauses.append("id IN (SELECT detection FROM detection_techniques WHERE technique = ?)")
+            params.append(technique.upper())
+        if tactic is not None:
+            clauses.append("id IN (SELECT detection FROM detection_tactics WHERE tactic = ?)")
+            params.append(tactic)
+        for column, value in (("predictive_readiness", readiness), ("platform", platform), ("product", product)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if min_score is not None:
+            clauses.append("predictive_readiness_score >= ?")
+            params.append(int(min_score))
+        return list(self._records("WHERE " + " AND ".join(clauses) if clauses else "", params))
+
+
+def build_from_yaml(yaml_path: Union[str, Path], path: Union[str, Path]) -> int:
+    """
+    Convert a YAML inventory index (the ingester's YAML export) into a
+    database at path.
+    """
+    import yaml
+
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    with Path(yaml_path).open("r", encoding="utf-8") as f:
+        doc = yaml.load(f, Loader=loader)
+    meta = {k: v for k, v in doc.items() if k != "records"}
+    return write_inventory(path, doc.get("records") or [], meta)
+
+
+def source_yaml(path: Union[str, Path], yaml_path: Union[str, Path, None] = None) -> Optional[Path]:
+    """
+    The YAML index a database at path is built from: yaml_path if given,
+    the committed Sigma YAML for the default database, else None.
+    """
+    if yaml_path is not None:
+        return Path(yaml_path)
+    if Path(path).resolve() == DEFAULT_PATH.resolve():
+        return DEFAULT_YAML_PATH
+    return None
+
+
+def open_inventory(path: Union[str, Path, None] = None, yaml_path: Union[str, Path, None] = None) -> InventoryStore:
+    """
+    Open the inventory database, first building it from its source YAML
+    (see source_yaml) if the database is missing or older than the YAML.
+    """
+    path = Path(path or os.environ.get("PDE_INVENTORY_PATH") or DEFAULT_PATH)
+    source = source_yaml(path, yaml_path)
+    if source is not None and source.exists():
+        yaml_mtime = source.stat().st_mtime_ns
+        if not path.exists() or path.stat().st_mtime_ns < yaml_mtime:
+            build_from_yaml(source, path)
+    return InventoryStore(path)
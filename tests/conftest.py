@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import Any, Dict, List, Optional, Sequence
+from urllib.parse import urlencode
+
+import pytest
+
+
+class Response:
+    def __init__(self, status: int, headers: Dict[str, str], body: bytes) -> None:
+        self.status_code = status
+        self.headers = headers
+        self.content = body
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+
+async def _call(app, method: str, path: str, query: Any, body: Sequence[bytes], headers: Dict[str, str]) -> Response:
+    chunks = list(body) or [b""]
+    messages = [{"type": "http.request", "body": c, "more_body": i < len(chunks) - 1} for i, c in enumerate(chunks)]
+    out: Dict[str, Any] = {"status": None, "headers": {}, "body": b""}
+
+    async def receive() -> dict:
+        if messages:
+            return messages.pop(0)
+        await asyncio.Event().wait()
+
+    async def send(message: dict) -> None:
+        if message["type"] == "http.response.start":
+            out["status"] = message["status"]
+            out["headers"] = {k.decode(): v.decode() for k, v in message["headers"]}
+        elif message["type"] == "http.response.body":
+            out["body"] += message.get("body", b"")
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": urlencode(query or {}, doseq=True).encode(),
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+        "server": ("testserver", 80),
+        "client": ("testclient", 50000),
+        "root_path": "",
+    }
+    await app(scope, receive, send)
+    return Response(out["status"], out["headers"], out["body"])
+
+
+class ASGIClient:
+    """
+    Minimal in-process HTTP client for the API (no httpx/TestClient needed).
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        *,
+        params: Any = None,
+        json_body: Any = None,
+        content: Optional[bytes] = None,
+        chunks: Optional[List[bytes]] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Response:
+        headers = dict(headers or {})
+        if json_body is not None:
+            content = json.dumps(json_body).encode()
+            headers.setdefault("content-type", "application/json")
+        body = chunks if chunks is not None else ([content] if content is not None else [])
+        return asyncio.run(_call(self.app, method, path, params, body, headers))
+
+    def get(self, path: str, **kwargs: Any) -> Response:
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path: str, **kwargs: Any) -> Response:
+        return self.request("POST", path, **kwargs)
+
+
+@pytest.fixture
+def api(monkeypatch):
+    """
+    Client for src.api.main:app with evaluations run in the thread pool and
+    the result cache disabled.
+    """
+    from src.api import main, routes
+    from src.api.result_cache import ResultCache
+    from src.api.workers import EvaluationPool
+
+    pool = EvaluationPool(workers=0, max_pending=64, timeout_seconds=30)
+    monkeypatch.setattr(routes, "evaluation_pool", pool)
+    monkeypatch.setattr(main, "evaluation_pool", pool)
+    monkeypatch.setattr(routes, "result_cache", ResultCache(ttl_seconds=0))
+    return ASGIClient(main.app)
+
+
+# (entity, value, unique-count) fields of each detection's bucket features
+FEATURE_FIELDS = {
+    "0401": ("host", "internal_dest_count", "internal_conn_count"),
+    "0402": ("src_ip", "auth_failures_per_src", "unique_users_targeted"),
+    "0403": ("host", "persistence_events_per_host", "unique_persistence_artifacts"),
+    "0404": ("host", "staging_events_per_host", "unique_staging_artifacts"),
+    "0405": ("host", "admin_tool_events_per_host", "unique_admin_tools"),
+}
+
+
+@pytest.fixture
+def eval_payload():
+    """
+    eval_payload(key) -> an evaluate request body (row form) for that
+    detection, with a quiet baseline and one entity that drifts.
+    """
+    t0 = 1700000000 - 1700000000 % 3600
+
+    def make(key: str) -> Dict[str, Any]:
+        entity, value, unique = FEATURE_FIELDS[key]
+        bucket = 900 if key == "0402" else 3600
+
+        def row(name: str, i: int, v: int, u: int) -> Dict[str, Any]:
+            return {entity: name, "bucket_start": t0 + i * bucket, value: v, unique: u}
+
+        return {
+            "baseline": [row(e, i, 2 + i % 3, 1) for e in ("e1", "e2") for i in range(48)],
+            "observation": [row("e1", 48 + i, 40 + 10 * i, 25) for i in range(4)] + [row("e2", 48 + i, 3, 1) for i in range(4)],
+            "sustained_buckets": 2,
+            "min_baseline_buckets": 24,
+            "expected_baseline_buckets": 48,
+        }
+
+    return make
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import os
+import time
+
+from src.engine.allowlists import CidrIndex, SuppressionEngine
+from src.engine.incremental import IncrementalPipeline
+from src.features.network_fanout import extract_fanout_bucket_features
+
+
+RULES = {
+    "host_allowlist": [
+        {"id": "jump-hosts", "hosts": ["JUMP01"], "patterns": [r"^backup-\d+$"]},
+    ],
+    "cidr_allowlist": [
+        {"id": "scanners", "cidrs": ["10.20.0.0/16"]},
+        {"id": "scanner-subnet", "cidrs": ["10.20.5.0/24"], "detections": ["pde-spl-0402"]},
+    ],
+    "tool_allowlist": [
+        {"id": "backup-agent", "tools": ["veeam.exe"], "detections": ["pde-spl-0405"]},
+        {"id": "sccm", "patterns": [r"\bccmexec\b"]},
+    ],
+    "exceptions": [
+        {"id": "build-archives", "detection": "pde-spl-0404", "match": {"host": r"^build\d+$", "file_name": r"\.zip$"}},
+    ],
+}
+
+
+def test_cidr_index_overlapping_ranges():
+    index = CidrIndex([("10.0.0.0/8", "wide"), ("10.1.2.0/24", "narrow"), ("192.168.1.10/32", "single")])
+    assert index.lookup("10.1.2.3") in {"wide", "narrow"}
+    assert index.lookup("10.200.0.1") == "wide"
+    assert index.lookup("192.168.1.10") == "single"
+    assert index.lookup("192.168.1.11") is None
+    assert index.lookup("not-an-ip") is None
+
+
+def test_suppression_scopes_and_counters():
+    engine = SuppressionEngine(rules=RULES)
+
+    assert engine.match({"host": "jump01"}, "pde-spl-0401") == "jump-hosts"
+    assert engine.match({"host": "backup-12"}, "pde-spl-0403") == "jump-hosts"
+    assert engine.match({"host": "10.20.9.9"}, "pde-spl-0401") == "scanners"
+    assert engine.match({"host": "h1", "process_name": "C:\\Tools\\veeam.exe"}, "pde-spl-0405") == "backup-agent"
+    assert engine.match({"host": "h1", "process_name": "C:\\Tools\\veeam.exe"}, "pde-spl-0401") is None
+    assert engine.match({"host": "h1", "command_line": "ccmexec /run"}, "pde-spl-0401") == "sccm"
+    assert engine.match({"host": "build7", "file_name": "out.zip"}, "pde-spl-0404") == "build-archives"
+    assert engine.match({"host": "build7", "file_name": "out.txt"}, "pde-spl-0404") is None
+
+    assert engine.hit_counts() == {
+        "backup-agent": 1,
+        "build-archives": 1,
+        "jump-hosts": 2,
+        "scanners": 1,
+        "sccm": 1,
+    }
+
+
+def test_suppressed_hosts_never_create_bucket_state():
+    engine = SuppressionEngine(rules=RULES)
+    events = [
+        {"_time": 1700000000, "host": "jump01", "dest_ip": "10.0.0.5"},
+        {"_time": 1700000010, "host": "hostA", "dest_ip": "10.0.0.6"},
+    ]
+    rows = extract_fanout_bucket_features(engine.filter_events(events, "pde-spl-0401"))
+    assert [r.host for r in rows] == ["hostA"]
+
+    pipeline = IncrementalPipeline(["pde-spl-0401"], suppression=engine)
+    pipeline.feed_many(events + [{"_time": 1700010000, "host": "hostA", "dest_ip": "10.0.0.6"}])
+    assert set(pipeline.states["pde-spl-0401"].baselines) == {"hostA"}
+    assert pipeline.suppressed_events == 1
+
+
+def test_hot_reload(tmp_path):
+    path = tmp_path / "suppression.yml"
+    path.write_text("host_allowlist:\n  - id: a\n    hosts: [h1]\n", encoding="utf-8")
+    engine = SuppressionEngine(path)
+    assert engine.match({"host": "h1"}) == "a"
+    assert engine.reload_if_changed() is False
+
+    path.write_text("host_allowlist:\n  - id: b\n    hosts: [h2]\n", encoding="utf-8")
+    future = time.time() + 5
+    os.utime(path, (future, future))
+
+    assert engine.reload_if_changed() is True
+    assert engine.match({"host": "h1"}) is None
+    assert engine.match({"host": "h2"}) == "b"
+
+
+def test_pipeline_picks_up_rule_file_changes(tmp_path):
+    path = tmp_path / "suppression.yml"
+    path.write_text("host_allowlist:\n  - id: a\n    hosts: [h1]\n", encoding="utf-8")
+    engine = SuppressionEngine(path, check_interval=0)
+    pipeline = IncrementalPipeline(["pde-spl-0401"], suppression=engine)
+    t = 1700000000
+    pipeline.feed_many([{"_time": t, "host": "h1", "dest_ip": "10.0.0.5"}, {"_time": t + 1, "host": "h2", "dest_ip": "10.0.0.5"}])
+    assert pipeline.suppressed_events == 1
+
+    path.write_text("host_allowlist:\n  - id: b\n    hosts: [h2]\n", encoding="utf-8")
+    future = time.time() + 5
+    os.utime(path, (future, future))
+    pipeline.feed_many([{"_time": t + 2, "host": "h1", "dest_ip": "10.0.0.5"}, {"_time": t + 3, "host": "h2", "dest_ip": "10.0.0.5"}])
+    assert pipeline.suppressed_events == 2
+    assert engine.hit_counts() == {"a": 1, "b": 1}
+
+    # A broken edit keeps the rules that were loaded
+    path.write_text("exceptions:\n  - id: bad\n", encoding="utf-8")
+    os.utime(path, (future + 5, future + 5))
+    assert engine.poll() is False
+    assert engine.match({"host": "h2"}) == "b"
+
+
+def test_poll_is_throttled(tmp_path):
+    path = tmp_path / "suppression.yml"
+    path.write_text("host_allowlist:\n  - id: a\n    hosts: [h1]\n", encoding="utf-8")
+    engine = SuppressionEngine(path, check_interval=3600)
+    path.write_text("host_allowlist:\n  - id: b\n    hosts: [h2]\n", encoding="utf-8")
+    future = time.time() + 5
+    os.utime(path, (future, future))
+    assert engine.poll() is False
+    assert engine.match({"host": "h1"}) == "a"
+
+
+def test_pipeline_polls_per_batch_not_per_event(tmp_path, monkeypatch):
+    path = tmp_path / "suppression.yml"
+    path.write_text("host_allowlist:\n  - id: a\n    hosts: [h1]\n", encoding="utf-8")
+    engine = SuppressionEngine(path, check_interval=0)
+    pipeline = IncrementalPipeline(["pde-spl-0401"], suppression=engine)
+    polls = []
+    poll = engine.poll
+    monkeypatch.setattr(engine, "poll", lambda: polls.append(1) or poll())
+
+    t = 1700000000
+    pipeline.feed_many([{"_time": t + i, "host": "h1", "dest_ip": "10.0.0.5"} for i in range(50)])
+    assert len(polls) == 1
+    pipeline.feed({"_time": t + 60, "host": "h1", "dest_ip": "10.0.0.5"})
+    assert len(polls) == 1
+    assert pipeline.suppressed_events == 51
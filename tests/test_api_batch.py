@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import json
+
+import orjson
+
+from src.api import routes
+from src.api.registry import detection_registry
+
+
+def _expected(key, payload):
+    model = routes.BASELINE_MODELS[key]
+    return orjson.loads(orjson.dumps(detection_registry.runner(key)(model.model_validate(payload))))
+
+
+def test_batch_matches_per_detection_runners(api, eval_payload):
+    payloads = {key: eval_payload(key) for key in detection_registry}
+    r = api.post("/evaluate/batch", json_body=payloads)
+    assert r.status_code == 200, r.content
+    body = r.json()
+    assert sorted(body["results"]) == sorted(detection_registry)
+    for key, payload in payloads.items():
+        assert body["results"][key] == _expected(key, payload), key
+    assert body["count"] == sum(res["count"] for res in body["results"].values())
+    assert body["count"] > 0
+
+
+def test_batch_accepts_aliases_and_field_names(api, eval_payload):
+    payload = eval_payload("0402")
+    by_alias = api.post("/evaluate/batch", json_body={"0402": payload}).json()
+    by_name = api.post("/evaluate/batch", json_body={"d0402": payload}).json()
+    assert list(by_alias["results"]) == ["0402"]
+    assert by_alias == by_name
+    assert by_alias["results"]["0402"] == api.post("/evaluate/0402", json_body=payload).json()
+
+
+def test_empty_batch(api):
+    r = api.post("/evaluate/batch", json_body={})
+    assert r.status_code == 200
+    assert r.json() == {"count": 0, "results": {}}
+
+    r = api.post("/evaluate/batch", json_body={}, headers={"accept": "application/x-ndjson"})
+    assert r.status_code == 200
+    assert [json.loads(line) for line in r.content.splitlines() if line] == []
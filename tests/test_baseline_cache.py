@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import pytest
+
+from src.api import routes
+from src.api.baseline_cache import BaselineCache, estimate_nbytes
+
+
+STATS = {"h1": (1.0, 2.0), "h2": (3.0, 4.0)}
+SIZE = estimate_nbytes(STATS)
+
+
+def test_lru_order_and_entry_cap():
+    cache = BaselineCache(max_entries=2)
+    cache.put("a", "0401", STATS)
+    cache.put("b", "0401", STATS)
+    assert cache.get("a") is not None
+    cache.put("c", "0401", STATS)
+    assert "b" not in cache
+    assert list(cache._entries) == ["a", "c"]
+    assert cache.evictions == 1
+
+    # Re-putting an id refreshes it rather than adding a second entry
+    cache.put("a", "0401", STATS)
+    cache.put("d", "0401", STATS)
+    assert list(cache._entries) == ["a", "d"]
+    assert cache.nbytes == 2 * SIZE
+
+
+def test_byte_cap_evicts_least_recently_used():
+    cache = BaselineCache(max_bytes=3 * SIZE)
+    for key in "abc":
+        cache.put(key, "0401", STATS)
+    cache.get("a")
+    cache.put("d", "0401", STATS)
+    assert list(cache._entries) == ["c", "a", "d"]
+    assert cache.nbytes == 3 * SIZE
+    assert cache.delete("c") is True
+    assert cache.delete("c") is False
+    assert cache.nbytes == 2 * SIZE
+
+
+def test_oversize_put_is_rejected():
+    cache = BaselineCache(max_bytes=SIZE - 1)
+    with pytest.raises(ValueError):
+        cache.put("a", "0401", STATS)
+    assert len(cache) == 0 and cache.nbytes == 0
+
+
+def test_hit_and_miss_counters():
+    cache = BaselineCache()
+    entry = cache.put("a", "0402", STATS)
+    cache.set_alias("corp-0402", entry)
+    assert cache.get("a") is entry
+    assert cache.lookup("corp-0402") is entry
+    assert cache.get("missing") is None
+    assert cache.lookup("no-such-alias") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_ratio"]) == (2, 2, 0.5)
+    assert (stats["entries"], stats["bytes"], stats["aliases"]) == (1, SIZE, 1)
+
+
+def test_oversize_upload_is_413(api, monkeypatch):
+    monkeypatch.setattr(routes, "baseline_cache", BaselineCache(max_bytes=64))
+    rows = [{"host": f"h{i}", "bucket_start": 0, "internal_dest_count": 1, "internal_conn_count": 1} for i in range(20)]
+    r = api.post("/evaluate/baselines/0401", json_body={"baseline": rows})
+    assert r.status_code == 413
+    assert "exceeds the cache cap" in r.json()["detail"]
+
+
+def test_aliased_entries_are_not_evicted():
+    cache = BaselineCache(max_entries=1)
+    first = cache.put("a", "0402", STATS)
+    cache.set_alias("corp-0402", first)
+    cache.put("b", "0402", STATS)
+    assert "a" in cache and "b" in cache
+    cache.put("c", "0402", STATS)
+    assert list(cache._entries) == ["a", "c"]
+
+    moved = cache.set_alias("corp-0402", cache.get("c"))
+    assert moved.generation == 2
+    cache.put("d", "0402", STATS)
+    assert list(cache._entries) == ["c", "d"]
+    assert cache.lookup("corp-0402").baseline_id == "c"
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from src.engine.correlation import CorrelationEngine, CorrelationRule, load_story_rules, parse_window
+from src.engine.evaluator_admin_tooling import AdminToolingSignal
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+STORY = REPO_ROOT / "stories" / "pde-story-0001-binary-location-and-sideloading.yml"
+
+BASE = 1700000000
+
+
+def test_story_rules_parsed():
+    rules = load_story_rules([STORY])
+    assert parse_window("60m") == 3600
+    assert [r.severity for r in rules] == ["critical", "high"]
+    assert rules[0].primary == {"PDE-SPL-0301", "PDE-SPL-0302"}
+    assert rules[0].supporting == {"PDE-SPL-0003", "PDE-SPL-0005"}
+    assert all(r.window_seconds == 3600 and r.correlation_key == "host" for r in rules)
+
+
+def test_primary_plus_supporting_within_window_escalates():
+    engine = CorrelationEngine(load_story_rules([STORY]))
+
+    assert engine.ingest({"detection_id": "PDE-SPL-0003", "host": "ws01"}, BASE) == []
+    matches = engine.ingest({"detection_id": "pde-spl-0301", "host": "ws01"}, BASE + 1800)
+    assert [m.severity for m in matches] == ["critical"]
+    assert matches[0].primary_detections == ("PDE-SPL-0301",)
+    assert matches[0].supporting_detections == ("PDE-SPL-0003",)
+    assert (matches[0].first_seen, matches[0].last_seen) == (BASE, BASE + 1800)
+
+    # Different host, and same host outside the window, do not correlate
+    assert engine.ingest({"detection_id": "PDE-SPL-0005", "host": "ws02"}, BASE + 1900) == []
+    assert engine.ingest({"detection_id": "PDE-SPL-0002", "host": "ws01"}, BASE + 1800 + 3601) == []
+
+
+def test_memory_bounded_by_largest_window():
+    engine = CorrelationEngine(load_story_rules([STORY]))
+    for i in range(1000):
+        engine.ingest({"detection_id": "PDE-SPL-0002", "host": f"h{i}"}, BASE + i * 60)
+    # 60s spacing, 3600s window => at most ~61 entries retained
+    assert len(engine) <= 62
+
+
+def test_evaluator_signals_and_multivalue_keys():
+    rule = CorrelationRule(
+        rule_id="pde-correlation-0001",
+        story_id="PDE-CORRELATION-0001",
+        primary=frozenset({"PDE-SPL-0304"}),
+        supporting=frozenset({"PDE-SPL-0405"}),
+        window_seconds=3600,
+        severity="critical",
+    )
+    engine = CorrelationEngine([rule])
+    assert engine.ingest({"detection_id": "PDE-SPL-0304", "user": "alice", "dest_hosts": ["db01", "db02"]}, BASE) == []
+
+    signal = AdminToolingSignal(
+        signal_name="Suspicious Admin Tooling Drift",
+        detection_id="pde-spl-0405",
+        entity_type="host",
+        entity_id="db02",
+        risk_score=80,
+        confidence=0.9,
+        time_horizon="emerging",
+        admin_tool_events_per_host=10,
+        unique_admin_tools=3,
+        baseline_evt_avg=1.0,
+        admin_tool_drift_ratio=10.0,
+        growth_hits=3,
+    )
+    matches = engine.ingest(signal, BASE + 600)
+    assert [(m.key_value, m.severity) for m in matches] == [("db02", "critical")]
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import asyncio
+import gzip
+import json
+import zlib
+
+import pytest
+from fastapi import HTTPException
+
+from src.api.encoding import _decoder, _InflatingReceive
+
+
+def _inflate(chunks, encoding="gzip", max_bytes=1 << 20):
+    messages = [{"type": "http.request", "body": c, "more_body": i < len(chunks) - 1} for i, c in enumerate(chunks)]
+
+    async def receive():
+        return messages.pop(0)
+
+    async def drain():
+        wrapped = _InflatingReceive(receive, _decoder(encoding), max_bytes)
+        body = b""
+        while True:
+            message = await wrapped()
+            body += message["body"]
+            if not message["more_body"]:
+                return body
+
+    return asyncio.run(drain())
+
+
+def _split(data, n):
+    return [data[i : i + n] for i in range(0, len(data), n)] or [b""]
+
+
+BODY = b"".join(json.dumps({"_time": i, "host": f"h{i % 7}"}).encode() + b"\n" for i in range(5000))
+
+
+@pytest.mark.parametrize("chunk", [7, 1000, 1 << 20])
+def test_gzip_members_and_deflate(chunk):
+    members = gzip.compress(BODY[:30000]) + gzip.compress(BODY[30000:]) + gzip.compress(b"")
+    assert _inflate(_split(members, chunk)) == BODY
+    assert _inflate(_split(zlib.compress(BODY), chunk), "deflate") == BODY
+    assert _inflate(_split(gzip.compress(BODY), chunk), "x-gzip") == BODY
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        gzip.compress(BODY)[:-10],
+        gzip.compress(BODY) + b"trailing garbage",
+        gzip.compress(BODY) + b"\x1f",
+        b"not gzip at all",
+    ],
+)
+def test_corrupt_bodies_are_400(data):
+    with pytest.raises(HTTPException) as exc:
+        _inflate(_split(data, 4096))
+    assert exc.value.status_code == 400
+    assert exc.value.detail.startswith("Invalid gzip request body")
+
+
+def test_inflate_cap_is_413():
+    bomb = gzip.compress(b"\0" * (4 << 20))
+    assert len(bomb) < 8192
+    with pytest.raises(HTTPException) as exc:
+        _inflate([bomb], max_bytes=1 << 20)
+    assert exc.value.status_code == 413
+    assert len(_inflate([bomb], max_bytes=4 << 20)) == 4 << 20
+
+
+def test_middleware_on_the_app(api, eval_payload):
+    raw = json.dumps(eval_payload("0401")).encode()
+    plain = api.post("/evaluate/0401", content=raw, headers={"content-type": "application/json"})
+    headers = {"content-type": "application/json", "content-encoding": "gzip"}
+    zipped = api.post("/evaluate/0401", chunks=_split(gzip.compress(raw), 100), headers=headers)
+    assert zipped.status_code == 200
+    assert zipped.json() == plain.json()
+
+    r = api.post("/evaluate/0401", content=raw, headers=dict(headers, **{"content-encoding": "br"}))
+    assert r.status_code == 415
+    r = api.post("/evaluate/0401", content=gzip.compress(raw)[:-4], headers=headers)
+    assert r.status_code == 400
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import gzip
+import json
+
+from src.engine.evidence import EvidenceIndex
+from src.engine.replay import iter_archive_events, replay_archive
+
+
+BASE = 1700000000 - 1700000000 % 3600
+PARAMS = {"pde-spl-0405": {"sustained_buckets": 1, "min_baseline_buckets": 1, "min_unique_tools": 1}}
+
+
+def build_events():
+    events = [{"_time": BASE + 10, "host": "h1", "process_name": "wmic.exe"}]
+    t = BASE + 3600
+    for i in range(10):
+        events.append({"_time": t + i, "host": "h1", "process_name": "psexec.exe", "n": i})
+        events.append({"_time": t + i, "host": "h2", "process_name": "notepad.exe"})
+    return events
+
+
+def write_archive(path, events, opener=open):
+    with opener(path, "wt", encoding="utf-8") as f:
+        for e in events:
+            f.write(json.dumps(e) + "\n")
+
+
+def test_offsets_point_at_archive_lines(tmp_path):
+    path = tmp_path / "events.ndjson"
+    write_archive(path, build_events())
+    raw = path.read_bytes()
+    for e in iter_archive_events(path, with_offsets=True):
+        off = e.pop("_offset")
+        assert json.loads(raw[off:raw.index(b"\n", off)]) == e
+
+
+def test_replay_records_and_fetches_signal_evidence(tmp_path):
+    path = tmp_path / "events.ndjson"
+    write_archive(path, build_events())
+
+    index = EvidenceIndex()
+    report = replay_archive(path, ["pde-spl-0405"], params=PARAMS, evidence=index)
+    assert len(report.hits) == 1
+    hit = report.hits[0]
+
+    # Only the signal's bucket is indexed, and only the events that counted
+    assert index.keys() == [("pde-spl-0405", "h1", hit.bucket_start)]
+    events = index.fetch_for_signal(hit.signal, hit.bucket_start)
+    assert [e["n"] for e in events] == list(range(10))
+    assert all(e["process_name"] == "psexec.exe" for e in events)
+    assert len(index.fetch("PDE-SPL-0405", "h1", hit.bucket_start, limit=3)) == 3
+
+    saved = tmp_path / "evidence.json"
+    index.save(saved)
+    loaded = EvidenceIndex.load(saved)
+    assert loaded.archive == path
+    assert loaded.offsets("pde-spl-0405", "h1", hit.bucket_start) == index.offsets("pde-spl-0405", "h1", hit.bucket_start)
+
+
+def test_gzip_archive_and_record_all(tmp_path):
+    path = tmp_path / "events.ndjson.gz"
+    write_archive(path, build_events(), opener=gzip.open)
+
+    index = EvidenceIndex(record_all=True, max_per_bucket=4)
+    replay_archive(path, ["pde-spl-0405"], params=PARAMS, evidence=index)
+    assert ("pde-spl-0405", "h1", BASE) in index
+    assert index.truncated == {("pde-spl-0405", "h1", BASE + 3600): 6}
+    assert [e["n"] for e in index.fetch("pde-spl-0405", "h1", BASE + 3600)] == [0, 1, 2, 3]
+
+
+def test_save_load_keeps_caps_and_truncation(tmp_path):
+    index = EvidenceIndex(tmp_path / "events.ndjson", record_all=True, max_per_bucket=3)
+    index.add("PDE-SPL-0405", "h1", BASE, range(0, 500, 100))
+    index.add("pde-spl-0405", "h2", BASE, [7])
+    assert index.truncated == {("pde-spl-0405", "h1", BASE): 2}
+
+    saved = tmp_path / "evidence.json"
+    index.save(saved)
+    loaded = EvidenceIndex.load(saved)
+    assert (loaded.record_all, loaded.max_per_bucket) == (True, 3)
+    assert loaded.truncated == index.truncated
+    assert loaded.offsets("pde-spl-0405", "h1", BASE) == [0, 100, 200]
+
+    # Further adds keep using the configured cap
+    loaded.add("pde-spl-0405", "h2", BASE, [8, 9, 10])
+    assert loaded.offsets("pde-spl-0405", "h2", BASE) == [7, 8, 9]
+    assert loaded.truncated[("pde-spl-0405", "h2", BASE)] == 1
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+from dataclasses import asdict
+
+import pytest
+
+from src.engine.evaluator import Signal
+from src.engine.evaluator_admin_tooling import AdminToolingSignal
+from src.engine.evaluator_auth import AuthSignal
+from src.engine.evaluator_persistence import PersistenceSignal
+from src.engine.evaluator_staging import StagingSignal
+from src.engine.explain import explain, explain_many, explain_ns_p2_001
+from src.engine.explainability_templates import (
+    ExplanationTemplate,
+    compile_template,
+    registered_detections,
+)
+
+
+def fanout_signal(ratio=3.25, baseline=2.0) -> Signal:
+    return Signal(
+        signal_name="Emerging Lateral Movement Preparation",
+        detection_id="pde-spl-0401",
+        entity_type="host",
+        entity_id="hostA",
+        risk_score=72,
+        confidence=0.8125,
+        time_horizon="emerging",
+        internal_dest_count=8,
+        internal_conn_count=8,
+        baseline_avg_internal_dest_count=baseline,
+        baseline_deviation_ratio=ratio,
+        growth_hits=3,
+        new_internal_targets=8,
+    )
+
+
+def all_signals():
+    common = dict(risk_score=80, confidence=0.9, time_horizon="emerging", growth_hits=3)
+    return [
+        fanout_signal(),
+        AuthSignal("Password Spray Drift (Low-and-Slow)", "pde-spl-0402", "src_ip", "10.0.0.5",
+                   failures=40, unique_users_targeted=25, baseline_fail_avg=2.0, failure_drift_ratio=20.0, **common),
+        PersistenceSignal("Persistence Mechanism Drift (Tasks/Services)", "pde-spl-0403", "host", "h1",
+                          persistence_events_per_host=9, unique_persistence_artifacts=4, baseline_evt_avg=None,
+                          persistence_drift_ratio=None, **common),
+        StagingSignal("Data Staging Drift (Compression/Large File Activity)", "pde-spl-0404", "host", "h2",
+                      staging_events_per_host=12, unique_staging_artifacts=6, baseline_evt_avg=3.0,
+                      staging_drift_ratio=4.0, **common),
+        AdminToolingSignal("Suspicious Admin Tooling Drift", "pde-spl-0405", "host", "h3",
+                           admin_tool_events_per_host=10, unique_admin_tools=3, baseline_evt_avg=1.0,
+                           admin_tool_drift_ratio=10.0, **common),
+    ]
+
+
+def test_ns_p2_001_output_unchanged():
+    s = fanout_signal()
+    exp = explain_ns_p2_001(s)
+    assert exp["headline"] == "Emerging Lateral Movement Preparation on host hostA"
+    assert "baseline deviation ratio of 3.25 (relative to the host’s baseline average)" in exp["narrative"]
+    assert exp["evidence"][2] == "Baseline avg unique destinations: 2.0"
+    assert exp["evidence"][-2] == "Confidence: 0.81"
+    assert len(exp["next_steps"]) == 5
+    assert exp["raw"] == asdict(s)
+
+    no_baseline = explain_ns_p2_001(fanout_signal(ratio=None, baseline=None))
+    assert no_baseline["narrative"].startswith("Host behavior is drifting from historical norms. The host contacted 8")
+    assert "Baseline deviation ratio: unknown" in no_baseline["evidence"]
+
+
+def test_all_five_detections_registered_and_render():
+    assert registered_detections() == ["pde-spl-0401", "pde-spl-0402", "pde-spl-0403", "pde-spl-0404", "pde-spl-0405"]
+    for s in all_signals():
+        exp = explain(s)
+        assert s.entity_id in exp["headline"]
+        assert exp["narrative"] and exp["evidence"] and exp["next_steps"]
+        assert exp["raw"]["detection_id"] == s.detection_id
+
+
+def test_rendering_is_lazy_and_cached():
+    exp = explain(fanout_signal())
+    assert exp._cache == {}
+    headline = exp["headline"]
+    assert list(exp._cache) == ["headline"]
+    assert exp["headline"] is headline
+    assert set(exp) == {"headline", "narrative", "evidence", "next_steps", "raw"}
+
+
+def test_explain_many_pages_and_selects_fields():
+    signals = all_signals()
+    page = explain_many(signals, fields=("headline",), offset=1, limit=2)
+    assert page == [
+        {"headline": "Password Spray Drift (Low-and-Slow) from source 10.0.0.5"},
+        {"headline": "Persistence Mechanism Drift (Tasks/Services) on host h1"},
+    ]
+    with pytest.raises(ValueError):
+        explain_many(signals, fields=("bogus",))
+
+
+def test_template_fields_validated_at_compile_time():
+    bad = ExplanationTemplate(
+        detection_id="pde-spl-9999",
+        signal_type=AuthSignal,
+        headline="{signal_name} on {no_such_field}",
+        narrative="",
+        evidence=(),
+        next_steps=(),
+    )
+    with pytest.raises(ValueError):
+        compile_template(bad)
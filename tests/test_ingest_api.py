@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+from fastapi import HTTPException
+
+from src.api import ingest
+from src.api.ingest import StreamRegistry, _feed_lines, _get_stream, _LineSplitter
+
+
+T0 = 1700000000 - 1700000000 % 3600
+
+
+@pytest.fixture
+def streams(monkeypatch):
+    registry = StreamRegistry(max_streams=2, idle_seconds=60)
+    monkeypatch.setattr(ingest, "ingest_streams", registry)
+    return registry
+
+
+def _lines(events):
+    return [json.dumps(e).encode() for e in events]
+
+
+def test_line_splitter_carries_partial_lines_and_crlf():
+    splitter = _LineSplitter()
+    assert splitter.feed(b'{"a": 1}\r\n{"b"') == [b'{"a": 1}\r']
+    assert splitter.feed(b": 2}") == []
+    assert splitter.feed(b"\r\n\n{}") == [b'{"b": 2}\r', b""]
+    assert splitter.finish() == [b"{}"]
+    assert splitter.finish() == []
+    assert splitter.feed(b"  \n   ") == [b"  "]
+    assert splitter.finish() == []
+
+
+def test_line_splitter_rejects_over_long_partial_line():
+    splitter = _LineSplitter(max_line_bytes=8)
+    assert splitter.feed(b"0123456789\n0123") == [b"0123456789"]
+    with pytest.raises(HTTPException) as exc:
+        splitter.feed(b"45678")
+    assert exc.value.status_code == 413
+
+
+def test_feed_lines_counts_bad_lines(streams):
+    s = _get_stream("a", ["pde-spl-0401"], 30)
+    lines = _lines([{"_time": T0, "host": "h1", "dest_ip": "10.0.0.5"}]) + [b"", b"{not json", b"[1, 2]", b'"text"', b" {}\r"]
+    assert _feed_lines(s, lines) == []
+    assert s.bad_lines == 3
+    assert s.pipeline.events_seen == 1
+
+
+def test_buckets_close_on_watermark_and_flush(streams):
+    s = _get_stream("a", ["pde-spl-0401"], 30)
+    assert _get_stream("a", None, 30) is s
+    events = [{"_time": T0 + i, "host": "h1", "dest_ip": f"10.0.0.{i}"} for i in range(5)]
+    assert _feed_lines(s, _lines(events)) == []
+
+    closed = _feed_lines(s, _lines([{"_time": T0 + 3600, "host": "h1", "dest_ip": "10.0.0.1"}]))
+    assert [(r.detection_id, r.bucket_start, r.entities) for r in closed] == [("pde-spl-0401", T0, 1)]
+
+    flushed = s.pipeline.flush()
+    assert [(r.bucket_start, r.entities) for r in flushed] == [(T0 + 3600, 1)]
+    assert s.pipeline.states["pde-spl-0401"].open_buckets == {}
+
+
+def test_unknown_detection_is_rejected(streams):
+    with pytest.raises(HTTPException) as exc:
+        _get_stream("a", ["pde-spl-9999"], 30)
+    assert exc.value.status_code == 400
+    assert streams.streams == {}
+
+
+def test_stream_cap_and_idle_expiry(streams):
+    a = _get_stream("a", None, 30)
+    _get_stream("b", None, 30)
+    with pytest.raises(HTTPException) as exc:
+        _get_stream("c", None, 30)
+    assert exc.value.status_code == 429
+
+    a.last_used -= 120
+    assert streams.lookup("b") is not None
+    assert streams.lookup("a") is None
+    assert _get_stream("c", None, 30) is not None
+    assert streams.stats() == {"streams": 2, "max_streams": 2, "expired": 1}
+
+
+def test_streams_apply_suppression_and_maintenance(tmp_path, monkeypatch):
+    rules = tmp_path / "suppression.yml"
+    rules.write_text("host_allowlist:\n  - id: jump\n    hosts: [jump01]\n", encoding="utf-8")
+    calendar = tmp_path / "maintenance.yml"
+    calendar.write_text(f"windows:\n  - id: patching\n    start: {T0}\n    end: {T0 + 3600}\n    scope:\n      hosts: [h2]\n", encoding="utf-8")
+    registry = StreamRegistry(suppression_path=str(rules), maintenance_path=str(calendar))
+    monkeypatch.setattr(ingest, "ingest_streams", registry)
+
+    s = _get_stream("a", ["pde-spl-0401"], 30)
+    assert _get_stream("b", ["pde-spl-0401"], 30).pipeline.suppression is s.pipeline.suppression
+    events = [{"_time": T0 + 1, "host": h, "dest_ip": "10.0.0.5"} for h in ("jump01", "h1", "h2")]
+    _feed_lines(s, _lines(events))
+    closed = s.pipeline.flush()
+    assert s.pipeline.suppressed_events == 1
+    assert s.pipeline.maintenance_buckets == 1
+    assert [r.entities for r in closed] == [1]
+    assert set(s.pipeline.states["pde-spl-0401"].baselines) == {"h1"}
+
+
+def test_open_buckets_keep_counts_not_events(streams):
+    s = _get_stream("a", ["pde-spl-0401"], 30)
+    events = [{"_time": T0 + i, "host": "h1", "dest_ip": f"10.0.0.{i % 3}", "payload": "x" * 100} for i in range(50)]
+    _feed_lines(s, _lines(events + [{"_time": T0 + 5, "host": "h2", "dest_ip": "8.8.8.8"}]))
+    counts = s.pipeline.states["pde-spl-0401"].open_buckets[T0]
+    assert counts.counts == {("h1", T0): 50}
+    assert counts.values == {("h1", T0): {"10.0.0.0", "10.0.0.1", "10.0.0.2"}}
+
+
+def test_far_future_event_is_dropped_not_used_as_watermark(streams):
+    s = _get_stream("a", ["pde-spl-0401"], 30, max_skew=7200)
+    _feed_lines(s, _lines([{"_time": T0, "host": "h1", "dest_ip": "10.0.0.5"}]))
+    assert _feed_lines(s, _lines([{"_time": T0 + 10 * 86400, "host": "h1", "dest_ip": "10.0.0.6"}])) == []
+    assert s.pipeline.future_events == 1
+    assert s.pipeline.watermark == T0
+
+    closed = _feed_lines(s, _lines([{"_time": T0 + 3600, "host": "h1", "dest_ip": "10.0.0.7"}]))
+    assert [r.bucket_start for r in closed] == [T0]
+    assert s.pipeline.late_events == 0
+
+
+def test_ingest_route_sets_lateness_and_skew(api, streams):
+    body = b"\n".join(_lines([
+        {"_time": T0 + 10, "host": "h1", "dest_ip": "10.0.0.5"},
+        {"_time": T0 + 3600 + 60, "host": "h1", "dest_ip": "10.0.0.6"},
+        {"_time": T0 + 20, "host": "h1", "dest_ip": "10.0.0.7"},
+        {"_time": T0 + 400 * 86400, "host": "h1", "dest_ip": "10.0.0.8"},
+    ]))
+    r = api.post("/ingest", params={"stream": "a", "detection": "pde-spl-0401", "allowed_lateness": 300}, content=body)
+    assert r.status_code == 200
+    assert (r.json()["late_events"], r.json()["future_events"], r.json()["buckets_closed"]) == (0, 1, 0)
+
+    status = api.get("/ingest/a").json()
+    assert (status["allowed_lateness"], status["max_skew"]) == (300, streams.max_skew)
+
+    ahead = _lines([{"_time": T0 + 3600 + 61, "host": "h1", "dest_ip": "10.0.0.9"}])[0]
+    assert api.post("/ingest", params={"stream": "a", "max_skew": 0}, content=ahead).json()["future_events"] == 1
+    assert api.get("/ingest/a").json()["max_skew"] == 0
+    assert api.post("/ingest", params={"stream": "a", "max_skew": -1}, content=body).status_code == 422
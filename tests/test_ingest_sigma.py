@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+import yaml
+
+from src.inventory.store import InventoryStore
+from tools import ingest_sigma
+
+
+RULES = {
+    "rules/windows/seq.yml": {
+        "title": "Staged discovery sequence",
+        "id": "r-1",
+        "tags": ["attack.discovery", "attack.t1087.002"],
+        "logsource": {"product": "windows", "category": "process_creation"},
+        "detection": {"sel": {"CommandLine|contains": "whoami"}, "timeframe": "10m", "condition": "sel | count() by host > 5"},
+        "level": "high",
+    },
+    "rules/linux/plain.yml": {
+        "title": "Known bad hash",
+        "id": "r-2",
+        "tags": ["attack.execution"],
+        "logsource": {"product": "linux"},
+        "detection": {"sel": {"Hashes": "abc"}, "condition": "sel"},
+    },
+}
+
+
+def _reference_classifier(rule_text, rule_tags, classifier):
+    # The per-keyword loop CompiledClassifier replaced
+    score = 0
+    fired = []
+    tags_text = " ".join([str(t).lower() for t in ingest_sigma.safe_list(rule_tags)])
+    for r in classifier.get("rules", []):
+        keywords = [k.lower() for k in (r.get("evidence", {}) or {}).get("keywords", [])]
+        if any(kw and (kw in rule_text or kw in tags_text) for kw in keywords):
+            score += int(r.get("points", 0))
+            fired.append(r.get("id", "unknown_rule"))
+    for g in classifier.get("guardrails", []):
+        if g.get("id") == "ioc_only_cap":
+            kw_list = [k.lower() for k in (g.get("evidence", {}) or {}).get("keywords", [])]
+            if any(kw in rule_text or kw in tags_text for kw in kw_list) and score <= 3:
+                fired.append("guardrail:ioc_only_cap")
+    label = "reactive_only"
+    for name, bounds in classifier.get("labels", {}).items():
+        if int(bounds.get("min_score", 0)) <= score <= int(bounds.get("max_score", 999999)):
+            label = name
+            break
+    return score, label, fired
+
+
+@pytest.mark.parametrize("automaton", [True, False])
+def test_compiled_classifier_matches_keyword_loop(monkeypatch, automaton):
+    if automaton:
+        pytest.importorskip("ahocorasick")
+    else:
+        monkeypatch.setattr(ingest_sigma, "ahocorasick", None)
+    raw = yaml.safe_load(ingest_sigma.CLASSIFIER_PATH.read_text(encoding="utf-8"))["classifier"]
+    compiled = ingest_sigma.CompiledClassifier(raw)
+    assert (compiled.automaton is not None) == automaton
+
+    keywords = [k.lower() for r in raw["rules"] + raw["guardrails"] for k in r["evidence"]["keywords"]]
+    filler = ["process", "creation", "whoami", "attack.t1059", "authentication", "overall", "html", "known"]
+    rng = random.Random(7)
+    for _ in range(400):
+        words = rng.sample(keywords + filler * 4, rng.randint(0, 6))
+        text = "".join(w + rng.choice(["", " ", "_"]) for w in words)
+        tags = rng.sample(["attack.execution", "attack.t1110", "cve.2021", "detection.threat_hunting", "Brute Force"], 2)
+        assert compiled.classify(text, tags) == _reference_classifier(text, tags, raw)
+
+
+def _tree(tmp_path, monkeypatch):
+    sigma = tmp_path / "external" / "sigma"
+    for rel, doc in RULES.items():
+        p = sigma / rel
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_text(yaml.safe_dump(doc), encoding="utf-8")
+    (sigma / "rules" / "broken.yml").write_text(": : [\n", encoding="utf-8")
+    monkeypatch.setattr(ingest_sigma, "REPO_ROOT", tmp_path)
+    monkeypatch.setattr(ingest_sigma, "SIGMA_ROOT", sigma)
+    monkeypatch.setattr(ingest_sigma, "OUT_PATH", tmp_path / "inventory" / "index.sqlite")
+    monkeypatch.setattr(ingest_sigma, "YAML_PATH", tmp_path / "inventory" / "index.yml")
+    monkeypatch.setattr(ingest_sigma, "CACHE_PATH", tmp_path / ".cache" / "ingest.pickle")
+    return sigma
+
+
+def _records():
+    store = InventoryStore(ingest_sigma.OUT_PATH)
+    try:
+        return list(store.records())
+    finally:
+        store.close()
+
+
+def test_cached_run_reparses_only_changed_rules(tmp_path, monkeypatch, capsys):
+    sigma = _tree(tmp_path, monkeypatch)
+    assert ingest_sigma.main(["-j", "1"]) == 0
+    out = capsys.readouterr().out
+    assert "Skipped: 1" in out and "Rules parsed: 3 | Reused from cache: 0" in out
+    first = _records()
+    assert [r["detection_id"] for r in first] == ["r-2", "r-1"]
+    stamp = ingest_sigma.OUT_PATH.stat().st_mtime_ns
+
+    (sigma / "rules" / "linux" / "plain.yml").touch()
+    assert ingest_sigma.main(["-j", "1"]) == 0
+    out = capsys.readouterr().out
+    assert out.startswith("Up to date") and "Rules parsed: 0" in out
+    assert ingest_sigma.OUT_PATH.stat().st_mtime_ns == stamp
+
+    doc = dict(RULES["rules/linux/plain.yml"], title="Known bad hash sequence")
+    (sigma / "rules" / "linux" / "plain.yml").write_text(yaml.safe_dump(doc), encoding="utf-8")
+    assert ingest_sigma.main(["-j", "1"]) == 0
+    assert "Rules parsed: 1 | Reused from cache: 2" in capsys.readouterr().out
+    second = _records()
+    assert second[1] == first[1]
+    assert second[0]["name"] == "Known bad hash sequence"
+    assert "sequence_or_progression_logic" in second[0]["predictive_readiness_factors"]
+
+
+def test_yaml_export_matches_database(tmp_path, monkeypatch, capsys):
+    _tree(tmp_path, monkeypatch)
+    assert ingest_sigma.main(["-j", "1", "--no-yaml"]) == 0
+    assert not ingest_sigma.YAML_PATH.exists()
+
+    assert ingest_sigma.main(["-j", "1"]) == 0
+    out = capsys.readouterr().out
+    assert f"Wrote: {ingest_sigma.YAML_PATH}" in out
+    doc = yaml.safe_load(ingest_sigma.YAML_PATH.read_text(encoding="utf-8"))
+    assert doc["counts"] == {"total_rules_discovered": 3, "records_written": 2, "skipped": 1}
+    assert doc["records"] == _records()
+
+    assert ingest_sigma.main(["-j", "1"]) == 0
+    assert f"Up to date: {ingest_sigma.YAML_PATH}" in capsys.readouterr().out
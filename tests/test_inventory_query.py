@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+import yaml
+
+from src.inventory.query import InventoryIndex, InventoryQuery
+from src.inventory.store import write_inventory
+
+
+def _record(detection_id, name, score=None, **fields):
+    record = {
+        "detection_id": detection_id,
+        "source_id": "sigmahq_sigma",
+        "name": name,
+        "description": "",
+        "detection_type": "reactive",
+        "predictive_readiness": "reactive_only",
+        "severity": "medium",
+        "platform": "windows",
+        "product": "security",
+        "tactics": [],
+        "techniques": [],
+        "tags": [],
+    }
+    if score is not None:
+        record["predictive_readiness_score"] = score
+    record.update(fields)
+    return record
+
+
+RECORDS = [
+    _record("s-1", "Encoded PowerShell", 2, description="PowerShell started with -EncodedCommand",
+            techniques=["T1059.001"], tactics=["Execution"], tags=["attack.execution", "attack.t1059.001"]),
+    _record("s-2", "Password spray", 9, predictive_readiness="predictive_ready", description="Failures across many users",
+            techniques=["T1110.003"], tactics=["Credential Access"], tags=["attack.t1110.003"]),
+    _record("s-3", "Shell from web server", 5, predictive_readiness="predictive_adjacent", platform="linux",
+            techniques=["T1059"], tactics=["Execution"], description="Web server spawns a shell"),
+    _record("PDE-SPL-0402", "Password spray drift", source_id="splunk_starter_pack", detection_type="predictive",
+            predictive_readiness="predictive_ready", techniques=["T1110"], tactics=["Credential Access"]),
+]
+
+
+def _ids(result):
+    return [r["detection_id"] for r in result["results"]]
+
+
+def test_results_are_ordered_by_score_then_name():
+    index = InventoryIndex(RECORDS)
+    assert _ids(index.search()) == ["s-2", "s-3", "s-1", "PDE-SPL-0402"]
+    assert _ids(index.search(offset=1, limit=2)) == ["s-3", "s-1"]
+    assert index.search(limit=0)["total"] == 4
+
+
+def test_filters_combine_and_techniques_match_sub_techniques():
+    index = InventoryIndex(RECORDS)
+    assert _ids(index.search(techniques=["t1059"])) == ["s-3", "s-1"]
+    assert _ids(index.search(techniques=["T1059.001"])) == ["s-1"]
+    assert _ids(index.search(techniques=["T1110", "T1059.001"])) == ["s-2", "s-1", "PDE-SPL-0402"]
+    assert _ids(index.search(tactics=["credential access"], source_id=["splunk_starter_pack"])) == ["PDE-SPL-0402"]
+    assert _ids(index.search(tags=["attack.execution"], platform=["windows"])) == ["s-1"]
+    assert _ids(index.search(min_score=5)) == ["s-2", "s-3"]
+    assert _ids(index.search(predictive_readiness=["nope"])) == []
+    with pytest.raises(ValueError):
+        index.search(family=["x"])
+
+
+def test_text_search_on_name_and_description():
+    index = InventoryIndex(RECORDS)
+    assert _ids(index.search(text="powershell")) == ["s-1"]
+    assert _ids(index.search(text="password spray")) == ["s-2", "PDE-SPL-0402"]
+    assert _ids(index.search(text="spray drift")) == ["PDE-SPL-0402"]
+    assert _ids(index.search(text="fail*")) == ["s-2"]
+    assert _ids(index.search(text="sh*", platform=["linux"])) == ["s-3"]
+    assert _ids(index.search(text="kerberoast")) == []
+
+
+def test_facets_count_the_matching_set_either_way():
+    many = RECORDS + [_record(f"x-{i}", f"Filler {i}", 0, tags=["filler"]) for i in range(100)]
+    index = InventoryIndex(many)
+    small = index.search(techniques=["T1110"])["facets"]
+    assert small["source_id"] == {"sigmahq_sigma": 1, "splunk_starter_pack": 1}
+    assert small["predictive_readiness"] == {"predictive_ready": 2}
+    assert small["tactics"] == {"Credential Access": 2}
+
+    full = index.search(facet_limit=2)["facets"]
+    assert full["tags"] == {"filler": 100, "attack.execution": 1}
+    assert full["platform"] == {"windows": 103, "linux": 1}
+
+
+def test_get_by_detection_id_is_case_insensitive():
+    index = InventoryIndex(RECORDS)
+    assert [r["source_id"] for r in index.get("pde-spl-0402")] == ["splunk_starter_pack"]
+    assert index.get("missing") == []
+
+
+def test_query_service_merges_corpora_and_rebuilds_on_change(tmp_path):
+    db = tmp_path / "detections.sigma.index.sqlite"
+    write_inventory(db, RECORDS[:3], {"source_id": "sigmahq_sigma", "generated_at": "2026-01-16T17:51:40Z"})
+    pack = tmp_path / "detections.splunk.starter_pack.yml"
+    pack.write_text(yaml.safe_dump({"source_id": "splunk_starter_pack", "records": RECORDS[3:]}), encoding="utf-8")
+
+    service = InventoryQuery(db_path=db, directory=tmp_path, yaml_path=None)
+    index = service.current()
+    assert len(index) == 4
+    assert service.current() is index
+    assert [(s["source_id"], s["records"]) for s in service.describe()["sources"]] == [
+        ("sigmahq_sigma", 3),
+        ("splunk_starter_pack", 1),
+    ]
+
+    extra = dict(RECORDS[3], detection_id="PDE-SPL-0403", name="Persistence drift")
+    pack.write_text(yaml.safe_dump({"source_id": "splunk_starter_pack", "records": RECORDS[3:] + [extra]}), encoding="utf-8")
+    future = pack.stat().st_mtime_ns + 10**9
+    os.utime(pack, ns=(future, future))
+    assert service.current() is not index
+    assert _ids(service.current().search(text="persistence")) == ["PDE-SPL-0403"]
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+import yaml
+
+from src.inventory.store import (
+    DEFAULT_PATH,
+    DEFAULT_YAML_PATH,
+    InventoryError,
+    InventoryStore,
+    open_inventory,
+    source_yaml,
+    write_inventory,
+)
+
+
+def _record(i, **fields):
+    record = {
+        "detection_id": f"d-{i}",
+        "source_id": "sigmahq_sigma",
+        "source_rule_path": f"external/sigma/rules/r{i}.yml",
+        "name": f"Rule {i}",
+        "description": "Detects things",
+        "query_language": "sigma",
+        "detection_type": "reactive",
+        "predictive_readiness": "reactive_only",
+        "predictive_readiness_score": 0,
+        "predictive_readiness_factors": [],
+        "severity": "medium",
+        "status": "test",
+        "platform": "windows",
+        "product": "security",
+        "category": "",
+        "data_sources": [],
+        "tactics": [],
+        "techniques": [],
+        "tags": [],
+        "time_window": "",
+        "references": [],
+        "false_positives": ["Unknown"],
+        "notes": "",
+    }
+    record.update(fields)
+    return record
+
+
+RECORDS = [
+    _record(0, tactics=["Credential Access"], techniques=["T1110", "T1110.003"], predictive_readiness="predictive_adjacent",
+            predictive_readiness_score=5, predictive_readiness_factors=["time_window_aggregation", "repeated_or_escalation_behavior"]),
+    _record(1, platform="linux", product="auditd", tactics=["Execution"], techniques=["T1059.004"], tags=["attack.execution", "attack.t1059.004"]),
+    _record(2, tactics=["Execution", "Credential Access"], techniques=["T1110"], predictive_readiness="predictive_ready",
+            predictive_readiness_score=9, description="Ünïcode and 'quotes'"),
+]
+META = {"source_id": "sigmahq_sigma", "generated_at": "2026-01-16T17:51:40Z", "counts": {"records_written": 3}}
+
+
+def test_inventory_round_trips_records_and_meta(tmp_path):
+    path = tmp_path / "inv.sqlite"
+    write_inventory(path, RECORDS, META)
+    store = InventoryStore(path)
+    assert len(store) == 3
+    assert list(store.records()) == RECORDS
+    assert store.meta["generated_at"] == META["generated_at"]
+    assert store.meta["counts"] == {"records_written": 3}
+
+
+def test_find_uses_every_filter(tmp_path):
+    path = tmp_path / "inv.sqlite"
+    write_inventory(path, RECORDS, META)
+    store = InventoryStore(path)
+
+    def ids(**filters):
+        return [r["detection_id"] for r in store.find(**filters)]
+
+    assert ids(technique="t1110") == ["d-0", "d-2"]
+    assert ids(tactic="Execution") == ["d-1", "d-2"]
+    assert ids(technique="T1110", tactic="Execution") == ["d-2"]
+    assert ids(readiness="predictive_ready") == ["d-2"]
+    assert ids(min_score=5) == ["d-0", "d-2"]
+    assert ids(platform="linux", product="auditd") == ["d-1"]
+    assert ids(platform="macos") == []
+    assert ids() == ["d-0", "d-1", "d-2"]
+
+    plan = store.conn.execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM detections WHERE id IN "
+        "(SELECT detection FROM detection_techniques WHERE technique = 'T1110')"
+    ).fetchall()
+    assert any("ix_techniques" in row[-1] for row in plan)
+
+
+def test_open_inventory_builds_from_newer_yaml(tmp_path):
+    yaml_path = tmp_path / "index.yml"
+    db_path = tmp_path / "index.sqlite"
+    yaml_path.write_text(yaml.safe_dump(dict(META, records=RECORDS[:2]), sort_keys=False), encoding="utf-8")
+    assert [r["detection_id"] for r in open_inventory(db_path, yaml_path).records()] == ["d-0", "d-1"]
+
+    # A database newer than the YAML is used as is
+    write_inventory(db_path, RECORDS, META)
+    assert len(open_inventory(db_path, yaml_path)) == 3
+
+    yaml_path.write_text(yaml.safe_dump(dict(META, records=RECORDS[2:]), sort_keys=False), encoding="utf-8")
+    future = db_path.stat().st_mtime_ns + 10**9
+    os.utime(yaml_path, ns=(future, future))
+    assert [r["detection_id"] for r in open_inventory(db_path, yaml_path).records()] == ["d-2"]
+
+
+def test_missing_inventory_is_an_error(tmp_path):
+    with pytest.raises(InventoryError):
+        open_inventory(tmp_path / "none.sqlite", tmp_path / "none.yml")
+
+
+def test_custom_database_is_never_rebuilt_from_the_default_yaml(tmp_path, monkeypatch):
+    db_path = tmp_path / "custom.sqlite"
+    write_inventory(db_path, RECORDS, META)
+    os.utime(db_path, ns=(0, 0))
+    monkeypatch.setenv("PDE_INVENTORY_PATH", str(db_path))
+    store = open_inventory()
+    assert store.path == db_path
+    assert [r["detection_id"] for r in store.records()] == ["d-0", "d-1", "d-2"]
+    assert db_path.stat().st_mtime_ns == 0
+
+    assert source_yaml(db_path) is None
+    assert source_yaml(db_path, tmp_path / "x.yml") == tmp_path / "x.yml"
+    assert source_yaml(DEFAULT_PATH) == DEFAULT_YAML_PATH
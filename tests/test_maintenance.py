@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import os
+import time
+from datetime import datetime, timezone
+
+from src.engine.incremental import IncrementalPipeline
+from src.engine.maintenance import MaintenanceCalendar, exclude_maintenance_buckets
+from src.features.admin_tooling_drift import AdminToolingBucketFeatures
+
+
+def ts(s: str) -> int:
+    return int(datetime.fromisoformat(s).replace(tzinfo=timezone.utc).timestamp())
+
+
+CALENDAR = {
+    "groups": {"patch-ring-1": ["app01", "app02"]},
+    "windows": [
+        {
+            "id": "weekly-patching",
+            "recurrence": "weekly",
+            "days": ["sat"],
+            "start": "02:00",
+            "duration_minutes": 240,
+            "scope": {"groups": ["patch-ring-1"]},
+        },
+        {
+            "id": "sunday-late",
+            "recurrence": "weekly",
+            "days": ["sun"],
+            "start": "23:00",
+            "duration_minutes": 120,
+            "scope": {"hosts": ["db01"]},
+        },
+        {"id": "wide-net", "recurrence": "daily", "start": "12:00", "duration_minutes": 30, "scope": {"cidrs": ["10.0.0.0/8"]}},
+        {"id": "narrow-net", "start": "2026-03-09T08:00:00", "end": "2026-03-09T09:00:00", "scope": {"cidrs": ["10.1.0.0/16"]}},
+        {"id": "freeze", "start": "2026-03-10T18:00:00Z", "end": "2026-03-10T20:00:00Z"},
+    ],
+}
+
+
+def test_recurring_group_window():
+    cal = MaintenanceCalendar(doc=CALENDAR)
+    assert cal.window_for("APP01", ts("2026-03-07T03:00:00")) == "weekly-patching"
+    assert cal.window_for("app01", ts("2026-03-14T05:59:59")) == "weekly-patching"
+    assert cal.window_for("app01", ts("2026-03-07T06:00:00")) is None
+    assert cal.window_for("web01", ts("2026-03-07T03:00:00")) is None
+
+
+def test_recurring_window_wraps_week_boundary():
+    cal = MaintenanceCalendar(doc=CALENDAR)
+    assert cal.window_for("db01", ts("2026-03-08T23:30:00")) == "sunday-late"
+    assert cal.window_for("db01", ts("2026-03-09T00:30:00")) == "sunday-late"
+    assert cal.window_for("db01", ts("2026-03-09T01:00:00")) is None
+
+
+def test_nested_cidr_and_global_scopes():
+    cal = MaintenanceCalendar(doc=CALENDAR)
+    assert cal.window_for("10.1.2.3", ts("2026-03-09T08:30:00")) == "narrow-net"
+    assert cal.window_for("10.1.2.3", ts("2026-03-09T12:10:00")) == "wide-net"
+    assert cal.window_for("10.9.2.3", ts("2026-03-09T08:30:00")) is None
+    assert cal.window_for("anything", ts("2026-03-10T19:00:00")) == "freeze"
+
+
+def test_resolved_scopes_are_lru_bounded():
+    cal = MaintenanceCalendar(doc=CALENDAR, max_resolved=2)
+    at = ts("2026-03-07T03:00:00")
+    assert cal.window_for("app01", at) == "weekly-patching"
+    assert cal.window_for("web01", at) is None
+    assert cal.window_for("app01", at) == "weekly-patching"
+    assert cal.window_for("app02", at) == "weekly-patching"
+    # web01 was least recently used
+    assert list(cal._resolved) == ["app01", "app02"]
+    assert cal.window_for("web01", at) is None
+    assert cal.window_for("db01", ts("2026-03-08T23:30:00")) == "sunday-late"
+    assert list(cal._resolved) == ["web01", "db01"]
+
+
+def test_bucket_overlap():
+    cal = MaintenanceCalendar(doc=CALENDAR)
+    # 01:00-02:00 bucket only touches the window boundary; 05:00-06:00 is inside
+    assert not cal.in_window("app01", ts("2026-03-07T01:00:00"), 3600)
+    assert cal.in_window("app01", ts("2026-03-07T05:00:00"), 3600)
+    assert cal.in_window("app01", ts("2026-03-07T01:30:00"), 3600)
+
+
+def test_excluded_buckets_skip_baseline_and_alerting():
+    cal = MaintenanceCalendar(doc=CALENDAR)
+    b_in = ts("2026-03-07T03:00:00")
+    b_out = ts("2026-03-07T08:00:00")
+    rows = [
+        AdminToolingBucketFeatures("app01", b_in, 50, 5),
+        AdminToolingBucketFeatures("app01", b_out, 2, 1),
+    ]
+    assert [r.bucket_start for r in exclude_maintenance_buckets(rows, cal)] == [b_out]
+
+    pipeline = IncrementalPipeline(["pde-spl-0405"], maintenance=cal)
+    events = [
+        {"_time": b_in + i, "host": "app01", "process_name": "psexec.exe"} for i in range(50)
+    ] + [{"_time": b_out + 10, "host": "app01", "process_name": "wmic.exe"}]
+    pipeline.feed_many(events)
+    pipeline.flush()
+
+    window = pipeline.states["pde-spl-0405"].baselines["app01"]
+    assert window.bucket_count == 1
+    assert window.mean == 1.0
+    assert pipeline.maintenance_buckets == 1
+
+
+def test_pipeline_picks_up_calendar_changes(tmp_path):
+    path = tmp_path / "maintenance.yml"
+    path.write_text("windows: []\n", encoding="utf-8")
+    cal = MaintenanceCalendar(path, check_interval=0)
+    pipeline = IncrementalPipeline(["pde-spl-0405"], maintenance=cal)
+    b = ts("2026-03-07T03:00:00")
+    pipeline.feed_many([{"_time": b + 10, "host": "app01", "process_name": "psexec.exe"}])
+
+    path.write_text(
+        'windows:\n  - id: freeze\n    start: "2026-03-07T00:00:00Z"\n    end: "2026-03-08T00:00:00Z"\n',
+        encoding="utf-8",
+    )
+    future = time.time() + 5
+    os.utime(path, (future, future))
+    pipeline.feed_many([{"_time": b + 3600 + 10, "host": "app01", "process_name": "psexec.exe"}])
+    pipeline.flush()
+    assert pipeline.maintenance_buckets == 2
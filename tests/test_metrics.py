@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import threading
+
+from src.api.metrics import EVALUATIONS, STAGE_SECONDS, Metrics, RunRecord, instrumented, stage
+
+
+def _series(text):
+    return dict(line.rsplit(" ", 1) for line in text.splitlines() if not line.startswith("#"))
+
+
+def test_histogram_exposition():
+    m = Metrics(buckets=(0.1, 1.0))
+    for v in (0.05, 0.1, 0.5, 3.0):
+        m.observe(STAGE_SECONDS, v, detection="0401", stage="evaluate")
+    text = m.render()
+    lines = text.splitlines()
+    assert lines[:2] == [
+        "# HELP pde_stage_seconds Wall-clock seconds per evaluation stage, per detection",
+        "# TYPE pde_stage_seconds histogram",
+    ]
+    assert lines[2:] == [
+        'pde_stage_seconds_bucket{detection="0401",stage="evaluate",le="0.1"} 2',
+        'pde_stage_seconds_bucket{detection="0401",stage="evaluate",le="1.0"} 3',
+        'pde_stage_seconds_bucket{detection="0401",stage="evaluate",le="+Inf"} 4',
+        'pde_stage_seconds_sum{detection="0401",stage="evaluate"} 3.65',
+        'pde_stage_seconds_count{detection="0401",stage="evaluate"} 4',
+    ]
+    assert text.endswith("\n")
+
+
+def test_counters_labels_and_extra_values():
+    m = Metrics()
+    m.inc(EVALUATIONS, detection="0402")
+    m.inc(EVALUATIONS, 2, detection="0402")
+    m.inc("custom_total", 0.5, path='a"b\\c\nd', kind="x")
+    text = m.render({"pde_pool_pending": ("gauge", "Queued", 3), "pde_a_ratio": ("gauge", "Ratio", 0.25)})
+    assert _series(text) == {
+        'custom_total{kind="x",path="a\\"b\\\\c\\nd"}': "0.5",
+        'pde_evaluations_total{detection="0402"}': "3",
+        "pde_a_ratio": "0.25",
+        "pde_pool_pending": "3",
+    }
+    assert "# TYPE custom_total untyped" in text
+    assert "# TYPE pde_evaluations_total counter" in text
+    assert text.index("# HELP pde_a_ratio") < text.index("# HELP pde_pool_pending")
+
+
+def test_thread_shards_are_merged():
+    m = Metrics(buckets=(1.0,))
+    barrier = threading.Barrier(4)
+
+    def work():
+        barrier.wait()
+        for _ in range(1000):
+            m.inc(EVALUATIONS, detection="0401")
+            m.observe(STAGE_SECONDS, 0.5, detection="0401", stage="x")
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    m.inc(EVALUATIONS, detection="0401")
+
+    assert len(m._shards) == 5
+    counters, histograms = m.snapshot()
+    assert counters[(EVALUATIONS, (("detection", "0401"),))] == 4001
+    assert histograms[(STAGE_SECONDS, (("detection", "0401"), ("stage", "x")))] == [4000, 0, 2000.0]
+    assert _series(m.render())['pde_stage_seconds_count{detection="0401",stage="x"}'] == "4000"
+
+
+def test_instrumented_records_stages_and_rows():
+    def runner(n):
+        with stage("evaluate"):
+            return n * 2
+
+    result, record = instrumented(runner, 21)
+    assert result == 42
+    assert isinstance(record, RunRecord)
+    assert set(record.seconds) == {"evaluate"}
+    with stage("outside"):
+        pass
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from src.engine.evaluator_auth import compute_auth_baseline_stats, evaluate_pde_spl_0402
+from src.engine.gates import gate_funnel
 from src.features.auth_drift import extract_auth_failure_bucket_features
 
 
@@ -75,3 +76,28 @@ def test_pde_spl_0402_generates_signal():
     assert s.time_horizon in {"early", "emerging", "imminent"}
     assert s.unique_users_targeted >= 8
     assert s.failure_drift_ratio is not None
+
+
+def test_pde_spl_0402_gate_counts_funnel():
+    events = build_sample_auth_events()
+    bucketed = extract_auth_failure_bucket_features(events, bucket_seconds=900)
+    baseline_buckets, observation_buckets = split_baseline_vs_observation(bucketed, baseline_buckets=3)
+
+    gates = {}
+    signals = evaluate_pde_spl_0402(
+        observation_buckets,
+        compute_auth_baseline_stats(baseline_buckets),
+        drift_ratio_threshold=2.0,
+        sustained_buckets=2,
+        min_users=15,
+        expected_baseline_buckets=3,
+        min_baseline_buckets=1,
+        gate_counts=gates,
+    )
+
+    funnel = gate_funnel(gates)
+    assert funnel["ratio"]["in"] == len(observation_buckets) == 3
+    assert funnel["ratio"]["out"] == 3
+    # Growth needs two prior increases, so only the last bucket passes
+    assert funnel["growth"] == {"in": 3, "out": 1}
+    assert funnel["min_unique"] == {"in": 1, "out": len(signals)} == {"in": 1, "out": 1}
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from src.api import routes
+from src.api.registry import DEFAULT_MANIFEST, DetectionRegistry, RegistryError
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+
+@pytest.fixture
+def trimmed(tmp_path, monkeypatch):
+    doc = json.loads(DEFAULT_MANIFEST.read_text(encoding="utf-8"))
+    del doc["0403"]
+    path = tmp_path / "manifest.json"
+    path.write_text(json.dumps(doc), encoding="utf-8")
+    registry = DetectionRegistry.from_manifest(path)
+    monkeypatch.setattr(routes, "detection_registry", registry)
+    return registry
+
+
+def test_detection_left_out_of_the_manifest_is_404(api, trimmed, eval_payload):
+    assert "0403" not in trimmed and list(trimmed) == ["0401", "0402", "0404", "0405"]
+    r = api.post("/evaluate/0403", json_body=eval_payload("0403"))
+    assert r.status_code == 404
+    assert r.json() == {"detail": "Unknown detection: 0403"}
+    assert api.post("/evaluate/0402", json_body=eval_payload("0402")).status_code == 200
+
+    r = api.post("/evaluate/batch", json_body={"0402": eval_payload("0402"), "0403": eval_payload("0403")})
+    assert r.status_code == 404
+    assert api.post("/evaluate/batch", json_body={"0402": eval_payload("0402")}).json()["count"] > 0
+
+    r = api.post("/evaluate/baselines/0403", json_body={"baseline": eval_payload("0403")["baseline"]})
+    assert r.status_code == 404
+
+
+def test_manifest_entries_are_checked(tmp_path):
+    path = tmp_path / "manifest.json"
+    path.write_text(json.dumps({"0401": {"detection_id": "pde-spl-0401", "runner": "m:f"}}), encoding="utf-8")
+    with pytest.raises(RegistryError):
+        DetectionRegistry.from_manifest(path)
+
+
+def test_app_import_loads_no_evaluators():
+    code = (
+        "import sys, src.api.main; "
+        "print(sorted(m for m in sys.modules if m.startswith(('src.engine.evaluator', 'src.api.detections.'))))"
+    )
+    out = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]"
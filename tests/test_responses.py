@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+from fastapi import HTTPException
+
+from src.api import responses, routes
+from src.api.responses import JSON, MSGPACK, NDJSON, _ndjson_chunks, negotiate, result_signals
+
+
+@pytest.mark.parametrize(
+    "accept, media",
+    [
+        ("", JSON),
+        ("*/*", JSON),
+        ("text/html", JSON),
+        ("application/x-ndjson", NDJSON),
+        ("application/ndjson;q=0.5, application/json;q=0.4", NDJSON),
+        ("application/json, application/msgpack;q=0", JSON),
+        ("application/json;q=0.5, application/vnd.msgpack", MSGPACK),
+        ("application/msgpack, application/json", MSGPACK),
+        ("application/json, application/msgpack", JSON),
+        ("application/x-ndjson;q=0, */*", JSON),
+        ("application/json;q=0, */*;q=0.1", NDJSON),
+        ("application/*;q=0.2, application/x-ndjson;q=0.3", NDJSON),
+        ("application/json;q=bogus, application/x-ndjson;q=0.1", NDJSON),
+    ],
+)
+def test_negotiate(accept, media):
+    pytest.importorskip("msgpack")
+    assert negotiate(accept) == media
+
+
+@pytest.mark.parametrize("accept", ["application/json;q=0", "*/*;q=0", "application/json;q=0, application/x-ndjson;q=0.0, text/csv"])
+def test_negotiate_refused(accept):
+    with pytest.raises(HTTPException) as exc:
+        negotiate(accept)
+    assert exc.value.status_code == 406
+
+
+def test_negotiate_without_msgpack(monkeypatch):
+    monkeypatch.setattr(responses, "msgpack", None)
+    assert negotiate("application/msgpack, application/json;q=0.1") == JSON
+    assert negotiate("*/*") == JSON
+    with pytest.raises(HTTPException) as exc:
+        negotiate("application/msgpack")
+    assert exc.value.status_code == 406
+    assert "msgpack" in exc.value.detail
+
+
+def test_ndjson_chunks(monkeypatch):
+    monkeypatch.setattr(responses, "NDJSON_CHUNK_BYTES", 40)
+    signals = [{"entity_id": f"h{i}", "risk": i} for i in range(7)]
+    spent = []
+    chunks = list(_ndjson_chunks(iter(signals), spent.append))
+    assert len(chunks) > 1
+    assert all(len(c) >= 40 for c in chunks[:-1])
+    assert all(c.endswith(b"\n") for c in chunks)
+    assert [json.loads(line) for line in b"".join(chunks).splitlines()] == signals
+    assert len(spent) == 1 and spent[0] >= 0
+
+    assert list(_ndjson_chunks([], spent.append)) == []
+    assert len(spent) == 2
+
+
+def test_result_signals():
+    single = {"count": 2, "signals": [{"s": 1}, {"s": 2}], "profile": {"stages": {}}}
+    assert list(result_signals(single)) == [{"s": 1}, {"s": 2}, {"profile": {"stages": {}}}]
+    assert list(result_signals({"count": 0, "signals": []})) == []
+
+    batch = {
+        "count": 3,
+        "results": {
+            "0401": {"count": 1, "signals": [{"s": 1}], "profile": {"p": 1}},
+            "0402": {"count": 2, "signals": [{"s": 2}, {"s": 3}]},
+        },
+    }
+    assert list(result_signals(batch)) == [{"s": 1}, {"detection": "0401", "profile": {"p": 1}}, {"s": 2}, {"s": 3}]
+    assert list(result_signals({"count": 0, "results": {}})) == []
+
+
+def test_refused_accept_is_406_before_evaluating(api, eval_payload):
+    r = api.post("/evaluate/0402", json_body=eval_payload("0402"), headers={"accept": "application/json;q=0"})
+    assert r.status_code == 406
+    r = api.post("/evaluate/batch", json_body={"0402": eval_payload("0402")}, headers={"accept": "text/csv, */*;q=0"})
+    assert r.status_code == 406
+    assert routes.evaluation_pool.stats()["completed"] == 0
+
+
+def test_encodings_carry_the_same_result(api, eval_payload):
+    msgpack = pytest.importorskip("msgpack")
+    payload = eval_payload("0401")
+    as_json = api.post("/evaluate/0401", json_body=payload).json()
+    r = api.post("/evaluate/0401", json_body=payload, headers={"accept": "application/msgpack"})
+    assert r.headers["content-type"] == MSGPACK
+    assert msgpack.unpackb(r.content) == as_json
+    r = api.post("/evaluate/0401", json_body=payload, headers={"accept": "application/x-ndjson"})
+    assert r.headers["content-type"] == NDJSON
+    assert [json.loads(line) for line in r.content.splitlines()] == as_json["signals"]
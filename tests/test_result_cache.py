@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+
+from src.api.responses import dumps
+from src.api.result_cache import ResultCache, result_key
+
+
+RESULT = {"count": 1, "signals": [{"entity_id": "h1", "risk_score": 70}]}
+SIZE = len(dumps(RESULT))
+
+
+def test_result_key_separates_detection_baseline_and_body():
+    key = result_key("0401", [None], b"{}")
+    assert key == result_key("0401", [None], b"{}")
+    assert len({key, result_key("0402", [None], b"{}"), result_key("0401", ["b1"], b"{}"), result_key("0401", [None], b"{ }")}) == 4
+    assert result_key("batch", ["a", None], b"") != result_key("batch", [None, "a"], b"")
+
+
+def test_ttl_expiry():
+    cache = ResultCache(ttl_seconds=0.05)
+    cache.put("k", RESULT)
+    assert cache.get("k") is RESULT
+    time.sleep(0.06)
+    assert cache.get("k") is None
+    assert cache.stats()["entries"] == 0 and cache.nbytes == 0
+
+
+def test_lru_and_byte_cap_eviction():
+    cache = ResultCache(max_entries=2)
+    cache.put("a", RESULT)
+    cache.put("b", RESULT)
+    cache.get("a")
+    cache.put("c", RESULT)
+    assert list(cache._entries) == ["a", "c"]
+
+    cache = ResultCache(max_bytes=2 * SIZE)
+    for key in "abc":
+        cache.put(key, RESULT)
+    assert list(cache._entries) == ["b", "c"]
+    assert (cache.nbytes, cache.evictions) == (2 * SIZE, 1)
+
+    # A result larger than the whole cap is not cached at all
+    cache.put("big", {"signals": ["x" * 3 * SIZE]})
+    assert "big" not in cache._entries and cache.nbytes == 2 * SIZE
+    assert not ResultCache(ttl_seconds=0).enabled and not ResultCache(max_entries=0).enabled
+
+
+def test_concurrent_requests_share_one_run():
+    cache = ResultCache()
+    runs = []
+
+    async def scenario():
+        gate = asyncio.Event()
+
+        async def run():
+            runs.append(1)
+            await gate.wait()
+            return RESULT
+
+        first = asyncio.ensure_future(cache.get_or_run("k", run))
+        await asyncio.sleep(0)
+        others = [asyncio.ensure_future(cache.get_or_run("k", run)) for _ in range(3)]
+        await asyncio.sleep(0)
+        # The first caller going away does not cancel the shared run
+        first.cancel()
+        gate.set()
+        results = await asyncio.gather(*others)
+        assert results == [(RESULT, True)] * 3
+        assert await cache.get_or_run("k", run) == (RESULT, True)
+
+    asyncio.run(scenario())
+    assert runs == [1]
+    stats = cache.stats()
+    assert (stats["misses"], stats["hits"], stats["coalesced"], stats["inflight"]) == (1, 4, 3, 0)
+
+
+def test_failures_are_not_cached():
+    cache = ResultCache()
+    calls = []
+
+    async def scenario():
+        gate = asyncio.Event()
+
+        async def failing():
+            calls.append("fail")
+            await gate.wait()
+            raise RuntimeError("worker died")
+
+        async def ok():
+            calls.append("ok")
+            return RESULT
+
+        waiters = [asyncio.ensure_future(cache.get_or_run("k", failing)) for _ in range(2)]
+        await asyncio.sleep(0)
+        gate.set()
+        for w in waiters:
+            with pytest.raises(RuntimeError):
+                await w
+        assert await cache.get_or_run("k", ok) == (RESULT, False)
+
+    asyncio.run(scenario())
+    assert calls == ["fail", "ok"]
+    assert cache.stats()["entries"] == 1
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import math
+
+from src.engine.risk import RiskLedger
+
+
+BASE = 1700000000
+HOUR = 3600
+
+
+def sig(det: str, etype: str, eid: str, risk: float) -> dict:
+    return {"detection_id": det, "entity_type": etype, "entity_id": eid, "risk_score": risk}
+
+
+def test_score_halves_every_half_life():
+    ledger = RiskLedger(half_life_seconds=HOUR)
+    assert math.isclose(ledger.add(sig("pde-spl-0401", "host", "h1", 80), BASE), 80)
+    assert math.isclose(ledger.score("host", "h1", BASE + HOUR), 40)
+    assert math.isclose(ledger.score("host", "h1", BASE + 3 * HOUR), 10)
+    assert ledger.score("host", "missing", BASE) == 0.0
+
+
+def test_signals_accumulate_across_detections():
+    ledger = RiskLedger(half_life_seconds=HOUR, detection_weights={"PDE-SPL-0405": 0.5})
+    ledger.add(sig("pde-spl-0401", "host", "h1", 80), BASE)
+    score = ledger.add(sig("pde-spl-0405", "host", "h1", 60), BASE + HOUR)
+    assert math.isclose(score, 40 + 30)
+
+    r = ledger.get("host", "h1", BASE + HOUR)
+    assert r is not None
+    assert r.signal_count == 2
+    assert r.detections == {"pde-spl-0401": 1, "pde-spl-0405": 1}
+    assert r.last_seen == BASE + HOUR
+
+
+def test_top_k_reflects_decay_and_entity_type():
+    ledger = RiskLedger(half_life_seconds=HOUR)
+    ledger.add(sig("pde-spl-0401", "host", "old", 100), BASE)
+    ledger.add(sig("pde-spl-0402", "src_ip", "10.0.0.1", 70), BASE + 2 * HOUR)
+    ledger.add(sig("pde-spl-0405", "host", "new", 30), BASE + 2 * HOUR)
+    for i in range(200):
+        ledger.add(sig("pde-spl-0403", "user", f"u{i}", 1), BASE + 2 * HOUR)
+
+    top = ledger.top(3, at=BASE + 2 * HOUR)
+    assert [(r.entity_id, round(r.score)) for r in top] == [("10.0.0.1", 70), ("new", 30), ("old", 25)]
+    assert [r.entity_id for r in ledger.top(2, at=BASE + 2 * HOUR, entity_type="host")] == ["new", "old"]
+
+    # Repeated queries don't consume the index
+    assert [r.entity_id for r in ledger.top(1, at=BASE + 2 * HOUR)] == ["10.0.0.1"]
+
+
+def test_prune_forgets_decayed_entities():
+    ledger = RiskLedger(half_life_seconds=HOUR)
+    ledger.add(sig("pde-spl-0401", "host", "h1", 8), BASE)
+    ledger.add(sig("pde-spl-0401", "host", "h2", 80), BASE + 4 * HOUR)
+    assert ledger.prune(BASE + 4 * HOUR, min_score=1.0) == 1
+    assert len(ledger) == 1
+    assert [r.entity_id for r in ledger.top(5, at=BASE + 4 * HOUR)] == ["h2"]
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import pickle
+
+import pytest
+
+from src.api import baseline_cache
+from src.api.baseline_cache import SharedBaselineStore
+from src.api.workers import EvaluationPool
+from src.baselines.rolling import compute_host_baseline_stats
+from src.baselines.shared import SharedStatsTable, TableEvicted, forget_table, open_table, write_table
+from src.engine.evaluator_auth import AuthBaselineStats, evaluate_pde_spl_0402
+from src.features.auth_drift import AuthBucketFeatures
+from src.features.network_fanout import FanoutBucketFeatures
+
+
+BASE = 1700000000
+
+
+def test_shared_table_reads_back_every_entity(tmp_path):
+    rows = [
+        FanoutBucketFeatures(host=h, bucket_start=BASE + i * 3600, internal_dest_count=n, internal_conn_count=n * 2)
+        for h, counts in {"ws-01": [3, 5, 4], "ws-ü2": [10, 12], "db-9": [1]}.items()
+        for i, n in enumerate(counts)
+    ]
+    stats = compute_host_baseline_stats(rows)
+    path = tmp_path / "t.pdeb"
+    write_table(path, "0401", stats)
+
+    table = SharedStatsTable(path)
+    assert table.detection == "0401"
+    assert len(table) == 3
+    assert sorted(table) == sorted(stats)
+    assert dict(table.items()) == stats
+    assert table.get("missing") is None
+    assert "ws-ü2" in table and "ws" not in table
+
+
+def test_shared_table_pickles_by_path_and_matches_dict_evaluation(tmp_path):
+    stats = {f"10.0.0.{i}": AuthBaselineStats(src_ip=f"10.0.0.{i}", avg_failures=float(i), bucket_count=100) for i in range(1, 50)}
+    path = tmp_path / "auth.pdeb"
+    write_table(path, "0402", stats)
+    table = open_table(path)
+
+    blob = pickle.dumps(table)
+    assert len(blob) < 200
+    assert pickle.loads(blob) is table
+
+    obs = [
+        AuthBucketFeatures(src_ip=f"10.0.0.{i % 60}", bucket_start=BASE + b * 900, auth_failures_per_src=30 + 5 * b, unique_users_targeted=12)
+        for i in range(60)
+        for b in range(3)
+    ]
+    expected = evaluate_pde_spl_0402(obs, stats, sustained_buckets=1)
+    assert expected
+    assert evaluate_pde_spl_0402(obs, table, sustained_buckets=1) == expected
+
+
+def test_empty_shared_table(tmp_path):
+    path = tmp_path / "empty.pdeb"
+    write_table(path, "0403", {})
+    table = SharedStatsTable(path)
+    assert len(table) == 0
+    assert list(table) == []
+    assert table.get("h") is None
+
+
+AUTH = {f"10.0.0.{i}": AuthBaselineStats(src_ip=f"10.0.0.{i}", avg_failures=float(i), bucket_count=100) for i in range(1, 9)}
+
+
+def _id(n):
+    return f"{n:064x}"
+
+
+def _age(store, baseline_id, seconds):
+    path = store._path(baseline_id)
+    t = path.stat().st_mtime - seconds
+    os.utime(path, (t, t))
+
+
+def _count_entities(table):
+    return len(table)
+
+
+def test_store_evicts_least_recently_used_tables(tmp_path):
+    store = SharedBaselineStore(tmp_path, max_entries=2)
+    for n in range(2):
+        store.put(_id(n), "0402", AUTH)
+        _age(store, _id(n), 100 - n)
+    assert store.get(_id(0)) is not None
+    store.put(_id(2), "0402", AUTH)
+    assert _id(1) not in store
+    assert store.get(_id(1)) is None
+    assert store.get(_id(0)).stats.get("10.0.0.3") == AUTH["10.0.0.3"]
+    stats = store.stats()
+    assert (stats["entries"], stats["evictions"], stats["hits"], stats["misses"]) == (2, 1, 2, 1)
+    assert store.get("../../etc/passwd") is None
+
+
+def test_store_aliases_pin_tables_and_count_generations(tmp_path):
+    store = SharedBaselineStore(tmp_path, max_entries=1)
+    first = store.put(_id(0), "0402", AUTH)
+    assert store.set_alias("corp-0402", first).generation == 1
+    _age(store, _id(0), 100)
+
+    # The aliased table survives eviction, even over the cap
+    second = store.put(_id(1), "0402", AUTH)
+    assert _id(0) in store and _id(1) in store
+    assert store.lookup("corp-0402").baseline_id == _id(0)
+
+    # Another worker's store sees the same alias and bumps its generation
+    other = SharedBaselineStore(tmp_path, max_entries=1)
+    moved = other.set_alias("corp-0402", second)
+    assert (moved.baseline_id, moved.generation) == (_id(1), 2)
+    assert store.alias("corp-0402") == moved
+    assert store.lookup("corp-0402").baseline_id == _id(1)
+
+    # Once unpinned, the old generation is evictable
+    _age(store, _id(0), 200)
+    store.put(_id(2), "0402", AUTH)
+    assert _id(0) not in store and _id(1) in store
+    assert store.alias("no-such") is None and store.alias("../x") is None
+    with pytest.raises(ValueError):
+        store.set_alias(_id(5), second)
+
+
+def test_store_get_misses_if_table_is_evicted_mid_lookup(tmp_path, monkeypatch):
+    store = SharedBaselineStore(tmp_path)
+    store.put(_id(0), "0402", AUTH)
+    forget_table(store._path(_id(0)))
+    real_open = baseline_cache.open_table
+
+    def evicted_first(path):
+        os.unlink(path)
+        return real_open(path)
+
+    monkeypatch.setattr(baseline_cache, "open_table", evicted_first)
+    assert store.get(_id(0)) is None
+    assert store.stats()["misses"] == 1
+
+
+def test_evicted_table_unpickles_as_placeholder(tmp_path):
+    path = tmp_path / "auth.pdeb"
+    write_table(path, "0402", AUTH)
+    live = open_table(path)
+    blob = pickle.dumps(live)
+    forget_table(path)
+    path.unlink()
+    # This process still has its mapping; a process that never mapped the file gets the placeholder
+    assert len(live) == len(AUTH)
+    table = pickle.loads(blob)
+    with pytest.raises(TableEvicted):
+        table.get("10.0.0.1")
+    with pytest.raises(TableEvicted):
+        len(table)
+
+    # In a worker process it fails the call, not the pool
+    pool = EvaluationPool(workers=1, max_pending=2, timeout_seconds=60)
+
+    async def scenario():
+        with pytest.raises(TableEvicted):
+            await pool.run(_count_entities, live)
+        assert await pool.run(_count_entities, {"a": 1}) == 1
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        pool.shutdown()
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import random
+from collections import Counter
+
+from src.api.responses import signal_dict
+from src.engine.evaluator_auth import AuthBaselineStats, evaluate_pde_spl_0402
+from src.engine.explain import explain
+from src.engine.incremental import IncrementalPipeline
+from src.features.auth_drift import extract_auth_failure_bucket_features
+from src.features.network_fanout import extract_fanout_bucket_features
+from src.features.sketches import SpaceSaving
+
+
+BASE = 1700000000
+
+
+def test_space_saving_keeps_heavy_hitters_in_fixed_memory():
+    rng = random.Random(7)
+    stream = ["hot1"] * 500 + ["hot2"] * 300 + [f"noise{rng.randrange(5000)}" for _ in range(2000)]
+    rng.shuffle(stream)
+    truth = Counter(stream)
+
+    sketch = SpaceSaving(capacity=20)
+    for x in stream:
+        sketch.add(x)
+
+    assert len(sketch) == 20
+    assert sketch.total == len(stream)
+    assert [i for i, _ in sketch.top(2)] == ["hot1", "hot2"]
+    for item, est in sketch.top():
+        # Estimates never under-count and over-count by at most the recorded error
+        assert truth[item] <= est <= truth[item] + sketch.error(item)
+
+
+def test_extractor_fills_sketch_per_entity_bucket():
+    # 3 heavy destinations x 15 connections, then 15 one-off destinations
+    events = [{"_time": BASE + i, "host": "h1", "dest_ip": f"10.0.0.{i % 3 if i < 45 else i}"} for i in range(60)]
+    events.append({"_time": BASE + 3600, "host": "h1", "dest_ip": "10.0.0.99"})
+    sketches = {}
+    rows = extract_fanout_bucket_features(events, top_evidence=sketches, top_k_capacity=8)
+
+    assert set(sketches) == {(r.host, r.bucket_start) for r in rows}
+    first = sketches[(rows[0].host, rows[0].bucket_start)]
+    assert len(first) == 8
+    # Anything above total / capacity (60 / 8) is guaranteed to be tracked
+    assert {"10.0.0.0", "10.0.0.1", "10.0.0.2"} <= {i for i, _ in first.top()}
+
+
+def test_top_evidence_reaches_signal_and_explanation():
+    b = BASE - BASE % 900
+    events = [
+        {"_time": b + i, "src_ip": "10.9.9.9", "user": "admin" if i % 2 else f"u{i}", "outcome": "failure"}
+        for i in range(40)
+    ]
+    sketches = {}
+    rows = extract_auth_failure_bucket_features(events, top_evidence=sketches)
+    signals = evaluate_pde_spl_0402(
+        rows,
+        {"10.9.9.9": AuthBaselineStats(src_ip="10.9.9.9", avg_failures=2.0, bucket_count=100)},
+        sustained_buckets=1,
+        growth_hits_map={("10.9.9.9", b): 1},
+        top_evidence=sketches,
+        top_n=2,
+    )
+    assert len(signals) == 1
+    assert signals[0].top_evidence[0] == ("admin", 20)
+    assert len(signals[0].top_evidence) == 2
+    assert explain(signals[0])["evidence"][-1].startswith("Most targeted accounts: admin (20), ")
+
+    # Without sketches nothing is attached
+    plain = evaluate_pde_spl_0402(rows, {"10.9.9.9": AuthBaselineStats("10.9.9.9", 2.0, 100)},
+                                  sustained_buckets=1, growth_hits_map={("10.9.9.9", b): 1})[0]
+    assert plain.top_evidence is None
+    assert "top_evidence" not in signal_dict(plain)
+    assert signal_dict(signals[0])["top_evidence"] == signals[0].top_evidence
+
+
+def test_evaluate_responses_leave_out_unset_top_evidence(api, eval_payload):
+    for key in ("0401", "0402", "0403", "0404", "0405"):
+        body = api.post(f"/evaluate/{key}", json_body=eval_payload(key)).json()
+        assert body["count"] > 0, key
+        assert all("top_evidence" not in s for s in body["signals"]), key
+
+
+def test_pipeline_top_k():
+    pipeline = IncrementalPipeline(
+        ["pde-spl-0405"],
+        params={"pde-spl-0405": {"sustained_buckets": 1, "min_baseline_buckets": 1, "min_unique_tools": 1}},
+        top_k=1,
+    )
+    events = [{"_time": BASE + 10, "host": "h1", "process_name": "wmic.exe"}]
+    for h in range(1, 3):
+        t = BASE + h * 3600
+        events += [{"_time": t + i, "host": "h1", "process_name": "psexec.exe"} for i in range(10)]
+        events += [{"_time": t + 20, "host": "h1", "process_name": "wmic.exe"}]
+    signals = [s for r in pipeline.feed_many(events) + pipeline.flush() for s in r.signals]
+    assert signals
+    assert all(s.top_evidence == [("psexec", 10)] for s in signals)
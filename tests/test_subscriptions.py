@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from src.api.subscriptions import SignalFilter, SignalHub, Subscriber, _sse, subscription_params
+
+
+def _signal(i, detection="pde-spl-0402", entity="10.0.0.1", risk=50):
+    return {"detection_id": detection, "entity_id": entity, "risk_score": risk, "i": i}
+
+
+def _drain(sub):
+    async def collect():
+        out = []
+        async for event in sub.events():
+            out.append(event)
+        return out
+
+    sub.close("test over")
+    return asyncio.run(collect())
+
+
+def _received(events):
+    return [e["signal"]["i"] if e["type"] == "signal" else e for e in events]
+
+
+def test_filter_matching():
+    f = subscription_params(detection=["0402", "PDE-SPL-0405"], entity=None, min_risk=40, buffer=8, policy="drop_oldest")
+    assert f.signal_filter.detections == {"pde-spl-0402", "pde-spl-0405"}
+    sf = f.signal_filter
+    assert sf.matches(_signal(0))
+    assert sf.matches(_signal(0, detection="PDE-SPL-0405", risk=40))
+    assert not sf.matches(_signal(0, detection="pde-spl-0401"))
+    assert not sf.matches(_signal(0, risk=39))
+    assert not sf.matches({"detection_id": "pde-spl-0402"})
+
+    by_entity = SignalFilter(entities=frozenset({"h1"}))
+    assert by_entity.matches(_signal(0, entity="h1", risk=0))
+    assert not by_entity.matches(_signal(0, entity="h2"))
+    assert SignalFilter().matches({})
+
+    with pytest.raises(HTTPException) as exc:
+        subscription_params(detection=None, entity=None, min_risk=0, buffer=8, policy="block")
+    assert exc.value.status_code == 400
+
+
+def test_drop_oldest_keeps_newest_and_reports_drops():
+    sub = Subscriber(SignalFilter(), buffer=3, policy="drop_oldest")
+    for i in range(5):
+        sub.offer(_signal(i))
+    assert sub.dropped == 2
+    assert _received(_drain(sub)) == [{"type": "dropped", "count": 2}, 2, 3, 4, {"type": "closed", "reason": "test over"}]
+    assert sub.delivered == 3
+
+
+def test_drop_newest_keeps_oldest():
+    sub = Subscriber(SignalFilter(), buffer=3, policy="drop_newest")
+    for i in range(5):
+        sub.offer(_signal(i))
+    assert sub.dropped == 2
+    assert _received(_drain(sub))[:4] == [{"type": "dropped", "count": 2}, 0, 1, 2]
+
+
+def test_disconnect_closes_slow_consumer():
+    sub = Subscriber(SignalFilter(), buffer=2, policy="disconnect")
+    for i in range(4):
+        sub.offer(_signal(i))
+    assert sub.closed and sub.dropped == 0
+    assert _received(_drain(sub)) == [0, 1, {"type": "closed", "reason": "slow consumer: buffer full"}]
+
+
+def test_filtered_signals_do_not_count_as_drops():
+    sub = Subscriber(SignalFilter(min_risk=60), buffer=1)
+    for i in range(5):
+        sub.offer(_signal(i))
+    sub.offer(_signal(9, risk=90))
+    assert (sub.dropped, len(sub.buffer)) == (0, 1)
+    with pytest.raises(ValueError):
+        Subscriber(SignalFilter(), policy="block")
+
+
+def test_hub_cap_publish_and_stats():
+    hub = SignalHub(max_subscribers=2)
+    fast = hub.subscribe(SignalFilter(), buffer=10, policy="drop_oldest")
+    slow = hub.subscribe(SignalFilter(detections=frozenset({"pde-spl-0402"})), buffer=1, policy="disconnect")
+    with pytest.raises(HTTPException) as exc:
+        hub.subscribe(SignalFilter(), buffer=1, policy="drop_oldest")
+    assert exc.value.status_code == 503
+
+    hub.publish(_signal(i) for i in range(3))
+    assert slow.closed
+    assert hub.subscribers == {fast}
+    assert hub.stats() == {"subscribers": 1, "max_subscribers": 2, "published": 3, "buffered": 3, "dropped": 0}
+
+    # A closed subscriber's slot is free again
+    hub.subscribe(SignalFilter(), buffer=1, policy="drop_newest")
+    hub.unsubscribe(fast)
+    assert fast.closed_reason == "unsubscribed"
+    assert len(hub.subscribers) == 1
+
+
+def test_sse_framing():
+    assert _sse({"type": "heartbeat"}) == b": heartbeat\n\n"
+    assert _sse({"type": "signal", "signal": {"i": 1}}) == b'event: signal\ndata: {"i":1}\n\n'
+    assert _sse({"type": "dropped", "count": 2}) == b'event: dropped\ndata: {"count":2}\n\n'
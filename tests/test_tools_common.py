@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import argparse
+import os
+import pickle
+
+from tools import _common
+
+
+def _scale(i, factor):
+    return i * factor, os.getpid()
+
+
+def test_map_jobs_matches_serial_run_in_order():
+    jobs = [(i,) for i in range(40)]
+    serial = _common.map_jobs(_scale, jobs, "3", workers=1, build=int)
+    assert [r for r, _ in serial] == [i * 3 for i in range(40)]
+    assert {pid for _, pid in serial} == {os.getpid()}
+
+    parallel = _common.map_jobs(_scale, jobs, "3", workers=3, min_jobs=4, build=int)
+    assert [r for r, _ in parallel] == [r for r, _ in serial]
+    assert os.getpid() not in {pid for _, pid in parallel}
+
+    # Too few jobs for a pool: run in-process, state passed as is
+    few = _common.map_jobs(_scale, jobs[:3], 2, workers=3, min_jobs=4)
+    assert few == [(0, os.getpid()), (2, os.getpid()), (4, os.getpid())]
+
+
+def test_cache_round_trip_and_invalidation(tmp_path):
+    path = tmp_path / ".cache" / "tool.pickle"
+    key = _common.cache_key(b"schema", "jsonschema-4")
+    assert _common.load_cache(path, key) == {}
+
+    _common.save_cache(path, key, {"a.yml": "sha"})
+    assert _common.load_cache(path, key) == {"a.yml": "sha"}
+    assert not path.with_suffix(".tmp").exists()
+    assert _common.load_cache(path, _common.cache_key(b"schema", "jsonschema-5")) == {}
+
+    path.write_bytes(b"not a pickle")
+    assert _common.load_cache(path, key) == {}
+    path.write_bytes(pickle.dumps(["wrong", "shape"]))
+    assert _common.load_cache(path, key) == {}
+
+
+def test_jobs_argument():
+    ap = argparse.ArgumentParser()
+    _common.add_jobs_argument(ap)
+    assert ap.parse_args(["-j", "2"]).jobs == 2
+    assert ap.parse_args([]).jobs == (os.cpu_count() or 1)
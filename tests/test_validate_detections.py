@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import shutil
+
+import pytest
+
+pytest.importorskip("jsonschema")
+
+from tools import validate_detections  # noqa: E402
+
+
+VALID = validate_detections.DETECTIONS_DIR / "splunk" / "reactive" / "pde-spl-0001-powershell-encodedcommand.yml"
+
+
+def _tree(tmp_path, monkeypatch):
+    detections = tmp_path / "detections"
+    detections.mkdir()
+    for i in range(3):
+        shutil.copy(VALID, detections / f"ok_{i}.yml")
+    (detections / "bad.yml").write_text("id: x\nname: [unclosed\n", encoding="utf-8")
+    text = VALID.read_text(encoding="utf-8")
+    (detections / "schema.yml").write_text(text.replace("severity: ", "severity: nope-", 1), encoding="utf-8")
+    monkeypatch.setattr(validate_detections, "REPO_ROOT", tmp_path)
+    monkeypatch.setattr(validate_detections, "DETECTIONS_DIR", detections)
+    monkeypatch.setattr(validate_detections, "CACHE_PATH", tmp_path / ".cache" / "validate.json")
+    return detections
+
+
+def _cached():
+    return validate_detections.load_cache(
+        validate_detections.CACHE_PATH, validate_detections.schema_cache_key(validate_detections.SCHEMA_PATH)
+    )
+
+
+def test_cached_run_prints_the_same_report(tmp_path, monkeypatch, capsys):
+    detections = _tree(tmp_path, monkeypatch)
+    assert validate_detections.main(["-j", "1"]) == 1
+    first = capsys.readouterr().out
+    assert f'in "{detections / "bad.yml"}", line 2' in first
+    assert "❌ Schema errors in:" in first and "✅ detections/ok_2.yml" in first
+    assert first.endswith("Validation failed with 2 issue(s).\n")
+    # Only files that passed are cached
+    assert sorted(_cached()) == ["detections/ok_0.yml", "detections/ok_1.yml", "detections/ok_2.yml"]
+
+    calls = []
+    check_file = validate_detections.check_file
+    monkeypatch.setattr(validate_detections, "check_file", lambda *a: calls.append(a[0].name) or check_file(*a))
+    assert validate_detections.main(["-j", "1"]) == 1
+    assert capsys.readouterr().out == first
+    assert sorted(calls) == ["bad.yml", "schema.yml"]
+
+    (detections / "ok_1.yml").write_text("- not a mapping\n", encoding="utf-8")
+    calls.clear()
+    assert validate_detections.main(["-j", "1"]) == 1
+    assert "❌ Invalid YAML root (expected mapping/object)" in capsys.readouterr().out
+    assert sorted(calls) == ["bad.yml", "ok_1.yml", "schema.yml"]
+    assert "detections/ok_1.yml" not in _cached()
+
+
+def test_schema_change_invalidates_cache(tmp_path, monkeypatch, capsys):
+    _tree(tmp_path, monkeypatch)
+    validate_detections.main(["-j", "1"])
+    schema = tmp_path / "schema.json"
+    schema.write_text(validate_detections.SCHEMA_PATH.read_text(encoding="utf-8") + "\n", encoding="utf-8")
+    monkeypatch.setattr(validate_detections, "SCHEMA_PATH", schema)
+    assert _cached() == {}
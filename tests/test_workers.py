@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from src.api.workers import EvaluationPool
+
+
+def _pool(**kwargs):
+    return EvaluationPool(**dict({"workers": 0, "max_pending": 2, "timeout_seconds": 5}, **kwargs))
+
+
+def _crash():
+    os._exit(1)
+
+
+def test_admission_and_bookkeeping():
+    pool = _pool()
+    gate = threading.Event()
+
+    async def scenario():
+        first = asyncio.ensure_future(pool.run(gate.wait, 5))
+        second = asyncio.ensure_future(pool.run(gate.wait, 5))
+        await asyncio.sleep(0.05)
+        assert pool.pending == 2
+        with pytest.raises(HTTPException) as exc:
+            await pool.run(sum, [1, 2])
+        assert exc.value.status_code == 429
+        assert exc.value.headers == {"Retry-After": "1"}
+        gate.set()
+        assert await asyncio.gather(first, second) == [True, True]
+        assert await pool.run(sum, [1, 2]) == 3
+        with pytest.raises(ZeroDivisionError):
+            await pool.run(divmod, 1, 0)
+
+    asyncio.run(scenario())
+    stats = pool.stats()
+    assert (stats["pending"], stats["completed"], stats["failed"], stats["rejected"]) == (0, 3, 1, 1)
+
+
+def test_run_many_is_admitted_whole_or_rejected_whole():
+    pool = _pool(max_pending=3)
+
+    async def scenario():
+        assert await pool.run_many([(sum, ([1, 2],)), (max, (4, 5)), (min, (4, 5))]) == [3, 5, 4]
+        assert await pool.run_many([]) == []
+        gate = threading.Event()
+        held = asyncio.ensure_future(pool.run(gate.wait, 5))
+        await asyncio.sleep(0.05)
+        with pytest.raises(HTTPException) as exc:
+            await pool.run_many([(sum, ([1],)), (sum, ([2],)), (sum, ([3],))])
+        assert exc.value.status_code == 429
+        assert pool.pending == 1
+        assert await pool.run_many([(sum, ([1],)), (sum, ([2],))]) == [1, 2]
+        gate.set()
+        await held
+
+    asyncio.run(scenario())
+    assert pool.stats()["pending"] == 0
+    assert pool.stats()["completed"] == 6
+
+
+def test_timed_out_thread_keeps_its_slot_until_it_finishes():
+    pool = _pool(max_pending=1, timeout_seconds=0.05)
+    gate = threading.Event()
+
+    async def scenario():
+        with pytest.raises(HTTPException) as exc:
+            await pool.run(gate.wait, 5)
+        assert exc.value.status_code == 504
+        # The thread is still running, so the slot is still taken
+        assert pool.pending == 1
+        with pytest.raises(HTTPException) as exc:
+            await pool.run(sum, [1])
+        assert exc.value.status_code == 429
+        gate.set()
+        for _ in range(100):
+            if pool.pending == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert await pool.run(sum, [1]) == 1
+
+    asyncio.run(scenario())
+    stats = pool.stats()
+    assert (stats["pending"], stats["timed_out"], stats["completed"], stats["rejected"]) == (0, 1, 2, 1)
+
+
+def test_broken_process_pool_is_503_and_replaced():
+    pool = _pool(workers=1, max_pending=4, timeout_seconds=60)
+
+    async def scenario():
+        with pytest.raises(HTTPException) as exc:
+            await pool.run(_crash)
+        assert exc.value.status_code == 503
+        assert pool._executor is None
+        assert await pool.run(sum, [1, 2]) == 3
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        pool.shutdown()
+    stats = pool.stats()
+    assert (stats["pending"], stats["failed"], stats["completed"]) == (0, 1, 1)
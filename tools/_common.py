@@ -0,0 +1,91 @@
+"""
+Job cache and process pool shared by the tools/ scripts.
+
+A cache is one pickle file holding a key and the tool's data. The key
+hashes CACHE_VERSION and whatever the tool's results depend on (schema,
+classifier rules, code), so changing any of them drops the cache. Writes
+go to a temporary file and are renamed into place.
+
+map_jobs runs a function over jobs in worker processes, or in-process
+when there are too few jobs for a pool to pay off.
+"""
+import os
+import pickle
+import hashlib
+from functools import partial
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+CACHE_VERSION = 1
+# Below this many jobs, starting a process pool costs more than it saves
+POOL_MIN_JOBS = 16
+# pool.map chunks per worker: large enough to amortise pickling, small
+# enough that one slow chunk does not leave the other workers idle
+CHUNKS_PER_WORKER = 4
+
+# ------------------------
+# Job cache
+# ------------------------
+
+def cache_key(*parts) -> str:
+    """
+    sha256 over CACHE_VERSION and parts (bytes, or anything str() turns
+    into the text to hash).
+    """
+    h = hashlib.sha256(f"v{CACHE_VERSION}".encode())
+    for part in parts:
+        h.update(part if isinstance(part, bytes) else str(part).encode())
+    return h.hexdigest()
+
+def load_cache(path: Path, key: str) -> dict:
+    """
+    The data saved under key, or {} if the cache is missing, unreadable or
+    was saved under another key.
+    """
+    try:
+        with path.open("rb") as f:
+            cache = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ValueError):
+        return {}
+    if not isinstance(cache, dict) or cache.get("key") != key:
+        return {}
+    return cache.get("data") or {}
+
+def save_cache(path: Path, key: str, data: dict):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with tmp.open("wb") as f:
+        pickle.dump({"key": key, "data": data}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+# ------------------------
+# Parallel jobs
+# ------------------------
+
+_worker_state = None
+
+def _init_worker(state, build):
+    global _worker_state
+    _worker_state = build(state) if build is not None else state
+
+def _run_job(func, job):
+    return func(*job, _worker_state)
+
+def map_jobs(func, jobs: list, state, workers: int, min_jobs: int = POOL_MIN_JOBS, build=None) -> list:
+    """
+    [func(*job, state) for job in jobs], in order, across up to workers
+    processes. state is sent to each worker once; with build, each
+    worker (or the serial run) uses build(state) instead, for state that
+    is cheaper to rebuild than to pickle. func and build must be
+    module-level functions.
+    """
+    if workers <= 1 or len(jobs) < min_jobs:
+        state = build(state) if build is not None else state
+        return [func(*job, state) for job in jobs]
+    workers = min(workers, len(jobs) // (min_jobs // 2 or 1) or 1)
+    chunksize = max(1, len(jobs) // (workers * CHUNKS_PER_WORKER))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(state, build)) as pool:
+        return list(pool.map(partial(_run_job, func), jobs, chunksize=chunksize))
+
+def add_jobs_argument(ap):
+    ap.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="worker processes (default: CPU count)")
@@ -1,16 +1,61 @@
 #!/usr/bin/env python3
+"""
+Build the Sigma detection inventory from the external/sigma submodule:
+inventory/detections.sigma.index.sqlite (see src/inventory/store.py) and
+the inventory/detections.sigma.index.yml export. The database is not
+committed; the YAML is, and other checkouts rebuild their database from
+it, so commit the YAML after a re-ingest.
+
+Parsed and classified rules are cached in .cache/ingest_sigma.pickle
+(see tools/_common.py), keyed by rule path, mtime, size and content hash.
+A run re-parses only rules whose content changed; the rest are reused,
+and the inventory is not rewritten when nothing changed. The cache is
+dropped when the classifier rules or this script change.
+
+Classifier keywords are matched with one pyahocorasick automaton
+(tools/requirements.txt); without the package, CompiledClassifier falls
+back to a per-keyword substring loop with the same results.
+
+  python tools/ingest_sigma.py              # incremental, parallel
+  python tools/ingest_sigma.py --jobs 1     # single process
+  python tools/ingest_sigma.py --no-cache   # re-parse every rule
+  python tools/ingest_sigma.py --no-yaml    # database only (local experiments)
+"""
 import re
 import sys
 import json
+import hashlib
+import argparse
 from pathlib import Path
 from datetime import datetime
 
 import yaml
 
+try:
+    import ahocorasick
+except ImportError:  # pragma: no cover - optional
+    ahocorasick = None
+
 REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    # Run as a script (python tools/ingest_sigma.py)
+    sys.path.insert(0, str(REPO_ROOT))
+
+from src.inventory.store import write_inventory
+from tools._common import add_jobs_argument, cache_key, load_cache, map_jobs, save_cache
+
 SIGMA_ROOT = REPO_ROOT / "external" / "sigma"
 CLASSIFIER_PATH = REPO_ROOT / "classifier" / "predictive_readiness_rules.yml"
-OUT_PATH = REPO_ROOT / "inventory" / "detections.sigma.index.yml"
+OUT_PATH = REPO_ROOT / "inventory" / "detections.sigma.index.sqlite"
+YAML_PATH = REPO_ROOT / "inventory" / "detections.sigma.index.yml"
+CACHE_PATH = REPO_ROOT / ".cache" / "ingest_sigma.pickle"
+
+# Rules parse in well under a millisecond each, so a pool needs more of them
+POOL_MIN_FILES = 64
+
+# libyaml bindings are several times faster; fall back to the pure-Python classes
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+YAML_DUMPER = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
 
 SIGMA_RULE_DIR_GLOB = "rules*"
 SIGMA_YAML_EXTS = (".yml", ".yaml")
@@ -20,7 +65,7 @@ TACTIC_RE = re.compile(r"^attack\.([a-z_]+)$", re.IGNORECASE)
 
 def load_yaml(path: Path):
     with path.open("r", encoding="utf-8") as f:
-        return yaml.safe_load(f)
+        return yaml.load(f, Loader=YAML_LOADER)
 
 def safe_list(v):
     if v is None:
@@ -41,49 +86,103 @@ def stringify_detection_block(det) -> str:
 
 def load_classifier():
     doc = load_yaml(CLASSIFIER_PATH)
-    return doc["classifier"]
-
-def apply_classifier(rule_text: str, rule_tags: list, classifier: dict):
-    score = 0
-    fired = []
-
-    tags_text = " ".join([str(t).lower() for t in safe_list(rule_tags)])
-
-    for r in classifier.get("rules", []):
-        pts = int(r.get("points", 0))
-        evidence = r.get("evidence", {}) or {}
-        keywords = [k.lower() for k in evidence.get("keywords", [])]
+    return CompiledClassifier(doc["classifier"])
+
+class CompiledClassifier:
+    """
+    predictive_readiness_rules.yml compiled once for scoring many rules.
+
+    Every keyword of every rule and guardrail goes into one multi-pattern
+    automaton whose matches map back to the owning rule and guardrail
+    indexes, so a rule text is scanned once instead of once per keyword.
+    Scores, labels and factors are the same as checking each keyword with
+    `kw in text`. If pyahocorasick (a tools/requirements.txt dependency) is
+    not installed, the keywords are checked one by one, still compiled once.
+    """
+
+    def __init__(self, classifier: dict):
+        self.rules = []
+        for r in classifier.get("rules", []):
+            evidence = r.get("evidence", {}) or {}
+            self.rules.append((
+                r.get("id", "unknown_rule"),
+                int(r.get("points", 0)),
+                tuple(k.lower() for k in evidence.get("keywords", []) if k),
+            ))
+        # Only the ioc_only_cap guardrail is scored; an empty keyword
+        # matches any text
+        self.guardrails = []
+        for g in classifier.get("guardrails", []):
+            if g.get("id") == "ioc_only_cap":
+                kw_list = tuple(k.lower() for k in (g.get("evidence", {}) or {}).get("keywords", []))
+                self.guardrails.append(("" in kw_list, tuple(k for k in kw_list if k)))
+        self.labels = [
+            (name, int(bounds.get("min_score", 0)), int(bounds.get("max_score", 999999)))
+            for name, bounds in classifier.get("labels", {}).items()
+        ]
+
+        # Targets 0..n-1 are rules, n.. are guardrails
+        targets = {}
+        for i, (_, _, keywords) in enumerate(self.rules):
+            for kw in keywords:
+                targets.setdefault(kw, set()).add(i)
+        for j, (_, keywords) in enumerate(self.guardrails):
+            for kw in keywords:
+                targets.setdefault(kw, set()).add(len(self.rules) + j)
+        self.keyword_groups = [kws for _, _, kws in self.rules] + [kws for _, kws in self.guardrails]
+        self.automaton = None
+        if ahocorasick is not None and targets:
+            self.automaton = ahocorasick.Automaton()
+            for kw, ids in targets.items():
+                self.automaton.add_word(kw, frozenset(ids))
+            self.automaton.make_automaton()
+
+    def matches(self, *texts: str) -> set:
+        """
+        Indexes of the rules and guardrails with a keyword in any of texts.
+        """
+        hits = set()
+        if self.automaton is not None:
+            for text in texts:
+                for _, ids in self.automaton.iter(text):
+                    hits |= ids
+            return hits
+        for i, keywords in enumerate(self.keyword_groups):
+            for kw in keywords:
+                if any(kw in text for text in texts):
+                    hits.add(i)
+                    break
+        return hits
+
+    def classify(self, rule_text: str, rule_tags: list):
+        tags_text = " ".join([str(t).lower() for t in safe_list(rule_tags)])
+        hits = self.matches(rule_text, tags_text)
+
+        score = 0
+        fired = []
+        for i, (rule_id, pts, _) in enumerate(self.rules):
+            if i in hits:
+                score += pts
+                fired.append(rule_id)
+
+        # Guardrails (best-effort)
+        for j, (always, _) in enumerate(self.guardrails):
+            if (always or len(self.rules) + j in hits) and score <= 3:
+                fired.append("guardrail:ioc_only_cap")
 
-        hit = False
-        for kw in keywords:
-            if kw and (kw in rule_text or kw in tags_text):
-                hit = True
+        # Score to label
+        label = "reactive_only"
+        for name, min_s, max_s in self.labels:
+            if min_s <= score <= max_s:
+                label = name
                 break
 
-        if hit:
-            score += pts
-            fired.append(r.get("id", "unknown_rule"))
-
-    # Guardrails (best-effort)
-    guardrails = classifier.get("guardrails", [])
-    for g in guardrails:
-        if g.get("id") == "ioc_only_cap":
-            kw_list = [k.lower() for k in (g.get("evidence", {}) or {}).get("keywords", [])]
-            ioc_hit = any(kw in rule_text or kw in tags_text for kw in kw_list)
-            if ioc_hit and score <= 3:
-                fired.append("guardrail:ioc_only_cap")
-
-    # Score to label
-    labels = classifier.get("labels", {})
-    label = "reactive_only"
-    for name, bounds in labels.items():
-        min_s = int(bounds.get("min_score", 0))
-        max_s = int(bounds.get("max_score", 999999))
-        if min_s <= score <= max_s:
-            label = name
-            break
+        return score, label, fired
 
-    return score, label, fired
+def apply_classifier(rule_text: str, rule_tags: list, classifier):
+    if not isinstance(classifier, CompiledClassifier):
+        classifier = CompiledClassifier(classifier)
+    return classifier.classify(rule_text, rule_tags)
 
 def extract_mitre_from_sigma_tags(tags):
     tactics = []
@@ -121,7 +220,7 @@ def discover_sigma_rule_files():
                     rule_files.append(fp)
     return sorted(rule_files)
 
-def build_inventory_record(fp: Path, doc: dict, classifier: dict):
+def build_inventory_record(fp: Path, doc: dict, classifier: CompiledClassifier):
     rid = doc.get("id", "") or ""
     title = doc.get("title", "") or ""
     desc = doc.get("description", "") or ""
@@ -184,57 +283,147 @@ def build_inventory_record(fp: Path, doc: dict, classifier: dict):
         "notes": ""
     }
 
-def main():
+def parse_rule(fp: Path, data: bytes, classifier: CompiledClassifier):
+    """
+    Inventory record for one rule file, or None if it is not a Sigma rule.
+    """
+    try:
+        doc = yaml.load(data.decode("utf-8"), Loader=YAML_LOADER)
+    except Exception:
+        return None
+    if not isinstance(doc, dict):
+        return None
+    if not doc.get("title") and not doc.get("detection"):
+        return None
+    return build_inventory_record(fp, doc, classifier)
+
+# ------------------------
+# Rule cache
+# ------------------------
+
+def rule_cache_key(classifier_path: Path) -> str:
+    # Records depend on the classifier rules and on the code in this file
+    return cache_key(classifier_path.read_bytes(), Path(__file__).read_bytes())
+
+def output_stamp(path: Path):
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+def ingest(files: list, cache: dict, classifier_loader, workers: int):
+    """
+    Records for files, in order, reusing cached entries. Returns
+    (records, skipped, parsed, changed, touched): changed means the
+    inventory differs from the cached run, touched that only cached
+    mtimes need refreshing.
+    """
+    old = cache["rules"]
+    rules = {}
+    entries = []
+    jobs = []
+    changed = touched = False
+
+    for fp in files:
+        rel = fp.relative_to(REPO_ROOT).as_posix()
+        st = fp.stat()
+        entry = old.get(rel)
+        if entry is not None and entry["mtime_ns"] == st.st_mtime_ns and entry["size"] == st.st_size:
+            rules[rel] = entry
+            entries.append(entry)
+            continue
+        data = fp.read_bytes()
+        sha = hashlib.sha256(data).hexdigest()
+        if entry is not None and entry["sha256"] == sha:
+            # Touched (checkout, rebase) but not edited
+            entry = dict(entry, mtime_ns=st.st_mtime_ns, size=st.st_size)
+            touched = True
+        else:
+            entry = {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "sha256": sha, "record": None}
+            jobs.append((fp, data, entry))
+            changed = True
+        rules[rel] = entry
+        entries.append(entry)
+
+    if jobs:
+        parsed = map_jobs(
+            parse_rule, [(fp, data) for fp, data, _ in jobs], classifier_loader(), workers, min_jobs=POOL_MIN_FILES
+        )
+        for (_, _, entry), record in zip(jobs, parsed):
+            entry["record"] = record
+
+    if len(rules) != len(old) or any(rel not in rules for rel in old):
+        changed = True
+    cache["rules"] = rules
+
+    records = [e["record"] for e in entries if e["record"] is not None]
+    return records, len(entries) - len(records), len(jobs), changed, touched
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Index Sigma rules with predictive readiness scores.")
+    add_jobs_argument(ap)
+    ap.add_argument("--no-cache", action="store_true", help="ignore the rule cache and re-parse every rule")
+    ap.add_argument("--force", action="store_true", help="rewrite the inventory even if nothing changed")
+    ap.add_argument(
+        "--no-yaml",
+        dest="yaml",
+        action="store_false",
+        help=f"skip the YAML export ({YAML_PATH.relative_to(REPO_ROOT)}), which other checkouts build their database from",
+    )
+    return ap.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
     if not CLASSIFIER_PATH.exists():
         print(f"ERROR: Classifier rules not found: {CLASSIFIER_PATH}")
         return 2
 
-    classifier = load_classifier()
     files = discover_sigma_rule_files()
     if not files:
         print("No Sigma rule files discovered.")
         return 2
 
-    records = []
-    skipped = 0
-
-    for fp in files:
-        try:
-            doc = load_yaml(fp)
-            if not isinstance(doc, dict):
-                skipped += 1
-                continue
-        except Exception:
-            skipped += 1
-            continue
+    key = rule_cache_key(CLASSIFIER_PATH)
+    cache = {"rules": {}, "outputs": {}}
+    if not args.no_cache:
+        cache.update(load_cache(CACHE_PATH, key))
+    records, skipped, parsed, changed, touched = ingest(files, cache, load_classifier, args.jobs)
 
-        if not doc.get("title") and not doc.get("detection"):
-            skipped += 1
-            continue
-
-        records.append(build_inventory_record(fp, doc, classifier))
-
-    out = {
-        "source_id": "sigmahq_sigma",
-        "generated_at": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
-        "counts": {
-            "total_rules_discovered": len(files),
-            "records_written": len(records),
-            "skipped": skipped
-        },
-        "records": records
-    }
-
-    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with OUT_PATH.open("w", encoding="utf-8") as f:
-        yaml.safe_dump(out, f, sort_keys=False, allow_unicode=True)
+    outputs = [YAML_PATH, OUT_PATH] if args.yaml else [OUT_PATH]
+    stamps = [output_stamp(p) for p in outputs]
+    up_to_date = not (changed or args.force) and all(
+        stamp is not None and cache["outputs"].get(str(p)) == stamp for p, stamp in zip(outputs, stamps)
+    )
+    if not up_to_date:
+        meta = {
+            "source_id": "sigmahq_sigma",
+            "generated_at": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "counts": {
+                "total_rules_discovered": len(files),
+                "records_written": len(records),
+                "skipped": skipped
+            }
+        }
+
+        # The database goes last, so it is never older than the YAML export
+        if args.yaml:
+            YAML_PATH.parent.mkdir(parents=True, exist_ok=True)
+            with YAML_PATH.open("w", encoding="utf-8") as f:
+                yaml.dump(dict(meta, records=records), f, Dumper=YAML_DUMPER, sort_keys=False, allow_unicode=True)
+        write_inventory(OUT_PATH, records, meta)
+        cache["outputs"] = {str(p): output_stamp(p) for p in outputs}
+    if not up_to_date or touched:
+        save_cache(CACHE_PATH, key, cache)
 
     label_counts = {}
     for r in records:
         label_counts[r["predictive_readiness"]] = label_counts.get(r["predictive_readiness"], 0) + 1
 
-    print(f"Wrote: {OUT_PATH}")
+    for p in outputs:
+        print(f"{'Up to date' if up_to_date else 'Wrote'}: {p}")
     print(f"Rules discovered: {len(files)} | Records: {len(records)} | Skipped: {skipped}")
+    print(f"Rules parsed: {parsed} | Reused from cache: {len(files) - parsed}")
     print("Predictive readiness distribution:")
     for k in sorted(label_counts.keys()):
         print(f"  - {k}: {label_counts[k]}")
@@ -1,14 +1,42 @@
 #!/usr/bin/env python3
+"""
+Validate every detection YAML under detections/ against
+schemas/detection.schema.json.
+
+Files are validated across worker processes. The sha256 of each file
+that passed is cached in .cache/validate_detections.pickle, keyed to the
+schema (its content and the jsonschema version), and unchanged files are
+not parsed or validated again. Only passing files are cached, so failures
+are always re-checked and reported in full. Output is the same either way.
+
+  python tools/validate_detections.py              # cached, parallel
+  python tools/validate_detections.py --jobs 1     # single process
+  python tools/validate_detections.py --no-cache   # validate every file
+"""
 import json
 import sys
+import hashlib
+import argparse
+from importlib.metadata import version
 from pathlib import Path
 
 import yaml
 from jsonschema import Draft202012Validator
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    # Run as a script (python tools/validate_detections.py)
+    sys.path.insert(0, str(REPO_ROOT))
+
+from tools._common import add_jobs_argument, cache_key, load_cache, map_jobs, save_cache
+
 SCHEMA_PATH = REPO_ROOT / "schemas" / "detection.schema.json"
 DETECTIONS_DIR = REPO_ROOT / "detections"
+CACHE_PATH = REPO_ROOT / ".cache" / "validate_detections.pickle"
+
+# libyaml is several times faster; files it rejects are parsed again with
+# load_yaml, so error messages stay the same
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
 
 def load_schema():
     with SCHEMA_PATH.open("r", encoding="utf-8") as f:
@@ -23,46 +51,92 @@ def load_yaml(path: Path):
     with path.open("r", encoding="utf-8") as f:
         return yaml.safe_load(f)
 
-def main():
+def parse_yaml(fp: Path, data: bytes):
+    try:
+        return yaml.load(data.decode("utf-8"), Loader=YAML_LOADER)
+    except Exception:
+        # Re-read the file for the usual error message (it names the file)
+        return load_yaml(fp)
+
+def check_file(fp: Path, data: bytes, validator):
+    """
+    (issue count, report lines) for one detection file.
+    """
+    try:
+        doc = parse_yaml(fp, data)
+    except Exception as e:
+        return 1, [f"\n❌ YAML parse error: {fp}\n  {e}"]
+
+    # Basic sanity
+    if not isinstance(doc, dict):
+        return 1, [f"\n❌ Invalid YAML root (expected mapping/object): {fp}"]
+
+    # Schema validation
+    schema_errors = sorted(validator.iter_errors(doc), key=lambda e: e.path)
+    if not schema_errors:
+        return 0, [f"✅ {fp.relative_to(REPO_ROOT)}"]
+
+    lines = [f"\n❌ Schema errors in: {fp}"]
+    for e in schema_errors[:50]:
+        loc = ".".join([str(p) for p in e.path]) if e.path else "<root>"
+        lines.append(f"  - {loc}: {e.message}")
+    if len(schema_errors) > 50:
+        lines.append(f"  ... {len(schema_errors)-50} more errors")
+    return len(schema_errors), lines
+
+def schema_cache_key(schema_path: Path) -> str:
+    return cache_key(f"jsonschema-{version('jsonschema')}", schema_path.read_bytes())
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Validate detection YAML files against the detection schema.")
+    add_jobs_argument(ap)
+    ap.add_argument("--no-cache", action="store_true", help="validate every file, ignoring cached results")
+    return ap.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
     if not SCHEMA_PATH.exists():
         print(f"ERROR: Schema not found: {SCHEMA_PATH}")
         return 2
 
     schema = load_schema()
-    validator = Draft202012Validator(schema)
 
     files = find_detection_files()
     if not files:
         print("No detection YAML files found under detections/.")
         return 0
 
-    errors_found = 0
+    key = schema_cache_key(SCHEMA_PATH)
+    cached = {} if args.no_cache else load_cache(CACHE_PATH, key)
+    valid = {}
+    reports = {}
+    jobs = []
     for fp in files:
-        try:
-            doc = load_yaml(fp)
-        except Exception as e:
-            errors_found += 1
-            print(f"\n❌ YAML parse error: {fp}\n  {e}")
-            continue
-
-        # Basic sanity
-        if not isinstance(doc, dict):
-            errors_found += 1
-            print(f"\n❌ Invalid YAML root (expected mapping/object): {fp}")
-            continue
-
-        # Schema validation
-        schema_errors = sorted(validator.iter_errors(doc), key=lambda e: e.path)
-        if schema_errors:
-            errors_found += len(schema_errors)
-            print(f"\n❌ Schema errors in: {fp}")
-            for e in schema_errors[:50]:
-                loc = ".".join([str(p) for p in e.path]) if e.path else "<root>"
-                print(f"  - {loc}: {e.message}")
-            if len(schema_errors) > 50:
-                print(f"  ... {len(schema_errors)-50} more errors")
+        rel = fp.relative_to(REPO_ROOT).as_posix()
+        data = fp.read_bytes()
+        sha = hashlib.sha256(data).hexdigest()
+        if cached.get(rel) == sha:
+            valid[rel] = sha
+            reports[fp] = (0, [f"✅ {fp.relative_to(REPO_ROOT)}"])
         else:
-            print(f"✅ {fp.relative_to(REPO_ROOT)}")
+            jobs.append((fp, data, rel, sha))
+
+    # Validators are rebuilt in each worker rather than pickled
+    checked = map_jobs(check_file, [(fp, data) for fp, data, _, _ in jobs], schema, args.jobs, build=Draft202012Validator)
+    for (fp, _, rel, sha), report in zip(jobs, checked):
+        reports[fp] = report
+        if report[0] == 0:
+            valid[rel] = sha
+
+    errors_found = 0
+    for fp in files:
+        issues, lines = reports[fp]
+        errors_found += issues
+        for line in lines:
+            print(line)
+
+    if valid != cached:
+        save_cache(CACHE_PATH, key, valid)
 
     if errors_found:
         print(f"\nValidation failed with {errors_found} issue(s).")